@@ -1,23 +1,157 @@
-import requests
+import functools
+import json
+import logging
+import os
 import time
-from web3 import Web3
-from google.adk.agents import Agent
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+from hexbytes import HexBytes
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.exceptions import TransactionNotFound
 from typing import Optional
 
+from .amounts import format_ton, parse_ton, wei_to_ton
+from .balances import iter_balances, normalize_addresses, parse_address_list
+from .bulk_payout import (
+    JOURNAL_CONFIRMED,
+    JOURNAL_REVERTED,
+    JOURNAL_SEND_FAILED,
+    JOURNAL_SIGNED,
+    JOURNAL_SUBMITTED,
+    MemoryJournal,
+    PayoutJournal,
+    parse_payouts,
+    payout_fingerprint,
+)
+from .dispatch import ToolDispatcher
+from .gas_oracle import GasOracle
+from .indexer import ProtectedPayIndexer
+from .instrumentation import instrument_provider, instrument_tool, metrics
+from .lazy import LazyObject
+from .multicall import MULTICALL3_ADDRESS, batch_call
+from .nonce_manager import NonceManager, is_nonce_error
+from .portfolio import load_portfolio
+from .read_cache import ReadCache, ReadCacheMiddleware
+from .records import TransferColumns
+from .rpc_router import AsyncRoutedHTTPProvider, RoutedHTTPProvider, RpcRouter
+from .sessions import SessionStore, bind_session
+from .signer import SignerService
+from . import shared
+from .shared import (
+    add_async_session_listener,
+    balances_result,
+    get_fresh_index,
+    http_session,
+    normalize_token_symbol,
+    pending_claims_result,
+    portfolio_result,
+    price_cache,
+    transfers_page_result,
+    TransferScan,
+    username_cache,
+)
+from .simulation import TransactionSimulator, decode_revert_error, is_revert
+from .transfer_filters import TRANSFER_STATUS_CODES, build_transfer_filters
+from .transport import DEFAULT_TIMEOUT, PooledHTTPProvider
+from .tx_tracker import TransactionTracker
+
+logger = logging.getLogger(__name__)
+
 # DuckChain Mainnet configuration
 DUCKCHAIN_RPC = "https://rpc.duckchain.io"
 
+# All DuckChain RPC endpoints to use; with more than one, requests are routed between them by health and latency
+DUCKCHAIN_RPC_ENDPOINTS = [DUCKCHAIN_RPC]
+
+# Seconds between health and block height probes of the RPC endpoints (only with several endpoints)
+RPC_PROBE_INTERVAL = 5.0
+
 # ProtectedPay contract address (DuckChain mainnet)
 PROTECTEDPAY_CONTRACT_ADDRESS = "0xf8Bc82B8184BDd37bF0226aca6e2a81c337bA076"
 
-# Initialize Web3 for DuckChain
-w3 = Web3(Web3.HTTPProvider(DUCKCHAIN_RPC))
+# Multicall3 aggregator used to batch read calls (falls back to one call per read if missing)
+MULTICALL_ADDRESS = MULTICALL3_ADDRESS
+
+# Maximum number of getTransferDetails calls packed into one aggregated eth_call
+TRANSFER_DETAILS_BATCH_SIZE = 100
+
+def _build_rpc_router() -> RpcRouter:
+    router = RpcRouter(DUCKCHAIN_RPC_ENDPOINTS, http_session)
+    router.start(interval=RPC_PROBE_INTERVAL)
+    return router
+
+# Router over DUCKCHAIN_RPC_ENDPOINTS (only built and probed when there is more than one endpoint)
+rpc_router = LazyObject(_build_rpc_router)
+
+# Web3 providers used instead of DUCKCHAIN_RPC_ENDPOINTS when set before the first chain access (e.g. a local test chain)
+DUCKCHAIN_PROVIDER = None
+DUCKCHAIN_ASYNC_PROVIDER = None
+
+def _build_w3() -> Web3:
+    if DUCKCHAIN_PROVIDER is not None:
+        provider = DUCKCHAIN_PROVIDER
+    elif len(DUCKCHAIN_RPC_ENDPOINTS) > 1:
+        provider = RoutedHTTPProvider(rpc_router.resolve())
+    else:
+        provider = PooledHTTPProvider(DUCKCHAIN_RPC_ENDPOINTS[0], session=http_session)
+    network_w3 = Web3(instrument_provider(provider))
+    if CACHE_ETH_CALLS:
+        network_w3.middleware_onion.inject(ReadCacheMiddleware.build(read_cache), name="read_cache", layer=0)
+    return network_w3
+
+def _build_async_w3() -> AsyncWeb3:
+    if DUCKCHAIN_ASYNC_PROVIDER is not None:
+        provider = DUCKCHAIN_ASYNC_PROVIDER
+    elif len(DUCKCHAIN_RPC_ENDPOINTS) > 1:
+        provider = AsyncRoutedHTTPProvider(rpc_router.resolve())
+    else:
+        provider = AsyncHTTPProvider(
+            DUCKCHAIN_RPC_ENDPOINTS[0], request_kwargs={"timeout": aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)}
+        )
+    network_async_w3 = AsyncWeb3(instrument_provider(provider))
+    if CACHE_ETH_CALLS:
+        network_async_w3.middleware_onion.inject(ReadCacheMiddleware.build(read_cache), name="read_cache", layer=0)
+    return network_async_w3
+
+# Web3 for DuckChain (pooled connections, per-method timeouts, retried reads), built on first use
+w3 = LazyObject(_build_w3)
+
+# Answer repeated eth_calls from read_cache (set before the first chain access)
+CACHE_ETH_CALLS = True
+
+# Byte budget of the eth_call result cache (least recently used results are evicted first)
+READ_CACHE_MAX_BYTES = 16 * 1024 * 1024
 
-# User session state for private key
-user_private_key = None
+# Seconds between eth_blockNumber polls that drop the results pinned to the previous head block
+READ_CACHE_POLL_INTERVAL = 2.0
 
-# User session state for network preference
-user_network_preference = "mainnet"
+# Selector of getTransferDetails(bytes32)
+GET_TRANSFER_DETAILS_SELECTOR = "0x92a05087"
+
+def _is_finished_transfer(result) -> bool:
+    # status is the fifth head word of getTransferDetails; Completed and Cancelled transfers never change
+    data = HexBytes(result)
+    return len(data) >= 160 and int.from_bytes(data[128:160], "big") in (
+        TRANSFER_STATUS_CODES["completed"], TRANSFER_STATUS_CODES["cancelled"]
+    )
+
+# eth_call results shared by w3 and async_w3, pinned to the head block (finished transfers are kept across blocks)
+read_cache = ReadCache(
+    block_number=lambda: w3.eth.block_number,
+    max_bytes=READ_CACHE_MAX_BYTES,
+    poll_interval=READ_CACHE_POLL_INTERVAL
+)
+read_cache.mark_immutable(GET_TRANSFER_DETAILS_SELECTOR, _is_finished_transfer)
+
+# Async Web3 for the async read tools (the aiohttp session is attached per event loop), built on first use
+async_w3 = LazyObject(_build_async_w3)
+
+async def _attach_async_session(session: aiohttp.ClientSession) -> None:
+    """Send async_w3 requests through the event loop's shared aiohttp session."""
+    if isinstance(async_w3.provider, AsyncHTTPProvider):
+        await async_w3.provider.cache_async_session(session)
+
+add_async_session_listener(_attach_async_session)
 
 # Network configuration for balance checking (DuckChain mainnet)
 NETWORK_CONFIG = {
@@ -27,1061 +161,175 @@ NETWORK_CONFIG = {
     "currency_symbol": "TON"
 }
 
-# Contract ABI (extracted from frontend)
-CONTRACT_ABI = [
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_potId",
-				"type": "bytes32"
-			}
-		],
-		"name": "breakPot",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_senderAddress",
-				"type": "address"
-			}
-		],
-		"name": "claimTransferByAddress",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_transferId",
-				"type": "bytes32"
-			}
-		],
-		"name": "claimTransferById",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "_senderUsername",
-				"type": "string"
-			}
-		],
-		"name": "claimTransferByUsername",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_paymentId",
-				"type": "bytes32"
-			}
-		],
-		"name": "contributeToGroupPayment",
-		"outputs": [],
-		"stateMutability": "payable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_potId",
-				"type": "bytes32"
-			}
-		],
-		"name": "contributeToSavingsPot",
-		"outputs": [],
-		"stateMutability": "payable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_recipient",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "_numParticipants",
-				"type": "uint256"
-			},
-			{
-				"internalType": "string",
-				"name": "_remarks",
-				"type": "string"
-			}
-		],
-		"name": "createGroupPayment",
-		"outputs": [],
-		"stateMutability": "payable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "_name",
-				"type": "string"
-			},
-			{
-				"internalType": "uint256",
-				"name": "_targetAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "string",
-				"name": "_remarks",
-				"type": "string"
-			}
-		],
-		"name": "createSavingsPot",
-		"outputs": [
-			{
-				"internalType": "bytes32",
-				"name": "",
-				"type": "bytes32"
-			}
-		],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "paymentId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			}
-		],
-		"name": "GroupPaymentCompleted",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "paymentId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "contributor",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			}
-		],
-		"name": "GroupPaymentContributed",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "paymentId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "creator",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "totalAmount",
-				"type": "uint256"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "numParticipants",
-				"type": "uint256"
-			},
-			{
-				"indexed": False,
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"name": "GroupPaymentCreated",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "potId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "owner",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			}
-		],
-		"name": "PotBroken",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "potId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "contributor",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			}
-		],
-		"name": "PotContribution",
-		"type": "event"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_transferId",
-				"type": "bytes32"
-			}
-		],
-		"name": "refundTransfer",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "_username",
-				"type": "string"
-			}
-		],
-		"name": "registerUsername",
-		"outputs": [],
-		"stateMutability": "nonpayable",
-		"type": "function"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "potId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "owner",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "string",
-				"name": "name",
-				"type": "string"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "targetAmount",
-				"type": "uint256"
-			},
-			{
-				"indexed": False,
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"name": "SavingsPotCreated",
-		"type": "event"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_recipient",
-				"type": "address"
-			},
-			{
-				"internalType": "string",
-				"name": "_remarks",
-				"type": "string"
-			}
-		],
-		"name": "sendToAddress",
-		"outputs": [],
-		"stateMutability": "payable",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "_username",
-				"type": "string"
-			},
-			{
-				"internalType": "string",
-				"name": "_remarks",
-				"type": "string"
-			}
-		],
-		"name": "sendToUsername",
-		"outputs": [],
-		"stateMutability": "payable",
-		"type": "function"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "transferId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			}
-		],
-		"name": "TransferClaimed",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "transferId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "sender",
-				"type": "address"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			},
-			{
-				"indexed": False,
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"name": "TransferInitiated",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "bytes32",
-				"name": "transferId",
-				"type": "bytes32"
-			},
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "sender",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			}
-		],
-		"name": "TransferRefunded",
-		"type": "event"
-	},
-	{
-		"anonymous": False,
-		"inputs": [
-			{
-				"indexed": True,
-				"internalType": "address",
-				"name": "userAddress",
-				"type": "address"
-			},
-			{
-				"indexed": False,
-				"internalType": "string",
-				"name": "username",
-				"type": "string"
-			}
-		],
-		"name": "UserRegistered",
-		"type": "event"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_paymentId",
-				"type": "bytes32"
-			},
-			{
-				"internalType": "address",
-				"name": "_user",
-				"type": "address"
-			}
-		],
-		"name": "getGroupPaymentContribution",
-		"outputs": [
-			{
-				"internalType": "uint256",
-				"name": "",
-				"type": "uint256"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_paymentId",
-				"type": "bytes32"
-			}
-		],
-		"name": "getGroupPaymentDetails",
-		"outputs": [
-			{
-				"internalType": "address",
-				"name": "creator",
-				"type": "address"
-			},
-			{
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "totalAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "amountPerPerson",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "numParticipants",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "amountCollected",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "timestamp",
-				"type": "uint256"
-			},
-			{
-				"internalType": "enum ProtectedPay.GroupPaymentStatus",
-				"name": "status",
-				"type": "uint8"
-			},
-			{
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_sender",
-				"type": "address"
-			}
-		],
-		"name": "getPendingTransfers",
-		"outputs": [
-			{
-				"internalType": "bytes32[]",
-				"name": "",
-				"type": "bytes32[]"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_potId",
-				"type": "bytes32"
-			}
-		],
-		"name": "getSavingsPotDetails",
-		"outputs": [
-			{
-				"internalType": "address",
-				"name": "owner",
-				"type": "address"
-			},
-			{
-				"internalType": "string",
-				"name": "name",
-				"type": "string"
-			},
-			{
-				"internalType": "uint256",
-				"name": "targetAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "currentAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "timestamp",
-				"type": "uint256"
-			},
-			{
-				"internalType": "enum ProtectedPay.PotStatus",
-				"name": "status",
-				"type": "uint8"
-			},
-			{
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_transferId",
-				"type": "bytes32"
-			}
-		],
-		"name": "getTransferDetails",
-		"outputs": [
-			{
-				"internalType": "address",
-				"name": "sender",
-				"type": "address"
-			},
-			{
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "timestamp",
-				"type": "uint256"
-			},
-			{
-				"internalType": "enum ProtectedPay.TransferStatus",
-				"name": "status",
-				"type": "uint8"
-			},
-			{
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_userAddress",
-				"type": "address"
-			}
-		],
-		"name": "getUserByAddress",
-		"outputs": [
-			{
-				"internalType": "string",
-				"name": "",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "_username",
-				"type": "string"
-			}
-		],
-		"name": "getUserByUsername",
-		"outputs": [
-			{
-				"internalType": "address",
-				"name": "",
-				"type": "address"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_userAddress",
-				"type": "address"
-			}
-		],
-		"name": "getUserProfile",
-		"outputs": [
-			{
-				"internalType": "string",
-				"name": "username",
-				"type": "string"
-			},
-			{
-				"internalType": "bytes32[]",
-				"name": "transferIds",
-				"type": "bytes32[]"
-			},
-			{
-				"internalType": "bytes32[]",
-				"name": "groupPaymentIds",
-				"type": "bytes32[]"
-			},
-			{
-				"internalType": "bytes32[]",
-				"name": "participatedGroupPayments",
-				"type": "bytes32[]"
-			},
-			{
-				"internalType": "bytes32[]",
-				"name": "savingsPotIds",
-				"type": "bytes32[]"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "_userAddress",
-				"type": "address"
-			}
-		],
-		"name": "getUserTransfers",
-		"outputs": [
-			{
-				"components": [
-					{
-						"internalType": "address",
-						"name": "sender",
-						"type": "address"
-					},
-					{
-						"internalType": "address",
-						"name": "recipient",
-						"type": "address"
-					},
-					{
-						"internalType": "uint256",
-						"name": "amount",
-						"type": "uint256"
-					},
-					{
-						"internalType": "uint256",
-						"name": "timestamp",
-						"type": "uint256"
-					},
-					{
-						"internalType": "enum ProtectedPay.TransferStatus",
-						"name": "status",
-						"type": "uint8"
-					},
-					{
-						"internalType": "string",
-						"name": "remarks",
-						"type": "string"
-					}
-				],
-				"internalType": "struct ProtectedPay.Transfer[]",
-				"name": "",
-				"type": "tuple[]"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "",
-				"type": "bytes32"
-			}
-		],
-		"name": "groupPayments",
-		"outputs": [
-			{
-				"internalType": "bytes32",
-				"name": "paymentId",
-				"type": "bytes32"
-			},
-			{
-				"internalType": "address",
-				"name": "creator",
-				"type": "address"
-			},
-			{
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "totalAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "amountPerPerson",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "numParticipants",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "amountCollected",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "timestamp",
-				"type": "uint256"
-			},
-			{
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			},
-			{
-				"internalType": "enum ProtectedPay.GroupPaymentStatus",
-				"name": "status",
-				"type": "uint8"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "_paymentId",
-				"type": "bytes32"
-			},
-			{
-				"internalType": "address",
-				"name": "_user",
-				"type": "address"
-			}
-		],
-		"name": "hasContributedToGroupPayment",
-		"outputs": [
-			{
-				"internalType": "bool",
-				"name": "",
-				"type": "bool"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "",
-				"type": "uint256"
-			}
-		],
-		"name": "pendingTransfersBySender",
-		"outputs": [
-			{
-				"internalType": "bytes32",
-				"name": "",
-				"type": "bytes32"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "",
-				"type": "bytes32"
-			}
-		],
-		"name": "savingsPots",
-		"outputs": [
-			{
-				"internalType": "bytes32",
-				"name": "potId",
-				"type": "bytes32"
-			},
-			{
-				"internalType": "address",
-				"name": "owner",
-				"type": "address"
-			},
-			{
-				"internalType": "string",
-				"name": "name",
-				"type": "string"
-			},
-			{
-				"internalType": "uint256",
-				"name": "targetAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "currentAmount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "timestamp",
-				"type": "uint256"
-			},
-			{
-				"internalType": "enum ProtectedPay.PotStatus",
-				"name": "status",
-				"type": "uint8"
-			},
-			{
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "bytes32",
-				"name": "",
-				"type": "bytes32"
-			}
-		],
-		"name": "transfers",
-		"outputs": [
-			{
-				"internalType": "address",
-				"name": "sender",
-				"type": "address"
-			},
-			{
-				"internalType": "address",
-				"name": "recipient",
-				"type": "address"
-			},
-			{
-				"internalType": "uint256",
-				"name": "amount",
-				"type": "uint256"
-			},
-			{
-				"internalType": "uint256",
-				"name": "timestamp",
-				"type": "uint256"
-			},
-			{
-				"internalType": "enum ProtectedPay.TransferStatus",
-				"name": "status",
-				"type": "uint8"
-			},
-			{
-				"internalType": "string",
-				"name": "remarks",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "string",
-				"name": "",
-				"type": "string"
-			}
-		],
-		"name": "usernameToAddress",
-		"outputs": [
-			{
-				"internalType": "address",
-				"name": "",
-				"type": "address"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	},
-	{
-		"inputs": [
-			{
-				"internalType": "address",
-				"name": "",
-				"type": "address"
-			}
-		],
-		"name": "users",
-		"outputs": [
-			{
-				"internalType": "string",
-				"name": "username",
-				"type": "string"
-			}
-		],
-		"stateMutability": "view",
-		"type": "function"
-	}
-]
-
-# Initialize contract for DuckChain mainnet
-contract = w3.eth.contract(address=PROTECTEDPAY_CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+# ProtectedPay contract ABI (extracted from frontend), read from this file on first use
+CONTRACT_ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "protectedpay_abi.json")
+
+@functools.lru_cache(maxsize=None)
+def load_contract_abi() -> list:
+    """Load the ProtectedPay contract ABI (parsed once, then shared).
+    
+    Returns:
+        list: ABI entries
+    """
+    with open(CONTRACT_ABI_PATH, encoding="utf-8") as abi_file:
+        return json.load(abi_file)
+
+def __getattr__(name: str):
+    # CONTRACT_ABI and root_agent stay importable as module attributes without being built at import time
+    if name == "CONTRACT_ABI":
+        return load_contract_abi()
+    if name == "root_agent":
+        return build_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Contract for DuckChain mainnet (built on first use)
+contract = LazyObject(lambda: w3.eth.contract(address=PROTECTEDPAY_CONTRACT_ADDRESS, abi=load_contract_abi()))
+async_contract = LazyObject(lambda: async_w3.eth.contract(address=PROTECTEDPAY_CONTRACT_ADDRESS, abi=load_contract_abi()))
+
+# Username <-> address lookups (shared.username_cache) read through the mainnet contract
+username_cache.w3 = w3
+username_cache.contract = contract
+
+# Local nonce reservations per signing address (lets several transactions be in flight at once)
+nonce_manager = NonceManager(w3)
+
+# Seconds a fetched gas price is reused for new transactions
+GAS_PRICE_TTL = 10
+
+# Cached gas price and per-function gas estimate history
+gas_oracle = GasOracle(w3, price_ttl=GAS_PRICE_TTL)
+
+# Worker processes for signing bulk payouts (None uses one per CPU; 1 signs everything in-process)
+SIGNER_WORKERS = None
+
+# Signing with one derived account per private key; large batches are signed in worker processes
+signer = SignerService(max_workers=SIGNER_WORKERS)
+
+# Sessions (users) whose private key and preferences are kept in memory; the least recently used are evicted first
+MAX_SESSIONS = 1000
+
+# Seconds without a tool call after which a session's private key and preferences are dropped
+SESSION_IDLE_TIMEOUT = 3600
+
+# Share one private key and preferences across all of a user's sessions ("user") or keep them per session ("session")
+SESSION_SCOPE = "session"
+
+# Per-session private key (encrypted in memory), network preference and confirmation mode
+session_store = SessionStore(
+    max_sessions=MAX_SESSIONS,
+    idle_timeout=SESSION_IDLE_TIMEOUT,
+    on_evict=lambda private_key: signer.forget(private_key)
+)
+
+# Run every transaction as an eth_call at the pending block before signing it, rejecting it if it would revert
+SIMULATE_TRANSACTIONS = True
+
+# Simulation results cached per (contract, function, calldata, value, sender, block)
+transaction_simulator = TransactionSimulator(w3)
+
+# Receipt tracking for transactions submitted without waiting for confirmation
+transaction_tracker = TransactionTracker(w3)
+
+def _resync_nonce_if_dropped(record: dict) -> None:
+    if record.get("dropped") and record.get("from_address"):
+        nonce_manager.resync(record["from_address"])
+
+def _record_gas_usage(record: dict) -> None:
+    if record.get("gas_key") and record.get("gas_used") is not None:
+        gas_oracle.record_receipt(record["gas_key"], record["gas_limit"], record["gas_used"], record["status"] == "confirmed")
+
+transaction_tracker.add_listener(_resync_nonce_if_dropped)
+transaction_tracker.add_listener(_record_gas_usage)
+
+def enable_local_index(db_path: str, start_block: int = 0, sync_interval: float = 5.0) -> ProtectedPayIndexer:
+    """Build a local SQLite index of ProtectedPay events and keep it current in the background.
+    
+    Once the index is fresh, get_user_transfers, get_user_by_username and
+    get_user_by_address answer from it instead of making RPC calls.
+    
+    Args:
+        db_path (str): SQLite database path (existing indexes resume from their checkpoint)
+        start_block (int): First block to scan (the contract deployment block)
+        sync_interval (float): Seconds between incremental sync rounds
+        
+    Returns:
+        ProtectedPayIndexer: the running indexer
+    """
+    if shared.protectedpay_index is not None:
+        shared.protectedpay_index.close()
+    
+    shared.protectedpay_index = ProtectedPayIndexer(w3, contract, db_path=db_path, start_block=start_block)
+    shared.protectedpay_index.start(interval=sync_interval)
+    return shared.protectedpay_index
+
+# Transfers per get_user_transfers page by default, and the largest page allowed
+TRANSFER_PAGE_SIZE = 25
+MAX_TRANSFER_PAGE_SIZE = 100
+
+def iter_user_transfers(user_address: str, offset: int = 0, limit: Optional[int] = None, filters: Optional[dict] = None,
+                        batch_size: int = TRANSFER_DETAILS_BATCH_SIZE):
+    """Stream a user's transfers in history order, fetching and decoding them chunk by chunk.
+    
+    Without filters only the requested range of getUserProfile().transferIds is
+    fetched; with filters, chunks of ``batch_size`` are fetched until ``limit``
+    matches are found.
+    
+    Args:
+        user_address (str): The user's wallet address
+        offset (int): Position in the user's history to start at
+        limit (int): Maximum number of transfers to yield (None for all)
+        filters (dict): Filters from build_transfer_filters()
+        batch_size (int): Transfers fetched per aggregated call
+        
+    Yields:
+        Transfer: records decoded on access (to_dict() gives the tool output); index is the position in the history
+    """
+    user_address = w3.to_checksum_address(user_address)
+    scan = TransferScan(user_address, offset, limit, filters, batch_size)
+    if scan.done:
+        return
+    
+    # Answer from the local event index when it is up to date (status, direction and time filtered in SQL)
+    index = get_fresh_index()
+    if index is not None:
+        sql_filters = {key: scan.filters[key] for key in ("status", "direction", "start_time", "end_time") if key in scan.filters}
+        while True:
+            page = index.get_transfer_page(user_address, scan.position, batch_size, **sql_filters)
+            yield from scan.index_records(page)
+            if scan.done or len(page) < batch_size:
+                return
+    
+    # First get the user profile to get the actual transfer IDs
+    try:
+        transfer_ids = contract.functions.getUserProfile(user_address).call()[1]  # transferIds is the second element
+    except Exception as profile_error:
+        # Fallback to old method if getUserProfile fails
+        yield from scan.legacy_records(contract.functions.getUserTransfers(user_address).call(), profile_error)
+        return
+    
+    chunk_ids = scan.next_chunk(transfer_ids)
+    while chunk_ids:
+        # Get details for the chunk in as few aggregated calls as possible
+        detail_results = batch_call(
+            w3,
+            [contract.functions.getTransferDetails(transfer_id_bytes) for transfer_id_bytes in chunk_ids],
+            chunk_size=batch_size,
+            multicall_address=MULTICALL_ADDRESS
+        )
+        yield from scan.chunk_records(chunk_ids, detail_results)
+        chunk_ids = scan.next_chunk(transfer_ids)
+
+def load_user_transfer_columns(user_address: str, filters: Optional[dict] = None) -> TransferColumns:
+    """Load a user's whole transfer history into a compact column store (for analytics and bulk exports).
+
+    Args:
+        user_address (str): The user's wallet address
+        filters (dict): Filters from build_transfer_filters()
+
+    Returns:
+        TransferColumns: the matching transfers in history order
+    """
+    return TransferColumns.from_records(iter_user_transfers(user_address, filters=filters))
 
 def set_private_key(private_key: str) -> dict:
     """Set the private key for signing transactions.
@@ -1092,8 +340,6 @@ def set_private_key(private_key: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    global user_private_key
-    
     try:
         # Clean the private key
         if private_key.startswith('0x'):
@@ -1110,8 +356,8 @@ def set_private_key(private_key: str) -> dict:
             
         # Test if the private key is valid by trying to derive an account
         try:
-            account = w3.eth.account.from_key('0x' + clean_key)
-            user_private_key = '0x' + clean_key
+            account = signer.account('0x' + clean_key)
+            session_store.set_private_key('0x' + clean_key)
             
             return {
                 "status": "success",
@@ -1136,9 +382,9 @@ def get_wallet_info() -> dict:
     Returns:
         dict: status and wallet information or error msg.
     """
-    global user_private_key
+    private_key = session_store.private_key()
     
-    if user_private_key is None:
+    if private_key is None:
         return {
             "status": "no_key",
             "report": "No private key set. Please set a private key using set_private_key() to enable transaction signing.",
@@ -1146,7 +392,7 @@ def get_wallet_info() -> dict:
         }
     
     try:
-        account = w3.eth.account.from_key(user_private_key)
+        account = signer.account(private_key)
         return {
             "status": "success",
             "report": f"Wallet configured. Address: {account.address}",
@@ -1165,8 +411,9 @@ def clear_private_key() -> dict:
     Returns:
         dict: status and result.
     """
-    global user_private_key
-    user_private_key = None
+    private_key = session_store.clear_private_key()
+    if private_key is not None:
+        signer.forget(private_key)
     
     return {
         "status": "success",
@@ -1182,7 +429,7 @@ def set_user_network_preference(network: str) -> dict:
     Returns:
         dict: status and result or error msg.
     """
-    global user_network_preference
+    session = session_store.get()
     
     if network.lower() != "mainnet":
         return {
@@ -1190,12 +437,12 @@ def set_user_network_preference(network: str) -> dict:
             "error_message": "Only mainnet is supported. ProtectedPay is deployed on DuckChain mainnet."
         }
     
-    user_network_preference = network.lower()
+    session.network_preference = network.lower()
     
     return {
         "status": "success",
-        "report": f"Network preference set to: {user_network_preference}",
-        "network": user_network_preference
+        "report": f"Network preference set to: {session.network_preference}",
+        "network": session.network_preference
     }
 
 def get_user_network_preference() -> dict:
@@ -1204,14 +451,88 @@ def get_user_network_preference() -> dict:
     Returns:
         dict: status and current network preference.
     """
-    global user_network_preference
+    network = session_store.get().network_preference
     
     return {
         "status": "success",
-        "report": f"Current network preference: {user_network_preference}",
-        "network": user_network_preference
+        "report": f"Current network preference: {network}",
+        "network": network
     }
 
+def set_transaction_confirmation_mode(wait_for_confirmation: bool) -> dict:
+    """Choose whether write operations wait for the transaction to be mined.
+    
+    Args:
+        wait_for_confirmation (bool): True to wait for the receipt (up to 120 seconds),
+            False to return right after submission with a tracking ID for get_transaction_status()
+        
+    Returns:
+        dict: status and result.
+    """
+    session = session_store.get()
+    
+    session.wait_for_confirmation = bool(wait_for_confirmation)
+    mode = "wait for confirmation" if session.wait_for_confirmation else "submit and return"
+    
+    return {
+        "status": "success",
+        "report": f"Transaction mode set to: {mode}",
+        "wait_for_confirmation": session.wait_for_confirmation
+    }
+
+def get_transaction_status(tracking_id: str) -> dict:
+    """Get the status of a submitted transaction (pending, confirmed or failed).
+    
+    Args:
+        tracking_id (str): Tracking ID or transaction hash returned by a write operation
+        
+    Returns:
+        dict: status and transaction state or error msg.
+    """
+    try:
+        record = transaction_tracker.get(tracking_id)
+        
+        if record is None:
+            # Not submitted by this agent process, ask the chain directly
+            try:
+                receipt = w3.eth.get_transaction_receipt(tracking_id)
+            except TransactionNotFound:
+                return {
+                    "status": "success",
+                    "report": f"Transaction {tracking_id} has not been mined yet (or is unknown to the node)",
+                    "tracking_id": tracking_id,
+                    "transaction_status": "pending"
+                }
+            record = {
+                "tracking_id": tracking_id,
+                "transaction_hash": tracking_id,
+                "status": "confirmed" if receipt.status == 1 else "failed",
+                "block_number": receipt.blockNumber,
+                "gas_used": receipt.gasUsed
+            }
+        
+        report = f"Transaction {record['transaction_hash']} is {record['status']}"
+        if record["status"] == "confirmed":
+            report += f" in block {record['block_number']}"
+        elif record["status"] == "failed" and record.get("error_message"):
+            report += f": {record['error_message']}"
+        
+        return {
+            "status": "success",
+            "report": report,
+            "tracking_id": record["tracking_id"],
+            "transaction_hash": record["transaction_hash"],
+            "transaction_status": record["status"],
+            "block_number": record.get("block_number"),
+            "gas_used": record.get("gas_used"),
+            "error_message": record.get("error_message")
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error checking transaction status for {tracking_id}: {str(e)}"
+        }
+
 def explain_protectedpay_networks() -> dict:
     """Explain the available networks for ProtectedPay.
     
@@ -1288,26 +609,22 @@ def execute_contract_transaction(contract, function_name: str, params: dict, val
     Returns:
         dict: status and transaction result or error msg.
     """
-    global user_private_key
+    private_key = session_store.private_key()
     
-    if user_private_key is None:
+    if private_key is None:
         return {
             "status": "no_key",
             "error_message": "No private key set. Please set a private key using set_private_key() to enable transaction signing."
         }
     
     try:
-        # Get account from private key
-        account = network_w3.eth.account.from_key(user_private_key)
-        print(f"Account address: {account.address}")
-        print(f"Network: {network}")
-        print(f"Contract address: {contract.address}")
-        print(f"Function: {function_name}")
-        print(f"Parameters: {params}")
+        # Get account from private key (derived once per key)
+        account = signer.account(private_key)
+        logger.debug("Executing %s(%s) on %s contract %s from %s", function_name, params, network, contract.address, account.address)
         
         # Check account balance
         balance = network_w3.eth.get_balance(account.address)
-        print(f"Account balance: {network_w3.from_wei(balance, 'ether')} TON")
+        logger.debug("Account balance: %s TON", format_ton(balance))
         
         if balance == 0:
             return {
@@ -1318,47 +635,109 @@ def execute_contract_transaction(contract, function_name: str, params: dict, val
         # Get the contract function
         contract_function = getattr(contract.functions, function_name)(**params)
         
-        # Build transaction with better gas estimation
+        # Dry run at the pending block: a call that would revert is rejected before anything is signed
+        if SIMULATE_TRANSACTIONS:
+            try:
+                simulation = transaction_simulator.simulate(contract_function, account.address, value_wei)
+            except Exception as simulation_error:
+                logger.warning("Simulation of %s unavailable: %s, sending without a dry run", function_name, simulation_error)
+                metrics.record_event("simulation", "unavailable")
+                simulation = None
+            if simulation is not None:
+                metrics.record_event("simulation", "passed" if simulation["success"] else "reverted")
+            if simulation is not None and not simulation["success"]:
+                return {
+                    "status": "error",
+                    "error_message": f"Transaction would revert: {simulation['reason']}. Nothing was signed or sent.",
+                    "revert_reason": simulation["reason"],
+                    "revert": simulation["revert"],
+                    "simulated_block": simulation["block_number"],
+                    "function": function_name,
+                    "network": network
+                }
+        
+        # Gas limit from this function's estimate history, or estimate_gas with a 20% buffer
+        gas_key = None
         try:
-            # First, estimate gas
-            gas_estimate = contract_function.estimate_gas({
+            gas_limit, gas_key, gas_source = gas_oracle.gas_limit(contract_function, {
                 'from': account.address,
                 'value': value_wei
             })
-            # Add 20% buffer to gas estimate
-            gas_limit = int(gas_estimate * 1.2)
+            logger.debug("Gas limit of %s: %d (%s)", function_name, gas_limit, gas_source)
         except Exception as gas_error:
             # If gas estimation fails, use a higher default
-            print(f"Gas estimation failed: {gas_error}, using default gas limit")
+            logger.warning("Gas estimation of %s failed: %s, using default gas limit", function_name, gas_error)
             gas_limit = 500000
+            gas_source = "default"
+        metrics.record_event("gas_limit", gas_source)
         
-        # Get current gas price
+        # Get current gas price (cached for GAS_PRICE_TTL seconds, 10% above the node's price)
         try:
-            gas_price = network_w3.eth.gas_price
-            # Increase gas price by 10% to ensure faster confirmation
-            gas_price = int(gas_price * 1.1)
+            gas_price = gas_oracle.gas_price()
+            metrics.record_event("gas_price", "node")
         except Exception as price_error:
-            print(f"Gas price fetch failed: {price_error}, using default gas price")
+            logger.warning("Gas price fetch failed: %s, using default gas price", price_error)
+            metrics.record_event("gas_price", "default")
             gas_price = network_w3.to_wei('20', 'gwei')
         
-        # Build transaction
-        transaction = contract_function.build_transaction({
-            'from': account.address,
-            'value': value_wei,
-            'gas': gas_limit,
-            'gasPrice': gas_price,
-            'nonce': network_w3.eth.get_transaction_count(account.address),
-            'chainId': 5545  # DuckChain chain ID
-        })
+        # Reserve a nonce locally (includes our own pending transactions)
+        nonce = nonce_manager.reserve(account.address)
         
-        # Sign transaction
-        signed_txn = network_w3.eth.account.sign_transaction(transaction, user_private_key)
-        
-        # Send transaction
-        tx_hash = network_w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        try:
+            # Build transaction
+            transaction = contract_function.build_transaction({
+                'from': account.address,
+                'value': value_wei,
+                'gas': gas_limit,
+                'gasPrice': gas_price,
+                'nonce': nonce,
+                'chainId': 5545  # DuckChain chain ID
+            })
+            
+            # Sign transaction
+            signed_txn = signer.sign(transaction, private_key)
+            
+            # Send transaction
+            tx_hash = network_w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as send_error:
+            nonce_manager.release(account.address, nonce, resync=is_nonce_error(send_error))
+            raise
+        
+        nonce_manager.confirm(account.address, nonce)
+        transaction_simulator.forget_sender(account.address)
+        
+        if not session_store.get().wait_for_confirmation:
+            # Return right away, the receipt poller resolves the transaction in the background
+            tracking_id = transaction_tracker.track(
+                tx_hash,
+                from_address=account.address,
+                nonce=nonce,
+                function_name=function_name,
+                params=params,
+                network=network,
+                gas_key=gas_key,
+                gas_limit=gas_limit
+            )
+            return {
+                "status": "submitted",
+                "report": f"Transaction submitted on {network}, awaiting confirmation",
+                "transaction_hash": tracking_id,
+                "tracking_id": tracking_id,
+                "from_address": account.address,
+                "network": network,
+                "note": "Use get_transaction_status() with the tracking_id to check whether it was confirmed"
+            }
         
         # Wait for transaction receipt
-        tx_receipt = network_w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        try:
+            tx_receipt = network_w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        except Exception:
+            # The transaction may have been dropped, re-read the pending nonce before the next one
+            nonce_manager.resync(account.address)
+            raise
+        
+        if gas_key is not None:
+            gas_oracle.record_receipt(gas_key, gas_limit, tx_receipt.gasUsed, tx_receipt.status == 1)
         
         return {
             "status": "success",
@@ -1372,10 +751,18 @@ def execute_contract_transaction(contract, function_name: str, params: dict, val
         
     except Exception as e:
         error_msg = str(e)
-        print(f"Transaction execution error: {error_msg}")
+        logger.warning("Executing %s failed: %s", function_name, error_msg)
         
-        # Provide more specific error messages for common issues
-        if "insufficient funds" in error_msg.lower():
+        # Reverts carry a decodable reason; provide more specific error messages for other common issues
+        if is_revert(e):
+            revert = decode_revert_error(e)
+            return {
+                "status": "error",
+                "error_message": f"Contract execution reverted: {revert['reason']}",
+                "revert_reason": revert["reason"],
+                "revert": revert
+            }
+        elif "insufficient funds" in error_msg.lower():
             return {
                 "status": "error",
                 "error_message": f"Insufficient funds for transaction. Error: {error_msg}"
@@ -1401,6 +788,18 @@ def execute_contract_transaction(contract, function_name: str, params: dict, val
                 "error_message": f"Transaction execution failed: {error_msg}"
             }
 
+def set_transaction_report(tx_result: dict, report: str) -> None:
+    """Set the report of a successful or submitted transaction result.
+    
+    Args:
+        tx_result (dict): Result from execute_contract_transaction
+        report (str): Report describing the completed operation ("Successfully ...")
+    """
+    if tx_result["status"] == "submitted":
+        report = report.replace("Successfully ", "Submitted (awaiting confirmation): ", 1)
+        report += f". Check progress with get_transaction_status('{tx_result['tracking_id']}')"
+    tx_result["report"] = report
+
 def get_protectedpay_info() -> dict:
     """Get information about the ProtectedPay contract on DuckChain.
     
@@ -1433,50 +832,23 @@ def get_token_price(token_symbol: str) -> dict:
     """
     try:
         # Convert common token names to symbols
-        token_mappings = {
-            'bitcoin': 'BTC',
-            'ethereum': 'ETH',
-            'ton': 'TON',
-            'toncoin': 'TON',
-            'usdc': 'USDC',
-            'usdt': 'USDT',
-            'cardano': 'ADA',
-            'solana': 'SOL',
-            'polkadot': 'DOT',
-            'chainlink': 'LINK',
-            'litecoin': 'LTC',
-            'dogecoin': 'DOG',
-            'duck': 'DUCK'  # DuckChain token
-        }
-        
-        normalized_token = token_symbol.lower().strip()
-        if normalized_token in token_mappings:
-            token_symbol = token_mappings[normalized_token]
-        else:
-            token_symbol = token_symbol.upper().strip()
+        token_symbol = normalize_token_symbol(token_symbol)
         
-        url = f"https://api.coinbase.com/v2/prices/{token_symbol}-USD/spot"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if 'data' in data and 'amount' in data['data']:
-            price = float(data['data']['amount'])
-            currency = data['data']['currency']
-            
-            return {
-                "status": "success",
-                "report": f"The current price of {token_symbol} is ${price:,.2f} {currency}",
-                "token": token_symbol,
-                "price": price,
-                "currency": currency
-            }
-        else:
+        try:
+            price, currency = price_cache.get(token_symbol)
+        except LookupError as not_found:
             return {
                 "status": "error",
-                "error_message": f"Price data not found for token '{token_symbol}'"
+                "error_message": str(not_found)
             }
+        
+        return {
+            "status": "success",
+            "report": f"The current price of {token_symbol} is ${price:,.2f} {currency}",
+            "token": token_symbol,
+            "price": price,
+            "currency": currency
+        }
             
     except Exception as e:
         return {
@@ -1513,8 +885,10 @@ def register_username(username: str, user_address: str) -> dict:
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully registered username '{username}' for address {user_address} on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            # Forget cached answers for this name and address right away instead of waiting for the log poll
+            username_cache.invalidate(username=username, address=tx_result["from_address"])
+            set_transaction_report(tx_result, f"Successfully registered username '{username}' for address {user_address} on mainnet")
             tx_result["username"] = username
             tx_result["registered_address"] = user_address
         
@@ -1550,7 +924,7 @@ def send_to_address(recipient_address: str, amount_ton: str, remarks: str, sende
                 "error_message": f"Invalid sender address: {sender_address}"
             }
         
-        amount_wei = w3.to_wei(float(amount_ton), 'ether')
+        amount_wei = parse_ton(amount_ton)
         
         # Execute the transaction on mainnet
         tx_result = execute_contract_transaction(
@@ -1565,11 +939,11 @@ def send_to_address(recipient_address: str, amount_ton: str, remarks: str, sende
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
+        if tx_result["status"] in ("success", "submitted"):
             # Generate a display ID for the newly created transfer
             transfer_id = f"new_tx_{tx_result['transaction_hash'][2:8]}_{int(time.time())}"
             
-            tx_result["report"] = f"Successfully sent {amount_ton} TON to {recipient_address} with message '{remarks}' on mainnet. Transaction ID: {transfer_id}"
+            set_transaction_report(tx_result, f"Successfully sent {amount_ton} TON to {recipient_address} with message '{remarks}' on mainnet. Transaction ID: {transfer_id}")
             tx_result["display_transfer_id"] = transfer_id
             tx_result["amount_ton"] = amount_ton
             tx_result["recipient"] = recipient_address
@@ -1610,7 +984,14 @@ def send_to_username(username: str, amount_ton: str, remarks: str, sender_addres
                 "error_message": f"Invalid sender address: {sender_address}"
             }
         
-        amount_wei = w3.to_wei(float(amount_ton), 'ether')
+        # Reject unregistered usernames before paying for a transaction that would revert
+        if username_cache.lookup_address(username) is None:
+            return {
+                "status": "error",
+                "error_message": f"Username '{username}' is not registered on mainnet"
+            }
+        
+        amount_wei = parse_ton(amount_ton)
         
         # Execute the transaction on mainnet
         tx_result = execute_contract_transaction(
@@ -1625,11 +1006,11 @@ def send_to_username(username: str, amount_ton: str, remarks: str, sender_addres
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
+        if tx_result["status"] in ("success", "submitted"):
             # Generate a display ID for the newly created transfer
             transfer_id = f"new_tx_{tx_result['transaction_hash'][2:8]}_{int(time.time())}"
             
-            tx_result["report"] = f"Successfully sent {amount_ton} TON to username '{username}' with message '{remarks}' on mainnet. Transaction ID: {transfer_id}"
+            set_transaction_report(tx_result, f"Successfully sent {amount_ton} TON to username '{username}' with message '{remarks}' on mainnet. Transaction ID: {transfer_id}")
             tx_result["display_transfer_id"] = transfer_id
             tx_result["amount_ton"] = amount_ton
             tx_result["recipient_username"] = username
@@ -1662,7 +1043,12 @@ def get_user_by_username(username: str, network: Optional[str] = None) -> dict:
         # Get contract instance for mainnet
         network_contract, _ = get_contract_for_network("mainnet")
         
-        address = network_contract.functions.getUserByUsername(username).call()
+        # Answer from the local event index when it is up to date
+        index = get_fresh_index()
+        if index is not None:
+            address = index.get_address_by_username(username) or "0x0000000000000000000000000000000000000000"
+        else:
+            address = username_cache.lookup_address(username) or "0x0000000000000000000000000000000000000000"
         
         if address == "0x0000000000000000000000000000000000000000":
             return {
@@ -1708,8 +1094,12 @@ def get_user_by_address(user_address: str, network: Optional[str] = None) -> dic
                 "error_message": f"Invalid address format: {user_address}"
             }
         
-        # Use mainnet contract
-        username = contract.functions.getUserByAddress(user_address).call()
+        # Answer from the local event index when it is up to date, otherwise use mainnet contract
+        index = get_fresh_index()
+        if index is not None:
+            username = index.get_username_by_address(user_address)
+        else:
+            username = username_cache.lookup_username(user_address)
         
         if not username:
             return {
@@ -1731,15 +1121,26 @@ def get_user_by_address(user_address: str, network: Optional[str] = None) -> dic
             "error_message": f"Error looking up address {user_address}: {str(e)}"
         }
 
-def get_user_transfers(user_address: str, network: Optional[str] = None) -> dict:
-    """Get all transfers for a specific user address (mainnet).
+def get_user_transfers(user_address: str, network: Optional[str] = None, offset: int = 0, limit: int = TRANSFER_PAGE_SIZE,
+                       status: Optional[str] = None, direction: Optional[str] = None, start_time: Optional[int] = None,
+                       end_time: Optional[int] = None, min_amount_ton: Optional[str] = None,
+                       max_amount_ton: Optional[str] = None) -> dict:
+    """Get one page of transfers for a specific user address (mainnet), optionally filtered.
 
     Args:
         user_address (str): The user's wallet address
         network (str): Network to use (must be "mainnet" or None)
+        offset (int): Position in the transfer history to start from (use next_offset from the previous page)
+        limit (int): Maximum number of transfers to return (default 25, at most 100)
+        status (str): Only transfers with this status: "Pending", "Completed" or "Cancelled"
+        direction (str): Only "sent" or "received" transfers
+        start_time (int): Only transfers at or after this unix timestamp
+        end_time (int): Only transfers at or before this unix timestamp
+        min_amount_ton (str): Only transfers of at least this many TON
+        max_amount_ton (str): Only transfers of at most this many TON
 
     Returns:
-        dict: status and result or error msg.
+        dict: status, transfers and next_offset (None when there are no more) or error msg.
     """
     try:
         # Only mainnet is supported
@@ -1755,92 +1156,24 @@ def get_user_transfers(user_address: str, network: Optional[str] = None) -> dict
                 "error_message": f"Invalid address format: {user_address}"
             }
         
-        # First get the user profile to get the actual transfer IDs
-        try:
-            user_profile = contract.functions.getUserProfile(user_address).call()
-            transfer_ids = user_profile[1]  # transferIds is the second element
-            
-            if not transfer_ids:
-                return {
-                    "status": "success",
-                    "report": f"No transfers found for address {user_address} on mainnet",
-                    "transfers": [],
-                    "network": "mainnet",
-                    "contract_address": PROTECTEDPAY_CONTRACT_ADDRESS
-                }
-            
-            transfer_list = []
-            status_map = {0: "Pending", 1: "Completed", 2: "Cancelled"}
-            
-            # Get details for each transfer using the actual transfer IDs
-            for i, transfer_id_bytes in enumerate(transfer_ids):
-                try:
-                    # Get transfer details using the bytes32 transfer ID
-                    transfer_details = contract.functions.getTransferDetails(transfer_id_bytes).call()
-                    
-                    transfer_list.append({
-                        "transfer_id": transfer_id_bytes.hex(),  # Convert bytes32 to hex string for display
-                        "transfer_id_bytes": transfer_id_bytes,  # Keep original bytes32 for contract calls
-                        "transfer_index": i,
-                        "sender": transfer_details[0],
-                        "recipient": transfer_details[1], 
-                        "amount_wei": int(transfer_details[2]),
-                        "amount_ton": float(w3.from_wei(transfer_details[2], 'ether')),
-                        "timestamp": int(transfer_details[3]),
-                        "status": status_map.get(transfer_details[4], "Unknown"),
-                        "remarks": transfer_details[5]
-                    })
-                except Exception as detail_error:
-                    print(f"Error getting details for transfer {i}: {detail_error}")
-                    continue
-            
+        if offset < 0 or limit < 1 or limit > MAX_TRANSFER_PAGE_SIZE:
             return {
-                "status": "success",
-                "report": f"Found {len(transfer_list)} transfers for address {user_address} on mainnet",
-                "transfers": transfer_list,
-                "count": len(transfer_list),
-                "network": "mainnet",
-                "contract_address": PROTECTEDPAY_CONTRACT_ADDRESS
+                "status": "error",
+                "error_message": f"offset must be 0 or more and limit between 1 and {MAX_TRANSFER_PAGE_SIZE}"
             }
-            
-        except Exception as profile_error:
-            # Fallback to old method if getUserProfile fails
-            print(f"getUserProfile failed: {profile_error}, falling back to getUserTransfers")
-            transfers = contract.functions.getUserTransfers(user_address).call()
-            
-            if not transfers:
-                return {
-                    "status": "success",
-                    "report": f"No transfers found for address {user_address} on mainnet",
-                    "transfers": [],
-                    "network": "mainnet",
-                    "contract_address": PROTECTEDPAY_CONTRACT_ADDRESS
-                }
-            
-            transfer_list = []
-            status_map = {0: "Pending", 1: "Completed", 2: "Cancelled"}
-            
-            for i, transfer in enumerate(transfers):
-                transfer_list.append({
-                    "transfer_id": f"fallback_{i}",  # Fallback ID
-                    "transfer_index": i,
-                    "sender": transfer[0],
-                    "recipient": transfer[1], 
-                    "amount_wei": int(transfer[2]),
-                    "amount_ton": float(w3.from_wei(transfer[2], 'ether')),
-                    "timestamp": int(transfer[3]),
-                    "status": status_map.get(transfer[4], "Unknown"),
-                    "remarks": transfer[5]
-                })
-            
+        
+        try:
+            filters = build_transfer_filters(status, direction, start_time, end_time, min_amount_ton, max_amount_ton)
+        except ValueError as filter_error:
             return {
-                "status": "success",
-                "report": f"Found {len(transfer_list)} transfers for address {user_address} on mainnet (fallback method)",
-                "transfers": transfer_list,
-                "count": len(transfer_list),
-                "network": "mainnet",
-                "contract_address": PROTECTEDPAY_CONTRACT_ADDRESS
+                "status": "error",
+                "error_message": str(filter_error)
             }
+        
+        source = "local_index" if get_fresh_index() is not None else None
+        transfer_list = list(iter_user_transfers(user_address, offset=offset, limit=limit, filters=filters))
+        return transfers_page_result(user_address, transfer_list, offset, limit, filters, PROTECTEDPAY_CONTRACT_ADDRESS,
+                                     source=source)
             
     except Exception as e:
         return {
@@ -1848,6 +1181,84 @@ def get_user_transfers(user_address: str, network: Optional[str] = None) -> dict
             "error_message": f"Error fetching transfers for {user_address}: {str(e)}"
         }
 
+def get_user_portfolio(user_address: str, network: Optional[str] = None, include_group_payments: bool = True,
+                       include_savings_pots: bool = True) -> dict:
+    """Get a user's group payments and savings pots with full details (mainnet).
+    
+    Uses one getUserProfile call plus one batched read of all details, however
+    many payments and pots the user has.
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+        include_group_payments (bool): List group payments the user created or joined, with their contribution
+        include_savings_pots (bool): List savings pots the user owns
+
+    Returns:
+        dict: status, group_payments and/or savings_pots, or error msg.
+    """
+    try:
+        # Only mainnet is supported
+        if network is not None and network.lower() != "mainnet":
+            return {
+                "status": "error",
+                "error_message": "Only mainnet is supported for ProtectedPay operations."
+            }
+        
+        if not w3.is_address(user_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid address format: {user_address}"
+            }
+        
+        if not include_group_payments and not include_savings_pots:
+            return {
+                "status": "error",
+                "error_message": "Include group payments, savings pots or both"
+            }
+        
+        user_address = w3.to_checksum_address(user_address)
+        portfolio = load_portfolio(
+            w3,
+            contract,
+            user_address,
+            group_payments=include_group_payments,
+            savings_pots=include_savings_pots,
+            chunk_size=TRANSFER_DETAILS_BATCH_SIZE,
+            multicall_address=MULTICALL_ADDRESS
+        )
+        return portfolio_result(user_address, portfolio, include_group_payments, include_savings_pots,
+                                PROTECTEDPAY_CONTRACT_ADDRESS)
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching portfolio for {user_address}: {str(e)}"
+        }
+
+def get_user_group_payments(user_address: str, network: Optional[str] = None) -> dict:
+    """Get the group payments a user created or contributed to, with their contribution (mainnet).
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+
+    Returns:
+        dict: status and group_payments or error msg.
+    """
+    return get_user_portfolio(user_address, network, include_group_payments=True, include_savings_pots=False)
+
+def get_user_savings_pots(user_address: str, network: Optional[str] = None) -> dict:
+    """Get the savings pots a user owns, with their progress towards the target (mainnet).
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+
+    Returns:
+        dict: status and savings_pots or error msg.
+    """
+    return get_user_portfolio(user_address, network, include_group_payments=False, include_savings_pots=True)
+
 def create_group_payment(payment_id: str, recipient_address: str, num_participants: int, remarks: str, total_amount_ton: str, creator_address: str, network: Optional[str] = None) -> dict:
     """Create a group payment (mainnet).
 
@@ -1889,7 +1300,7 @@ def create_group_payment(payment_id: str, recipient_address: str, num_participan
         else:
             payment_id_bytes = payment_id.encode('utf-8')[:32].ljust(32, b'\0')
         
-        total_amount_wei = w3.to_wei(float(total_amount_ton), 'ether')
+        total_amount_wei = parse_ton(total_amount_ton)
         
         # Execute transaction on mainnet
         
@@ -1907,8 +1318,8 @@ def create_group_payment(payment_id: str, recipient_address: str, num_participan
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully created group payment with ID {payment_id} for {total_amount_ton} TON to {recipient_address} with {num_participants} participants on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully created group payment with ID {payment_id} for {total_amount_ton} TON to {recipient_address} with {num_participants} participants on mainnet")
             tx_result["payment_id"] = payment_id
             tx_result["recipient"] = recipient_address
             tx_result["num_participants"] = num_participants
@@ -1956,7 +1367,7 @@ def create_savings_pot(pot_id: str, name: str, target_amount_ton: str, remarks:
         else:
             pot_id_bytes = pot_id.encode('utf-8')[:32].ljust(32, b'\0')
         
-        target_amount_wei = w3.to_wei(float(target_amount_ton), 'ether')
+        target_amount_wei = parse_ton(target_amount_ton)
         
         # Execute the transaction on mainnet
         tx_result = execute_contract_transaction(
@@ -1972,8 +1383,8 @@ def create_savings_pot(pot_id: str, name: str, target_amount_ton: str, remarks:
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully created savings pot '{name}' with target {target_amount_ton} TON on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully created savings pot '{name}' with target {target_amount_ton} TON on mainnet")
             tx_result["pot_id"] = pot_id
             tx_result["pot_name"] = name
             tx_result["target_amount_ton"] = target_amount_ton
@@ -2001,14 +1412,13 @@ def convert_eth_wei(amount: str, conversion_type: str) -> dict:
         conversion_type = conversion_type.lower().strip()
         
         if conversion_type == 'eth_to_wei':
-            # Convert ETH to Wei
-            eth_amount = float(amount)
-            wei_amount = Web3.to_wei(eth_amount, 'ether')
+            # Convert ETH to Wei (exactly, without a float)
+            wei_amount = parse_ton(amount)
             
             return {
                 "status": "success",
-                "report": f"{eth_amount} ETH = {wei_amount:,} Wei",
-                "original_amount": eth_amount,
+                "report": f"{format_ton(wei_amount)} ETH = {wei_amount:,} Wei",
+                "original_amount": wei_to_ton(wei_amount),
                 "converted_amount": wei_amount,
                 "original_unit": "ETH",
                 "converted_unit": "Wei"
@@ -2017,13 +1427,14 @@ def convert_eth_wei(amount: str, conversion_type: str) -> dict:
         elif conversion_type == 'wei_to_eth':
             # Convert Wei to ETH
             wei_amount = int(amount)
-            eth_amount = Web3.from_wei(wei_amount, 'ether')
+            if wei_amount < 0:
+                raise ValueError(amount)
             
             return {
                 "status": "success",
-                "report": f"{wei_amount:,} Wei = {eth_amount} ETH",
+                "report": f"{wei_amount:,} Wei = {format_ton(wei_amount)} ETH",
                 "original_amount": wei_amount,
-                "converted_amount": float(eth_amount),
+                "converted_amount": wei_to_ton(wei_amount),
                 "original_unit": "Wei",
                 "converted_unit": "ETH"
             }
@@ -2106,17 +1517,14 @@ def calculate_gas_cost(gas_limit: str, gas_price_gwei: str) -> dict:
         # Calculate total gas cost in Wei
         total_gas_wei = gas_limit * gas_price_wei
         
-        # Convert to ETH
-        total_gas_eth = Web3.from_wei(total_gas_wei, 'ether')
-        
         return {
             "status": "success",
-            "report": f"Gas Cost: {gas_limit:,} gas × {gas_price_gwei} Gwei = {total_gas_eth} ETH ({total_gas_wei:,} Wei)",
+            "report": f"Gas Cost: {gas_limit:,} gas × {gas_price_gwei} Gwei = {format_ton(total_gas_wei)} ETH ({total_gas_wei:,} Wei)",
             "gas_limit": gas_limit,
             "gas_price_gwei": gas_price_gwei,
             "gas_price_wei": gas_price_wei,
             "total_cost_wei": total_gas_wei,
-            "total_cost_eth": float(total_gas_eth)
+            "total_cost_eth": wei_to_ton(total_gas_wei)
         }
         
     except ValueError as e:
@@ -2162,30 +1570,20 @@ def get_ton_balance(address: str, network: str = "mainnet") -> dict:
         # Use mainnet configuration
         network_w3 = w3
         
-        # Check connection
-        if not network_w3.is_connected():
-            return {
-                "status": "error",
-                "error_message": f"Unable to connect to DuckChain at {DUCKCHAIN_RPC}"
-            }
-        
-        # Get balance in Wei
+        # Get balance in Wei (connection failures surface as errors, no separate probe)
         balance_wei = network_w3.eth.get_balance(address)
         
-        # Convert to TON (ETH units)
-        balance_ton = Web3.from_wei(balance_wei, 'ether')
-        
         # Get checksummed address
         checksum_address = Web3.to_checksum_address(address)
         
         return {
             "status": "success",
-            "report": f"Balance on DuckChain: {balance_ton} TON",
+            "report": f"Balance on DuckChain: {format_ton(balance_wei)} TON",
             "address": checksum_address,
             "network": "DuckChain",
             "chain_id": 5545,
             "balance_wei": balance_wei,
-            "balance_ton": float(balance_ton),
+            "balance_ton": wei_to_ton(balance_wei),
             "currency_symbol": "TON",
             "rpc_url": DUCKCHAIN_RPC
         }
@@ -2243,6 +1641,42 @@ def get_multiple_balances(address: str) -> dict:
             "error_message": f"Error fetching balances for {address}: {str(e)}"
         }
 
+# eth_getBalance calls per JSON-RPC batch, and batches in flight at once, for get_balances
+BALANCE_BATCH_SIZE = 100
+BALANCE_MAX_CONCURRENCY = 4
+
+def get_balances(addresses: str, block_number: Optional[int] = None) -> dict:
+    """Get TON balances for many addresses at once on DuckChain.
+
+    Args:
+        addresses (str): Addresses separated by commas, spaces or newlines, or a JSON list
+        block_number (int): Block number to read balances at (default: the current block)
+
+    Returns:
+        dict: status, per-address balances and total or error msg.
+    """
+    try:
+        address_inputs = parse_address_list(addresses)
+        unique_addresses, invalid = normalize_addresses(address_inputs)
+        
+        # Read every batch at the same block so the total is a consistent snapshot
+        if block_number is None:
+            block_number = w3.eth.block_number
+        
+        results = dict(iter_balances(
+            w3,
+            unique_addresses,
+            block_identifier=block_number,
+            batch_size=BALANCE_BATCH_SIZE,
+            max_concurrency=BALANCE_MAX_CONCURRENCY
+        ))
+        return balances_result(unique_addresses, invalid, len(address_inputs), block_number, results)
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching balances: {str(e)}"
+        }
+
 
 def claim_transfer_by_id(transfer_id: str, claimer_address: str) -> dict:
     """Claim a transfer by its ID (mainnet only).
@@ -2292,8 +1726,8 @@ def claim_transfer_by_id(transfer_id: str, claimer_address: str) -> dict:
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully claimed transfer ID {transfer_id} for address {claimer_address} on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully claimed transfer ID {transfer_id} for address {claimer_address} on mainnet")
             tx_result["transfer_id"] = transfer_id
             tx_result["claimer_address"] = claimer_address
         
@@ -2336,8 +1770,8 @@ def claim_transfer_by_username(sender_username: str, claimer_address: str) -> di
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully claimed pending transfer from sender username '{sender_username}' for address {claimer_address} on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully claimed pending transfer from sender username '{sender_username}' for address {claimer_address} on mainnet")
             tx_result["sender_username"] = sender_username
             tx_result["claimer_address"] = claimer_address
         
@@ -2386,8 +1820,8 @@ def claim_transfer_by_address(sender_address: str, claimer_address: str) -> dict
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully claimed pending transfer from sender address {sender_address} for address {claimer_address} on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully claimed pending transfer from sender address {sender_address} for address {claimer_address} on mainnet")
             tx_result["sender_address"] = sender_address
             tx_result["claimer_address"] = claimer_address
         
@@ -2398,6 +1832,286 @@ def claim_transfer_by_address(sender_address: str, claimer_address: str) -> dict
             "error_message": f"Error preparing claim transfer by address: {str(e)}"
         }
 
+# Most claim transactions claim_all_pending_transfers sends in one call
+MAX_CLAIMS_PER_CALL = 200
+
+# Seconds to wait for all claim receipts when waiting for confirmation
+CLAIM_ALL_RECEIPT_TIMEOUT = 300
+
+def list_pending_claims(claimer_address: str) -> list:
+    """Pending transfers waiting to be claimed by an address, oldest first.
+    
+    Reads the claimer's transfer IDs from getUserProfile and their details in
+    batched calls (or from the local event index when it is fresh), keeping
+    the Pending transfers whose recipient is the claimer.
+    
+    Args:
+        claimer_address (str): The recipient's wallet address
+        
+    Returns:
+        list: Transfer records
+    """
+    filters = build_transfer_filters(status="Pending", direction="received")
+    return [
+        transfer for transfer in iter_user_transfers(claimer_address, filters=filters)
+        if not transfer.is_legacy  # Legacy entries have no ID to claim by
+    ]
+
+def get_pending_claims(claimer_address: str, network: Optional[str] = None) -> dict:
+    """List every pending transfer an address can claim (mainnet).
+    
+    Args:
+        claimer_address (str): The recipient's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+    
+    Returns:
+        dict: status, pending_transfers and total_pending_ton or error msg.
+    """
+    try:
+        # Only mainnet is supported
+        if network is not None and network.lower() != "mainnet":
+            return {
+                "status": "error",
+                "error_message": "Only mainnet is supported for ProtectedPay operations."
+            }
+        
+        if not w3.is_address(claimer_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid claimer address: {claimer_address}"
+            }
+        
+        claimer_address = w3.to_checksum_address(claimer_address)
+        return pending_claims_result(claimer_address, list_pending_claims(claimer_address), PROTECTEDPAY_CONTRACT_ADDRESS)
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching pending claims for {claimer_address}: {str(e)}"
+        }
+
+def claim_all_pending_transfers(claimer_address: str, max_claims: int = MAX_CLAIMS_PER_CALL) -> dict:
+    """Claim every pending transfer sent to an address in one call (mainnet).
+    
+    Pending transfers are listed in one batched read, then one claimTransferById
+    transaction per transfer is signed with sequential nonces and broadcast in
+    nonce order while the rest are still being signed. Transfers whose claim
+    from this account is still waiting for a receipt are skipped, so calling
+    again never claims twice.
+    
+    Args:
+        claimer_address (str): The claimer's wallet address (must match the configured private key)
+        max_claims (int): Most transfers to claim in this call (default 200); call again for the rest
+    
+    Returns:
+        dict: status, per-transfer results and the total claimed or error msg.
+    """
+    private_key = session_store.private_key()
+    
+    if private_key is None:
+        return {
+            "status": "no_key",
+            "error_message": "No private key set. Please set a private key using set_private_key() to enable transaction signing."
+        }
+    
+    try:
+        if not w3.is_address(claimer_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid claimer address: {claimer_address}"
+            }
+        
+        if max_claims < 1:
+            return {
+                "status": "error",
+                "error_message": "max_claims must be at least 1"
+            }
+        
+        account = signer.account(private_key)
+        if account.address != w3.to_checksum_address(claimer_address):
+            return {
+                "status": "error",
+                "error_message": f"Claimer address {claimer_address} does not match the configured private key ({account.address})"
+            }
+        
+        # The contract shows a transfer as Pending until its claim is mined; skip claims still in flight
+        in_flight = {
+            record["params"]["_transferId"]
+            for record in transaction_tracker.pending_records(from_address=account.address, function_name="claimTransferById")
+            if record.get("params")
+        }
+        listed = list_pending_claims(account.address)
+        pending = [transfer for transfer in listed if transfer.id_bytes not in in_flight]
+        skipped = len(listed) - len(pending)
+        if not pending:
+            report = f"No pending transfers are waiting to be claimed by {account.address} on mainnet"
+            if skipped:
+                report += f" ({skipped} claims already submitted are awaiting confirmation)"
+            return {
+                "status": "success",
+                "report": report,
+                "results": [],
+                "counts": {},
+                "total_claimed_ton": "0",
+                "remaining": 0,
+                "in_flight": skipped,
+                "claimer_address": account.address,
+                "network": "mainnet"
+            }
+        
+        to_claim = pending[:max_claims]
+        transfer_ids = [transfer.id_bytes for transfer in to_claim]
+        
+        # Every claim runs the same code path, so one gas limit covers them all
+        try:
+            gas_limit, _, gas_source = gas_oracle.gas_limit(
+                contract.functions.claimTransferById(transfer_ids[0]),
+                {'from': account.address, 'value': 0}
+            )
+        except Exception as gas_error:
+            logger.warning("Gas estimation of claimTransferById failed: %s, using default gas limit", gas_error)
+            gas_limit = 500000
+            gas_source = "default"
+        metrics.record_event("gas_limit", gas_source)
+        
+        try:
+            gas_price = gas_oracle.gas_price()
+            metrics.record_event("gas_price", "node")
+        except Exception as price_error:
+            logger.warning("Gas price fetch failed: %s, using default gas price", price_error)
+            metrics.record_event("gas_price", "default")
+            gas_price = w3.to_wei('20', 'gwei')
+        
+        # Claim only as many transfers as the balance can pay gas for
+        balance = w3.eth.get_balance(account.address)
+        affordable = balance // (gas_limit * gas_price)
+        if affordable == 0:
+            return {
+                "status": "error",
+                "error_message": f"Account {account.address} cannot pay gas for a claim: need {format_ton(gas_limit * gas_price)} TON, have {format_ton(balance)} TON.",
+                "pending_count": len(pending)
+            }
+        if affordable < len(to_claim):
+            to_claim = to_claim[:affordable]
+            transfer_ids = transfer_ids[:affordable]
+        
+        nonces = nonce_manager.reserve_many(account.address, len(to_claim))
+        transactions = [
+            contract.functions.claimTransferById(transfer_id).build_transaction({
+                'from': account.address,
+                'value': 0,
+                'gas': gas_limit,
+                'gasPrice': gas_price,
+                'nonce': nonce,
+                'chainId': 5545  # DuckChain chain ID
+            })
+            for transfer_id, nonce in zip(transfer_ids, nonces)
+        ]
+        
+        results = [
+            {
+                "transfer_id": transfer.transfer_id,
+                "sender": transfer.sender,
+                "amount_ton": transfer.amount_ton,
+                "remarks": transfer.remarks,
+                "status": "not_sent",
+                "transaction_hash": None,
+                "nonce": nonce,
+                "error_message": None
+            }
+            for transfer, nonce in zip(to_claim, nonces)
+        ]
+        
+        # One sender thread broadcasts in nonce order, each send only after the node accepted the previous
+        # nonce. After the first failure later nonces would be stuck behind the gap, so they stay not_sent
+        # (their nonces are released below and the transfers are re-signed by the next call)
+        stop_sending = [False]
+        
+        def broadcast(result: dict, signed_txn) -> None:
+            if stop_sending[0]:
+                return
+            result["transaction_hash"] = "0x" + signed_txn.hash.hex().removeprefix("0x")
+            try:
+                w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            except Exception as send_error:
+                stop_sending[0] = True
+                result["status"] = "failed"
+                result["error_message"] = str(send_error)
+                return
+            nonce_manager.confirm(account.address, result["nonce"])
+            result["status"] = "submitted"
+        
+        with ThreadPoolExecutor(max_workers=1) as sender:
+            send_queue = [
+                sender.submit(broadcast, result, signed_txn)
+                for result, signed_txn in zip(results, signer.iter_sign(transactions, private_key))
+            ]
+            for sent in send_queue:
+                sent.result()
+        
+        if stop_sending[0]:
+            for result in results:
+                if result["status"] != "submitted":
+                    nonce_manager.release(account.address, result["nonce"], resync=True)
+        
+        # Track receipts of everything submitted
+        tracking_ids = {}
+        for index, result in enumerate(results):
+            if result["status"] == "submitted":
+                tracking_ids[index] = transaction_tracker.track(
+                    result["transaction_hash"],
+                    from_address=account.address,
+                    nonce=result["nonce"],
+                    function_name="claimTransferById",
+                    params={"_transferId": transfer_ids[index]},
+                    network="mainnet"
+                )
+        
+        if session_store.get().wait_for_confirmation and tracking_ids:
+            deadline = time.time() + CLAIM_ALL_RECEIPT_TIMEOUT
+            for index, tracking_id in tracking_ids.items():
+                record = transaction_tracker.wait(tracking_id, timeout=max(0, deadline - time.time()))
+                if record["status"] == "confirmed":
+                    results[index]["status"] = "confirmed"
+                elif record["status"] == "failed":
+                    results[index]["status"] = "failed"
+                    results[index]["error_message"] = record.get("error_message")
+        
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        claimed_wei = sum(
+            transfer.amount_wei for transfer, result in zip(to_claim, results)
+            if result["status"] in ("confirmed", "submitted")
+        )
+        
+        failed = counts.get("failed", 0) + counts.get("not_sent", 0)
+        remaining = len(pending) - counts.get("confirmed", 0) - counts.get("submitted", 0)
+        report = f"Claimed {len(results)} of {len(pending)} pending transfers: " + ", ".join(
+            f"{count} {status}" for status, count in sorted(counts.items())
+        )
+        if skipped:
+            report += f" ({skipped} claims already submitted are awaiting confirmation and were skipped)"
+        if remaining:
+            report += f". {remaining} transfers are still pending; call claim_all_pending_transfers again to claim them."
+        
+        return {
+            "status": "error" if failed else "success",
+            "report": report,
+            "error_message": f"{failed} claims were not completed" if failed else None,
+            "results": results,
+            "counts": counts,
+            "total_claimed_ton": format_ton(claimed_wei),
+            "remaining": remaining,
+            "in_flight": skipped,
+            "claimer_address": account.address,
+            "network": "mainnet"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error claiming pending transfers: {str(e)}"
+        }
+
 def contribute_to_group_payment(payment_id: str, contribution_ton: str, contributor_address: str) -> dict:
     """Contribute to a group payment.
 
@@ -2422,7 +2136,7 @@ def contribute_to_group_payment(payment_id: str, contribution_ton: str, contribu
         else:
             payment_id_bytes = payment_id.encode('utf-8')[:32].ljust(32, b'\0')
         
-        contribution_wei = w3.to_wei(float(contribution_ton), 'ether')
+        contribution_wei = parse_ton(contribution_ton)
         
         # Get contract instance for the selected network
         contract, network_w3 = get_contract_for_network("mainnet")  # Using mainnet for DuckChain
@@ -2439,8 +2153,8 @@ def contribute_to_group_payment(payment_id: str, contribution_ton: str, contribu
             network_w3=network_w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully contributed {contribution_ton} TON to group payment {payment_id}"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully contributed {contribution_ton} TON to group payment {payment_id}")
             tx_result["payment_id"] = payment_id
             tx_result["contribution_ton"] = contribution_ton
         
@@ -2475,7 +2189,7 @@ def contribute_to_savings_pot(pot_id: str, contribution_ton: str, contributor_ad
         else:
             pot_id_bytes = pot_id.encode('utf-8')[:32].ljust(32, b'\0')
         
-        contribution_wei = w3.to_wei(float(contribution_ton), 'ether')
+        contribution_wei = parse_ton(contribution_ton)
         
         # Get contract instance for the selected network
         contract, network_w3 = get_contract_for_network("mainnet")  # Using mainnet for DuckChain
@@ -2492,8 +2206,8 @@ def contribute_to_savings_pot(pot_id: str, contribution_ton: str, contributor_ad
             network_w3=network_w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully contributed {contribution_ton} TON to savings pot {pot_id}"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully contributed {contribution_ton} TON to savings pot {pot_id}")
             tx_result["pot_id"] = pot_id
             tx_result["contribution_ton"] = contribution_ton
         
@@ -2552,8 +2266,8 @@ def refund_transfer(transfer_id: str, sender_address: str) -> dict:
             network_w3=w3
         )
         
-        if tx_result["status"] == "success":
-            tx_result["report"] = f"Successfully refunded transfer ID {transfer_id} for sender {sender_address} on mainnet"
+        if tx_result["status"] in ("success", "submitted"):
+            set_transaction_report(tx_result, f"Successfully refunded transfer ID {transfer_id} for sender {sender_address} on mainnet")
             tx_result["transfer_id"] = transfer_id
             tx_result["sender_address"] = sender_address
         
@@ -2564,67 +2278,440 @@ def refund_transfer(transfer_id: str, sender_address: str) -> dict:
             "error_message": f"Error preparing transfer refund: {str(e)}"
         }
 
+# Seconds to wait for all payout receipts when waiting for confirmation
+BULK_PAYOUT_RECEIPT_TIMEOUT = 300
+
+def send_bulk_payout(payouts: str, sender_address: str, journal_path: Optional[str] = None) -> dict:
+    """Send TON to many addresses or usernames in one call (mainnet).
+    
+    All rows are validated and usernames resolved before anything is signed.
+    Transactions are signed with sequential nonces and broadcast in nonce
+    order while the rest are still being signed and journaled.
+
+    Args:
+        payouts (str): JSON list of {"recipient" or "username", "amount_ton", "remarks"} objects,
+            or CSV with a header row "recipient,amount_ton,remarks" (recipient may be an address or a username)
+        sender_address (str): The sender's wallet address (must match the configured private key)
+        journal_path (str): Optional journal file. Running the same payouts again with the same
+            journal resumes an interrupted run without paying anyone twice
+
+    Returns:
+        dict: status, per-row results and totals or error msg.
+    """
+    private_key = session_store.private_key()
+    
+    if private_key is None:
+        return {
+            "status": "no_key",
+            "error_message": "No private key set. Please set a private key using set_private_key() to enable transaction signing."
+        }
+    
+    try:
+        if not w3.is_address(sender_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid sender address: {sender_address}"
+            }
+        
+        account = signer.account(private_key)
+        if account.address != w3.to_checksum_address(sender_address):
+            return {
+                "status": "error",
+                "error_message": f"Sender address {sender_address} does not match the configured private key ({account.address})"
+            }
+        
+        rows = parse_payouts(payouts)
+        if not rows:
+            return {
+                "status": "error",
+                "error_message": "No payouts found. Provide a JSON list or CSV with recipient, amount_ton and remarks."
+            }
+        
+        # Resolve all usernames from the cache, fetching the rest in one batched lookup
+        usernames = sorted({row["username"] for row in rows if row["username"] and not row["error"]})
+        resolved = username_cache.resolve_usernames(
+            usernames,
+            chunk_size=TRANSFER_DETAILS_BATCH_SIZE,
+            multicall_address=MULTICALL_ADDRESS
+        )
+        
+        # Validate every row before anything is signed
+        for row in rows:
+            if row["error"]:
+                continue
+            if row["username"]:
+                if resolved.get(row["username"]) is None:
+                    row["error"] = f"Username '{row['username']}' is not registered on mainnet"
+                else:
+                    row["recipient"] = resolved[row["username"]]
+            elif not w3.is_address(row["recipient"]):
+                row["error"] = f"Invalid recipient address: {row['recipient']}"
+            else:
+                row["recipient"] = w3.to_checksum_address(row["recipient"])
+            if not row["error"] and row["recipient"] == account.address:
+                row["error"] = "Cannot send to yourself"
+        
+        invalid_rows = [{"row": row["row"], "error": row["error"]} for row in rows if row["error"]]
+        if invalid_rows:
+            return {
+                "status": "error",
+                "error_message": f"{len(invalid_rows)} of {len(rows)} payout rows are invalid. Nothing was sent.",
+                "invalid_rows": invalid_rows
+            }
+        
+        fingerprint = payout_fingerprint(account.address, rows)
+        journal = PayoutJournal(journal_path, fingerprint) if journal_path else MemoryJournal(fingerprint)
+        
+        def broadcast(row: dict) -> bool:
+            entry = journal.state(row["row"])
+            try:
+                w3.eth.send_raw_transaction(HexBytes(entry["raw_transaction"]))
+            except Exception as send_error:
+                # After a crash the transaction may already have been accepted or mined
+                try:
+                    w3.eth.get_transaction(entry["tx_hash"])
+                except Exception:
+                    journal.record(row["row"], JOURNAL_SEND_FAILED, error=str(send_error))
+                    return False
+            journal.record(row["row"], JOURNAL_SUBMITTED, error=None)
+            return True
+        
+        # A failed broadcast may still have reached a node (timeout, failover), so its row keeps the journaled
+        # nonce and bytes; it is re-signed at a new nonce only once the chain shows that nonce went to another
+        # transaction (a transaction at a mined nonce without a receipt can never be mined)
+        to_sign = [row for row in rows if journal.state(row["row"]) is None]
+        to_broadcast = [row for row in rows if (journal.state(row["row"]) or {}).get("type") == JOURNAL_SIGNED]
+        failed_rows = [row for row in rows if (journal.state(row["row"]) or {}).get("type") == JOURNAL_SEND_FAILED]
+        if failed_rows:
+            mined_count = w3.eth.get_transaction_count(account.address, "latest")
+            for row in failed_rows:
+                entry = journal.state(row["row"])
+                if entry.get("nonce") is None or not entry.get("raw_transaction"):
+                    to_sign.append(row)
+                elif entry["nonce"] >= mined_count:
+                    to_broadcast.append(row)
+                else:
+                    try:
+                        w3.eth.get_transaction_receipt(entry["tx_hash"])
+                    except TransactionNotFound:
+                        to_sign.append(row)
+                    else:
+                        journal.record(row["row"], JOURNAL_SUBMITTED, error=None)
+            to_sign.sort(key=lambda row: row["row"])
+        
+        # Resume: broadcast the journaled transactions one at a time in nonce order before signing anything
+        # new, stopping at the first failure (later nonces would be stuck behind it until the next run)
+        resume_failed = False
+        if to_broadcast:
+            to_broadcast.sort(key=lambda row: journal.state(row["row"])["nonce"])
+            for row in to_broadcast:
+                if not broadcast(row):
+                    resume_failed = True
+                    break
+            # New reservations must not reuse the nonces these transactions hold
+            nonce_manager.resync(account.address)
+        
+        # Sign every row that has no transaction that can still be mined, with sequential nonces
+        if to_sign and not resume_failed:
+            values = [row["amount_wei"] for row in to_sign]
+            
+            # One gas limit for the row with the longest remarks, applied to every row
+            sample_index = max(range(len(to_sign)), key=lambda i: len(to_sign[i]["remarks"].encode('utf-8')))
+            try:
+                gas_limit, _, gas_source = gas_oracle.gas_limit(
+                    contract.functions.sendToAddress(to_sign[sample_index]["recipient"], to_sign[sample_index]["remarks"]),
+                    {'from': account.address, 'value': values[sample_index]}
+                )
+            except Exception as gas_error:
+                logger.warning("Gas estimation of sendToAddress failed: %s, using default gas limit", gas_error)
+                gas_limit = 500000
+                gas_source = "default"
+            metrics.record_event("gas_limit", gas_source)
+            
+            try:
+                gas_price = gas_oracle.gas_price()
+                metrics.record_event("gas_price", "node")
+            except Exception as price_error:
+                logger.warning("Gas price fetch failed: %s, using default gas price", price_error)
+                metrics.record_event("gas_price", "default")
+                gas_price = w3.to_wei('20', 'gwei')
+            
+            total_cost = sum(values) + gas_limit * gas_price * len(to_sign)
+            balance = w3.eth.get_balance(account.address)
+            if balance < total_cost:
+                return {
+                    "status": "error",
+                    "error_message": f"Insufficient balance for payout: need {format_ton(total_cost)} TON including gas, have {format_ton(balance)} TON. Nothing was sent.",
+                    "required_wei": total_cost,
+                    "balance_wei": balance
+                }
+            
+            nonces = nonce_manager.reserve_many(account.address, len(to_sign))
+            transactions = [
+                contract.functions.sendToAddress(row["recipient"], row["remarks"]).build_transaction({
+                    'from': account.address,
+                    'value': value_wei,
+                    'gas': gas_limit,
+                    'gasPrice': gas_price,
+                    'nonce': nonce,
+                    'chainId': 5545  # DuckChain chain ID
+                })
+                for row, value_wei, nonce in zip(to_sign, values, nonces)
+            ]
+            
+            # One sender thread broadcasts in nonce order, each send only after the node accepted the previous
+            # nonce. After the first failure later rows stay journaled as signed and are sent by the next run
+            stop_sending = [False]
+            
+            def broadcast_new(row_and_nonce) -> None:
+                row, nonce = row_and_nonce
+                if stop_sending[0]:
+                    return
+                if broadcast(row):
+                    nonce_manager.confirm(account.address, nonce)
+                else:
+                    stop_sending[0] = True
+            
+            # Signatures arrive in nonce order (from the signer's worker processes for large batches);
+            # each is journaled, then queued for the sender while the rest are still being signed
+            with ThreadPoolExecutor(max_workers=1) as sender:
+                send_queue = []
+                for row, nonce, signed_txn in zip(to_sign, nonces, signer.iter_sign(transactions, private_key)):
+                    journal.record(
+                        row["row"], JOURNAL_SIGNED,
+                        nonce=nonce,
+                        tx_hash="0x" + signed_txn.hash.hex().removeprefix("0x"),
+                        raw_transaction="0x" + signed_txn.raw_transaction.hex().removeprefix("0x"),
+                        error=None
+                    )
+                    send_queue.append(sender.submit(broadcast_new, (row, nonce)))
+                for sent in send_queue:
+                    sent.result()
+            
+            if stop_sending[0]:
+                for row, nonce in zip(to_sign, nonces):
+                    if journal.state(row["row"])["type"] != JOURNAL_SUBMITTED:
+                        nonce_manager.release(account.address, nonce, resync=True)
+        
+        # Track receipts of everything submitted
+        tracking_ids = {}
+        for row in rows:
+            entry = journal.state(row["row"]) or {}
+            if entry.get("type") == JOURNAL_SUBMITTED:
+                tracking_ids[row["row"]] = transaction_tracker.track(
+                    entry["tx_hash"],
+                    from_address=account.address,
+                    nonce=entry["nonce"],
+                    function_name="sendToAddress",
+                    network="mainnet"
+                )
+        
+        if session_store.get().wait_for_confirmation and tracking_ids:
+            deadline = time.time() + BULK_PAYOUT_RECEIPT_TIMEOUT
+            for row_index, tracking_id in tracking_ids.items():
+                record = transaction_tracker.wait(tracking_id, timeout=max(0, deadline - time.time()))
+                if record["status"] == "confirmed":
+                    journal.record(row_index, JOURNAL_CONFIRMED, block_number=record["block_number"])
+                elif record["status"] == "failed":
+                    journal.record(row_index, JOURNAL_REVERTED, error=record.get("error_message"))
+        
+        # Per-row report
+        row_status = {
+            JOURNAL_CONFIRMED: "confirmed",
+            JOURNAL_SUBMITTED: "submitted",
+            JOURNAL_REVERTED: "reverted",
+            JOURNAL_SEND_FAILED: "failed",
+            JOURNAL_SIGNED: "not_sent",
+            None: "not_sent"
+        }
+        results = []
+        for row in rows:
+            entry = journal.state(row["row"]) or {}
+            results.append({
+                "row": row["row"],
+                "recipient": row["recipient"],
+                "username": row["username"],
+                "amount_ton": str(row["amount_ton"]),
+                "remarks": row["remarks"],
+                "status": row_status[entry.get("type")],
+                "transaction_hash": entry.get("tx_hash"),
+                "nonce": entry.get("nonce"),
+                "error_message": entry.get("error")
+            })
+        
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        sent_wei = sum(row["amount_wei"] for row, result in zip(rows, results) if result["status"] in ("confirmed", "submitted"))
+        
+        # Reverted rows were mined and used their nonce; they are final and never re-signed by a resume
+        retryable = counts.get("failed", 0) + counts.get("not_sent", 0)
+        reverted = counts.get("reverted", 0)
+        failed = retryable + reverted
+        report = f"Bulk payout of {len(rows)} rows: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        if retryable and journal_path:
+            report += f". Run again with journal '{journal_path}' to retry the {retryable} rows that were not sent"
+        if reverted:
+            report += f". {reverted} rows reverted on chain and will not be retried"
+        
+        return {
+            "status": "error" if failed else "success",
+            "report": report,
+            "error_message": f"{failed} payout rows were not completed" if failed else None,
+            "results": results,
+            "counts": counts,
+            "total_sent_ton": format_ton(sent_wei),
+            "from_address": account.address,
+            "journal_path": journal_path,
+            "network": "mainnet"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error running bulk payout: {str(e)}"
+        }
+
+
+# Cache counters exported with the tool and RPC metrics (recording starts with metrics.enable())
+metrics.register_collector("username_cache", username_cache.stats)
+metrics.register_collector("price_cache", price_cache.stats)
+metrics.register_collector("gas_oracle", gas_oracle.stats)
+metrics.register_collector("transaction_simulator", transaction_simulator.stats)
+metrics.register_collector("read_cache", read_cache.stats)
+
+# Tools without side effects, run concurrently when the model calls several in one turn
+# (every other tool is mutating and runs one at a time per session, in call order)
+READ_ONLY_TOOLS = frozenset({
+    "get_token_price",
+    "convert_eth_wei",
+    "validate_ethereum_address",
+    "calculate_gas_cost",
+    "get_ton_balance",
+    "get_multiple_balances",
+    "get_balances",
+    "get_user_network_preference",
+    "get_wallet_info",
+    "get_transaction_status",
+    "explain_protectedpay_networks",
+    "get_user_by_username",
+    "get_user_by_address",
+    "get_user_transfers",
+    "get_user_portfolio",
+    "get_user_group_payments",
+    "get_user_savings_pots",
+    "get_pending_claims",
+})
+
+# Read-only tool calls in flight at once per event loop (threads for the synchronous ones)
+TOOL_DISPATCH_MAX_WORKERS = 8
+
+# Seconds a read-only tool may run before it is cancelled, and per-tool overrides
+READ_TOOL_TIMEOUT = 30
+READ_TOOL_TIMEOUTS = {
+    "get_balances": 120,
+    "get_user_portfolio": 60,
+    "get_pending_claims": 60,
+}
 
-root_agent = Agent(
-    name="crypto_web3_agent",
-    model="gemini-2.0-flash",
-    description=(
-        "Agent to answer questions about cryptocurrency prices, ETH/Wei conversions, address validation, and gas calculations."
-    ),
-    instruction=(
-        "You are a helpful agent specialized in cryptocurrency and blockchain operations. You can:\n"
-        "1. Fetch current cryptocurrency prices in USD using the Coinbase API\n"
-        "2. Convert between ETH and Wei using web3.py utilities\n"
-        "3. Validate Ethereum addresses and provide checksummed versions\n"
-        "4. Calculate gas costs for Ethereum transactions\n\n"
-        "You can handle various token symbols like BTC, ETH, TON, USDC, USDT, DUCK, and many others. "
-        "You can also understand common token names like 'bitcoin' for BTC, 'ethereum' for ETH, 'ton' for TON, etc. "
-        "For web3 operations, always provide clear explanations of the conversions and calculations.\n\n"
-        "5. Manage private keys and execute transactions:\n"
-        "- Set private key for transaction signing\n"
-        "- Get wallet information and address\n"
-        "- Clear private key for security\n"
-        "- Execute actual blockchain transactions (not just simulate them)\n\n"
-        "6. Interact with the ProtectedPay smart contract on DuckChain:\n"
-        "- Set network preference (mainnet) - will remember your choice\n"
-        "- Register usernames (executes transaction)\n"
-        "- Send TON to addresses or usernames (executes transaction)\n" 
-        "- Look up users by username or address\n"
-        "- Get user transfer history\n"
-        "- Create and manage group payments (executes transaction)\n"
-        "- Create and manage savings pots (executes transaction)\n"
-        "- Claim transfers, contribute to payments/pots, and handle refunds (executes transaction)\n\n"
-        "7. Check TON balances:\n"
-        "- Get TON balance on DuckChain for any address\n"
-        "- Validate addresses and provide checksummed versions\n\n"
-        "IMPORTANT: For write operations (transfers, registrations, etc.), you need to set a private key first using set_private_key(). The agent will then execute actual blockchain transactions and return transaction hashes and receipts."
-    ),
-    tools=[
-        get_token_price, 
-        convert_eth_wei, 
-        validate_ethereum_address, 
-        calculate_gas_cost,
-        get_ton_balance,
-        get_multiple_balances,
-        set_user_network_preference,
-        get_user_network_preference,
-        set_private_key,
-        get_wallet_info,
-        clear_private_key,
-        explain_protectedpay_networks,
-        register_username,
-        send_to_address,
-        send_to_username,
-        get_user_by_username,
-        get_user_by_address,
-        get_user_transfers,
-        create_group_payment,
-        create_savings_pot,
-        claim_transfer_by_id,
-        claim_transfer_by_username,
-        claim_transfer_by_address,
-        contribute_to_group_payment,
-        contribute_to_savings_pot,
-        refund_transfer
-    ],
-)
\ No newline at end of file
+# Concurrent dispatch of the read-only tools and ordered dispatch of the mutating ones
+tool_dispatcher = ToolDispatcher(
+    READ_ONLY_TOOLS,
+    max_workers=TOOL_DISPATCH_MAX_WORKERS,
+    timeouts=READ_TOOL_TIMEOUTS,
+    default_timeout=READ_TOOL_TIMEOUT
+)
+metrics.register_collector("tool_dispatcher", tool_dispatcher.stats)
+
+@functools.lru_cache(maxsize=None)
+def build_root_agent():
+    """Build the agent on first access to root_agent.
+    
+    Importing google.adk's LlmAgent is the slowest part of startup, so it is
+    deferred until the agent is actually needed. The async read tools are
+    registered here rather than imported with this module, since async_tools
+    imports it.
+    
+    Returns:
+        Agent: the ProtectedPay agent
+    """
+    from google.adk.agents import Agent
+    
+    from . import async_tools
+    
+    return Agent(
+        name="crypto_web3_agent",
+        model="gemini-2.0-flash",
+        description=(
+            "Agent to answer questions about cryptocurrency prices, ETH/Wei conversions, address validation, and gas calculations."
+        ),
+        instruction=(
+            "You are a helpful agent specialized in cryptocurrency and blockchain operations. You can:\n"
+            "1. Fetch current cryptocurrency prices in USD using the Coinbase API\n"
+            "2. Convert between ETH and Wei using web3.py utilities\n"
+            "3. Validate Ethereum addresses and provide checksummed versions\n"
+            "4. Calculate gas costs for Ethereum transactions\n\n"
+            "You can handle various token symbols like BTC, ETH, TON, USDC, USDT, DUCK, and many others. "
+            "You can also understand common token names like 'bitcoin' for BTC, 'ethereum' for ETH, 'ton' for TON, etc. "
+            "For web3 operations, always provide clear explanations of the conversions and calculations.\n\n"
+            "5. Manage private keys and execute transactions:\n"
+            "- Set private key for transaction signing\n"
+            "- Get wallet information and address\n"
+            "- Clear private key for security\n"
+            "- Execute actual blockchain transactions (not just simulate them)\n"
+            "- Optionally submit transactions without waiting for confirmation and check them later with get_transaction_status\n\n"
+            "6. Interact with the ProtectedPay smart contract on DuckChain:\n"
+            "- Set network preference (mainnet) - will remember your choice\n"
+            "- Register usernames (executes transaction)\n"
+            "- Send TON to addresses or usernames (executes transaction)\n" 
+            "- Pay many addresses or usernames at once from a JSON or CSV list with send_bulk_payout (executes transactions)\n" 
+            "- Look up users by username or address\n"
+            "- Check balances for many addresses at once with get_balances (optionally at a past block)\n"
+            "- Get user transfer history a page at a time (pass next_offset for the next page), filtered by status, direction, time range or amount\n"
+            "- List a user's group payments and savings pots with full details (get_user_portfolio for both at once)\n"
+            "- Create and manage group payments (executes transaction)\n"
+            "- Create and manage savings pots (executes transaction)\n"
+            "- Claim transfers, contribute to payments/pots, and handle refunds (executes transaction)\n"
+            "- List every pending transfer waiting for a user with get_pending_claims, and claim them all at once with claim_all_pending_transfers (executes transactions)\n\n"
+            "7. Check TON balances:\n"
+            "- Get TON balance on DuckChain for any address\n"
+            "- Validate addresses and provide checksummed versions\n\n"
+            "IMPORTANT: For write operations (transfers, registrations, etc.), you need to set a private key first using set_private_key(). The agent will then execute actual blockchain transactions and return transaction hashes and receipts."
+        ),
+        tools=[instrument_tool(bind_session(tool_dispatcher.wrap(tool), SESSION_SCOPE)) for tool in (
+            async_tools.get_token_price, 
+            convert_eth_wei, 
+            validate_ethereum_address, 
+            calculate_gas_cost,
+            async_tools.get_ton_balance,
+            async_tools.get_multiple_balances,
+            async_tools.get_balances,
+            set_user_network_preference,
+            get_user_network_preference,
+            set_private_key,
+            get_wallet_info,
+            clear_private_key,
+            set_transaction_confirmation_mode,
+            get_transaction_status,
+            explain_protectedpay_networks,
+            register_username,
+            send_to_address,
+            send_to_username,
+            send_bulk_payout,
+            async_tools.get_user_by_username,
+            async_tools.get_user_by_address,
+            async_tools.get_user_transfers,
+            async_tools.get_user_portfolio,
+            async_tools.get_user_group_payments,
+            async_tools.get_user_savings_pots,
+            create_group_payment,
+            create_savings_pot,
+            claim_transfer_by_id,
+            claim_transfer_by_username,
+            claim_transfer_by_address,
+            async_tools.get_pending_claims,
+            claim_all_pending_transfers,
+            contribute_to_group_payment,
+            contribute_to_savings_pot,
+            refund_transfer
+        )],
+    )
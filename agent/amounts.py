@@ -0,0 +1,134 @@
+"""Exact TON amount parsing and wei conversion.
+
+Amounts are carried as integer wei everywhere; TON values are only parsed
+from the user's text and formatted for output. ``parse_ton`` converts a TON
+amount (text, int or Decimal) to wei without going through a float or a
+Decimal context: plain decimal strings are split at the point and scaled
+with integer arithmetic, and only exponent notation falls back to Decimal
+(read digit by digit, so no rounding). Amounts with more than 18 decimal
+places are rejected instead of truncated, and so are digit separators
+("1_000").
+
+``parse_ton_many`` and ``wei_to_ton_many`` convert whole lists (bulk payouts,
+balance sheets) in one pass, and ``format_ton`` renders wei as an exact
+decimal string for reports.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+
+# Decimal places of TON (wei per TON = 10 ** TON_DECIMALS)
+TON_DECIMALS = 18
+WEI_PER_TON = 10 ** TON_DECIMALS
+
+# Largest amount accepted: the uint256 range of msg.value
+MAX_WEI = 2 ** 256 - 1
+
+# Plain decimal notation: optional sign, digits with an optional fraction
+_PLAIN_AMOUNT = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
+
+
+def _check_range(amount_wei: int, amount) -> int:
+    if amount_wei < 0:
+        raise ValueError(f"Invalid TON amount: '{amount}' is negative")
+    if amount_wei > MAX_WEI:
+        raise ValueError(f"Invalid TON amount: '{amount}' is too large")
+    return amount_wei
+
+
+def _decimal_to_wei(amount: Decimal, original) -> int:
+    if not amount.is_finite():
+        raise ValueError(f"Invalid TON amount: '{original}'")
+    sign, digits, exponent = amount.as_tuple()
+    scale = exponent + TON_DECIMALS
+    value = int("".join(map(str, digits)) or "0")
+    if not value:
+        return 0
+    # Bound the exponent before scaling ("1e1000000" must not build a million-digit integer)
+    if len(digits) + scale > len(str(MAX_WEI)):
+        raise ValueError(f"Invalid TON amount: '{original}' is too large")
+    if -scale > len(digits):
+        raise ValueError(f"Invalid TON amount: '{original}' has more than {TON_DECIMALS} decimal places")
+    if scale >= 0:
+        value *= 10 ** scale
+    else:
+        value, remainder = divmod(value, 10 ** -scale)
+        if remainder:
+            raise ValueError(f"Invalid TON amount: '{original}' has more than {TON_DECIMALS} decimal places")
+    return _check_range(-value if sign else value, original)
+
+
+def parse_ton(amount) -> int:
+    """Convert a TON amount to wei exactly.
+
+    Args:
+        amount: TON as text ("1.5", "0.000000000000000001", "2e-3"), int or Decimal
+
+    Returns:
+        int: the amount in wei
+
+    Raises:
+        ValueError: if the amount is not a number, is negative, has more than 18 decimal places or exceeds uint256
+    """
+    if isinstance(amount, bool):
+        raise ValueError(f"Invalid TON amount: '{amount}'")
+    if isinstance(amount, int):
+        return _check_range(amount * WEI_PER_TON, amount)
+    if isinstance(amount, Decimal):
+        return _decimal_to_wei(amount, amount)
+    if isinstance(amount, float):
+        # The shortest repr is the value the caller wrote
+        amount = repr(amount)
+
+    text = str(amount).strip() if amount is not None else ""
+    # Decimal() and int() accept digit separators ("1_000"), which are not an amount format
+    if "_" in text:
+        raise ValueError(f"Invalid TON amount: '{amount}'")
+    match = _PLAIN_AMOUNT.fullmatch(text)
+    if match is not None and (match.group(2) or match.group(3)):
+        sign, whole, fraction = match.groups()
+        fraction = (fraction or "").rstrip("0")
+        if len(fraction) > TON_DECIMALS:
+            raise ValueError(f"Invalid TON amount: '{amount}' has more than {TON_DECIMALS} decimal places")
+        value = int(whole or "0") * WEI_PER_TON + int(fraction.ljust(TON_DECIMALS, "0"))
+        return _check_range(-value if sign == "-" else value, amount)
+    try:
+        return _decimal_to_wei(Decimal(text), amount)
+    except InvalidOperation:
+        raise ValueError(f"Invalid TON amount: '{amount}'") from None
+
+
+def parse_ton_many(amounts) -> list:
+    """Convert many TON amounts to wei (see parse_ton).
+
+    Raises:
+        ValueError: for the first invalid amount, naming its position
+    """
+    parse = parse_ton
+    values = []
+    append = values.append
+    for position, amount in enumerate(amounts):
+        try:
+            append(parse(amount))
+        except ValueError as e:
+            raise ValueError(f"Amount {position}: {e}") from None
+    return values
+
+
+def wei_to_ton(amount_wei: int) -> float:
+    """TON as a float for tool output (correctly rounded, without a Decimal context)."""
+    return amount_wei / WEI_PER_TON
+
+
+def wei_to_ton_many(amounts_wei) -> list:
+    """TON floats of many wei amounts."""
+    return [amount_wei / WEI_PER_TON for amount_wei in amounts_wei]
+
+
+def format_ton(amount_wei: int) -> str:
+    """Exact decimal string of a wei amount in TON ("1.5", "0.000000000000000001", "3")."""
+    sign = "-" if amount_wei < 0 else ""
+    whole, fraction = divmod(abs(amount_wei), WEI_PER_TON)
+    if not fraction:
+        return f"{sign}{whole}"
+    return f"{sign}{whole}.{str(fraction).rjust(TON_DECIMALS, '0').rstrip('0')}"
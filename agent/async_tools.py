@@ -0,0 +1,540 @@
+"""Async versions of the ProtectedPay read tools.
+
+These are the read tools registered with the agent. They use ``async_w3``
+(AsyncWeb3 over one shared aiohttp session per event loop) so RPC calls do
+not block the agent runtime's event loop, and share the caches, local event
+index and result builders of ``shared.py`` with the synchronous tools in
+``agent.py``. Each function keeps the name, arguments and result of its
+synchronous counterpart.
+"""
+
+from typing import Optional
+
+from web3 import Web3
+
+from . import agent as _agent
+from .agent import (
+    DUCKCHAIN_RPC,
+    MAX_TRANSFER_PAGE_SIZE,
+    TRANSFER_DETAILS_BATCH_SIZE,
+    TRANSFER_PAGE_SIZE,
+    iter_user_transfers,
+)
+from .amounts import format_ton, wei_to_ton
+from .balances import aiter_balances, normalize_addresses, parse_address_list
+from .multicall import async_batch_call
+from .portfolio import aload_portfolio
+from .shared import (
+    balances_result,
+    get_async_session,
+    get_fresh_index,
+    normalize_token_symbol,
+    pending_claims_result,
+    portfolio_result,
+    price_cache,
+    transfers_page_result,
+    TransferScan,
+    username_cache,
+)
+from .transfer_filters import build_transfer_filters
+
+
+async def _get_async_w3():
+    """async_w3 with the running event loop's shared session attached."""
+    await get_async_session()
+    return _agent.async_w3
+
+
+async def get_token_price(token_symbol: str) -> dict:
+    """Retrieves the current price of a cryptocurrency token in USD.
+
+    Args:
+        token_symbol (str): The symbol of the cryptocurrency token (e.g., 'BTC', 'ETH', 'TON').
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        # Convert common token names to symbols
+        token_symbol = normalize_token_symbol(token_symbol)
+
+        try:
+            price, currency = await price_cache.aget(token_symbol)
+        except LookupError as not_found:
+            return {
+                "status": "error",
+                "error_message": str(not_found)
+            }
+
+        return {
+            "status": "success",
+            "report": f"The current price of {token_symbol} is ${price:,.2f} {currency}",
+            "token": token_symbol,
+            "price": price,
+            "currency": currency
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Failed to fetch price for '{token_symbol}': {str(e)}"
+        }
+
+
+async def get_ton_balance(address: str, network: str = "mainnet") -> dict:
+    """Get TON balance for an address on DuckChain.
+
+    Args:
+        address (str): The wallet address to check balance for
+        network (str): Must be "mainnet" (default: mainnet)
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        address = address.strip()
+        network = network.lower().strip()
+
+        # Validate address format
+        if not Web3.is_address(address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid address format: {address}"
+            }
+
+        # Validate network - only mainnet supported
+        if network != "mainnet":
+            return {
+                "status": "error",
+                "error_message": f"Only mainnet is supported. Got: {network}"
+            }
+
+        # Get checksummed address
+        checksum_address = Web3.to_checksum_address(address)
+
+        # Get balance in Wei (connection failures surface as errors, no separate probe)
+        async_w3 = await _get_async_w3()
+        balance_wei = await async_w3.eth.get_balance(checksum_address)
+
+        return {
+            "status": "success",
+            "report": f"Balance on DuckChain: {format_ton(balance_wei)} TON",
+            "address": checksum_address,
+            "network": "DuckChain",
+            "chain_id": 5545,
+            "balance_wei": balance_wei,
+            "balance_ton": wei_to_ton(balance_wei),
+            "currency_symbol": "TON",
+            "rpc_url": DUCKCHAIN_RPC
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching balance for {address} on {network}: {str(e)}"
+        }
+
+
+async def get_multiple_balances(address: str) -> dict:
+    """Get TON balance for an address on DuckChain.
+
+    Args:
+        address (str): The wallet address to check balance for
+
+    Returns:
+        dict: status and result for mainnet or error msg.
+    """
+    try:
+        address = address.strip()
+
+        # Validate address format
+        if not Web3.is_address(address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid address format: {address}"
+            }
+
+        checksum_address = Web3.to_checksum_address(address)
+
+        # Get balance on mainnet only
+        balance_result = await get_ton_balance(address, "mainnet")
+
+        if balance_result["status"] == "success":
+            report = f"Balance for {checksum_address} on DuckChain: {balance_result['balance_ton']} TON"
+
+            return {
+                "status": "success",
+                "report": report,
+                "address": checksum_address,
+                "balances": {"mainnet": balance_result}
+            }
+        else:
+            return {
+                "status": "error",
+                "error_message": f"Failed to fetch balance on mainnet for {checksum_address}: {balance_result['error_message']}",
+                "address": checksum_address,
+                "balances": {"mainnet": balance_result}
+            }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching balances for {address}: {str(e)}"
+        }
+
+
+async def get_user_by_username(username: str, network: Optional[str] = None) -> dict:
+    """Get the address associated with a username.
+
+    Args:
+        username (str): The username to look up
+        network (str): Network to use (only "mainnet" is supported)
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        # Check which network to use
+        network_check = _agent.check_network_for_transaction(network)
+        if network_check["status"] == "error":
+            return network_check
+
+        # Answer from the local event index when it is up to date
+        index = get_fresh_index()
+        if index is not None:
+            address = index.get_address_by_username(username)
+        else:
+            address = await username_cache.lookup_address_async(await _get_async_w3(), _agent.async_contract, username)
+
+        if not address:
+            return {
+                "status": "error",
+                "error_message": f"Username '{username}' is not registered on mainnet"
+            }
+
+        return {
+            "status": "success",
+            "report": f"Username '{username}' is registered to address: {address} on mainnet",
+            "username": username,
+            "address": address,
+            "network": "mainnet",
+            "contract_address": _agent.PROTECTEDPAY_CONTRACT_ADDRESS
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error looking up username '{username}': {str(e)}"
+        }
+
+
+async def get_user_by_address(user_address: str, network: Optional[str] = None) -> dict:
+    """Get the username associated with an address (mainnet).
+
+    Args:
+        user_address (str): The wallet address to look up
+        network (str): Network to use (must be "mainnet" or None)
+
+    Returns:
+        dict: status and result or error msg.
+    """
+    try:
+        # Only mainnet is supported
+        if network is not None and network.lower() != "mainnet":
+            return {
+                "status": "error",
+                "error_message": "Only mainnet is supported for ProtectedPay operations."
+            }
+
+        if not Web3.is_address(user_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid address format: {user_address}"
+            }
+
+        # Answer from the local event index when it is up to date
+        index = get_fresh_index()
+        if index is not None:
+            username = index.get_username_by_address(user_address)
+        else:
+            username = await username_cache.lookup_username_async(await _get_async_w3(), _agent.async_contract, user_address)
+
+        if not username:
+            return {
+                "status": "error",
+                "error_message": f"No username registered for address {user_address} on mainnet"
+            }
+
+        return {
+            "status": "success",
+            "report": f"Address {user_address} is registered with username: '{username}' on mainnet",
+            "address": user_address,
+            "username": username,
+            "network": "mainnet",
+            "contract_address": _agent.PROTECTEDPAY_CONTRACT_ADDRESS
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error looking up address {user_address}: {str(e)}"
+        }
+
+
+async def aiter_user_transfers(user_address: str, offset: int = 0, limit: Optional[int] = None,
+                               filters: Optional[dict] = None, batch_size: int = TRANSFER_DETAILS_BATCH_SIZE):
+    """Async version of iter_user_transfers (an async generator)."""
+    index = get_fresh_index()
+    if index is not None:
+        # The index is local, nothing to await
+        for transfer in iter_user_transfers(user_address, offset, limit, filters, batch_size):
+            yield transfer
+        return
+
+    user_address = Web3.to_checksum_address(user_address)
+    scan = TransferScan(user_address, offset, limit, filters, batch_size)
+    if scan.done:
+        return
+
+    async_w3 = await _get_async_w3()
+    async_contract = _agent.async_contract
+
+    # First get the user profile to get the actual transfer IDs
+    try:
+        transfer_ids = (await async_contract.functions.getUserProfile(user_address).call())[1]
+    except Exception as profile_error:
+        # Fallback to old method if getUserProfile fails
+        transfers = await async_contract.functions.getUserTransfers(user_address).call()
+        for record in scan.legacy_records(transfers, profile_error):
+            yield record
+        return
+
+    chunk_ids = scan.next_chunk(transfer_ids)
+    while chunk_ids:
+        detail_results = await async_batch_call(
+            async_w3,
+            [async_contract.functions.getTransferDetails(transfer_id_bytes) for transfer_id_bytes in chunk_ids],
+            chunk_size=batch_size,
+            multicall_address=_agent.MULTICALL_ADDRESS
+        )
+        for record in scan.chunk_records(chunk_ids, detail_results):
+            yield record
+        chunk_ids = scan.next_chunk(transfer_ids)
+
+
+async def get_user_transfers(user_address: str, network: Optional[str] = None, offset: int = 0,
+                             limit: int = TRANSFER_PAGE_SIZE, status: Optional[str] = None,
+                             direction: Optional[str] = None, start_time: Optional[int] = None,
+                             end_time: Optional[int] = None, min_amount_ton: Optional[str] = None,
+                             max_amount_ton: Optional[str] = None) -> dict:
+    """Get one page of transfers for a specific user address (mainnet), optionally filtered.
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+        offset (int): Position in the transfer history to start from (use next_offset from the previous page)
+        limit (int): Maximum number of transfers to return (default 25, at most 100)
+        status (str): Only transfers with this status: "Pending", "Completed" or "Cancelled"
+        direction (str): Only "sent" or "received" transfers
+        start_time (int): Only transfers at or after this unix timestamp
+        end_time (int): Only transfers at or before this unix timestamp
+        min_amount_ton (str): Only transfers of at least this many TON
+        max_amount_ton (str): Only transfers of at most this many TON
+
+    Returns:
+        dict: status, transfers and next_offset (None when there are no more) or error msg.
+    """
+    try:
+        # Only mainnet is supported
+        if network is not None and network.lower() != "mainnet":
+            return {
+                "status": "error",
+                "error_message": "Only mainnet is supported for ProtectedPay operations."
+            }
+
+        if not Web3.is_address(user_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid address format: {user_address}"
+            }
+
+        if offset < 0 or limit < 1 or limit > MAX_TRANSFER_PAGE_SIZE:
+            return {
+                "status": "error",
+                "error_message": f"offset must be 0 or more and limit between 1 and {MAX_TRANSFER_PAGE_SIZE}"
+            }
+
+        try:
+            filters = build_transfer_filters(status, direction, start_time, end_time, min_amount_ton, max_amount_ton)
+        except ValueError as filter_error:
+            return {
+                "status": "error",
+                "error_message": str(filter_error)
+            }
+
+        source = "local_index" if get_fresh_index() is not None else None
+        transfer_list = [
+            transfer async for transfer in aiter_user_transfers(user_address, offset=offset, limit=limit, filters=filters)
+        ]
+        return transfers_page_result(user_address, transfer_list, offset, limit, filters,
+                                     _agent.PROTECTEDPAY_CONTRACT_ADDRESS, source=source)
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching transfers for {user_address}: {str(e)}"
+        }
+
+
+async def get_pending_claims(claimer_address: str, network: Optional[str] = None) -> dict:
+    """List every pending transfer an address can claim (mainnet).
+
+    Args:
+        claimer_address (str): The recipient's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+
+    Returns:
+        dict: status, pending_transfers and total_pending_ton or error msg.
+    """
+    try:
+        # Only mainnet is supported
+        if network is not None and network.lower() != "mainnet":
+            return {
+                "status": "error",
+                "error_message": "Only mainnet is supported for ProtectedPay operations."
+            }
+
+        if not Web3.is_address(claimer_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid claimer address: {claimer_address}"
+            }
+
+        claimer_address = Web3.to_checksum_address(claimer_address)
+        filters = build_transfer_filters(status="Pending", direction="received")
+        pending = [
+            transfer async for transfer in aiter_user_transfers(claimer_address, filters=filters)
+            if not transfer.is_legacy  # Legacy entries have no ID to claim by
+        ]
+        return pending_claims_result(claimer_address, pending, _agent.PROTECTEDPAY_CONTRACT_ADDRESS)
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching pending claims for {claimer_address}: {str(e)}"
+        }
+
+
+async def get_user_portfolio(user_address: str, network: Optional[str] = None, include_group_payments: bool = True,
+                             include_savings_pots: bool = True) -> dict:
+    """Get a user's group payments and savings pots with full details (mainnet).
+
+    Uses one getUserProfile call plus one batched read of all details, however
+    many payments and pots the user has.
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+        include_group_payments (bool): List group payments the user created or joined, with their contribution
+        include_savings_pots (bool): List savings pots the user owns
+
+    Returns:
+        dict: status, group_payments and/or savings_pots, or error msg.
+    """
+    try:
+        # Only mainnet is supported
+        if network is not None and network.lower() != "mainnet":
+            return {
+                "status": "error",
+                "error_message": "Only mainnet is supported for ProtectedPay operations."
+            }
+
+        if not Web3.is_address(user_address):
+            return {
+                "status": "error",
+                "error_message": f"Invalid address format: {user_address}"
+            }
+
+        if not include_group_payments and not include_savings_pots:
+            return {
+                "status": "error",
+                "error_message": "Include group payments, savings pots or both"
+            }
+
+        user_address = Web3.to_checksum_address(user_address)
+        async_w3 = await _get_async_w3()
+        portfolio = await aload_portfolio(
+            async_w3,
+            _agent.async_contract,
+            user_address,
+            group_payments=include_group_payments,
+            savings_pots=include_savings_pots,
+            chunk_size=TRANSFER_DETAILS_BATCH_SIZE,
+            multicall_address=_agent.MULTICALL_ADDRESS
+        )
+        return portfolio_result(user_address, portfolio, include_group_payments, include_savings_pots,
+                                _agent.PROTECTEDPAY_CONTRACT_ADDRESS)
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching portfolio for {user_address}: {str(e)}"
+        }
+
+
+async def get_user_group_payments(user_address: str, network: Optional[str] = None) -> dict:
+    """Get the group payments a user created or contributed to, with their contribution (mainnet).
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+
+    Returns:
+        dict: status and group_payments or error msg.
+    """
+    return await get_user_portfolio(user_address, network, include_group_payments=True, include_savings_pots=False)
+
+
+async def get_user_savings_pots(user_address: str, network: Optional[str] = None) -> dict:
+    """Get the savings pots a user owns, with their progress towards the target (mainnet).
+
+    Args:
+        user_address (str): The user's wallet address
+        network (str): Network to use (must be "mainnet" or None)
+
+    Returns:
+        dict: status and savings_pots or error msg.
+    """
+    return await get_user_portfolio(user_address, network, include_group_payments=False, include_savings_pots=True)
+
+
+async def get_balances(addresses: str, block_number: Optional[int] = None) -> dict:
+    """Get TON balances for many addresses at once on DuckChain.
+
+    Args:
+        addresses (str): Addresses separated by commas, spaces or newlines, or a JSON list
+        block_number (int): Block number to read balances at (default: the current block)
+
+    Returns:
+        dict: status, per-address balances and total or error msg.
+    """
+    try:
+        address_inputs = parse_address_list(addresses)
+        unique_addresses, invalid = normalize_addresses(address_inputs)
+        async_w3 = await _get_async_w3()
+
+        # Read every batch at the same block so the total is a consistent snapshot
+        if block_number is None:
+            block_number = await async_w3.eth.block_number
+
+        results = {}
+        async for address, balance in aiter_balances(
+            async_w3,
+            unique_addresses,
+            block_identifier=block_number,
+            batch_size=_agent.BALANCE_BATCH_SIZE,
+            max_concurrency=_agent.BALANCE_MAX_CONCURRENCY
+        ):
+            results[address] = balance
+        return balances_result(unique_addresses, invalid, len(address_inputs), block_number, results)
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Error fetching balances: {str(e)}"
+        }
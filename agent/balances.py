@@ -0,0 +1,154 @@
+"""Bulk TON balance reads for many addresses.
+
+Addresses are deduplicated and checksummed, then read with ``eth_getBalance``
+in JSON-RPC batches. Several batches are in flight at once and results are
+yielded batch by batch as they arrive, so callers can process thousands of
+addresses without waiting for the slowest batch.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from web3 import Web3
+
+from .instrumentation import metrics
+from .transport import async_batch_rpc_request, batch_rpc_request, to_int
+
+logger = logging.getLogger(__name__)
+
+# eth_getBalance calls per JSON-RPC batch request
+DEFAULT_BATCH_SIZE = 100
+
+# Batch requests in flight at the same time
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+def parse_address_list(addresses) -> list:
+    """Split an address list given as a JSON array, or comma/whitespace separated text.
+
+    Args:
+        addresses: list of strings, or a string in one of the formats above
+
+    Returns:
+        list: address strings as given (not validated)
+    """
+    if isinstance(addresses, str):
+        text = addresses.strip()
+        if text.startswith("["):
+            return [str(address).strip() for address in json.loads(text)]
+        return [address for address in re.split(r"[\s,;]+", text) if address]
+    return [str(address).strip() for address in addresses]
+
+
+def normalize_addresses(addresses) -> tuple:
+    """Checksum and deduplicate addresses, keeping first-seen order.
+
+    Args:
+        addresses: Iterable of address strings
+
+    Returns:
+        tuple: (unique checksummed addresses, invalid inputs)
+    """
+    unique = {}
+    invalid = []
+    for address in addresses:
+        if not Web3.is_address(address):
+            invalid.append(address)
+            continue
+        unique.setdefault(Web3.to_checksum_address(address), None)
+    return list(unique), invalid
+
+
+def block_param(block_identifier) -> str:
+    """JSON-RPC block parameter for a block number, tag or None (latest)."""
+    if block_identifier is None:
+        return "latest"
+    if isinstance(block_identifier, int):
+        return hex(block_identifier)
+    return block_identifier
+
+
+def _chunks(addresses: list, batch_size: int) -> list:
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    return [addresses[start:start + batch_size] for start in range(0, len(addresses), batch_size)]
+
+
+def _batch_balances(w3, chunk: list, block_identifier) -> list:
+    """(address, balance_wei or Exception) for one chunk, one call each if batching fails."""
+    block = block_param(block_identifier)
+    try:
+        results = batch_rpc_request(w3, [("eth_getBalance", [address, block]) for address in chunk])
+    except Exception as batch_error:
+        logger.warning("Batched balance request failed: %s, fetching balances one by one", batch_error)
+        metrics.record_event("balance_batch", "fallback")
+        results = []
+        for address in chunk:
+            try:
+                results.append(w3.eth.get_balance(address, "latest" if block_identifier is None else block_identifier))
+            except Exception as balance_error:
+                results.append(balance_error)
+    return [
+        (address, result if isinstance(result, Exception) else to_int(result))
+        for address, result in zip(chunk, results)
+    ]
+
+
+def iter_balances(w3, addresses: list, block_identifier=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                  max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+    """Yield balances for already normalized addresses, batch by batch as batches complete.
+
+    Args:
+        w3: Web3 instance to read with
+        addresses (list): Unique checksummed addresses (see normalize_addresses)
+        block_identifier: Block number or tag to read at (latest by default)
+        batch_size (int): eth_getBalance calls per batch request
+        max_concurrency (int): Batch requests in flight at once
+
+    Yields:
+        tuple: (address, balance_wei), or (address, Exception) if that read failed
+    """
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="balance-batch") as pool:
+        futures = [pool.submit(_batch_balances, w3, chunk, block_identifier) for chunk in _chunks(addresses, batch_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+async def _async_batch_balances(async_w3, chunk: list, block_identifier) -> list:
+    """Async version of _batch_balances."""
+    block = block_param(block_identifier)
+    try:
+        results = await async_batch_rpc_request(async_w3, [("eth_getBalance", [address, block]) for address in chunk])
+    except Exception as batch_error:
+        logger.warning("Batched balance request failed: %s, fetching balances one by one", batch_error)
+        metrics.record_event("balance_batch", "fallback")
+        results = await asyncio.gather(
+            *(async_w3.eth.get_balance(address, "latest" if block_identifier is None else block_identifier) for address in chunk),
+            return_exceptions=True
+        )
+    return [
+        (address, result if isinstance(result, Exception) else to_int(result))
+        for address, result in zip(chunk, results)
+    ]
+
+
+async def aiter_balances(async_w3, addresses: list, block_identifier=None, batch_size: int = DEFAULT_BATCH_SIZE,
+                         max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+    """Async version of iter_balances for an AsyncWeb3 instance (an async generator)."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(chunk: list) -> list:
+        async with semaphore:
+            return await _async_batch_balances(async_w3, chunk, block_identifier)
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in _chunks(addresses, batch_size)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for result in await next_done:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1 @@
+"""Benchmarks for the ProtectedPay agent (run each module with ``python -m``)."""
@@ -0,0 +1,128 @@
+"""Amount conversion micro-benchmark.
+
+Converts the same seeded TON amounts (payout-sized values with up to 18
+decimal places) with the path the tools used before ``amounts.py`` and with
+the amount module, and reports conversions per second:
+
+* ``to_wei(float)``: ``Web3.to_wei(float(text), 'ether')``, the old path of the
+  send, create and contribute tools
+* ``to_wei(Decimal)``: ``Web3.to_wei(Decimal(text), 'ether')``, the old bulk payout path
+* ``parse_ton`` / ``parse_ton_many``: exact parsing, one amount at a time and as a list
+* ``float(from_wei)`` vs ``wei_to_ton`` and ``str(from_wei)`` vs ``format_ton`` for output
+
+It also counts the amounts the float path converts to the wrong number of wei.
+
+Usage:
+    python -m agent.benchmarks.amounts [--amounts 100000] [--seed 0] [--json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+
+from web3 import Web3
+
+from agent.amounts import format_ton, parse_ton, parse_ton_many, wei_to_ton, wei_to_ton_many
+
+
+def make_amounts(count: int, seed: int = 0) -> list:
+    """TON amounts as text: up to a million TON with 0 to 18 decimal places."""
+    rng = random.Random(seed)
+    amounts = []
+    for _ in range(count):
+        decimals = rng.randint(0, 18)
+        whole = rng.randrange(10 ** rng.randint(0, 6))
+        if decimals:
+            amounts.append(f"{whole}.{rng.randrange(10 ** decimals):0{decimals}d}")
+        else:
+            amounts.append(str(whole))
+    return amounts
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else float("inf")
+
+
+def _timed(function, values) -> tuple:
+    started = time.perf_counter()
+    result = function(values)
+    return result, time.perf_counter() - started
+
+
+def run(amount_count: int = 100000, seed: int = 0) -> dict:
+    """Run the benchmark.
+
+    Args:
+        amount_count (int): Amounts converted by each method
+        seed (int): Seed of the generated amounts
+
+    Returns:
+        dict: conversions per second per method and the float path's wrong conversions
+    """
+    amounts = make_amounts(amount_count, seed)
+
+    float_wei, float_seconds = _timed(lambda values: [Web3.to_wei(float(text), 'ether') for text in values], amounts)
+    decimal_wei, decimal_seconds = _timed(lambda values: [Web3.to_wei(Decimal(text), 'ether') for text in values], amounts)
+    exact_wei, exact_seconds = _timed(lambda values: [parse_ton(text) for text in values], amounts)
+    many_wei, many_seconds = _timed(parse_ton_many, amounts)
+
+    if exact_wei != decimal_wei or many_wei != exact_wei:
+        raise AssertionError("parse_ton disagrees with Web3.to_wei(Decimal)")
+
+    old_floats, from_wei_seconds = _timed(lambda values: [float(Web3.from_wei(wei, 'ether')) for wei in values], exact_wei)
+    new_floats, wei_to_ton_seconds = _timed(wei_to_ton_many, exact_wei)
+    old_text, str_seconds = _timed(lambda values: [str(Web3.from_wei(wei, 'ether')) for wei in values], exact_wei)
+    new_text, format_seconds = _timed(lambda values: [format_ton(wei) for wei in values], exact_wei)
+
+    if new_floats != old_floats or [wei_to_ton(wei) for wei in exact_wei[:100]] != old_floats[:100]:
+        raise AssertionError("wei_to_ton disagrees with float(Web3.from_wei)")
+    if [Decimal(text) for text in new_text] != [Decimal(text) for text in old_text]:
+        raise AssertionError("format_ton disagrees with Web3.from_wei")
+
+    return {
+        "amounts": amount_count,
+        "seed": seed,
+        "conversions_per_second": {
+            "to_wei_float": _rate(amount_count, float_seconds),
+            "to_wei_decimal": _rate(amount_count, decimal_seconds),
+            "parse_ton": _rate(amount_count, exact_seconds),
+            "parse_ton_many": _rate(amount_count, many_seconds),
+            "float_from_wei": _rate(amount_count, from_wei_seconds),
+            "wei_to_ton_many": _rate(amount_count, wei_to_ton_seconds),
+            "str_from_wei": _rate(amount_count, str_seconds),
+            "format_ton": _rate(amount_count, format_seconds),
+        },
+        "float_path_wrong_wei": sum(1 for old, exact in zip(float_wei, exact_wei) if old != exact),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure TON amount conversion speed and exactness.")
+    parser.add_argument("--amounts", type=int, default=100000, help="amounts converted per method")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated amounts")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.amounts, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        rates = results["conversions_per_second"]
+        print(f"{results['amounts']} amounts (seed {results['seed']})")
+        print(f"  Web3.to_wei(float):   {rates['to_wei_float']:>12} conversions/s")
+        print(f"  Web3.to_wei(Decimal): {rates['to_wei_decimal']:>12} conversions/s")
+        print(f"  parse_ton:            {rates['parse_ton']:>12} conversions/s")
+        print(f"  parse_ton_many:       {rates['parse_ton_many']:>12} conversions/s")
+        print(f"  float(from_wei):      {rates['float_from_wei']:>12} conversions/s")
+        print(f"  wei_to_ton_many:      {rates['wei_to_ton_many']:>12} conversions/s")
+        print(f"  str(from_wei):        {rates['str_from_wei']:>12} conversions/s")
+        print(f"  format_ton:           {rates['format_ton']:>12} conversions/s")
+        print(f"  wrong wei amounts from the float path: {results['float_path_wrong_wei']} of {results['amounts']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+# pragma version ~=0.4.0
+"""
+@title ProtectedPay benchmark contract
+@notice ABI-compatible re-implementation of ProtectedPay for local benchmarking.
+        The seed* functions are not part of ProtectedPay: they write benchmark
+        data for many accounts in one transaction and check nothing.
+"""
+
+MAX_IDS: constant(uint256) = 2048
+MAX_TRANSFERS_RETURNED: constant(uint256) = 128
+MAX_SEED_BATCH: constant(uint256) = 128
+
+struct Transfer:
+    sender: address
+    recipient: address
+    amount: uint256
+    timestamp: uint256
+    status: uint8
+    remarks: String[256]
+
+struct GroupPayment:
+    paymentId: bytes32
+    creator: address
+    recipient: address
+    totalAmount: uint256
+    amountPerPerson: uint256
+    numParticipants: uint256
+    amountCollected: uint256
+    timestamp: uint256
+    remarks: String[256]
+    status: uint8
+
+struct SavingsPot:
+    potId: bytes32
+    owner: address
+    name: String[64]
+    targetAmount: uint256
+    currentAmount: uint256
+    timestamp: uint256
+    status: uint8
+    remarks: String[256]
+
+event TransferInitiated:
+    transferId: indexed(bytes32)
+    sender: indexed(address)
+    recipient: indexed(address)
+    amount: uint256
+    remarks: String[256]
+
+event TransferClaimed:
+    transferId: indexed(bytes32)
+    recipient: indexed(address)
+    amount: uint256
+
+event TransferRefunded:
+    transferId: indexed(bytes32)
+    sender: indexed(address)
+    amount: uint256
+
+event UserRegistered:
+    userAddress: indexed(address)
+    username: String[64]
+
+event GroupPaymentCreated:
+    paymentId: indexed(bytes32)
+    creator: indexed(address)
+    recipient: address
+    totalAmount: uint256
+    numParticipants: uint256
+    remarks: String[256]
+
+event GroupPaymentContributed:
+    paymentId: indexed(bytes32)
+    contributor: indexed(address)
+    amount: uint256
+
+event GroupPaymentCompleted:
+    paymentId: indexed(bytes32)
+    recipient: indexed(address)
+    amount: uint256
+
+event SavingsPotCreated:
+    potId: indexed(bytes32)
+    owner: indexed(address)
+    name: String[64]
+    targetAmount: uint256
+    remarks: String[256]
+
+event PotContribution:
+    potId: indexed(bytes32)
+    contributor: indexed(address)
+    amount: uint256
+
+event PotBroken:
+    potId: indexed(bytes32)
+    owner: indexed(address)
+    amount: uint256
+
+STATUS_PENDING: constant(uint8) = 0
+STATUS_COMPLETED: constant(uint8) = 1
+STATUS_CANCELLED: constant(uint8) = 2
+
+_transfers: HashMap[bytes32, Transfer]
+_groupPayments: HashMap[bytes32, GroupPayment]
+_savingsPots: HashMap[bytes32, SavingsPot]
+_contributions: HashMap[bytes32, HashMap[address, uint256]]
+
+_usernames: HashMap[address, String[64]]
+_addresses: HashMap[String[64], address]
+
+_transferIds: HashMap[address, DynArray[bytes32, MAX_IDS]]
+_groupPaymentIds: HashMap[address, DynArray[bytes32, MAX_IDS]]
+_participatedGroupPayments: HashMap[address, DynArray[bytes32, MAX_IDS]]
+_savingsPotIds: HashMap[address, DynArray[bytes32, MAX_IDS]]
+_pendingBySender: HashMap[address, DynArray[bytes32, MAX_IDS]]
+
+_nonce: uint256
+
+
+@internal
+def _next_id(creator: address) -> bytes32:
+    self._nonce += 1
+    return keccak256(abi_encode(creator, block.timestamp, self._nonce))
+
+
+@internal
+def _record_transfer(sender: address, recipient: address, amount: uint256, remarks: String[256]):
+    transfer_id: bytes32 = self._next_id(sender)
+    self._transfers[transfer_id] = Transfer(
+        sender=sender,
+        recipient=recipient,
+        amount=amount,
+        timestamp=block.timestamp,
+        status=STATUS_PENDING,
+        remarks=remarks,
+    )
+    self._transferIds[sender].append(transfer_id)
+    self._transferIds[recipient].append(transfer_id)
+    self._pendingBySender[sender].append(transfer_id)
+    log TransferInitiated(transferId=transfer_id, sender=sender, recipient=recipient, amount=amount, remarks=remarks)
+
+
+@internal
+@payable
+def _send(recipient: address, remarks: String[256]):
+    assert recipient != empty(address), "Invalid recipient"
+    assert recipient != msg.sender, "Cannot send to yourself"
+    assert msg.value > 0, "Amount must be greater than 0"
+    self._record_transfer(msg.sender, recipient, msg.value, remarks)
+
+
+@internal
+def _claim(transfer_id: bytes32):
+    t: Transfer = self._transfers[transfer_id]
+    assert t.recipient == msg.sender, "Not the recipient"
+    assert t.status == STATUS_PENDING, "Transfer not pending"
+    self._transfers[transfer_id].status = STATUS_COMPLETED
+    send(msg.sender, t.amount)
+    log TransferClaimed(transferId=transfer_id, recipient=msg.sender, amount=t.amount)
+
+
+@external
+def registerUsername(_username: String[64]):
+    assert len(_username) > 0, "Username cannot be empty"
+    assert self._addresses[_username] == empty(address), "Username already taken"
+    assert len(self._usernames[msg.sender]) == 0, "User already registered"
+    self._usernames[msg.sender] = _username
+    self._addresses[_username] = msg.sender
+    log UserRegistered(userAddress=msg.sender, username=_username)
+
+
+@external
+@payable
+def sendToAddress(_recipient: address, _remarks: String[256]):
+    self._send(_recipient, _remarks)
+
+
+@external
+@payable
+def sendToUsername(_username: String[64], _remarks: String[256]):
+    recipient: address = self._addresses[_username]
+    assert recipient != empty(address), "Username not found"
+    self._send(recipient, _remarks)
+
+
+@external
+def claimTransferById(_transferId: bytes32):
+    self._claim(_transferId)
+
+
+@external
+def claimTransferByAddress(_senderAddress: address):
+    for transfer_id: bytes32 in self._pendingBySender[_senderAddress]:
+        t: Transfer = self._transfers[transfer_id]
+        if t.recipient == msg.sender and t.status == STATUS_PENDING:
+            self._claim(transfer_id)
+            return
+    raise "No pending transfer found"
+
+
+@external
+def claimTransferByUsername(_senderUsername: String[64]):
+    sender: address = self._addresses[_senderUsername]
+    assert sender != empty(address), "Username not found"
+    for transfer_id: bytes32 in self._pendingBySender[sender]:
+        t: Transfer = self._transfers[transfer_id]
+        if t.recipient == msg.sender and t.status == STATUS_PENDING:
+            self._claim(transfer_id)
+            return
+    raise "No pending transfer found"
+
+
+@external
+def refundTransfer(_transferId: bytes32):
+    t: Transfer = self._transfers[_transferId]
+    assert t.sender == msg.sender, "Not the sender"
+    assert t.status == STATUS_PENDING, "Transfer not pending"
+    self._transfers[_transferId].status = STATUS_CANCELLED
+    send(msg.sender, t.amount)
+    log TransferRefunded(transferId=_transferId, sender=msg.sender, amount=t.amount)
+
+
+@internal
+def _record_group_payment(creator: address, recipient: address, amount_per_person: uint256, num_participants: uint256, remarks: String[256]) -> bytes32:
+    payment_id: bytes32 = self._next_id(creator)
+    total: uint256 = amount_per_person * num_participants
+    self._groupPayments[payment_id] = GroupPayment(
+        paymentId=payment_id,
+        creator=creator,
+        recipient=recipient,
+        totalAmount=total,
+        amountPerPerson=amount_per_person,
+        numParticipants=num_participants,
+        amountCollected=amount_per_person,
+        timestamp=block.timestamp,
+        remarks=remarks,
+        status=STATUS_PENDING,
+    )
+    self._contributions[payment_id][creator] = amount_per_person
+    self._groupPaymentIds[creator].append(payment_id)
+    self._participatedGroupPayments[creator].append(payment_id)
+    log GroupPaymentCreated(paymentId=payment_id, creator=creator, recipient=recipient, totalAmount=total, numParticipants=num_participants, remarks=remarks)
+    log GroupPaymentContributed(paymentId=payment_id, contributor=creator, amount=amount_per_person)
+    return payment_id
+
+
+@internal
+def _record_savings_pot(owner: address, name: String[64], target_amount: uint256, remarks: String[256]) -> bytes32:
+    pot_id: bytes32 = self._next_id(owner)
+    self._savingsPots[pot_id] = SavingsPot(
+        potId=pot_id,
+        owner=owner,
+        name=name,
+        targetAmount=target_amount,
+        currentAmount=0,
+        timestamp=block.timestamp,
+        status=STATUS_PENDING,
+        remarks=remarks,
+    )
+    self._savingsPotIds[owner].append(pot_id)
+    log SavingsPotCreated(potId=pot_id, owner=owner, name=name, targetAmount=target_amount, remarks=remarks)
+    return pot_id
+
+
+@external
+@payable
+def createGroupPayment(_recipient: address, _numParticipants: uint256, _remarks: String[256]):
+    assert _recipient != empty(address), "Invalid recipient"
+    assert _numParticipants > 0, "Invalid participants"
+    assert msg.value > 0, "Amount must be greater than 0"
+    payment_id: bytes32 = self._record_group_payment(msg.sender, _recipient, msg.value, _numParticipants, _remarks)
+    if _numParticipants == 1:
+        self._groupPayments[payment_id].status = STATUS_COMPLETED
+        send(_recipient, msg.value)
+        log GroupPaymentCompleted(paymentId=payment_id, recipient=_recipient, amount=msg.value)
+
+
+@external
+@payable
+def contributeToGroupPayment(_paymentId: bytes32):
+    p: GroupPayment = self._groupPayments[_paymentId]
+    assert p.creator != empty(address), "Payment not found"
+    assert p.status == STATUS_PENDING, "Payment not pending"
+    assert msg.value == p.amountPerPerson, "Incorrect amount"
+    assert self._contributions[_paymentId][msg.sender] == 0, "Already contributed"
+    self._contributions[_paymentId][msg.sender] = msg.value
+    self._participatedGroupPayments[msg.sender].append(_paymentId)
+    collected: uint256 = p.amountCollected + msg.value
+    self._groupPayments[_paymentId].amountCollected = collected
+    log GroupPaymentContributed(paymentId=_paymentId, contributor=msg.sender, amount=msg.value)
+    if collected >= p.totalAmount:
+        self._groupPayments[_paymentId].status = STATUS_COMPLETED
+        send(p.recipient, collected)
+        log GroupPaymentCompleted(paymentId=_paymentId, recipient=p.recipient, amount=collected)
+
+
+@external
+def createSavingsPot(_name: String[64], _targetAmount: uint256, _remarks: String[256]) -> bytes32:
+    assert _targetAmount > 0, "Invalid target"
+    return self._record_savings_pot(msg.sender, _name, _targetAmount, _remarks)
+
+
+@external
+@payable
+def contributeToSavingsPot(_potId: bytes32):
+    pot: SavingsPot = self._savingsPots[_potId]
+    assert pot.owner == msg.sender, "Not the pot owner"
+    assert pot.status == STATUS_PENDING, "Pot not active"
+    assert msg.value > 0, "Amount must be greater than 0"
+    self._savingsPots[_potId].currentAmount = pot.currentAmount + msg.value
+    log PotContribution(potId=_potId, contributor=msg.sender, amount=msg.value)
+
+
+@external
+def breakPot(_potId: bytes32):
+    pot: SavingsPot = self._savingsPots[_potId]
+    assert pot.owner == msg.sender, "Not the pot owner"
+    assert pot.status == STATUS_PENDING, "Pot not active"
+    self._savingsPots[_potId].status = STATUS_COMPLETED
+    self._savingsPots[_potId].currentAmount = 0
+    send(msg.sender, pot.currentAmount)
+    log PotBroken(potId=_potId, owner=msg.sender, amount=pot.currentAmount)
+
+
+@external
+def seedUsers(_users: DynArray[address, MAX_SEED_BATCH], _usernames: DynArray[String[64], MAX_SEED_BATCH]):
+    for i: uint256 in range(len(_users), bound=MAX_SEED_BATCH):
+        self._usernames[_users[i]] = _usernames[i]
+        self._addresses[_usernames[i]] = _users[i]
+        log UserRegistered(userAddress=_users[i], username=_usernames[i])
+
+
+@external
+@payable
+def seedTransfers(_senders: DynArray[address, MAX_SEED_BATCH], _recipients: DynArray[address, MAX_SEED_BATCH], _amount: uint256, _remarks: String[256]):
+    assert msg.value == _amount * len(_senders), "Incorrect amount"
+    for i: uint256 in range(len(_senders), bound=MAX_SEED_BATCH):
+        self._record_transfer(_senders[i], _recipients[i], _amount, _remarks)
+
+
+@external
+@payable
+def seedGroupPayments(_creators: DynArray[address, MAX_SEED_BATCH], _recipients: DynArray[address, MAX_SEED_BATCH], _amountPerPerson: uint256, _numParticipants: uint256, _remarks: String[256]):
+    assert msg.value == _amountPerPerson * len(_creators), "Incorrect amount"
+    for i: uint256 in range(len(_creators), bound=MAX_SEED_BATCH):
+        self._record_group_payment(_creators[i], _recipients[i], _amountPerPerson, _numParticipants, _remarks)
+
+
+@external
+def seedSavingsPots(_owners: DynArray[address, MAX_SEED_BATCH], _name: String[64], _targetAmount: uint256, _remarks: String[256]):
+    for i: uint256 in range(len(_owners), bound=MAX_SEED_BATCH):
+        self._record_savings_pot(_owners[i], _name, _targetAmount, _remarks)
+
+
+@view
+@external
+def getTransferDetails(_transferId: bytes32) -> (address, address, uint256, uint256, uint8, String[256]):
+    t: Transfer = self._transfers[_transferId]
+    assert t.sender != empty(address), "Transfer not found"
+    return t.sender, t.recipient, t.amount, t.timestamp, t.status, t.remarks
+
+
+@view
+@external
+def transfers(_transferId: bytes32) -> (address, address, uint256, uint256, uint8, String[256]):
+    t: Transfer = self._transfers[_transferId]
+    return t.sender, t.recipient, t.amount, t.timestamp, t.status, t.remarks
+
+
+@view
+@external
+def getUserTransfers(_userAddress: address) -> DynArray[Transfer, MAX_TRANSFERS_RETURNED]:
+    result: DynArray[Transfer, MAX_TRANSFERS_RETURNED] = []
+    for transfer_id: bytes32 in self._transferIds[_userAddress]:
+        if len(result) == MAX_TRANSFERS_RETURNED:
+            break
+        result.append(self._transfers[transfer_id])
+    return result
+
+
+@view
+@external
+def getPendingTransfers(_sender: address) -> DynArray[bytes32, MAX_IDS]:
+    result: DynArray[bytes32, MAX_IDS] = []
+    for transfer_id: bytes32 in self._pendingBySender[_sender]:
+        if self._transfers[transfer_id].status == STATUS_PENDING:
+            result.append(transfer_id)
+    return result
+
+
+@view
+@external
+def pendingTransfersBySender(_sender: address, _index: uint256) -> bytes32:
+    return self._pendingBySender[_sender][_index]
+
+
+@view
+@external
+def getUserProfile(_userAddress: address) -> (String[64], DynArray[bytes32, MAX_IDS], DynArray[bytes32, MAX_IDS], DynArray[bytes32, MAX_IDS], DynArray[bytes32, MAX_IDS]):
+    return self._usernames[_userAddress], self._transferIds[_userAddress], self._groupPaymentIds[_userAddress], self._participatedGroupPayments[_userAddress], self._savingsPotIds[_userAddress]
+
+
+@view
+@external
+def getUserByUsername(_username: String[64]) -> address:
+    return self._addresses[_username]
+
+
+@view
+@external
+def usernameToAddress(_username: String[64]) -> address:
+    return self._addresses[_username]
+
+
+@view
+@external
+def getUserByAddress(_userAddress: address) -> String[64]:
+    return self._usernames[_userAddress]
+
+
+@view
+@external
+def users(_userAddress: address) -> String[64]:
+    return self._usernames[_userAddress]
+
+
+@view
+@external
+def getGroupPaymentDetails(_paymentId: bytes32) -> (address, address, uint256, uint256, uint256, uint256, uint256, uint8, String[256]):
+    p: GroupPayment = self._groupPayments[_paymentId]
+    assert p.creator != empty(address), "Payment not found"
+    return p.creator, p.recipient, p.totalAmount, p.amountPerPerson, p.numParticipants, p.amountCollected, p.timestamp, p.status, p.remarks
+
+
+@view
+@external
+def groupPayments(_paymentId: bytes32) -> (bytes32, address, address, uint256, uint256, uint256, uint256, uint256, String[256], uint8):
+    p: GroupPayment = self._groupPayments[_paymentId]
+    return p.paymentId, p.creator, p.recipient, p.totalAmount, p.amountPerPerson, p.numParticipants, p.amountCollected, p.timestamp, p.remarks, p.status
+
+
+@view
+@external
+def getGroupPaymentContribution(_paymentId: bytes32, _user: address) -> uint256:
+    return self._contributions[_paymentId][_user]
+
+
+@view
+@external
+def hasContributedToGroupPayment(_paymentId: bytes32, _user: address) -> bool:
+    return self._contributions[_paymentId][_user] > 0
+
+
+@view
+@external
+def getSavingsPotDetails(_potId: bytes32) -> (address, String[64], uint256, uint256, uint256, uint8, String[256]):
+    pot: SavingsPot = self._savingsPots[_potId]
+    assert pot.owner != empty(address), "Pot not found"
+    return pot.owner, pot.name, pot.targetAmount, pot.currentAmount, pot.timestamp, pot.status, pot.remarks
+
+
+@view
+@external
+def savingsPots(_potId: bytes32) -> (bytes32, address, String[64], uint256, uint256, uint256, uint8, String[256]):
+    pot: SavingsPot = self._savingsPots[_potId]
+    return pot.potId, pot.owner, pot.name, pot.targetAmount, pot.currentAmount, pot.timestamp, pot.status, pot.remarks
@@ -0,0 +1,141 @@
+"""Import-time benchmark for the agent package.
+
+Imports ``agent`` in fresh interpreters and reports the wall time of the
+import, the self time of ``agent.agent`` (its module body, from ``-X
+importtime``) and whether anything that should be lazy was built during the
+import: the Web3 instances, the contract objects, the ABI file and the ADK
+agent. Exits with status 1 when a limit is exceeded, so it can guard CI
+against cold-start regressions.
+
+Usage:
+    python -m agent.benchmarks.import_time [--runs 5] [--max-self-ms 10] [--max-total-ms N] [--json]
+"""
+
+import argparse
+import compileall
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter: import the package, then report timing and what was built
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import agent
+elapsed = time.perf_counter() - start
+module = sys.modules["agent.agent"]
+print(json.dumps({
+    "import_seconds": elapsed,
+    "built": {
+        "w3": module.w3.is_resolved,
+        "async_w3": module.async_w3.is_resolved,
+        "contract": module.contract.is_resolved,
+        "async_contract": module.async_contract.is_resolved,
+        "rpc_router": module.rpc_router.is_resolved,
+        "contract_abi": module.load_contract_abi.cache_info().currsize > 0,
+        "root_agent": module.build_root_agent.cache_info().currsize > 0,
+        "llm_agent_module": "google.adk.agents.llm_agent" in sys.modules,
+    },
+}))
+"""
+
+# Default limit for the agent.agent module body (milliseconds)
+DEFAULT_MAX_SELF_MS = 10.0
+
+
+def _self_time_us(importtime_output: str, module_name: str) -> int:
+    """Self time in microseconds of one module from ``-X importtime`` output."""
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if len(fields) == 3 and fields[2] == module_name:
+            return int(fields[0])
+    raise LookupError(f"{module_name} not found in -X importtime output")
+
+
+def run_once(package_root: str) -> dict:
+    """Import the package once in a fresh interpreter.
+
+    Args:
+        package_root (str): Directory containing the ``agent`` package
+
+    Returns:
+        dict: import_seconds, self_seconds of agent.agent and the built flags
+    """
+    env = dict(os.environ, PYTHONPATH=package_root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["self_seconds"] = _self_time_us(completed.stderr, "agent.agent") / 1e6
+    return result
+
+
+def run(runs: int = 5) -> dict:
+    """Run the benchmark and summarize it.
+
+    Args:
+        runs (int): Fresh interpreters to import in
+
+    Returns:
+        dict: median/min/max import and self times in milliseconds, and the built flags of the last run
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # Measure imports from bytecode, as a deployed worker would load them
+    compileall.compile_dir(os.path.join(package_root, "agent"), quiet=1)
+    samples = [run_once(package_root) for _ in range(runs)]
+    import_ms = [sample["import_seconds"] * 1000 for sample in samples]
+    self_ms = [sample["self_seconds"] * 1000 for sample in samples]
+    return {
+        "runs": runs,
+        "python": sys.version.split()[0],
+        "import_ms": {"median": statistics.median(import_ms), "min": min(import_ms), "max": max(import_ms)},
+        "agent_module_self_ms": {"median": statistics.median(self_ms), "min": min(self_ms), "max": max(self_ms)},
+        "built_at_import": samples[-1]["built"],
+    }
+
+
+def check(summary: dict, max_self_ms: float, max_total_ms: float = None) -> list:
+    """Limit violations in a summary (empty when the import is within budget)."""
+    failures = [f"{name} was built during import" for name, built in summary["built_at_import"].items() if built]
+    if summary["agent_module_self_ms"]["median"] > max_self_ms:
+        failures.append(f"agent.agent self time {summary['agent_module_self_ms']['median']:.1f} ms > {max_self_ms} ms")
+    if max_total_ms is not None and summary["import_ms"]["median"] > max_total_ms:
+        failures.append(f"import time {summary['import_ms']['median']:.1f} ms > {max_total_ms} ms")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the agent package.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--max-self-ms", type=float, default=DEFAULT_MAX_SELF_MS,
+                        help="limit for the median self time of agent.agent")
+    parser.add_argument("--max-total-ms", type=float, default=None,
+                        help="limit for the median total import time (machine dependent, off by default)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = run(args.runs)
+    failures = check(summary, args.max_self_ms, args.max_total_ms)
+    summary["failures"] = failures
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"import agent: median {summary['import_ms']['median']:.1f} ms "
+              f"(min {summary['import_ms']['min']:.1f}, max {summary['import_ms']['max']:.1f}) over {args.runs} runs")
+        print(f"agent.agent module body: median {summary['agent_module_self_ms']['median']:.2f} ms")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
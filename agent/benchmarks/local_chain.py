@@ -0,0 +1,251 @@
+"""Local EVM (eth-tester on py-evm) with the ProtectedPay benchmark contract.
+
+``contracts/ProtectedPayBench.vy`` implements every function of
+``CONTRACT_ABI`` with the same signatures, plus ``seed*`` functions that
+write benchmark data for many accounts in one transaction.
+``contracts/Multicall3Bench.vy`` implements Multicall3's ``aggregate3``.
+Both are shipped precompiled (``contracts/*.json``), so a benchmark needs
+neither a compiler nor network access. After editing a contract, rebuild the
+artifacts (needs ``vyper``):
+
+    python -m agent.benchmarks.local_chain --compile
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from eth_utils import keccak
+from web3 import AsyncEthereumTesterProvider, EthereumTesterProvider, Web3
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts")
+
+# Contracts built into JSON artifacts by compile_artifacts()
+CONTRACT_NAMES = ("ProtectedPayBench", "Multicall3Bench")
+
+# Rows written per seed* transaction (the contract accepts at most 128)
+SEED_BATCH_SIZE = 64
+
+# Gas limit of seed transactions (below the local chain's block gas limit)
+SEED_GAS = 29_000_000
+
+# Amount of each seeded transfer, group payment share and the target of each savings pot (wei)
+SEED_AMOUNT = 10 ** 15
+
+
+def artifact_path(name: str) -> str:
+    return os.path.join(CONTRACTS_DIR, f"{name}.json")
+
+
+def load_artifact(name: str) -> dict:
+    """ABI and bytecode of a benchmark contract.
+
+    Returns:
+        dict: abi, bytecode and the compiler version they were built with
+    """
+    with open(artifact_path(name)) as artifact_file:
+        return json.load(artifact_file)
+
+
+def compile_artifacts() -> list:
+    """Compile the Vyper sources in contracts/ into their JSON artifacts (needs vyper).
+
+    Returns:
+        list: paths of the written artifacts
+    """
+    version = subprocess.check_output(["vyper", "--version"], text=True).strip()
+    written = []
+    for name in CONTRACT_NAMES:
+        source = os.path.join(CONTRACTS_DIR, f"{name}.vy")
+        abi_json, bytecode = subprocess.check_output(["vyper", "-f", "abi,bytecode", source], text=True).strip().splitlines()
+        with open(artifact_path(name), "w") as artifact_file:
+            json.dump({"compiler": f"vyper {version}", "abi": json.loads(abi_json), "bytecode": bytecode}, artifact_file)
+            artifact_file.write("\n")
+        written.append(artifact_path(name))
+    return written
+
+
+def derived_address(seed: int, index: int) -> str:
+    """Deterministic address of seeded user ``index`` (no private key, only used as data)."""
+    return Web3.to_checksum_address(keccak(f"protectedpay-bench:{seed}:{index}".encode())[-20:])
+
+
+class _LockedEthereumTesterProvider(EthereumTesterProvider):
+    """EthereumTesterProvider serializing requests (eth-tester is not thread-safe)."""
+
+    def __init__(self, ethereum_tester, lock: threading.Lock):
+        super().__init__(ethereum_tester)
+        self._chain_lock = lock
+
+    def make_request(self, method, params):
+        with self._chain_lock:
+            return super().make_request(method, params)
+
+
+class _LockedAsyncEthereumTesterProvider(AsyncEthereumTesterProvider):
+    """AsyncEthereumTesterProvider on a shared EthereumTester, serialized with the sync provider."""
+
+    def __init__(self, ethereum_tester, lock: threading.Lock):
+        super().__init__()
+        self.ethereum_tester = ethereum_tester
+        self._chain_lock = lock
+
+    async def make_request(self, method, params):
+        with self._chain_lock:
+            return await super().make_request(method, params)
+
+
+class LocalChain:
+    """An in-process py-evm chain with the benchmark contracts deployed."""
+
+    def __init__(self, funded_accounts: int = 10):
+        """Start the chain and deploy the contracts.
+
+        Args:
+            funded_accounts (int): Accounts with keys and a balance (index 0 deploys and seeds)
+        """
+        from eth_tester import EthereumTester, PyEVMBackend
+
+        backend = PyEVMBackend(genesis_state=PyEVMBackend.generate_genesis_state(num_accounts=funded_accounts))
+        self.tester = EthereumTester(backend)
+        self.private_keys = [key.to_hex() for key in backend.account_keys]
+        self.lock = threading.Lock()
+        self.w3 = Web3(_LockedEthereumTesterProvider(self.tester, self.lock))
+        self.accounts = self.w3.eth.accounts
+
+        self.contract = self._deploy("ProtectedPayBench")
+        self.multicall = self._deploy("Multicall3Bench")
+
+    def _deploy(self, name: str):
+        artifact = load_artifact(name)
+        factory = self.w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bytecode"])
+        tx_hash = factory.constructor().transact({"from": self.accounts[0]})
+        address = self.w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+        return self.w3.eth.contract(address=address, abi=artifact["abi"])
+
+    def sync_provider(self):
+        """A new provider on this chain for the agent's Web3 instance."""
+        return _LockedEthereumTesterProvider(self.tester, self.lock)
+
+    def async_provider(self):
+        """A new async provider on this chain for the agent's AsyncWeb3 instance."""
+        return _LockedAsyncEthereumTesterProvider(self.tester, self.lock)
+
+    def _seed_batches(self, function_name: str, rows: list, make_args, value_per_row: int = 0) -> None:
+        for start in range(0, len(rows), SEED_BATCH_SIZE):
+            batch = rows[start:start + SEED_BATCH_SIZE]
+            getattr(self.contract.functions, function_name)(*make_args(batch)).transact({
+                "from": self.accounts[0],
+                "value": value_per_row * len(batch),
+                "gas": SEED_GAS
+            })
+
+    def seed_users(self, users: list) -> None:
+        """Register a username (user<n>) for every address."""
+        self._seed_batches("seedUsers", list(enumerate(users)), lambda batch: (
+            [address for _, address in batch], [f"user{index}" for index, _ in batch]
+        ))
+
+    def seed_transfers(self, pairs: list, remarks: str = "benchmark transfer") -> None:
+        """Create a pending transfer of SEED_AMOUNT for every (sender, recipient) pair."""
+        self._seed_batches("seedTransfers", pairs, lambda batch: (
+            [sender for sender, _ in batch], [recipient for _, recipient in batch], SEED_AMOUNT, remarks
+        ), value_per_row=SEED_AMOUNT)
+
+    def seed_group_payments(self, pairs: list, participants: int = 3) -> None:
+        """Create a pending group payment for every (creator, recipient) pair."""
+        self._seed_batches("seedGroupPayments", pairs, lambda batch: (
+            [creator for creator, _ in batch], [recipient for _, recipient in batch], SEED_AMOUNT, participants,
+            "benchmark group payment"
+        ), value_per_row=SEED_AMOUNT)
+
+    def seed_savings_pots(self, owners: list) -> None:
+        """Create an empty savings pot for every owner."""
+        self._seed_batches("seedSavingsPots", owners, lambda batch: (
+            batch, "benchmark pot", SEED_AMOUNT * 10, "benchmark savings pot"
+        ))
+
+    def seed(self, users: int, transfers: int, group_payments: int, savings_pots: int, focus_account: str,
+             focus_transfers: int = 200, seed: int = 0) -> dict:
+        """Seed a reproducible data set.
+
+        Transfers, group payments and pots are spread over ``users`` derived
+        addresses at random (seeded by ``seed``); ``focus_transfers`` of the
+        transfers involve ``focus_account`` so its history has realistic depth.
+
+        Returns:
+            dict: seeded counts and the seconds seeding took
+        """
+        started = time.perf_counter()
+        rng = random.Random(seed)
+        addresses = [derived_address(seed, index) for index in range(users)]
+
+        def random_pair() -> tuple:
+            sender, recipient = rng.sample(addresses, 2)
+            return sender, recipient
+
+        self.seed_users(addresses)
+        pairs = [random_pair() for _ in range(max(0, transfers - focus_transfers))]
+        for i in range(min(transfers, focus_transfers)):
+            other = rng.choice(addresses)
+            pairs.append((focus_account, other) if i % 2 else (other, focus_account))
+        rng.shuffle(pairs)
+        self.seed_transfers(pairs)
+        self.seed_group_payments([random_pair() for _ in range(group_payments)])
+        self.seed_savings_pots([rng.choice(addresses) for _ in range(savings_pots)])
+        return {
+            "users": users,
+            "transfers": len(pairs),
+            "focus_transfers": min(transfers, focus_transfers),
+            "group_payments": group_payments,
+            "savings_pots": savings_pots,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def pending_transfer_ids(self, user: str, sender: str = None, recipient: str = None) -> list:
+        """IDs (hex) of a user's pending transfers, optionally only those with the given sender or recipient."""
+        ids = []
+        for transfer_id in self.contract.functions.getUserProfile(user).call()[1]:
+            details = self.contract.functions.getTransferDetails(transfer_id).call()
+            if details[4] != 0:
+                continue
+            if (sender is None or details[0] == sender) and (recipient is None or details[1] == recipient):
+                ids.append(transfer_id.hex())
+        return ids
+
+    def attach(self, agent_module) -> None:
+        """Point the agent at this chain (before anything has touched the chain through the agent).
+
+        Args:
+            agent_module: the ``agent.agent`` module
+        """
+        if agent_module.w3.is_resolved or agent_module.async_w3.is_resolved:
+            raise RuntimeError("The agent already connected to a chain; attach the local chain first")
+        agent_module.DUCKCHAIN_PROVIDER = self.sync_provider()
+        agent_module.DUCKCHAIN_ASYNC_PROVIDER = self.async_provider()
+        agent_module.PROTECTEDPAY_CONTRACT_ADDRESS = self.contract.address
+        agent_module.MULTICALL_ADDRESS = self.multicall.address
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark contracts on a local EVM.")
+    parser.add_argument("--compile", action="store_true", help="rebuild contracts/*.json from the Vyper sources")
+    args = parser.parse_args(argv)
+
+    if args.compile:
+        for path in compile_artifacts():
+            print(f"wrote {path}")
+        return 0
+
+    chain = LocalChain()
+    print(f"ProtectedPayBench deployed at {chain.contract.address}, Multicall3Bench at {chain.multicall.address}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Signing throughput benchmark for the signer service.
+
+Signs the same batch of ProtectedPay-sized transactions three ways and
+reports signatures per second:
+
+* ``from_key_per_call``: derive the account and sign for every transaction
+  (what the agent did before the signer service)
+* ``cached_account``: one cached LocalAccount, signing in-process (one worker)
+* ``process_pool``: ``SignerService.sign_many`` with N worker processes
+  (pool start-up is excluded; it happens once per agent process)
+
+Usage:
+    python -m agent.benchmarks.signing [--transactions 256] [--workers N] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from eth_account import Account
+
+from agent.signer import SignerService
+
+
+def make_transactions(count: int) -> list:
+    """sendToAddress-sized legacy transactions with sequential nonces."""
+    return [
+        {
+            "to": "0xf8Bc82B8184BDd37bF0226aca6e2a81c337bA076",
+            "value": 10 ** 15,
+            "gas": 150000,
+            "gasPrice": 10 ** 9,
+            "nonce": nonce,
+            "chainId": 5545,
+            # Same length as sendToAddress(address, string) calldata with a short remark
+            "data": "0x" + "00" * 164
+        }
+        for nonce in range(count)
+    ]
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else float("inf")
+
+
+def run(transaction_count: int = 256, workers: int = None) -> dict:
+    """Run the benchmark.
+
+    Args:
+        transaction_count (int): Transactions signed by each method
+        workers (int): Worker processes for the pool (default: CPU count)
+
+    Returns:
+        dict: signatures per second per method
+    """
+    workers = workers or os.cpu_count() or 1
+    private_key = Account.create().key.hex()
+    transactions = make_transactions(transaction_count)
+
+    started = time.perf_counter()
+    for transaction in transactions:
+        Account.from_key(private_key).sign_transaction(transaction)
+    per_call_seconds = time.perf_counter() - started
+
+    single = SignerService(max_workers=1)
+    single.account(private_key)
+    started = time.perf_counter()
+    single_signed = single.sign_many(transactions, private_key)
+    single_seconds = time.perf_counter() - started
+
+    pool = SignerService(max_workers=workers, pool_min_batch=0)
+    try:
+        # Start the workers and derive the account in each before timing
+        pool.sign_many(make_transactions(workers * pool.chunk_size), private_key)
+        started = time.perf_counter()
+        pool_signed = pool.sign_many(transactions, private_key)
+        pool_seconds = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+    if [signed.raw_transaction for signed in pool_signed] != [signed.raw_transaction for signed in single_signed]:
+        raise AssertionError("Pool and in-process signatures differ")
+
+    return {
+        "transactions": transaction_count,
+        "workers": workers,
+        "cpu_count": os.cpu_count(),
+        "signatures_per_second": {
+            "from_key_per_call": _rate(transaction_count, per_call_seconds),
+            "cached_account": _rate(transaction_count, single_seconds),
+            "process_pool": _rate(transaction_count, pool_seconds),
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure transaction signing throughput.")
+    parser.add_argument("--transactions", type=int, default=256, help="transactions signed per method")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.transactions, args.workers)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        rates = results["signatures_per_second"]
+        print(f"{results['transactions']} transactions, {results['workers']} workers ({results['cpu_count']} CPUs)")
+        print(f"  from_key per call:        {rates['from_key_per_call']:>8} signatures/s")
+        print(f"  cached account, 1 worker: {rates['cached_account']:>8} signatures/s")
+        print(f"  process pool, {results['workers']} workers:  {rates['process_pool']:>8} signatures/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Tool throughput and latency benchmark on a local EVM.
+
+Starts a py-evm chain (see ``local_chain``), deploys the ProtectedPay
+benchmark contract, seeds users, transfers, group payments and savings pots,
+points the agent at the chain and calls these tools repeatedly:
+
+* ``get_user_transfers`` and ``get_ton_balance``: the async versions
+  registered with the agent, run on one event loop with up to N calls in
+  flight
+* ``send_to_address``, ``claim_transfer_by_id`` and ``refund_transfer``: the
+  write tools, run from N threads with one signing key
+
+For each tool and concurrency level the throughput (calls per second) and the
+p50/p99 latency are reported. Everything runs offline and is seeded, so runs
+on the same machine are comparable across commits (``--json`` writes the
+results with the current git commit).
+
+eth-tester mines every transaction on arrival and rejects nonces that arrive
+out of order, so write tools default to a concurrency of 1
+(``--write-concurrency``); higher levels measure contention and report the
+rejected calls as errors.
+
+Usage:
+    python -m agent.benchmarks.tools [--users 1000] [--transfers 2000] [--group-payments 200]
+        [--savings-pots 200] [--calls 100] [--concurrency 1,4,16] [--write-concurrency 1]
+        [--tools get_user_transfers,...] [--seed 0] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.benchmarks.local_chain import LocalChain, derived_address
+
+READ_TOOLS = ("get_user_transfers", "get_ton_balance")
+WRITE_TOOLS = ("send_to_address", "claim_transfer_by_id", "refund_transfer")
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(tool: str, concurrency: int, latencies: list, errors: int, seconds: float) -> dict:
+    """Throughput and latency statistics of one tool at one concurrency level."""
+    ordered = sorted(latencies)
+    return {
+        "tool": tool,
+        "concurrency": concurrency,
+        "calls": len(latencies),
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "throughput_per_second": round(len(latencies) / seconds, 2) if seconds > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+
+
+def _is_error(result) -> bool:
+    return not isinstance(result, dict) or result.get("status") not in ("success", "submitted")
+
+
+async def _run_async(call, arguments: list, concurrency: int, close_async_session) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(args):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await call(*args)
+            except Exception:
+                result = None
+            latencies.append(time.perf_counter() - started)
+            if _is_error(result):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(args) for args in arguments))
+    seconds = time.perf_counter() - started
+    await close_async_session()
+    return latencies, errors, seconds
+
+
+def _run_threads(call, arguments: list, concurrency: int) -> tuple:
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(args):
+        started = time.perf_counter()
+        try:
+            result = call(*args)
+        except Exception:
+            result = None
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if _is_error(result):
+                errors[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, arguments))
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def run(users: int = 1000, transfers: int = 2000, group_payments: int = 200, savings_pots: int = 200,
+        calls: int = 100, concurrency_levels: tuple = (1, 4, 16), write_concurrency_levels: tuple = (1,),
+        tools: tuple = READ_TOOLS + WRITE_TOOLS, seed: int = 0) -> dict:
+    """Run the benchmark.
+
+    Args:
+        users (int): Seeded users (registered usernames)
+        transfers (int): Seeded transfers between users
+        group_payments (int): Seeded group payments
+        savings_pots (int): Seeded savings pots
+        calls (int): Calls per tool and concurrency level
+        concurrency_levels (tuple): Calls in flight for the read tools
+        write_concurrency_levels (tuple): Threads calling the write tools
+        tools (tuple): Tools to measure
+        seed (int): Seed of the generated data and call arguments
+
+    Returns:
+        dict: environment, seeded data and one result per tool and concurrency level
+    """
+    import agent.agent as agent_module
+    from agent import async_tools, shared
+
+    chain = LocalChain()
+    account = chain.accounts[1]
+    seeded = chain.seed(users, transfers, group_payments, savings_pots, focus_account=account, seed=seed)
+
+    # Pending transfers the benchmark account can claim (sent to it) and refund (sent by it)
+    write_runs = len(write_concurrency_levels)
+    others = [derived_address(seed, index) for index in range(users)]
+    if "claim_transfer_by_id" in tools:
+        chain.seed_transfers([(others[i % users], account) for i in range(calls * write_runs)], remarks="to claim")
+    if "refund_transfer" in tools:
+        chain.seed_transfers([(account, others[i % users]) for i in range(calls * write_runs)], remarks="to refund")
+    claimable = iter(chain.pending_transfer_ids(account, recipient=account) if "claim_transfer_by_id" in tools else [])
+    refundable = iter(chain.pending_transfer_ids(account, sender=account) if "refund_transfer" in tools else [])
+
+    chain.attach(agent_module)
+    agent_module.set_private_key(chain.private_keys[1])
+    agent_module.set_transaction_confirmation_mode(True)
+
+    rng = random.Random(seed)
+    calls_by_tool = {
+        "get_user_transfers": (async_tools.get_user_transfers, lambda: (account,)),
+        "get_ton_balance": (async_tools.get_ton_balance, lambda: (rng.choice(others),)),
+        "send_to_address": (agent_module.send_to_address, lambda: (rng.choice(others), "0.001", "benchmark", account)),
+        "claim_transfer_by_id": (agent_module.claim_transfer_by_id, lambda: (next(claimable), account)),
+        "refund_transfer": (agent_module.refund_transfer, lambda: (next(refundable), account)),
+    }
+
+    results = []
+    for tool in tools:
+        if tool not in calls_by_tool:
+            raise ValueError(f"Unknown tool '{tool}'. Choose from {', '.join(READ_TOOLS + WRITE_TOOLS)}")
+        call, make_arguments = calls_by_tool[tool]
+        for concurrency in (concurrency_levels if tool in READ_TOOLS else write_concurrency_levels):
+            arguments = [make_arguments() for _ in range(calls)]
+            # The write tools print progress for every transaction; keep it out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                if tool in READ_TOOLS:
+                    latencies, errors, seconds = asyncio.run(
+                        _run_async(call, arguments, concurrency, shared.close_async_session)
+                    )
+                else:
+                    latencies, errors, seconds = _run_threads(call, arguments, concurrency)
+            results.append(summarize(tool, concurrency, latencies, errors, seconds))
+
+    return {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "timestamp": int(time.time()),
+        "config": {
+            "calls": calls,
+            "concurrency": list(concurrency_levels),
+            "write_concurrency": list(write_concurrency_levels),
+            "tools": list(tools),
+            "seed": seed,
+        },
+        "seeded": seeded,
+        "results": results,
+    }
+
+
+def _int_list(text: str) -> tuple:
+    return tuple(int(part) for part in text.split(",") if part.strip())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark agent tools against a local EVM.")
+    parser.add_argument("--users", type=int, default=1000, help="seeded users")
+    parser.add_argument("--transfers", type=int, default=2000, help="seeded transfers")
+    parser.add_argument("--group-payments", type=int, default=200, help="seeded group payments")
+    parser.add_argument("--savings-pots", type=int, default=200, help="seeded savings pots")
+    parser.add_argument("--calls", type=int, default=100, help="calls per tool and concurrency level")
+    parser.add_argument("--concurrency", type=_int_list, default=(1, 4, 16), help="read tool concurrency levels")
+    parser.add_argument("--write-concurrency", type=_int_list, default=(1,), help="write tool concurrency levels")
+    parser.add_argument("--tools", default=",".join(READ_TOOLS + WRITE_TOOLS), help="comma-separated tools to measure")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated data")
+    parser.add_argument("--json", metavar="PATH", help="write the results to this JSON file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    summary = run(
+        users=args.users,
+        transfers=args.transfers,
+        group_payments=args.group_payments,
+        savings_pots=args.savings_pots,
+        calls=args.calls,
+        concurrency_levels=args.concurrency,
+        write_concurrency_levels=args.write_concurrency,
+        tools=tuple(tool.strip() for tool in args.tools.split(",") if tool.strip()),
+        seed=args.seed
+    )
+
+    if args.json == "-":
+        print(json.dumps(summary, indent=2))
+        return 0
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(summary, results_file, indent=2)
+            results_file.write("\n")
+
+    seeded = summary["seeded"]
+    print(f"Seeded {seeded['users']} users, {seeded['transfers']} transfers, {seeded['group_payments']} group payments "
+          f"and {seeded['savings_pots']} savings pots in {seeded['seconds']} s (commit {summary['commit']})")
+    print(f"{'tool':<22} {'conc':>4} {'calls':>6} {'errors':>6} {'calls/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for result in summary["results"]:
+        print(f"{result['tool']:<22} {result['concurrency']:>4} {result['calls']:>6} {result['errors']:>6} "
+              f"{result['throughput_per_second']:>9} {result['latency_ms']['p50']:>9} {result['latency_ms']['p99']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Parsing and crash-safe journaling for bulk payouts.
+
+A payout list is given as JSON or CSV rows of (recipient address or username,
+amount, remarks). Every signed transaction is written to an append-only JSON
+lines journal before it is broadcast, so an interrupted run can be resumed
+without paying anyone twice.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+from decimal import Decimal
+
+from .amounts import parse_ton
+
+# Column names accepted for each field (JSON keys or CSV header names)
+RECIPIENT_FIELDS = ("recipient", "recipient_address", "address", "to")
+USERNAME_FIELDS = ("username", "recipient_username")
+AMOUNT_FIELDS = ("amount_ton", "amount")
+REMARKS_FIELDS = ("remarks", "message", "memo")
+
+# Journal entry types, in the order a row moves through them
+JOURNAL_SIGNED = "signed"
+JOURNAL_SUBMITTED = "submitted"
+JOURNAL_SEND_FAILED = "send_failed"
+JOURNAL_CONFIRMED = "confirmed"
+JOURNAL_REVERTED = "reverted"
+
+
+def _first_field(row: dict, names: tuple) -> str:
+    for name in names:
+        value = row.get(name)
+        if value is not None and str(value).strip() != "":
+            return str(value).strip()
+    return ""
+
+
+def parse_payouts(payouts: str) -> list:
+    """Parse a payout list given as a JSON array or CSV text.
+
+    JSON: ``[{"recipient": "0x..." or "username": "alice", "amount_ton": "1.5", "remarks": "..."}]``.
+    CSV: a header row with ``recipient`` (address or username), ``amount_ton`` and ``remarks``.
+    A recipient that is not a 0x address is treated as a username.
+
+    Args:
+        payouts (str): JSON or CSV text
+
+    Returns:
+        list: dicts with row, recipient, username, amount_ton (Decimal), amount_wei (int), remarks and error keys
+    """
+    text = payouts.strip()
+    if text.startswith("["):
+        raw_rows = json.loads(text)
+        if not all(isinstance(raw_row, dict) for raw_row in raw_rows):
+            raise ValueError("JSON payouts must be a list of objects")
+    else:
+        raw_rows = list(csv.DictReader(io.StringIO(text)))
+        raw_rows = [{(key or "").strip().lower(): value for key, value in raw_row.items()} for raw_row in raw_rows]
+
+    rows = []
+    for index, raw_row in enumerate(raw_rows):
+        recipient = _first_field(raw_row, RECIPIENT_FIELDS)
+        username = _first_field(raw_row, USERNAME_FIELDS)
+        if recipient and not recipient.lower().startswith("0x") and not username:
+            recipient, username = "", recipient
+        amount_text = _first_field(raw_row, AMOUNT_FIELDS)
+
+        row = {
+            "row": index,
+            "recipient": recipient or None,
+            "username": username or None,
+            "amount_text": amount_text,
+            "amount_ton": None,
+            "amount_wei": None,
+            "remarks": _first_field(raw_row, REMARKS_FIELDS),
+            "error": None
+        }
+
+        try:
+            amount_wei = parse_ton(amount_text)
+            if amount_wei <= 0:
+                raise ValueError(amount_text)
+            row["amount_wei"] = amount_wei
+            row["amount_ton"] = Decimal(amount_text)
+        except ValueError:
+            row["error"] = f"Invalid amount: '{amount_text}'"
+
+        if not row["recipient"] and not row["username"]:
+            row["error"] = "Missing recipient address or username"
+
+        rows.append(row)
+    return rows
+
+
+def payout_fingerprint(sender_address: str, rows: list) -> str:
+    """Stable hash of a payout batch, used to match a journal to the batch it belongs to."""
+    digest = hashlib.sha256(sender_address.lower().encode())
+    for row in rows:
+        digest.update(json.dumps(
+            [row["recipient"], row["username"], row["amount_text"], row["remarks"]]
+        ).encode())
+    return digest.hexdigest()
+
+
+class PayoutJournal:
+    """Append-only JSON lines journal of a bulk payout run."""
+
+    def __init__(self, path: str, fingerprint: str):
+        """Open the journal, loading the state of a previous run of the same batch.
+
+        Args:
+            path (str): Journal file path
+            fingerprint (str): payout_fingerprint() of the batch
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.rows = {}  # row index -> latest journal entry for that row
+        self._lock = threading.Lock()
+
+        entries = []
+        if os.path.exists(path):
+            with open(path) as journal_file:
+                entries = [json.loads(line) for line in journal_file if line.strip()]
+        if entries:
+            if entries[0].get("fingerprint") != fingerprint:
+                raise ValueError(f"Journal {path} belongs to a different payout batch")
+            for entry in entries[1:]:
+                self.rows[entry["row"]] = entry
+        else:
+            # New or empty file (created by the caller, or a crash before the header was written)
+            self._append({"type": "batch", "fingerprint": fingerprint})
+
+    def _append(self, entry: dict) -> None:
+        with open(self.path, "a") as journal_file:
+            journal_file.write(json.dumps(entry) + "\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def record(self, row: int, entry_type: str, **fields) -> dict:
+        """Append an entry for a row and make it the row's current state.
+
+        Args:
+            row (int): Row index in the payout list
+            entry_type (str): One of the JOURNAL_* types
+            **fields: Extra data (tx_hash, nonce, raw_transaction, error, ...)
+
+        Returns:
+            dict: the entry written
+        """
+        with self._lock:
+            previous = self.rows.get(row, {})
+            entry = {**previous, **fields, "type": entry_type, "row": row}
+            self._append(entry)
+            self.rows[row] = entry
+            return entry
+
+    def state(self, row: int):
+        """Latest journal entry for a row, or None if it was never signed."""
+        return self.rows.get(row)
+
+
+class MemoryJournal(PayoutJournal):
+    """Journal kept in memory only (runs without a journal file cannot be resumed)."""
+
+    def __init__(self, fingerprint: str = ""):
+        self.path = None
+        self.fingerprint = fingerprint
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def _append(self, entry: dict) -> None:
+        pass
@@ -0,0 +1,182 @@
+"""Concurrent dispatch of read-only tools, ordered dispatch of mutating tools.
+
+The agent framework runs the function calls of one model turn as concurrent
+asyncio tasks. ``ToolDispatcher.wrap`` makes every registered tool a
+coroutine that runs where it is safe:
+
+* Read-only tools (``read_only`` names) run concurrently: synchronous ones in
+  a bounded thread pool, coroutines on the event loop, with at most
+  ``max_workers`` of either in flight per loop. Each call has a timeout
+  (``timeouts`` per tool, else ``default_timeout``); a call that exceeds it is
+  cancelled and answered with an error result.
+* Every other tool is treated as mutating. Mutating tools run one at a time per
+  session, in call order, on a single-thread executor of their own (kept
+  while the session has calls in flight), so sessions never wait behind each
+  other's writes. They have no timeout. A call that is cancelled before it
+  starts never runs, and a call that has started (and may have broadcast a
+  transaction) always runs to completion.
+
+Context variables (the session, the instrumented tool) are copied into the
+worker threads.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from .sessions import current_session_id
+
+# Read-only calls in flight at once per event loop (threads in the read pool)
+DEFAULT_MAX_WORKERS = 8
+
+# Seconds a read-only tool may run before it is cancelled
+DEFAULT_TIMEOUT = 30.0
+
+
+class ToolDispatcher:
+    """Runs read-only tools concurrently with timeouts and mutating tools in order per session."""
+
+    def __init__(self, read_only, max_workers: int = DEFAULT_MAX_WORKERS, timeouts: dict = None,
+                 default_timeout: float = DEFAULT_TIMEOUT):
+        """Create the dispatcher (threads are started on first use).
+
+        Args:
+            read_only: Names of the tools without side effects
+            max_workers (int): Read-only calls in flight at once per event loop
+            timeouts (dict): Seconds per read-only tool name, overriding default_timeout
+            default_timeout (float): Seconds a read-only tool may run
+        """
+        self.read_only = frozenset(read_only)
+        self.max_workers = max_workers
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+
+        self.concurrent_calls = 0
+        self.ordered_calls = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+        self._pool = None
+        self._lanes = weakref.WeakValueDictionary()  # session ID -> single-thread executor, while calls use it
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+
+    def is_read_only(self, func) -> bool:
+        """Whether a tool is marked side-effect-free."""
+        return func.__name__ in self.read_only
+
+    def timeout_for(self, func) -> float:
+        return self.timeouts.get(func.__name__, self.default_timeout)
+
+    def _read_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="protectedpay-read")
+            return self._pool
+
+    def _lane(self, session_id: str) -> ThreadPoolExecutor:
+        """The session's single-thread executor (callers keep it referenced until their call is done)."""
+        with self._lock:
+            lane = self._lanes.get(session_id)
+            if lane is None:
+                lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="protectedpay-write")
+                self._lanes[session_id] = lane
+            return lane
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def wrap(self, func):
+        """Wrap a tool as a coroutine dispatched by its read-only / mutating mark.
+
+        The wrapper keeps the tool's name, signature and docstring, so the agent
+        framework sees the same tool declaration.
+        """
+        if self.is_read_only(func):
+            return self._wrap_read_only(func)
+        if inspect.iscoroutinefunction(func):
+            raise TypeError(f"Mutating tool {func.__name__} must be synchronous (it runs on an ordered worker thread)")
+        return self._wrap_mutating(func)
+
+    def _timeout_result(self, func, timeout: float) -> dict:
+        return {
+            "status": "error",
+            "error_message": f"{func.__name__} did not finish within {timeout:g} seconds and was cancelled."
+        }
+
+    def _wrap_read_only(self, func):
+        is_async = inspect.iscoroutinefunction(func)
+
+        @functools.wraps(func)
+        async def read_only_wrapper(*args, **kwargs):
+            timeout = self.timeout_for(func)
+            self._count("concurrent_calls")
+            async with self._semaphore():
+                if is_async:
+                    call = func(*args, **kwargs)
+                else:
+                    context = contextvars.copy_context()
+                    call = asyncio.get_running_loop().run_in_executor(
+                        self._read_pool(), functools.partial(context.run, func, *args, **kwargs)
+                    )
+                try:
+                    return await asyncio.wait_for(call, timeout)
+                except asyncio.TimeoutError:
+                    self._count("timed_out")
+                    return self._timeout_result(func, timeout)
+                except asyncio.CancelledError:
+                    self._count("cancelled")
+                    raise
+        return read_only_wrapper
+
+    def _wrap_mutating(self, func):
+        @functools.wraps(func)
+        async def mutating_wrapper(*args, **kwargs):
+            self._count("ordered_calls")
+            context = contextvars.copy_context()
+            # Submitted from the event loop in call order; the session's lane runs its calls one at a time in
+            # that order. The callback keeps the lane alive until the call is done, even if this caller is
+            # cancelled, so a later call of the session cannot get a second lane.
+            lane = self._lane(current_session_id())
+            future = lane.submit(context.run, func, *args, **kwargs)
+            future.add_done_callback(lambda _, lane=lane: None)
+            try:
+                # Cancelling drops the call if it has not started; a started call finishes
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                self._count("cancelled")
+                raise
+        return mutating_wrapper
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads (they are started again on next use)."""
+        with self._lock:
+            executors = ([self._pool] if self._pool else []) + list(self._lanes.values())
+            self._pool = None
+            self._lanes = weakref.WeakValueDictionary()
+        for executor in executors:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Dispatch counters."""
+        with self._lock:
+            return {
+                "concurrent_calls": self.concurrent_calls,
+                "ordered_calls": self.ordered_calls,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+                "active_sessions": len(self._lanes),
+            }
@@ -0,0 +1,161 @@
+"""Gas price and gas limit oracle for transactions signed by the agent.
+
+The gas price is reused for a few seconds and never past that TTL. Gas estimates are remembered per
+contract function and call shape (calldata length and whether value is sent);
+once a shape has enough history the gas limit is predicted from it with a
+margin learned from the spread of the samples, and ``estimate_gas`` is skipped.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+# Seconds a fetched gas price is used before the node is asked again
+DEFAULT_GAS_PRICE_TTL = 10
+
+# Gas price multiplier for faster confirmation
+DEFAULT_GAS_PRICE_MULTIPLIER = 1.1
+
+# Gas estimates remembered per call shape
+DEFAULT_HISTORY_SIZE = 20
+
+# Estimates needed before a call shape stops calling estimate_gas
+DEFAULT_MIN_SAMPLES = 3
+
+# Safety margin on top of the largest remembered estimate; grows with the spread of the samples
+BASE_MARGIN = 0.1
+MAX_MARGIN = 0.5
+
+# Calldata lengths are bucketed to this many bytes (one ABI word)
+CALLDATA_BUCKET = 32
+
+# Transaction fields that keep build_transaction() from reading defaults over RPC when only the calldata is needed
+ENCODE_ONLY_PARAMS = {"gas": 0, "gasPrice": 0, "chainId": 0}
+
+
+class GasOracle:
+    """Cached gas price and history-based gas limits, keyed by call shape."""
+
+    def __init__(self, w3, price_ttl: float = DEFAULT_GAS_PRICE_TTL, price_multiplier: float = DEFAULT_GAS_PRICE_MULTIPLIER,
+                 history_size: int = DEFAULT_HISTORY_SIZE, min_samples: int = DEFAULT_MIN_SAMPLES):
+        """Create the oracle.
+
+        Args:
+            w3: Web3 instance used for gas price and estimate calls
+            price_ttl (float): Seconds a gas price is reused
+            price_multiplier (float): Multiplier applied to the node's gas price
+            history_size (int): Estimates remembered per call shape
+            min_samples (int): Estimates needed before predictions replace estimate_gas
+        """
+        self.w3 = w3
+        self.price_ttl = price_ttl
+        self.price_multiplier = price_multiplier
+        self.history_size = history_size
+        self.min_samples = min_samples
+
+        self.predictions = 0
+        self.estimates = 0
+        self.price_hits = 0
+        self.price_fetches = 0
+
+        self._price = (None, 0.0)  # (node gas price, monotonic time fetched)
+        self._history = {}  # call shape key -> deque of gas estimates
+        self._lock = threading.Lock()
+
+    def gas_price(self) -> int:
+        """Current gas price in wei with the multiplier applied (raises if the node cannot be reached).
+
+        The node's price is reused for ``price_ttl`` seconds; an older one is never used.
+        """
+        with self._lock:
+            price, fetched_at = self._price
+            if price is not None and time.monotonic() - fetched_at < self.price_ttl:
+                self.price_hits += 1
+                return int(price * self.price_multiplier)
+        price = self.w3.eth.gas_price
+        with self._lock:
+            self._price = (price, time.monotonic())
+            self.price_fetches += 1
+        return int(price * self.price_multiplier)
+
+    @staticmethod
+    def call_key(contract_function, value_wei: int) -> tuple:
+        """Call shape key: (contract, function name, calldata length bucket, sends value)."""
+        calldata = contract_function.build_transaction(ENCODE_ONLY_PARAMS)["data"]
+        calldata_bytes = (len(calldata) - 2) // 2
+        bucket = math.ceil(calldata_bytes / CALLDATA_BUCKET) * CALLDATA_BUCKET
+        return (contract_function.address, contract_function.fn_name, bucket, value_wei > 0)
+
+    def predict(self, key: tuple):
+        """Gas limit predicted from history, or None if the shape has too few samples."""
+        with self._lock:
+            samples = self._history.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            largest = max(samples)
+            spread = (largest - min(samples)) / largest if largest else 0.0
+        margin = min(MAX_MARGIN, BASE_MARGIN + spread / 2)
+        return int(largest * (1 + margin))
+
+    def record_estimate(self, key: tuple, gas_estimate: int) -> None:
+        """Remember an estimate_gas result for a call shape."""
+        with self._lock:
+            if key not in self._history:
+                self._history[key] = deque(maxlen=self.history_size)
+            self._history[key].append(gas_estimate)
+
+    def gas_limit(self, contract_function, tx_params: dict) -> tuple:
+        """Gas limit for a call, predicted from history or estimated with a 20% buffer.
+
+        Args:
+            contract_function: Bound contract function (arguments applied)
+            tx_params (dict): Transaction params for estimate_gas ('from', 'value')
+
+        Returns:
+            tuple: (gas_limit, call_key, source) where source is "history" or "estimate"
+        """
+        key = self.call_key(contract_function, tx_params.get("value", 0))
+        predicted = self.predict(key)
+        if predicted is not None:
+            with self._lock:
+                self.predictions += 1
+            return predicted, key, "history"
+
+        gas_estimate = contract_function.estimate_gas(tx_params)
+        self.record_estimate(key, gas_estimate)
+        with self._lock:
+            self.estimates += 1
+        return int(gas_estimate * 1.2), key, "estimate"
+
+    def record_receipt(self, key: tuple, gas_limit: int, gas_used: int, success: bool) -> None:
+        """Learn from a mined transaction sent with a gas limit from this oracle.
+
+        A failed transaction that used (nearly) all of its gas probably ran out
+        of gas, so the shape's history is dropped and the next call estimates again.
+        A successful one that used more gas than any remembered sample is added
+        to the history.
+        """
+        with self._lock:
+            samples = self._history.get(key)
+            if not success and gas_used >= gas_limit * 0.95:
+                self._history.pop(key, None)
+            elif success and samples and gas_used > max(samples):
+                samples.append(gas_used)
+
+    def reset(self) -> None:
+        """Forget all gas history and the cached gas price."""
+        with self._lock:
+            self._history.clear()
+            self._price = (None, 0.0)
+
+    def stats(self) -> dict:
+        """Prediction/estimate counters and gas price reuse counters."""
+        with self._lock:
+            return {
+                "predictions": self.predictions,
+                "estimates": self.estimates,
+                "call_shapes": len(self._history),
+                "gas_price_hits": self.price_hits,
+                "gas_price_fetches": self.price_fetches
+            }
@@ -0,0 +1,531 @@
+"""Event-sourced local index of ProtectedPay contract state.
+
+Streams the contract's events with eth_getLogs in block ranges and rebuilds
+transfers, users, group payments and savings pots into a local SQLite store.
+The store keeps a checkpointed block height so it can be kept current
+incrementally, and it can always be rebuilt from scratch.
+
+Logs and block timestamps are fetched without holding the database lock, so
+reads are only blocked for the SQLite write of each batch. A rebuild marks the
+index stale until its first sync has committed.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from .instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default number of blocks requested per eth_getLogs call
+DEFAULT_BLOCK_BATCH_SIZE = 2000
+
+# Default number of blocks kept behind the head to stay clear of reorgs
+DEFAULT_CONFIRMATIONS = 2
+
+# Status codes as stored on chain
+TRANSFER_PENDING, TRANSFER_COMPLETED, TRANSFER_CANCELLED = 0, 1, 2
+GROUP_PAYMENT_PENDING, GROUP_PAYMENT_COMPLETED = 0, 1
+POT_ACTIVE, POT_BROKEN = 0, 1
+
+INDEXED_EVENTS = (
+    "TransferInitiated",
+    "TransferClaimed",
+    "TransferRefunded",
+    "UserRegistered",
+    "GroupPaymentCreated",
+    "GroupPaymentContributed",
+    "GroupPaymentCompleted",
+    "SavingsPotCreated",
+    "PotContribution",
+    "PotBroken",
+)
+
+# uint256 amounts are stored as decimal TEXT since they can exceed SQLite's 64-bit integers
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    transfer_id TEXT PRIMARY KEY,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    amount_wei TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    remarks TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transfers_sender ON transfers (sender, block_number, log_index);
+CREATE INDEX IF NOT EXISTS transfers_recipient ON transfers (recipient, block_number, log_index);
+CREATE TABLE IF NOT EXISTS users (
+    address TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_payments (
+    payment_id TEXT PRIMARY KEY,
+    creator TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    total_amount_wei TEXT NOT NULL,
+    num_participants INTEGER NOT NULL,
+    amount_collected_wei TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    remarks TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS group_payments_creator ON group_payments (creator);
+CREATE TABLE IF NOT EXISTS group_contributions (
+    payment_id TEXT NOT NULL,
+    contributor TEXT NOT NULL,
+    amount_wei TEXT NOT NULL,
+    PRIMARY KEY (payment_id, contributor)
+);
+CREATE INDEX IF NOT EXISTS group_contributions_contributor ON group_contributions (contributor);
+CREATE TABLE IF NOT EXISTS savings_pots (
+    pot_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    target_amount_wei TEXT NOT NULL,
+    current_amount_wei TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    remarks TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS savings_pots_owner ON savings_pots (owner);
+"""
+
+DATA_TABLES = ("transfers", "users", "group_payments", "group_contributions", "savings_pots")
+
+
+def load_log_fixture(path: str) -> list:
+    """Load recorded eth_getLogs output from a JSON file.
+
+    The file holds a list of raw log objects as returned by the JSON-RPC API
+    (hex strings). An optional ``blockTimestamp`` per log lets the fixture be
+    replayed without any RPC access.
+
+    Args:
+        path (str): Path to the JSON fixture
+
+    Returns:
+        list: Logs normalized to the shape returned by w3.eth.get_logs
+    """
+    with open(path) as fixture_file:
+        raw_logs = json.load(fixture_file)
+
+    logs = []
+    for raw_log in raw_logs:
+        log = dict(raw_log)
+        log["address"] = Web3.to_checksum_address(log["address"])
+        log["topics"] = [HexBytes(topic) for topic in log["topics"]]
+        log["data"] = HexBytes(log["data"])
+        for key in ("blockNumber", "logIndex", "transactionIndex", "blockTimestamp"):
+            if isinstance(log.get(key), str):
+                log[key] = int(log[key], 16)
+        for key in ("blockHash", "transactionHash"):
+            if key in log:
+                log[key] = HexBytes(log[key])
+        logs.append(log)
+    return logs
+
+
+class ProtectedPayIndexer:
+    """Local SQLite index of ProtectedPay state rebuilt from contract events."""
+
+    def __init__(self, w3, contract, db_path: str = ":memory:", start_block: int = 0,
+                 block_batch_size: int = DEFAULT_BLOCK_BATCH_SIZE, confirmations: int = DEFAULT_CONFIRMATIONS):
+        """Open (or create) the index database.
+
+        Args:
+            w3: Web3 instance used for eth_getLogs and block timestamps
+            contract: ProtectedPay contract instance whose events are indexed
+            db_path (str): SQLite database path (":memory:" for a throwaway index)
+            start_block (int): First block to scan (the contract deployment block)
+            block_batch_size (int): Number of blocks requested per eth_getLogs call
+            confirmations (int): Number of blocks to stay behind the chain head
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.db_path = db_path
+        self.start_block = start_block
+        self.block_batch_size = block_batch_size
+        self.confirmations = confirmations
+        self.last_synced_at = None
+
+        self._lock = threading.RLock()  # guards the SQLite connection only
+        self._sync_lock = threading.RLock()  # serializes sync, rebuild and apply_logs (held across RPC calls)
+        self._stop_event = threading.Event()
+        self._sync_thread = None
+        self._log_listeners = []
+
+        self._events_by_topic = {}
+        for event_name in INDEXED_EVENTS:
+            event = getattr(contract.events, event_name)()
+            self._events_by_topic[HexBytes(event.topic)] = event
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            stored_address = self._get_meta("contract_address")
+            if stored_address is not None and stored_address != contract.address:
+                # Index belongs to another contract deployment, start over
+                self._reset()
+            self._set_meta("contract_address", contract.address)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _reset(self) -> None:
+        for table in DATA_TABLES:
+            self._conn.execute(f"DELETE FROM {table}")
+        self._conn.execute("DELETE FROM meta WHERE key = 'last_block'")
+
+    @property
+    def last_block(self) -> int:
+        """Highest block fully applied to the index (start_block - 1 if empty)."""
+        with self._lock:
+            value = self._get_meta("last_block")
+        return int(value) if value is not None else self.start_block - 1
+
+    def add_log_listener(self, listener) -> None:
+        """Register a callable invoked with every decoded event applied to the index.
+
+        Args:
+            listener: Callable taking the decoded event (web3 EventData)
+        """
+        self._log_listeners.append(listener)
+
+    def rebuild(self, to_block=None) -> dict:
+        """Drop all indexed state and replay every event from start_block.
+
+        Args:
+            to_block: Last block to index (defaults to head minus confirmations)
+
+        Returns:
+            dict: sync summary (see sync())
+        """
+        with self._sync_lock:
+            # Stale (get_fresh_index() skips it) until the replay below has committed
+            self.last_synced_at = None
+            with self._lock:
+                with self._conn:
+                    self._reset()
+            return self.sync(to_block=to_block)
+
+    def sync(self, to_block=None) -> dict:
+        """Apply all events between the checkpoint and ``to_block``.
+
+        Args:
+            to_block: Last block to index (defaults to head minus confirmations)
+
+        Returns:
+            dict: from_block, to_block and number of logs applied
+        """
+        with self._sync_lock:
+            if to_block is None:
+                to_block = self.w3.eth.block_number - self.confirmations
+            first_block = from_block = self.last_block + 1
+            applied = 0
+            batch_size = self.block_batch_size
+
+            while from_block <= to_block:
+                range_end = min(from_block + batch_size - 1, to_block)
+                try:
+                    logs = self.w3.eth.get_logs({
+                        "address": self.contract.address,
+                        "fromBlock": from_block,
+                        "toBlock": range_end,
+                        "topics": [[topic.to_0x_hex() for topic in self._events_by_topic]]
+                    })
+                except Exception as logs_error:
+                    # Providers cap the range or result count, retry with a smaller window
+                    if range_end == from_block:
+                        raise
+                    batch_size = max(1, (range_end - from_block + 1) // 2)
+                    logger.warning("eth_getLogs failed for blocks %d-%d: %s, retrying with %d blocks",
+                                   from_block, range_end, logs_error, batch_size)
+                    metrics.record_event("index_get_logs", "split")
+                    continue
+
+                applied += self.apply_logs(logs, checkpoint=range_end)
+                from_block = range_end + 1
+
+            self.last_synced_at = time.time()
+            return {"from_block": first_block, "to_block": to_block, "logs_applied": applied}
+
+    def apply_logs(self, logs: list, checkpoint: Optional[int] = None) -> int:
+        """Apply raw contract logs to the index in one transaction.
+
+        Logs must be in chain order. Logs for other events or contracts are ignored.
+        Block timestamps are fetched before the database lock is taken.
+
+        Args:
+            logs (list): Logs as returned by eth_getLogs (or load_log_fixture)
+            checkpoint (int): Block height to record as fully indexed afterwards
+
+        Returns:
+            int: number of logs applied
+        """
+        with self._sync_lock:
+            decoded = []
+            for log in logs:
+                if not log["topics"]:
+                    continue
+                event = self._events_by_topic.get(HexBytes(log["topics"][0]))
+                if event is None:
+                    continue
+                decoded.append((event.process_log(log), log.get("blockTimestamp")))
+
+            timestamps = self._get_block_timestamps(
+                {event_data["blockNumber"] for event_data, block_timestamp in decoded if block_timestamp is None}
+            )
+
+            with self._lock, self._conn:
+                for event_data, block_timestamp in decoded:
+                    if block_timestamp is None:
+                        block_timestamp = timestamps[event_data["blockNumber"]]
+                    self._apply_event(event_data, block_timestamp)
+                if checkpoint is None and decoded:
+                    checkpoint = max(event_data["blockNumber"] for event_data, _ in decoded)
+                if checkpoint is not None and checkpoint > self.last_block:
+                    self._set_meta("last_block", checkpoint)
+
+        for event_data, _ in decoded:
+            for listener in self._log_listeners:
+                listener(event_data)
+        return len(decoded)
+
+    def _get_block_timestamps(self, block_numbers: set) -> dict:
+        """Fetch timestamps for the given blocks, batched into one JSON-RPC request when possible."""
+        if not block_numbers:
+            return {}
+        block_numbers = sorted(block_numbers)
+        try:
+            with self.w3.batch_requests() as batch:
+                for block_number in block_numbers:
+                    batch.add(self.w3.eth.get_block(block_number))
+                blocks = batch.execute()
+        except Exception as batch_error:
+            logger.warning("Batched block fetch failed: %s, fetching blocks one by one", batch_error)
+            metrics.record_event("index_block_batch", "fallback")
+            blocks = [self.w3.eth.get_block(block_number) for block_number in block_numbers]
+        return {block_number: int(block["timestamp"]) for block_number, block in zip(block_numbers, blocks)}
+
+    def _apply_event(self, event_data, block_timestamp: int) -> None:
+        name = event_data["event"]
+        args = event_data["args"]
+        block_number = event_data["blockNumber"]
+        execute = self._conn.execute
+
+        if name == "TransferInitiated":
+            execute(
+                "INSERT OR REPLACE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (args["transferId"].hex(), args["sender"], args["recipient"], str(args["amount"]),
+                 block_timestamp, TRANSFER_PENDING, args["remarks"], block_number, event_data["logIndex"])
+            )
+        elif name == "TransferClaimed":
+            execute("UPDATE transfers SET status = ? WHERE transfer_id = ?", (TRANSFER_COMPLETED, args["transferId"].hex()))
+        elif name == "TransferRefunded":
+            execute("UPDATE transfers SET status = ? WHERE transfer_id = ?", (TRANSFER_CANCELLED, args["transferId"].hex()))
+        elif name == "UserRegistered":
+            execute("DELETE FROM users WHERE address = ? OR username = ?", (args["userAddress"], args["username"]))
+            execute("INSERT INTO users VALUES (?, ?, ?)", (args["userAddress"], args["username"], block_number))
+        elif name == "GroupPaymentCreated":
+            execute(
+                "INSERT OR REPLACE INTO group_payments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (args["paymentId"].hex(), args["creator"], args["recipient"], str(args["totalAmount"]),
+                 args["numParticipants"], "0", block_timestamp, GROUP_PAYMENT_PENDING, args["remarks"], block_number)
+            )
+        elif name == "GroupPaymentContributed":
+            payment_id = args["paymentId"].hex()
+            self._add_amount("group_payments", "amount_collected_wei", "payment_id", payment_id, args["amount"])
+            row = execute(
+                "SELECT amount_wei FROM group_contributions WHERE payment_id = ? AND contributor = ?",
+                (payment_id, args["contributor"])
+            ).fetchone()
+            total = (int(row["amount_wei"]) if row else 0) + args["amount"]
+            execute("INSERT OR REPLACE INTO group_contributions VALUES (?, ?, ?)", (payment_id, args["contributor"], str(total)))
+        elif name == "GroupPaymentCompleted":
+            execute("UPDATE group_payments SET status = ? WHERE payment_id = ?", (GROUP_PAYMENT_COMPLETED, args["paymentId"].hex()))
+        elif name == "SavingsPotCreated":
+            execute(
+                "INSERT OR REPLACE INTO savings_pots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (args["potId"].hex(), args["owner"], args["name"], str(args["targetAmount"]), "0",
+                 block_timestamp, POT_ACTIVE, args["remarks"], block_number)
+            )
+        elif name == "PotContribution":
+            self._add_amount("savings_pots", "current_amount_wei", "pot_id", args["potId"].hex(), args["amount"])
+        elif name == "PotBroken":
+            execute(
+                "UPDATE savings_pots SET status = ?, current_amount_wei = '0' WHERE pot_id = ?",
+                (POT_BROKEN, args["potId"].hex())
+            )
+
+    def _add_amount(self, table: str, column: str, key_column: str, key: str, amount: int) -> None:
+        row = self._conn.execute(f"SELECT {column} FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute(f"UPDATE {table} SET {column} = ? WHERE {key_column} = ?", (str(int(row[column]) + amount), key))
+
+    def start(self, interval: float = 5.0) -> None:
+        """Keep the index current by syncing every ``interval`` seconds in a daemon thread.
+
+        Args:
+            interval (float): Seconds between sync rounds
+        """
+        if self._sync_thread is not None and self._sync_thread.is_alive():
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                try:
+                    self.sync()
+                except Exception as sync_error:
+                    logger.warning("Index sync failed: %s", sync_error)
+                    metrics.record_event("index_sync", "failed")
+                self._stop_event.wait(interval)
+
+        self._sync_thread = threading.Thread(target=run, name="protectedpay-indexer", daemon=True)
+        self._sync_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background sync thread."""
+        self._stop_event.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+            self._sync_thread = None
+
+    def is_fresh(self, max_age: float) -> bool:
+        """Whether the index was synced within the last ``max_age`` seconds."""
+        return self.last_synced_at is not None and time.time() - self.last_synced_at <= max_age
+
+    def get_transfers_for_address(self, address: str) -> list:
+        """All transfers sent or received by an address, in chain order.
+
+        Returns:
+            list: (transfer_id_bytes, sender, recipient, amount_wei, timestamp, status, remarks) tuples
+        """
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM transfers WHERE sender = ? OR recipient = ? ORDER BY block_number, log_index",
+                (address, address)
+            ).fetchall()
+        return [
+            (bytes.fromhex(row["transfer_id"]), row["sender"], row["recipient"], int(row["amount_wei"]),
+             row["timestamp"], row["status"], row["remarks"])
+            for row in rows
+        ]
+
+    def get_transfer_page(self, address: str, offset: int = 0, limit: int = 100, status: Optional[int] = None,
+                          direction: Optional[str] = None, start_time: Optional[int] = None,
+                          end_time: Optional[int] = None) -> list:
+        """Transfers of an address from a position in its history on, filtered in SQL.
+
+        Positions count all of the address's transfers in chain order (the same
+        order as getUserProfile().transferIds), whether or not they match.
+
+        Args:
+            address (str): Sender or recipient address
+            offset (int): First position to consider
+            limit (int): Maximum number of matching transfers returned
+            status (int): Only this status code
+            direction (str): "sent" or "received" relative to ``address``
+            start_time (int): Earliest timestamp (inclusive)
+            end_time (int): Latest timestamp (inclusive)
+
+        Returns:
+            list: (position, (transfer_id_bytes, sender, recipient, amount_wei, timestamp, status, remarks)) tuples
+        """
+        address = Web3.to_checksum_address(address)
+        conditions = ["position >= ?"]
+        params = [address, address, offset]
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if direction == "sent":
+            conditions.append("sender = ?")
+            params.append(address)
+        elif direction == "received":
+            conditions.append("recipient = ?")
+            params.append(address)
+        if start_time is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            conditions.append("timestamp <= ?")
+            params.append(end_time)
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM (SELECT *, ROW_NUMBER() OVER (ORDER BY block_number, log_index) - 1 AS position "
+                "FROM transfers WHERE sender = ? OR recipient = ?) "
+                f"WHERE {' AND '.join(conditions)} ORDER BY position LIMIT ?",
+                params
+            ).fetchall()
+        return [
+            (row["position"], (bytes.fromhex(row["transfer_id"]), row["sender"], row["recipient"],
+                               int(row["amount_wei"]), row["timestamp"], row["status"], row["remarks"]))
+            for row in rows
+        ]
+
+    def get_address_by_username(self, username: str) -> Optional[str]:
+        """Address registered to a username, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT address FROM users WHERE username = ?", (username,)).fetchone()
+        return row["address"] if row else None
+
+    def get_username_by_address(self, address: str) -> Optional[str]:
+        """Username registered by an address, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT username FROM users WHERE address = ?", (Web3.to_checksum_address(address),)
+            ).fetchone()
+        return row["username"] if row else None
+
+    def get_group_payments_for_address(self, address: str) -> list:
+        """Group payments created by or contributed to by an address, as row dicts."""
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM group_payments WHERE creator = ? OR payment_id IN "
+                "(SELECT payment_id FROM group_contributions WHERE contributor = ?) ORDER BY block_number",
+                (address, address)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_savings_pots_for_address(self, address: str) -> list:
+        """Savings pots owned by an address, as row dicts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM savings_pots WHERE owner = ? ORDER BY block_number",
+                (Web3.to_checksum_address(address),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        """Stop syncing and close the database."""
+        self.stop()
+        with self._sync_lock, self._lock:
+            self._conn.close()
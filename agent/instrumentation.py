@@ -0,0 +1,439 @@
+"""Per-tool latency and RPC instrumentation with Prometheus and OpenTelemetry export.
+
+``instrument_tool`` wraps a tool function and ``instrument_provider`` wraps a
+Web3 provider. While ``metrics`` is enabled they record:
+
+* per tool: calls by result status, wall time (histogram) and the RPC
+  requests made on the tool's behalf, by method
+* per RPC method: requests, errors, time spent and bytes sent and received
+* diagnostic events by outcome (transaction dry runs, gas limit and gas
+  price sources, fallbacks of batched reads and failures of the background
+  threads), recorded with ``metrics.record_event``
+* cache counters read from registered ``stats()`` callables when exported
+
+``metrics.render_prometheus()`` returns everything in the Prometheus text
+format and ``metrics.serve(port)`` serves it on ``/metrics``. With
+``metrics.enable(opentelemetry=True)`` each tool call is also recorded as a
+span (requires the ``opentelemetry-api`` package).
+
+While disabled (the default) every wrapper costs one attribute check.
+"""
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+
+# Upper bounds (seconds) of the tool duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "protectedpay"
+
+# Tool label of RPC requests made outside any instrumented tool (background pollers, worker threads)
+NO_TOOL = "none"
+
+# Name of the tool call currently running in this context
+_current_tool = contextvars.ContextVar("protectedpay_current_tool", default=NO_TOOL)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _result_status(result) -> str:
+    """Status label of a tool result (the "status" field of result dicts)."""
+    if isinstance(result, dict) and isinstance(result.get("status"), str):
+        return result["status"]
+    return "success"
+
+
+def _flatten_stats(stats: dict, prefix: str = "") -> dict:
+    """Numeric values of a (nested) stats dict, with nested keys joined by underscores."""
+    values = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            values.update(_flatten_stats(value, f"{prefix}{key}_"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+class Metrics:
+    """In-process registry of tool and RPC metrics."""
+
+    def __init__(self):
+        self.enabled = False
+        self.tracer = None  # OpenTelemetry tracer when spans are enabled
+
+        self._tool_calls = {}  # (tool, status) -> count
+        self._tool_durations = {}  # tool -> [bucket counts..., +Inf count, sum]
+        self._tool_rpc = {}  # (tool, method) -> requests
+        self._rpc_requests = {}  # method -> requests
+        self._rpc_errors = {}  # method -> failed requests
+        self._rpc_seconds = {}  # method -> seconds spent
+        self._rpc_batches = 0
+        self._bytes = {"sent": 0, "received": 0}
+        self._events = {}  # (event, outcome) -> count
+        self._collectors = {}  # cache name -> stats() callable
+        self._lock = threading.Lock()
+        self._server = None
+
+    def enable(self, opentelemetry: bool = False) -> None:
+        """Start recording.
+
+        Args:
+            opentelemetry (bool): Also record each tool call as an OpenTelemetry span
+        """
+        if opentelemetry:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise RuntimeError("OpenTelemetry spans need the opentelemetry-api package") from None
+            self.tracer = trace.get_tracer("protectedpay.agent")
+        else:
+            self.tracer = None
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording (collected values are kept)."""
+        self.enabled = False
+        self.tracer = None
+
+    def reset(self) -> None:
+        """Forget all recorded values."""
+        with self._lock:
+            self._tool_calls.clear()
+            self._tool_durations.clear()
+            self._tool_rpc.clear()
+            self._rpc_requests.clear()
+            self._rpc_errors.clear()
+            self._rpc_seconds.clear()
+            self._rpc_batches = 0
+            self._bytes = {"sent": 0, "received": 0}
+            self._events.clear()
+
+    def register_collector(self, name: str, stats) -> None:
+        """Export the numeric values of ``stats()`` as cache metrics labelled ``cache=name``."""
+        with self._lock:
+            self._collectors[name] = stats
+
+    def record_tool(self, tool: str, status: str, seconds: float) -> None:
+        with self._lock:
+            self._tool_calls[(tool, status)] = self._tool_calls.get((tool, status), 0) + 1
+            histogram = self._tool_durations.get(tool)
+            if histogram is None:
+                histogram = self._tool_durations[tool] = [0] * (len(DURATION_BUCKETS) + 2)
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    def record_rpc(self, methods: list, seconds: float, failed: bool) -> None:
+        tool = _current_tool.get()
+        with self._lock:
+            if len(methods) > 1:
+                self._rpc_batches += 1
+            for method in methods:
+                self._rpc_requests[method] = self._rpc_requests.get(method, 0) + 1
+                self._tool_rpc[(tool, method)] = self._tool_rpc.get((tool, method), 0) + 1
+                if failed:
+                    self._rpc_errors[method] = self._rpc_errors.get(method, 0) + 1
+            # Time of a batch is attributed to its first method
+            self._rpc_seconds[methods[0]] = self._rpc_seconds.get(methods[0], 0.0) + seconds
+
+    def record_bytes(self, sent: int, received: int) -> None:
+        with self._lock:
+            self._bytes["sent"] += sent
+            self._bytes["received"] += received
+
+    def record_event(self, event: str, outcome: str) -> None:
+        """Count one outcome of a diagnostic event (e.g. event="simulation", outcome="reverted")."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._events[(event, outcome)] = self._events.get((event, outcome), 0) + 1
+
+    def snapshot(self) -> dict:
+        """Recorded values as plain dicts (tool calls, RPC requests by tool and method, bytes, events)."""
+        with self._lock:
+            tools = {}
+            for (tool, status), count in self._tool_calls.items():
+                entry = tools.setdefault(tool, {"calls": {}, "seconds": 0.0, "rpc": {}})
+                entry["calls"][status] = count
+            for tool, histogram in self._tool_durations.items():
+                tools[tool]["seconds"] = histogram[-1]
+            for (tool, method), count in self._tool_rpc.items():
+                tools.setdefault(tool, {"calls": {}, "seconds": 0.0, "rpc": {}})["rpc"][method] = count
+            return {
+                "enabled": self.enabled,
+                "tools": tools,
+                "rpc_requests": dict(self._rpc_requests),
+                "rpc_errors": dict(self._rpc_errors),
+                "rpc_batches": self._rpc_batches,
+                "bytes": dict(self._bytes),
+                "events": {f"{event}:{outcome}": count for (event, outcome), count in self._events.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        p = METRIC_PREFIX
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+
+        with self._lock:
+            family("tool_calls_total", "counter", "Tool calls by result status.")
+            for (tool, status), count in sorted(self._tool_calls.items()):
+                lines.append(f"{p}_tool_calls_total{_labels(tool=tool, status=status)} {count}")
+
+            family("tool_duration_seconds", "histogram", "Wall time of tool calls.")
+            for tool, histogram in sorted(self._tool_durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram):
+                    lines.append(f"{p}_tool_duration_seconds_bucket{_labels(tool=tool, le=bound)} {count}")
+                lines.append(f"{p}_tool_duration_seconds_bucket{_labels(tool=tool, le='+Inf')} {histogram[-2]}")
+                lines.append(f"{p}_tool_duration_seconds_sum{_labels(tool=tool)} {histogram[-1]}")
+                lines.append(f"{p}_tool_duration_seconds_count{_labels(tool=tool)} {histogram[-2]}")
+
+            family("tool_rpc_requests_total", "counter", "RPC requests made by each tool, by method.")
+            for (tool, method), count in sorted(self._tool_rpc.items()):
+                lines.append(f"{p}_tool_rpc_requests_total{_labels(tool=tool, method=method)} {count}")
+
+            family("rpc_requests_total", "counter", "RPC requests by method (batched calls counted individually).")
+            for method, count in sorted(self._rpc_requests.items()):
+                lines.append(f"{p}_rpc_requests_total{_labels(method=method)} {count}")
+
+            family("rpc_errors_total", "counter", "RPC requests that raised or returned an error, by method.")
+            for method, count in sorted(self._rpc_errors.items()):
+                lines.append(f"{p}_rpc_errors_total{_labels(method=method)} {count}")
+
+            family("rpc_seconds_total", "counter", "Time spent waiting for RPC responses, by method.")
+            for method, seconds in sorted(self._rpc_seconds.items()):
+                lines.append(f"{p}_rpc_seconds_total{_labels(method=method)} {seconds}")
+
+            family("rpc_batches_total", "counter", "JSON-RPC batch requests.")
+            lines.append(f"{p}_rpc_batches_total {self._rpc_batches}")
+
+            family("rpc_bytes_total", "counter", "JSON-RPC payload bytes by direction.")
+            for direction, count in sorted(self._bytes.items()):
+                lines.append(f"{p}_rpc_bytes_total{_labels(direction=direction)} {count}")
+
+            family("events_total", "counter", "Diagnostic events (transaction dry runs, gas limit and price sources) by outcome.")
+            for (event, outcome), count in sorted(self._events.items()):
+                lines.append(f"{p}_events_total{_labels(event=event, outcome=outcome)} {count}")
+
+            collectors = sorted(self._collectors.items())
+
+        family("cache", "gauge", "Cache counters (hits, misses, entries, ...) from each cache's stats().")
+        for name, stats in collectors:
+            try:
+                values = _flatten_stats(stats())
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                lines.append(f"{p}_cache{_labels(cache=name, counter=key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Serve ``render_prometheus()`` on http://host:port/metrics from a background thread.
+
+        Returns:
+            ThreadingHTTPServer: the running server (stop it with stop_serving())
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.stop_serving()
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server
+
+    def stop_serving(self) -> None:
+        """Stop the /metrics server started by serve()."""
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+# Process-wide registry used by the agent's tools and providers
+metrics = Metrics()
+
+
+def _start_span(tool: str):
+    """Open an OpenTelemetry span for a tool call (None when spans are off)."""
+    if metrics.tracer is None:
+        return None
+    span_context = metrics.tracer.start_as_current_span(f"tool {tool}", attributes={"protectedpay.tool": tool})
+    return span_context, span_context.__enter__()
+
+
+def _end_span(span, status: str) -> None:
+    if span is not None:
+        span_context, current_span = span
+        current_span.set_attribute("protectedpay.status", status)
+        span_context.__exit__(None, None, None)
+
+
+def instrument_tool(func):
+    """Wrap a tool (sync or async) to record its calls, wall time and RPC requests.
+
+    The wrapper keeps the tool's name, signature and docstring, so the agent
+    framework sees the same tool declaration.
+    """
+    tool = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return await func(*args, **kwargs)
+            token = _current_tool.set(tool)
+            span = _start_span(tool)
+            started = time.perf_counter()
+            status = "exception"
+            try:
+                result = await func(*args, **kwargs)
+                status = _result_status(result)
+                return result
+            finally:
+                metrics.record_tool(tool, status, time.perf_counter() - started)
+                _end_span(span, status)
+                _current_tool.reset(token)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        token = _current_tool.set(tool)
+        span = _start_span(tool)
+        started = time.perf_counter()
+        status = "exception"
+        try:
+            result = func(*args, **kwargs)
+            status = _result_status(result)
+            return result
+        finally:
+            metrics.record_tool(tool, status, time.perf_counter() - started)
+            _end_span(span, status)
+            _current_tool.reset(token)
+    return wrapper
+
+
+def _response_failed(response) -> bool:
+    if isinstance(response, list):
+        return any(isinstance(item, dict) and "error" in item for item in response)
+    return isinstance(response, dict) and "error" in response
+
+
+def instrument_provider(provider):
+    """Wrap a Web3 provider's request methods (sync or async) to record RPC metrics.
+
+    Requests and batches are counted by method at ``make_request`` /
+    ``make_batch_request``. Payload bytes are counted where the raw bytes are
+    visible: the pooled and routed providers' ``_post`` (single calls and
+    batches) or an HTTP provider's ``_make_request`` (single calls).
+
+    Returns:
+        the same provider
+    """
+    make_request = provider.make_request
+    make_batch_request = getattr(provider, "make_batch_request", None)
+    byte_method_name = "_post" if hasattr(provider, "_post") else "_make_request"
+    byte_method = getattr(provider, byte_method_name, None)
+
+    if inspect.iscoroutinefunction(make_request):
+        async def instrumented_make_request(method, params):
+            if not metrics.enabled:
+                return await make_request(method, params)
+            started = time.perf_counter()
+            failed = True
+            try:
+                response = await make_request(method, params)
+                failed = _response_failed(response)
+                return response
+            finally:
+                metrics.record_rpc([method], time.perf_counter() - started, failed)
+    else:
+        def instrumented_make_request(method, params):
+            if not metrics.enabled:
+                return make_request(method, params)
+            started = time.perf_counter()
+            failed = True
+            try:
+                response = make_request(method, params)
+                failed = _response_failed(response)
+                return response
+            finally:
+                metrics.record_rpc([method], time.perf_counter() - started, failed)
+    provider.make_request = instrumented_make_request
+
+    if make_batch_request is not None:
+        if inspect.iscoroutinefunction(make_batch_request):
+            async def instrumented_make_batch_request(batch_requests):
+                if not metrics.enabled:
+                    return await make_batch_request(batch_requests)
+                started = time.perf_counter()
+                failed = True
+                try:
+                    responses = await make_batch_request(batch_requests)
+                    failed = _response_failed(responses)
+                    return responses
+                finally:
+                    metrics.record_rpc([method for method, _ in batch_requests], time.perf_counter() - started, failed)
+        else:
+            def instrumented_make_batch_request(batch_requests):
+                if not metrics.enabled:
+                    return make_batch_request(batch_requests)
+                started = time.perf_counter()
+                failed = True
+                try:
+                    responses = make_batch_request(batch_requests)
+                    failed = _response_failed(responses)
+                    return responses
+                finally:
+                    metrics.record_rpc([method for method, _ in batch_requests], time.perf_counter() - started, failed)
+        provider.make_batch_request = instrumented_make_batch_request
+
+    if byte_method is not None:
+        if inspect.iscoroutinefunction(byte_method):
+            async def instrumented_bytes(first, request_data):
+                response = await byte_method(first, request_data)
+                if metrics.enabled:
+                    metrics.record_bytes(len(request_data), len(response or b""))
+                return response
+        else:
+            def instrumented_bytes(first, request_data):
+                response = byte_method(first, request_data)
+                if metrics.enabled:
+                    metrics.record_bytes(len(request_data), len(response or b""))
+                return response
+        setattr(provider, byte_method_name, instrumented_bytes)
+
+    return provider
@@ -0,0 +1,52 @@
+"""Deferred construction of module-level clients.
+
+``LazyObject`` stands in for an object that is expensive to build (Web3
+instances, contract objects). It builds the object on first attribute access,
+keeps it, and forwards every attribute access to it from then on, so code that
+holds the proxy uses it exactly like the real object.
+"""
+
+import threading
+
+
+class LazyObject:
+    """Proxy that builds its target once, on first use, in a thread-safe way."""
+
+    __slots__ = ("_factory", "_target", "_lock", "__weakref__")
+
+    def __init__(self, factory):
+        """Create the proxy.
+
+        Args:
+            factory: Callable without arguments that returns the real object
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def is_resolved(self) -> bool:
+        """Whether the real object has been built."""
+        return self._target is not None
+
+    def resolve(self):
+        """The real object, built on the first call."""
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    target = self._factory()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str):
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self.resolve(), name, value)
+
+    def __repr__(self) -> str:
+        if self._target is None:
+            return f"<LazyObject (not built) of {self._factory!r}>"
+        return repr(self._target)
@@ -0,0 +1,238 @@
+"""Batched contract reads through a Multicall3 aggregator.
+
+Packs many read-only contract calls into a few ``aggregate3`` eth_calls and
+falls back to one eth_call per read when the aggregator is not deployed.
+``async_batch_call`` does the same for AsyncWeb3 contract functions.
+"""
+
+import asyncio
+import logging
+
+from eth_utils.abi import get_abi_output_types
+from web3._utils.abi import map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+from .instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Canonical Multicall3 deployment address (same on every EVM chain it is deployed to)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Default number of calls packed into a single aggregate3 request
+DEFAULT_CHUNK_SIZE = 100
+
+# Minimal Multicall3 ABI (aggregate3 only)
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# Aggregator availability per (provider, multicall address), checked once
+_aggregator_available = {}
+
+
+def is_aggregator_available(w3, multicall_address: str = MULTICALL3_ADDRESS) -> bool:
+    """Check whether a Multicall3 contract is deployed at the given address.
+
+    Args:
+        w3: Web3 instance to check with
+        multicall_address (str): Address of the Multicall3 contract
+
+    Returns:
+        bool: True if contract code exists at the address
+    """
+    cache_key = (str(w3.provider), multicall_address.lower())
+    if cache_key not in _aggregator_available:
+        try:
+            code = w3.eth.get_code(w3.to_checksum_address(multicall_address))
+            _aggregator_available[cache_key] = len(code) > 0
+        except Exception as e:
+            logger.warning("Multicall3 availability check failed: %s", e)
+            metrics.record_event("multicall_check", "failed")
+            return False
+    return _aggregator_available[cache_key]
+
+
+def decode_call_result(w3, contract_function, return_data: bytes):
+    """Decode raw return data the same way ContractFunction.call() does.
+
+    Args:
+        w3: Web3 instance whose codec is used
+        contract_function: Bound contract function the data was returned for
+        return_data (bytes): Raw ABI-encoded return data
+
+    Returns:
+        The decoded value (single value for one output, list otherwise)
+    """
+    output_types = get_abi_output_types(contract_function.abi)
+    decoded = w3.codec.decode(output_types, return_data)
+    normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+    if len(normalized) == 1:
+        return normalized[0]
+    return normalized
+
+
+def _call_each(calls: list) -> list:
+    """Run each call as its own eth_call (no aggregator)."""
+    results = []
+    for contract_function in calls:
+        try:
+            results.append((True, contract_function.call()))
+        except Exception as call_error:
+            results.append((False, call_error))
+    return results
+
+
+def batch_call(w3, calls: list, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               multicall_address: str = MULTICALL3_ADDRESS) -> list:
+    """Execute many read-only contract calls in as few RPC round-trips as possible.
+
+    Calls are packed into aggregate3 requests of at most ``chunk_size`` calls.
+    If the aggregator is not deployed, or an aggregate request fails as a whole,
+    the affected calls are made one by one instead.
+
+    Args:
+        w3: Web3 instance to send the requests with
+        calls (list): Bound contract functions, e.g. contract.functions.getTransferDetails(id)
+        chunk_size (int): Maximum number of calls per aggregate3 request
+        multicall_address (str): Address of the Multicall3 contract
+
+    Returns:
+        list: (success, value_or_error) tuples, in the same order as ``calls``
+    """
+    if not calls:
+        return []
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    if not is_aggregator_available(w3, multicall_address):
+        return _call_each(calls)
+
+    multicall = w3.eth.contract(address=w3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI)
+    results = []
+
+    for start in range(0, len(calls), chunk_size):
+        chunk = calls[start:start + chunk_size]
+        try:
+            aggregate_results = multicall.functions.aggregate3([
+                (contract_function.address, True, contract_function._encode_transaction_data())
+                for contract_function in chunk
+            ]).call()
+        except Exception as aggregate_error:
+            logger.warning("Multicall3 aggregate3 failed: %s, falling back to individual calls", aggregate_error)
+            metrics.record_event("multicall", "fallback")
+            results.extend(_call_each(chunk))
+            continue
+
+        for contract_function, (success, return_data) in zip(chunk, aggregate_results):
+            if not success:
+                results.append((False, Exception(f"{contract_function.fn_name} reverted")))
+                continue
+            try:
+                results.append((True, decode_call_result(w3, contract_function, return_data)))
+            except Exception as decode_error:
+                results.append((False, decode_error))
+
+    return results
+
+
+async def async_is_aggregator_available(async_w3, multicall_address: str = MULTICALL3_ADDRESS) -> bool:
+    """Async version of is_aggregator_available (shares its cache)."""
+    cache_key = (str(async_w3.provider), multicall_address.lower())
+    if cache_key not in _aggregator_available:
+        try:
+            code = await async_w3.eth.get_code(async_w3.to_checksum_address(multicall_address))
+            _aggregator_available[cache_key] = len(code) > 0
+        except Exception as e:
+            logger.warning("Multicall3 availability check failed: %s", e)
+            metrics.record_event("multicall_check", "failed")
+            return False
+    return _aggregator_available[cache_key]
+
+
+async def _async_call_each(calls: list) -> list:
+    """Run each call as its own concurrent eth_call (no aggregator)."""
+    outcomes = await asyncio.gather(*(contract_function.call() for contract_function in calls), return_exceptions=True)
+    return [(not isinstance(outcome, Exception), outcome) for outcome in outcomes]
+
+
+async def async_batch_call(async_w3, calls: list, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           multicall_address: str = MULTICALL3_ADDRESS) -> list:
+    """Async version of batch_call for AsyncWeb3 contract functions.
+
+    Aggregate requests for all chunks are sent concurrently.
+
+    Args:
+        async_w3: AsyncWeb3 instance to send the requests with
+        calls (list): Bound AsyncWeb3 contract functions
+        chunk_size (int): Maximum number of calls per aggregate3 request
+        multicall_address (str): Address of the Multicall3 contract
+
+    Returns:
+        list: (success, value_or_error) tuples, in the same order as ``calls``
+    """
+    if not calls:
+        return []
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    if not await async_is_aggregator_available(async_w3, multicall_address):
+        return await _async_call_each(calls)
+
+    multicall = async_w3.eth.contract(address=async_w3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI)
+
+    async def run_chunk(chunk: list) -> list:
+        try:
+            aggregate_results = await multicall.functions.aggregate3([
+                (contract_function.address, True, contract_function._encode_transaction_data())
+                for contract_function in chunk
+            ]).call()
+        except Exception as aggregate_error:
+            logger.warning("Multicall3 aggregate3 failed: %s, falling back to individual calls", aggregate_error)
+            metrics.record_event("multicall", "fallback")
+            return await _async_call_each(chunk)
+
+        chunk_results = []
+        for contract_function, (success, return_data) in zip(chunk, aggregate_results):
+            if not success:
+                chunk_results.append((False, Exception(f"{contract_function.fn_name} reverted")))
+                continue
+            try:
+                chunk_results.append((True, decode_call_result(async_w3, contract_function, return_data)))
+            except Exception as decode_error:
+                chunk_results.append((False, decode_error))
+        return chunk_results
+
+    chunk_results = await asyncio.gather(*(
+        run_chunk(calls[start:start + chunk_size]) for start in range(0, len(calls), chunk_size)
+    ))
+    return [result for chunk in chunk_results for result in chunk]
@@ -0,0 +1,137 @@
+"""Local nonce allocation for transactions signed by the agent.
+
+Nonces are reserved locally per signing address so several transactions from
+the same key can be built, signed and in flight at once without asking the
+node for a transaction count every time. The local counter is seeded from the
+node's pending transaction count and resynced after errors or dropped
+transactions.
+"""
+
+import threading
+
+# Error fragments (lowercase) from nodes that mean the local nonce is out of step with the chain
+NONCE_ERROR_MARKERS = (
+    "nonce",
+    "already known",
+    "known transaction",
+    "replacement transaction underpriced",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    """Whether a node error indicates a stale or conflicting nonce."""
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+
+class NonceManager:
+    """Per-address nonce reservations that include pending transactions."""
+
+    def __init__(self, w3):
+        """Create the manager.
+
+        Args:
+            w3: Web3 instance used to read transaction counts
+        """
+        self.w3 = w3
+        self._next_nonce = {}  # address -> next nonce to hand out
+        self._in_flight = {}  # address -> nonces reserved and not yet confirmed or released
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, address: str) -> threading.Lock:
+        with self._locks_guard:
+            if address not in self._locks:
+                self._locks[address] = threading.Lock()
+            return self._locks[address]
+
+    def _chain_nonce(self, address: str) -> int:
+        return self.w3.eth.get_transaction_count(address, "pending")
+
+    def reserve(self, address: str) -> int:
+        """Reserve the next nonce for ``address``.
+
+        The first reservation reads the node's pending transaction count; later
+        ones are served locally.
+
+        Args:
+            address (str): Checksummed signing address
+
+        Returns:
+            int: the reserved nonce
+        """
+        with self._lock_for(address):
+            if address not in self._next_nonce:
+                self._next_nonce[address] = self._chain_nonce(address)
+                self._in_flight[address] = set()
+            nonce = self._next_nonce[address]
+            self._next_nonce[address] = nonce + 1
+            self._in_flight[address].add(nonce)
+            return nonce
+
+    def reserve_many(self, address: str, count: int) -> list:
+        """Reserve ``count`` consecutive nonces for ``address``.
+
+        Args:
+            address (str): Checksummed signing address
+            count (int): Number of nonces
+
+        Returns:
+            list: the reserved nonces in order
+        """
+        return [self.reserve(address) for _ in range(count)]
+
+    def confirm(self, address: str, nonce: int) -> None:
+        """Mark a reserved nonce as used by a transaction accepted by the node."""
+        with self._lock_for(address):
+            self._in_flight.get(address, set()).discard(nonce)
+
+    def release(self, address: str, nonce: int, resync: bool = False) -> None:
+        """Give back a reserved nonce whose transaction was never accepted by the node.
+
+        If it was the most recent reservation the nonce is reused; otherwise, or
+        if ``resync`` is set (e.g. the node rejected the nonce), the address is
+        resynced with the chain.
+
+        Args:
+            address (str): Checksummed signing address
+            nonce (int): The reserved nonce
+            resync (bool): Always re-read the pending transaction count
+        """
+        with self._lock_for(address):
+            self._in_flight.get(address, set()).discard(nonce)
+            if not resync and self._next_nonce.get(address) == nonce + 1:
+                self._next_nonce[address] = nonce
+                return
+        self.resync(address)
+
+    def resync(self, address: str) -> int:
+        """Re-read the pending transaction count after errors or dropped transactions.
+
+        Args:
+            address (str): Checksummed signing address
+
+        Returns:
+            int: the next nonce that will be handed out
+        """
+        with self._lock_for(address):
+            chain_nonce = self._chain_nonce(address)
+            in_flight = self._in_flight.setdefault(address, set())
+            # Reservations below the chain nonce are settled; ones above it keep their place
+            in_flight.difference_update({nonce for nonce in in_flight if nonce < chain_nonce})
+            self._next_nonce[address] = max([chain_nonce] + [nonce + 1 for nonce in in_flight])
+            return self._next_nonce[address]
+
+    def reset(self, address: str = None) -> None:
+        """Forget local state for one address, or all addresses if none is given."""
+        with self._locks_guard:
+            addresses = [address] if address is not None else list(self._next_nonce)
+        for addr in addresses:
+            with self._lock_for(addr):
+                self._next_nonce.pop(addr, None)
+                self._in_flight.pop(addr, None)
+
+    def in_flight(self, address: str) -> list:
+        """Nonces reserved for ``address`` that have not been confirmed or released yet."""
+        with self._lock_for(address):
+            return sorted(self._in_flight.get(address, set()))
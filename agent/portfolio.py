@@ -0,0 +1,127 @@
+"""A user's group payments and savings pots, read in a constant number of calls.
+
+All IDs come from one ``getUserProfile`` call. The details of every group
+payment and pot, plus the user's own contribution to each group payment, are
+then fetched together through ``batch_call``, so listing a portfolio costs the
+same number of round trips however many payments and pots the user has.
+"""
+
+from .multicall import DEFAULT_CHUNK_SIZE, MULTICALL3_ADDRESS, async_batch_call, batch_call
+from .records import GroupPayment, SavingsPot, UserProfile
+
+# Calls made per group payment: details, the user's contribution, whether they contributed
+CALLS_PER_GROUP_PAYMENT = 3
+
+
+def profile_ids(profile) -> tuple:
+    """Split a getUserProfile result into the IDs the portfolio reads.
+
+    Args:
+        profile: UserProfile or the raw (username, transferIds, groupPaymentIds, participatedGroupPayments,
+            savingsPotIds) tuple
+
+    Returns:
+        tuple: (created payment IDs, all payment IDs without duplicates, savings pot IDs)
+    """
+    profile = UserProfile.from_abi(profile)
+    created_ids = list(profile.group_payment_ids)
+    payment_ids = list(dict.fromkeys(created_ids + list(profile.participated_group_payments)))
+    return created_ids, payment_ids, list(profile.savings_pot_ids)
+
+
+def portfolio_calls(contract, user_address: str, payment_ids: list, pot_ids: list) -> list:
+    """Bound contract functions for every detail read, in the order decode_portfolio expects."""
+    calls = []
+    for payment_id in payment_ids:
+        calls.append(contract.functions.getGroupPaymentDetails(payment_id))
+        calls.append(contract.functions.getGroupPaymentContribution(payment_id, user_address))
+        calls.append(contract.functions.hasContributedToGroupPayment(payment_id, user_address))
+    for pot_id in pot_ids:
+        calls.append(contract.functions.getSavingsPotDetails(pot_id))
+    return calls
+
+
+def decode_portfolio(created_ids: list, payment_ids: list, pot_ids: list, results: list) -> dict:
+    """Turn batch_call results for portfolio_calls() into records.
+
+    Returns:
+        dict: group_payments (GroupPayment), savings_pots (SavingsPot) and errors (IDs whose details could not be read)
+    """
+    created = set(created_ids)
+    group_payments = []
+    savings_pots = []
+    errors = []
+
+    for i, payment_id in enumerate(payment_ids):
+        (details_ok, details), (contribution_ok, contribution), (contributed_ok, contributed) = \
+            results[i * CALLS_PER_GROUP_PAYMENT:(i + 1) * CALLS_PER_GROUP_PAYMENT]
+        if not details_ok:
+            errors.append({"payment_id": "0x" + payment_id.hex(), "error": str(details)})
+            continue
+        group_payments.append(GroupPayment(
+            payment_id,
+            details,
+            payment_id in created,
+            contribution if contribution_ok else 0,
+            contributed if contributed_ok else (contribution_ok and contribution > 0)
+        ))
+
+    pot_results = results[len(payment_ids) * CALLS_PER_GROUP_PAYMENT:]
+    for pot_id, (success, details) in zip(pot_ids, pot_results):
+        if not success:
+            errors.append({"pot_id": "0x" + pot_id.hex(), "error": str(details)})
+            continue
+        savings_pots.append(SavingsPot(pot_id, details))
+
+    return {"group_payments": group_payments, "savings_pots": savings_pots, "errors": errors}
+
+
+def _select_ids(profile, group_payments: bool, savings_pots: bool) -> tuple:
+    created_ids, payment_ids, pot_ids = profile_ids(profile)
+    if not group_payments:
+        created_ids, payment_ids = [], []
+    if not savings_pots:
+        pot_ids = []
+    return created_ids, payment_ids, pot_ids
+
+
+def load_portfolio(w3, contract, user_address: str, group_payments: bool = True, savings_pots: bool = True,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, multicall_address: str = MULTICALL3_ADDRESS) -> dict:
+    """Read a user's group payments and/or savings pots with full details.
+
+    Args:
+        w3: Web3 instance to read with
+        contract: ProtectedPay contract instance
+        user_address (str): Checksummed user address
+        group_payments (bool): Include group payments created or joined by the user
+        savings_pots (bool): Include savings pots owned by the user
+        chunk_size (int): Maximum calls per aggregated request
+        multicall_address (str): Multicall3 deployment used for batching
+
+    Returns:
+        dict: group_payments, savings_pots and errors (see decode_portfolio)
+    """
+    profile = contract.functions.getUserProfile(user_address).call()
+    created_ids, payment_ids, pot_ids = _select_ids(profile, group_payments, savings_pots)
+    results = batch_call(
+        w3,
+        portfolio_calls(contract, user_address, payment_ids, pot_ids),
+        chunk_size=chunk_size,
+        multicall_address=multicall_address
+    )
+    return decode_portfolio(created_ids, payment_ids, pot_ids, results)
+
+
+async def aload_portfolio(async_w3, async_contract, user_address: str, group_payments: bool = True,
+                          savings_pots: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          multicall_address: str = MULTICALL3_ADDRESS) -> dict:
+    """Async version of load_portfolio for an AsyncWeb3 contract (chunks are fetched concurrently)."""
+    profile = await async_contract.functions.getUserProfile(user_address).call()
+    created_ids, payment_ids, pot_ids = _select_ids(profile, group_payments, savings_pots)
+    results = await async_batch_call(
+        async_w3,
+        portfolio_calls(async_contract, user_address, payment_ids, pot_ids),
+        chunk_size=chunk_size,
+        multicall_address=multicall_address
+    )
+    return decode_portfolio(created_ids, payment_ids, pot_ids, results)
@@ -0,0 +1,202 @@
+"""In-process TTL cache with stale-while-revalidate for token prices.
+
+Fresh entries are served directly. Entries past their TTL but within the stale
+window are served immediately while one background refresh runs. Concurrent
+misses for the same key share a single fetch, whether they come from threads
+(``get``) or coroutines (``aget``).
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Seconds an entry is served without refreshing
+DEFAULT_TTL = 30
+
+# Seconds past the TTL an entry may still be served while it is refreshed in the background
+DEFAULT_STALE_TTL = 300
+
+
+def _retrieve_exception(waiter: asyncio.Future) -> None:
+    # A waiter whose caller was cancelled is never awaited; mark its error as seen
+    if not waiter.cancelled():
+        waiter.exception()
+
+
+class PriceCache:
+    """Thread-safe TTL cache keyed by normalized token symbol."""
+
+    def __init__(self, fetch, ttl: float = DEFAULT_TTL, stale_ttl: float = DEFAULT_STALE_TTL, refresh_workers: int = 2,
+                 async_fetch=None):
+        """Create the cache.
+
+        Args:
+            fetch: Callable taking a key and returning the value to cache (raises on failure)
+            ttl (float): Seconds an entry is considered fresh
+            stale_ttl (float): Seconds past the TTL a stale entry may still be served
+            refresh_workers (int): Threads used for background refreshes
+            async_fetch: Coroutine function used by aget() instead of ``fetch`` (optional)
+        """
+        self.fetch = fetch
+        self.async_fetch = async_fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+
+        self._entries = {}  # key -> (value, fetched_at)
+        self._in_flight = {}  # key -> Future of the running fetch
+        self._lock = threading.Lock()
+        self._fetch_tasks = set()  # fetches started by aget(), referenced until done
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="price-refresh")
+
+    def get(self, key: str):
+        """Get the value for ``key``, fetching it if it is missing or too old.
+
+        Args:
+            key (str): Normalized cache key (token symbol)
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if key not in self._in_flight:
+                        future = Future()
+                        self._in_flight[key] = future
+                        self._refresh_pool.submit(self._run_fetch, key, future)
+                    return value
+
+            self.misses += 1
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if owner:
+            self._run_fetch(key, future)
+        return future.result()
+
+    async def aget(self, key: str):
+        """Async version of get() that fetches with ``async_fetch`` on the running event loop.
+
+        Args:
+            key (str): Normalized cache key (token symbol)
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        if self.async_fetch is None:
+            return await asyncio.to_thread(self.get, key)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    if key not in self._in_flight:
+                        future = Future()
+                        self._in_flight[key] = future
+                        self._start_async_fetch(key, future)
+                    return value
+
+            self.misses += 1
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if owner:
+            self._start_async_fetch(key, future)
+        # Shielded: a cancelled caller (e.g. a tool timeout) stops waiting, the shared fetch keeps running
+        waiter = asyncio.wrap_future(future)
+        waiter.add_done_callback(_retrieve_exception)
+        return await asyncio.shield(waiter)
+
+    def _start_async_fetch(self, key: str, future: Future) -> None:
+        task = asyncio.get_running_loop().create_task(self._run_async_fetch(key, future))
+        self._fetch_tasks.add(task)
+        task.add_done_callback(self._fetch_tasks.discard)
+
+    async def _run_async_fetch(self, key: str, future: Future) -> None:
+        """Async counterpart of _run_fetch."""
+        try:
+            value = await self.async_fetch(key)
+        except BaseException as e:
+            self._fail(key, future, e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        self._resolve(key, future, value)
+
+    def _run_fetch(self, key: str, future: Future) -> None:
+        """Fetch ``key``, store the result and resolve everyone waiting on ``future``."""
+        try:
+            value = self.fetch(key)
+        except BaseException as e:
+            self._fail(key, future, e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        self._resolve(key, future, value)
+
+    def _resolve(self, key: str, future: Future, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        if not future.done():
+            future.set_result(value)
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        """Release the key and fail everyone waiting on ``future``, also when the fetch was cancelled."""
+        with self._lock:
+            self.fetch_errors += 1
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        if not isinstance(error, Exception):
+            error = RuntimeError(f"Fetching {key} was interrupted ({type(error).__name__})")
+        if not future.done():
+            future.set_exception(error)
+
+    def invalidate(self, key: str = None) -> None:
+        """Drop one entry, or every entry if no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "fetch_errors": self.fetch_errors,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries)
+            }
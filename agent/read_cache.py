@@ -0,0 +1,414 @@
+"""Head-block-aware cache of eth_call results, as Web3 middleware.
+
+``ReadCacheMiddleware`` answers repeated ``eth_call`` requests from a
+``ReadCache`` keyed by (to, from, calldata, block tag):
+
+* Calls at ``latest`` are pinned to the head block: a lightweight poller reads
+  ``eth_blockNumber`` every ``poll_interval`` seconds while the cache is in
+  use, and all pinned results are dropped when a new block is seen (block
+  numbers in responses passing through, e.g. receipts, advance it too).
+  While the head is known such calls are sent at its block number, so an
+  endpoint behind the head (the router accepts endpoints a few blocks
+  behind) cannot answer them with older state; if the endpoint does not
+  have that block yet the call is repeated at ``latest`` and not cached. A
+  result is not cached either if a new block was seen while it was in
+  flight.
+* Calls at an explicit block number or hash never change and are kept
+  across blocks, and so are results a registered predicate marks as
+  immutable (``mark_immutable``, e.g. finished transfers).
+* Multicall3 ``aggregate3`` calls are split: every sub-call is cached on its
+  own, and only the sub-calls not in the cache are sent.
+
+Calls at ``pending`` (or other tags), with extra fields such as ``value`` or
+state overrides, and calls that fail are not cached. Memory is bounded by a
+byte budget with least-recently-used eviction.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+from toolz import curry
+from web3.middleware.base import Web3MiddlewareBuilder
+
+# Bytes of results and keys kept in the cache (least recently used are evicted first)
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Seconds between eth_blockNumber polls while the cache is in use
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Seconds without cache lookups after which the poller stops (restarted on the next lookup)
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+# Approximate bytes per entry on top of its calldata and result (key tuple, entry tuple, dict slot)
+ENTRY_OVERHEAD = 200
+
+# Selector of Multicall3's aggregate3((address,bool,bytes)[])
+AGGREGATE3_SELECTOR = "0x82ad56cb"
+
+# Transaction fields an eth_call may carry and still be cached
+CACHEABLE_CALL_FIELDS = frozenset({"to", "from", "data", "input"})
+
+
+def _as_int(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return int(value, 16) if value.startswith("0x") else int(value)
+    return None
+
+
+def _to_hex(value) -> str:
+    return value if isinstance(value, str) else HexBytes(value).to_0x_hex()
+
+
+def _pin(params, head: int) -> list:
+    """eth_call params sent at the head block number instead of ``latest``."""
+    return [params[0], hex(head)]
+
+
+def _pinned_call_failed(response) -> bool:
+    """Whether a call sent at the head block failed for another reason than the call reverting.
+
+    An endpoint that lags behind answers a call at a block it does not have
+    yet with an error ("header not found", "unknown block").
+    """
+    error = response.get("error") if isinstance(response, dict) else None
+    if error is None:
+        return False
+    message = error.get("message", "") if isinstance(error, dict) else str(error)
+    return "revert" not in message.lower()
+
+
+def _block_tag(block):
+    """Normalized block tag: "latest" (pinned), ("number", n) / ("hash", h) (immutable) or None (not cached)."""
+    if block is None or block == "latest":
+        return "latest"
+    if isinstance(block, int):
+        return ("number", block)
+    if isinstance(block, str) and block.startswith("0x"):
+        return ("number", int(block, 16))
+    if isinstance(block, dict) and "blockHash" in block:
+        return ("hash", _to_hex(block["blockHash"]).lower())
+    return None
+
+
+class ReadCache:
+    """eth_call results pinned to the head block, with immutable results kept across blocks."""
+
+    def __init__(self, block_number, max_bytes: int = DEFAULT_MAX_BYTES, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """Create the cache (the poller starts with the first lookup).
+
+        Args:
+            block_number: Callable returning the chain's latest block number
+            max_bytes (int): Byte budget of cached keys and results
+            poll_interval (float): Seconds between head block polls
+            idle_timeout (float): Seconds without lookups after which polling stops
+        """
+        self.block_number = block_number
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+
+        self.head = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.poll_errors = 0
+        self.stale_results = 0
+
+        self._entries = OrderedDict()  # key -> (result, pinned block or None, size)
+        self._pinned = set()  # keys of entries pinned to the head block
+        self._immutable = {}  # selector -> predicate(result) for results that never change
+        self._bytes = 0
+        self._last_used = 0.0
+        self._poller = None
+        self._lock = threading.Lock()
+
+    def mark_immutable(self, selector: str, predicate) -> None:
+        """Keep results of a function across blocks when ``predicate(result)`` is true.
+
+        Args:
+            selector (str): 4-byte function selector as 0x-prefixed hex
+            predicate: Called with the raw result (hex or bytes)
+        """
+        self._immutable[selector.lower()] = predicate
+
+    # -- head block --
+
+    def observe_block(self, number: int) -> None:
+        """Record a block number seen on the chain; a new head drops the pinned results."""
+        with self._lock:
+            if self.head is not None and number <= self.head:
+                return
+            self.head = number
+            self._drop_pinned_locked()
+
+    def _drop_pinned_locked(self) -> None:
+        for key in self._pinned:
+            _, _, size = self._entries.pop(key)
+            self._bytes -= size
+        self.invalidations += len(self._pinned)
+        self._pinned.clear()
+
+    def observe_response(self, method: str, response) -> None:
+        """Advance the head from block numbers in responses (block number, receipts, blocks)."""
+        result = response.get("result") if isinstance(response, dict) else None
+        if result is None:
+            return
+        if method == "eth_blockNumber":
+            number = _as_int(result)
+        elif method in ("eth_getTransactionReceipt", "eth_getBlockByNumber") and isinstance(result, dict):
+            number = _as_int(result.get("blockNumber", result.get("block_number", result.get("number"))))
+        else:
+            return
+        if number is not None:
+            self.observe_block(number)
+
+    def _ensure_polling(self) -> None:
+        self._last_used = time.monotonic()
+        if self._poller is not None:
+            return
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll, name="read-cache-poller", daemon=True)
+            self._poller.start()
+
+    def _poll(self) -> None:
+        while time.monotonic() - self._last_used < self.idle_timeout:
+            try:
+                self.observe_block(self.block_number())
+            except Exception:
+                # Without a known head, pinned results cannot be trusted
+                with self._lock:
+                    self.poll_errors += 1
+                    self.head = None
+                    self._drop_pinned_locked()
+            time.sleep(self.poll_interval)
+        with self._lock:
+            self.head = None
+            self._drop_pinned_locked()
+            self._poller = None
+
+    # -- entries --
+
+    def lookup(self, key: tuple):
+        """Cached result of an eth_call key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def store(self, key: tuple, result, head=None) -> None:
+        """Cache the result of an eth_call key (pinned to the head block unless immutable).
+
+        Args:
+            key (tuple): call_key() of the request
+            result: Raw result (hex or bytes)
+            head: The head block when the request was sent (None if unknown); a result pinned to the head is
+                dropped if the head has moved since, because the call may have run against the older block
+        """
+        _, _, data, tag = key
+        predicate = self._immutable.get(data[:10].lower())
+        pinned = tag == "latest" and not (predicate is not None and predicate(result))
+        size = ENTRY_OVERHEAD + len(data) + len(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if pinned and (head is None or self.head != head):
+                # Without a known head, or with a new block seen while the call was in flight, it cannot be pinned
+                if head is not None:
+                    self.stale_results += 1
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+                self._pinned.discard(key)
+            self._entries[key] = (result, self.head if pinned else None, size)
+            self._bytes += size
+            if pinned:
+                self._pinned.add(key)
+            while self._bytes > self.max_bytes:
+                evicted_key, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._pinned.discard(evicted_key)
+                self.evictions += 1
+
+    # -- eth_call requests --
+
+    def call_key(self, params):
+        """Cache key of eth_call params, or None if the call is not cacheable."""
+        if not params or len(params) > 2 or not isinstance(params[0], dict):
+            return None
+        transaction = params[0]
+        if not transaction.keys() <= CACHEABLE_CALL_FIELDS or "to" not in transaction:
+            return None
+        tag = _block_tag(params[1] if len(params) > 1 else "latest")
+        if tag is None:
+            return None
+        data = _to_hex(transaction.get("data", transaction.get("input", "0x"))).lower()
+        sender = transaction.get("from")
+        return (transaction["to"].lower(), sender.lower() if sender else None, data, tag)
+
+    def prepare(self, params) -> tuple:
+        """Plan an eth_call.
+
+        Returns:
+            tuple: (cached response or None, params to send, function completing the response). The
+            completing function returns None if the call was sent at the head block and the endpoint could
+            not serve it; the caller then sends the original params and does not cache the answer.
+        """
+        key = self.call_key(params)
+        if key is None:
+            return None, params, None
+        self._ensure_polling()
+        if key[2].startswith(AGGREGATE3_SELECTOR):
+            return self._prepare_aggregate(params, key)
+
+        result = self.lookup(key)
+        if result is not None:
+            return {"jsonrpc": "2.0", "id": 0, "result": result}, None, None
+
+        # The head the call runs against; a result arriving after a new block is not pinned to that block
+        head = self.head
+        pinned = key[3] == "latest" and head is not None
+
+        def complete(response):
+            if pinned and _pinned_call_failed(response):
+                return None
+            if isinstance(response, dict) and response.get("result") is not None:
+                self.store(key, response["result"], head)
+            return response
+        return None, _pin(params, head) if pinned else params, complete
+
+    def _prepare_aggregate(self, params, key: tuple) -> tuple:
+        _, _, data, tag = key
+        try:
+            (calls,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[10:]))
+        except Exception:
+            return None, params, None
+
+        sub_keys = [(target.lower(), None, "0x" + calldata.hex(), tag) for target, _, calldata in calls]
+        cached = [self.lookup(sub_key) for sub_key in sub_keys]
+        missing = [index for index, result in enumerate(cached) if result is None]
+
+        def encode_results(results: list) -> str:
+            return "0x" + encode(["(bool,bytes)[]"], [[(True, bytes(HexBytes(result))) for result in results]]).hex()
+
+        if not missing:
+            return {"jsonrpc": "2.0", "id": 0, "result": encode_results(cached)}, None, None
+
+        head = self.head
+        pinned = tag == "latest" and head is not None
+        forward = params
+        if len(missing) < len(calls):
+            forward_data = AGGREGATE3_SELECTOR + encode(
+                ["(address,bool,bytes)[]"], [[calls[index] for index in missing]]
+            ).hex()
+            forward = [dict(params[0], data=forward_data), *params[1:]]
+            forward[0].pop("input", None)
+        if pinned:
+            forward = _pin(forward, head)
+
+        def complete(response):
+            if pinned and _pinned_call_failed(response):
+                return None
+            if not isinstance(response, dict) or response.get("result") is None:
+                return response
+            try:
+                (results,) = decode(["(bool,bytes)[]"], bytes(HexBytes(response["result"])))
+            except Exception:
+                return response
+            merged = list(cached)
+            for index, (success, return_data) in zip(missing, results):
+                if success:
+                    self.store(sub_keys[index], "0x" + return_data.hex(), head)
+                merged[index] = (success, return_data)
+            return dict(response, result="0x" + encode(["(bool,bytes)[]"], [[
+                item if isinstance(item, tuple) else (True, bytes(HexBytes(item))) for item in merged
+            ]]).hex())
+        return None, forward, complete
+
+    def clear(self) -> None:
+        """Forget all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Cache size, head block and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "pinned": len(self._pinned),
+                "bytes": self._bytes,
+                "head": self.head,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "poll_errors": self.poll_errors,
+                "stale_results": self.stale_results,
+            }
+
+
+class ReadCacheMiddleware(Web3MiddlewareBuilder):
+    """Web3 middleware answering eth_call from a ReadCache (sync and async)."""
+
+    cache = None
+
+    @staticmethod
+    @curry
+    def build(cache: ReadCache, w3):
+        """Middleware for ``w3.middleware_onion`` using ``cache`` (curried: ``build(cache)``)."""
+        middleware = ReadCacheMiddleware(w3)
+        middleware.cache = cache
+        return middleware
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            if method != "eth_call":
+                response = make_request(method, params)
+                self.cache.observe_response(method, response)
+                return response
+            cached, send_params, complete = self.cache.prepare(params)
+            if cached is not None:
+                return cached
+            response = make_request(method, send_params)
+            if complete is None:
+                return response
+            completed = complete(response)
+            # The endpoint did not have the head block yet: read at latest without caching
+            return completed if completed is not None else make_request(method, params)
+
+        return middleware
+
+    async def async_wrap_make_request(self, make_request):
+        async def middleware(method, params):
+            if method != "eth_call":
+                response = await make_request(method, params)
+                self.cache.observe_response(method, response)
+                return response
+            cached, send_params, complete = self.cache.prepare(params)
+            if cached is not None:
+                return cached
+            response = await make_request(method, send_params)
+            if complete is None:
+                return response
+            completed = complete(response)
+            # The endpoint did not have the head block yet: read at latest without caching
+            return completed if completed is not None else await make_request(method, params)
+
+        return middleware
@@ -0,0 +1,315 @@
+"""Compact records for decoded ProtectedPay structs.
+
+``Transfer``, ``GroupPayment``, ``SavingsPot`` and ``UserProfile`` are
+NamedTuples (no per-instance ``__dict__``) that keep the ABI tuple returned
+by the contract as it is and decode fields on access: the status name, TON
+amounts and hex IDs are derived only when asked for. ``to_dict()`` builds
+the dicts the tools return, so readers, filters and scripts pass records
+around and the conversion happens once, at the LLM boundary.
+
+``TransferColumns`` stores a bulk history column by column in ``array``
+buffers (about 100 bytes per transfer plus its remarks) for indexing and
+analytics over many transfers; ``to_numpy()`` exposes the columns as NumPy
+arrays when NumPy is installed.
+"""
+
+from array import array
+from typing import NamedTuple, Optional
+
+from web3 import Web3
+
+from .amounts import wei_to_ton
+from .transfer_filters import TRANSFER_STATUS_NAMES, transfer_matches
+
+# Contract status codes and their names in tool output
+GROUP_PAYMENT_STATUS_NAMES = {0: "Pending", 1: "Completed", 2: "Cancelled"}
+SAVINGS_POT_STATUS_NAMES = {0: "Active", 1: "Broken"}
+
+
+class Transfer(NamedTuple):
+    """A transfer: its position in a user's history, its bytes32 ID and the getTransferDetails tuple.
+
+    ``details`` is (sender, recipient, amount, timestamp, status, remarks).
+    Transfers read with the legacy getUserTransfers call have no ID.
+    """
+
+    index: int
+    id_bytes: Optional[bytes]
+    details: tuple
+
+    @property
+    def sender(self) -> str:
+        return self.details[0]
+
+    @property
+    def recipient(self) -> str:
+        return self.details[1]
+
+    @property
+    def amount_wei(self) -> int:
+        return int(self.details[2])
+
+    @property
+    def amount_ton(self) -> float:
+        return wei_to_ton(self.details[2])
+
+    @property
+    def timestamp(self) -> int:
+        return int(self.details[3])
+
+    @property
+    def status(self) -> int:
+        return self.details[4]
+
+    @property
+    def status_name(self) -> str:
+        return TRANSFER_STATUS_NAMES.get(self.details[4], "Unknown")
+
+    @property
+    def remarks(self) -> str:
+        return self.details[5]
+
+    @property
+    def is_legacy(self) -> bool:
+        """Read with getUserTransfers, without an ID to claim or refund by."""
+        return self.id_bytes is None
+
+    @property
+    def transfer_id(self) -> str:
+        """Hex ID accepted by the claim and refund tools (``fallback_<index>`` for legacy transfers)."""
+        return f"fallback_{self.index}" if self.id_bytes is None else self.id_bytes.hex()
+
+    def matches(self, user_address: str, filters: dict) -> bool:
+        """Whether the transfer passes every filter from build_transfer_filters()."""
+        return transfer_matches(user_address, *self.details[:5], filters)
+
+    def to_dict(self) -> dict:
+        """Transfer fields as returned by the tools."""
+        return {
+            "transfer_id": self.transfer_id,
+            "transfer_index": self.index,
+            "sender": self.details[0],
+            "recipient": self.details[1],
+            "amount_wei": int(self.details[2]),
+            "amount_ton": wei_to_ton(self.details[2]),
+            "timestamp": int(self.details[3]),
+            "status": self.status_name,
+            "remarks": self.details[5]
+        }
+
+
+class GroupPayment(NamedTuple):
+    """A group payment with the reading user's share.
+
+    ``details`` is the getGroupPaymentDetails tuple (creator, recipient, total
+    amount, amount per person, participants, amount collected, timestamp,
+    status, remarks).
+    """
+
+    payment_id: bytes
+    details: tuple
+    is_creator: bool
+    contribution_wei: int
+    has_contributed: bool
+
+    @property
+    def status_name(self) -> str:
+        return GROUP_PAYMENT_STATUS_NAMES.get(self.details[7], "Unknown")
+
+    def to_dict(self) -> dict:
+        """Group payment fields as returned by the tools."""
+        details = self.details
+        return {
+            "payment_id": "0x" + self.payment_id.hex(),  # Accepted by contribute_to_group_payment
+            "creator": details[0],
+            "recipient": details[1],
+            "total_amount_wei": int(details[2]),
+            "total_amount_ton": wei_to_ton(details[2]),
+            "amount_per_person_wei": int(details[3]),
+            "amount_per_person_ton": wei_to_ton(details[3]),
+            "num_participants": int(details[4]),
+            "amount_collected_wei": int(details[5]),
+            "amount_collected_ton": wei_to_ton(details[5]),
+            "timestamp": int(details[6]),
+            "status": self.status_name,
+            "remarks": details[8],
+            "role": "creator" if self.is_creator else "participant",
+            "your_contribution_wei": int(self.contribution_wei),
+            "your_contribution_ton": wei_to_ton(self.contribution_wei),
+            "has_contributed": bool(self.has_contributed)
+        }
+
+
+class SavingsPot(NamedTuple):
+    """A savings pot: its ID and the getSavingsPotDetails tuple (owner, name, target, current, timestamp, status, remarks)."""
+
+    pot_id: bytes
+    details: tuple
+
+    @property
+    def status_name(self) -> str:
+        return SAVINGS_POT_STATUS_NAMES.get(self.details[5], "Unknown")
+
+    @property
+    def current_amount_wei(self) -> int:
+        return int(self.details[3])
+
+    def to_dict(self) -> dict:
+        """Savings pot fields as returned by the tools."""
+        details = self.details
+        target_wei = int(details[2])
+        current_wei = int(details[3])
+        return {
+            "pot_id": "0x" + self.pot_id.hex(),  # Accepted by contribute_to_savings_pot
+            "owner": details[0],
+            "name": details[1],
+            "target_amount_wei": target_wei,
+            "target_amount_ton": wei_to_ton(target_wei),
+            "current_amount_wei": current_wei,
+            "current_amount_ton": wei_to_ton(current_wei),
+            "progress_percent": round(current_wei * 100 / target_wei, 2) if target_wei else None,
+            "timestamp": int(details[4]),
+            "status": self.status_name,
+            "remarks": details[6]
+        }
+
+
+class UserProfile(NamedTuple):
+    """A getUserProfile result."""
+
+    username: str
+    transfer_ids: list
+    group_payment_ids: list
+    participated_group_payments: list
+    savings_pot_ids: list
+
+    @classmethod
+    def from_abi(cls, profile) -> "UserProfile":
+        return cls(*profile)
+
+
+class TransferColumns:
+    """Column store for many transfers (fixed-width columns in ``array`` buffers).
+
+    Amounts are split into two unsigned 64-bit words, so amounts up to
+    2**128 - 1 wei are stored exactly. Rows are read back as ``Transfer``
+    records.
+    """
+
+    def __init__(self):
+        self.index = array("Q")
+        self.timestamp = array("Q")
+        self.status = array("B")
+        self.amount_high = array("Q")
+        self.amount_low = array("Q")
+        self.has_id = array("B")
+        self.ids = bytearray()  # 32 bytes per transfer (zeros for legacy transfers)
+        self.senders = bytearray()  # 20 bytes per transfer
+        self.recipients = bytearray()  # 20 bytes per transfer
+        self.remarks = []
+
+    @classmethod
+    def from_records(cls, transfers) -> "TransferColumns":
+        """Build columns from Transfer records (e.g. iter_user_transfers output)."""
+        columns = cls()
+        columns.extend(transfers)
+        return columns
+
+    def append(self, transfer: Transfer) -> None:
+        amount = int(transfer.details[2])
+        if amount >> 128:
+            raise OverflowError(f"Transfer amount {amount} does not fit in 128 bits")
+        self.index.append(transfer.index)
+        self.timestamp.append(int(transfer.details[3]))
+        self.status.append(transfer.details[4])
+        self.amount_high.append(amount >> 64)
+        self.amount_low.append(amount & 0xFFFFFFFFFFFFFFFF)
+        self.has_id.append(transfer.id_bytes is not None)
+        self.ids += transfer.id_bytes if transfer.id_bytes is not None else bytes(32)
+        self.senders += bytes.fromhex(transfer.details[0][2:])
+        self.recipients += bytes.fromhex(transfer.details[1][2:])
+        self.remarks.append(transfer.details[5])
+
+    def extend(self, transfers) -> None:
+        for transfer in transfers:
+            self.append(transfer)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def amount_wei(self, row: int) -> int:
+        return (self.amount_high[row] << 64) | self.amount_low[row]
+
+    def __getitem__(self, row: int) -> Transfer:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("transfer row out of range")
+        details = (
+            Web3.to_checksum_address(bytes(self.senders[row * 20:row * 20 + 20])),
+            Web3.to_checksum_address(bytes(self.recipients[row * 20:row * 20 + 20])),
+            self.amount_wei(row),
+            self.timestamp[row],
+            self.status[row],
+            self.remarks[row],
+        )
+        id_bytes = bytes(self.ids[row * 32:row * 32 + 32]) if self.has_id[row] else None
+        return Transfer(self.index[row], id_bytes, details)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_dicts(self, start: int = 0, stop: Optional[int] = None) -> list:
+        """Tool-output dicts of rows ``start`` to ``stop`` (the LLM boundary)."""
+        return [self[row].to_dict() for row in range(*slice(start, stop).indices(len(self)))]
+
+    def total_amount_wei(self, status: Optional[int] = None) -> int:
+        """Sum of the amounts, optionally only of transfers with a status code."""
+        return sum(
+            (high << 64) | low
+            for high, low, code in zip(self.amount_high, self.amount_low, self.status)
+            if status is None or code == status
+        )
+
+    def status_counts(self) -> dict:
+        """Number of transfers per status name."""
+        counts = {}
+        for code in self.status:
+            name = TRANSFER_STATUS_NAMES.get(code, "Unknown")
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the fixed-width columns (remarks strings not included)."""
+        fixed = (self.index, self.timestamp, self.status, self.amount_high, self.amount_low, self.has_id)
+        return sum(column.itemsize * len(column) for column in fixed) + len(self.ids) + len(self.senders) + \
+            len(self.recipients)
+
+    def to_numpy(self) -> dict:
+        """The columns as NumPy arrays (needs numpy).
+
+        The integer columns are views of these buffers, so no rows can be
+        appended while the arrays are referenced.
+
+        Returns:
+            dict: index, timestamp, status, amount_high, amount_low (uint64 / uint8),
+            amount_ton (float64, approximate), ids (n x 32), senders and recipients (n x 20, uint8)
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("TransferColumns.to_numpy needs the numpy package") from None
+
+        columns = {
+            name: numpy.frombuffer(getattr(self, name), dtype=numpy.uint64 if getattr(self, name).typecode == "Q"
+                                   else numpy.uint8)
+            for name in ("index", "timestamp", "status", "amount_high", "amount_low")
+        }
+        columns["amount_ton"] = (columns["amount_high"].astype(numpy.float64) * 2.0 ** 64
+                                 + columns["amount_low"].astype(numpy.float64)) / 1e18
+        columns["ids"] = numpy.frombuffer(self.ids, dtype=numpy.uint8).reshape(-1, 32)
+        columns["senders"] = numpy.frombuffer(self.senders, dtype=numpy.uint8).reshape(-1, 20)
+        columns["recipients"] = numpy.frombuffer(self.recipients, dtype=numpy.uint8).reshape(-1, 20)
+        return columns
@@ -0,0 +1,477 @@
+"""Routing JSON-RPC requests across several endpoints of the same chain.
+
+``RpcRouter`` keeps per-endpoint health, block height and latency, refreshed
+by a background ``eth_blockNumber`` probe and by every request it routes:
+
+* Reads go to the healthy endpoint with the lowest recent latency, sent from
+  the calling thread. If the answer has not arrived once the endpoint's p95
+  latency has passed, the read is sent to the next endpoint (a hedged read):
+  synchronous reads give up on the slow request, async reads keep it and take
+  the first answer. Failed reads fail over to the remaining endpoints.
+* Writes, and the ``pending`` nonce reads that precede them, are pinned to one
+  endpoint per sender, so a nonce sequence is never split across mempools.
+  A pin is released when its endpoint becomes unhealthy or the sender has been
+  idle for ``pin_ttl`` seconds.
+
+``RoutedHTTPProvider`` and ``AsyncRoutedHTTPProvider`` plug the router into
+Web3 and AsyncWeb3.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import aiohttp
+import requests
+from eth_account import Account
+from web3 import AsyncHTTPProvider
+
+from .instrumentation import metrics
+from .transport import DEFAULT_TIMEOUT, IDEMPOTENT_METHODS, METHOD_TIMEOUTS, PooledHTTPProvider, is_retryable_error
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background health probes
+DEFAULT_PROBE_INTERVAL = 5.0
+
+# Blocks an endpoint may trail the highest probed block and still be used for reads
+DEFAULT_MAX_BLOCK_LAG = 3
+
+# Seconds a sender stays pinned to its write endpoint after its last write
+DEFAULT_PIN_TTL = 120.0
+
+# Recent latency samples kept per endpoint
+LATENCY_WINDOW = 100
+
+# Reads are hedged once they take longer than this percentile of recent latency...
+HEDGE_PERCENTILE = 0.95
+
+# ...but only after this many samples, and never sooner or later than these bounds (seconds)
+MIN_HEDGE_SAMPLES = 20
+MIN_HEDGE_DELAY = 0.05
+MAX_HEDGE_DELAY = 2.0
+
+# Weight of the newest sample in the moving average used to rank endpoints
+LATENCY_EWMA_ALPHA = 0.2
+
+# Methods that submit transactions (routed to the sender's pinned endpoint)
+WRITE_METHODS = frozenset({"eth_sendRawTransaction", "eth_sendTransaction"})
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class EndpointState:
+    """Health, height and latency statistics of one endpoint."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True  # Assumed until a probe or request says otherwise
+        self.block_number = None
+        self.latency_ewma = None
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.last_error = None
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+
+    def record_failure(self, error: Exception) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.last_error = str(error)
+        if is_retryable_error(error):
+            # Connection problems, timeouts and 5xx: keep traffic away until the next good probe
+            self.healthy = False
+
+    def percentile(self, fraction: float):
+        """Latency at the given percentile of recent samples, or None without enough samples."""
+        if len(self.latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(HEDGE_PERCENTILE)
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "block_number": self.block_number,
+            "latency_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "last_error": self.last_error
+        }
+
+
+class HedgeTimeout(requests.Timeout):
+    """A synchronous read was abandoned at its hedge delay (the endpoint is slow, not failed)."""
+
+
+def _timeout_for(methods: list) -> float:
+    return max(METHOD_TIMEOUTS.get(method, DEFAULT_TIMEOUT) for method in methods)
+
+
+def _nonce_sequence_sender(method: str, request_data: bytes):
+    """Sender whose nonce sequence a request belongs to, or None for ordinary reads."""
+    if method not in WRITE_METHODS and method != "eth_getTransactionCount":
+        return None
+    params = json.loads(request_data).get("params") or []
+    if method == "eth_getTransactionCount":
+        return params[0].lower() if len(params) > 1 and params[1] == "pending" else None
+    if method == "eth_sendTransaction":
+        return params[0]["from"].lower()
+    return Account.recover_transaction(params[0]).lower()
+
+
+class RpcRouter:
+    """Latency-ranked, health-checked routing over several JSON-RPC endpoints."""
+
+    def __init__(self, urls: list, session, max_block_lag: int = DEFAULT_MAX_BLOCK_LAG,
+                 pin_ttl: float = DEFAULT_PIN_TTL, hedge: bool = True):
+        """Create the router.
+
+        Args:
+            urls (list): Endpoint URLs, in order of preference while latencies are unknown
+            session (requests.Session): Shared pooled session for synchronous requests and probes
+            max_block_lag (int): Blocks an endpoint may trail the best one and still serve reads
+            pin_ttl (float): Idle seconds after which a sender's write pin is released
+            hedge (bool): Send a duplicate read to a second endpoint when the first is slow
+        """
+        if not urls:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = [EndpointState(url) for url in dict.fromkeys(urls)]
+        self.session = session
+        self.max_block_lag = max_block_lag
+        self.pin_ttl = pin_ttl
+        self.hedge = hedge and len(self.endpoints) > 1
+
+        self._pins = {}  # sender -> (EndpointState, monotonic time of last use)
+        self._lock = threading.Lock()
+        # Probes all endpoints at once (requests are sent from the calling thread)
+        self._executor = ThreadPoolExecutor(max_workers=len(self.endpoints), thread_name_prefix="rpc-router")
+        self._stop_event = threading.Event()
+        self._probe_thread = None
+
+    @property
+    def primary_url(self) -> str:
+        """URL currently preferred for reads."""
+        return self.ranked_endpoints()[0].url
+
+    def ranked_endpoints(self) -> list:
+        """Endpoints in the order reads should try them: healthy by latency, then the rest."""
+        with self._lock:
+            return sorted(
+                self.endpoints,
+                key=lambda endpoint: (
+                    not endpoint.healthy,
+                    endpoint.latency_ewma if endpoint.latency_ewma is not None else float("inf")
+                )
+            )
+
+    def hedge_delay(self, endpoint: EndpointState) -> float:
+        """Seconds to wait for ``endpoint`` before hedging a read."""
+        with self._lock:
+            p95 = endpoint.percentile(HEDGE_PERCENTILE)
+        if p95 is None:
+            return MAX_HEDGE_DELAY
+        return min(MAX_HEDGE_DELAY, max(MIN_HEDGE_DELAY, p95))
+
+    def _record(self, endpoint: EndpointState, started: float, error: Exception = None) -> None:
+        with self._lock:
+            if error is None:
+                endpoint.record_success(time.monotonic() - started)
+            else:
+                endpoint.record_failure(error)
+
+    def pinned_endpoint(self, sender: str) -> EndpointState:
+        """Endpoint for a sender's nonce sequence, pinning the best healthy one if needed."""
+        now = time.monotonic()
+        with self._lock:
+            pin = self._pins.get(sender)
+            if pin is not None and pin[0].healthy and now - pin[1] < self.pin_ttl:
+                endpoint = pin[0]
+            else:
+                endpoint = None
+        if endpoint is None:
+            endpoint = self.ranked_endpoints()[0]
+        with self._lock:
+            self._pins[sender] = (endpoint, now)
+        return endpoint
+
+    def unpin(self, sender: str) -> None:
+        """Release a sender's pin (its next nonce sequence picks a new endpoint)."""
+        with self._lock:
+            self._pins.pop(sender.lower(), None)
+
+    # Synchronous requests
+
+    def _post(self, endpoint: EndpointState, methods: list, request_data: bytes,
+              hedge_after: Optional[float] = None) -> bytes:
+        timeout = _timeout_for(methods)
+        if hedge_after is not None and hedge_after >= timeout:
+            hedge_after = None
+        started = time.monotonic()
+        try:
+            response = self.session.post(endpoint.url, data=request_data, headers=JSON_HEADERS,
+                                         timeout=hedge_after or timeout)
+            response.raise_for_status()
+        except requests.Timeout as timeout_error:
+            if hedge_after is None:
+                self._record(endpoint, started, timeout_error)
+                raise
+            # Slow rather than failed: the censored sample keeps the percentile from drifting down
+            self._record(endpoint, started)
+            raise HedgeTimeout(f"No answer from {endpoint.url} within {hedge_after:.3f}s") from timeout_error
+        except Exception as post_error:
+            self._record(endpoint, started, post_error)
+            raise
+        self._record(endpoint, started)
+        return response.content
+
+    def send(self, methods: list, request_data: bytes) -> bytes:
+        """Route one JSON-RPC request body (a single call or a batch).
+
+        Args:
+            methods (list): JSON-RPC methods in the body
+            request_data (bytes): Encoded request
+
+        Returns:
+            bytes: raw response body
+        """
+        sender = _nonce_sequence_sender(methods[0], request_data) if len(methods) == 1 else None
+        if sender is not None:
+            endpoint = self.pinned_endpoint(sender)
+            try:
+                return self._post(endpoint, methods, request_data)
+            except Exception:
+                self.unpin(sender)
+                raise
+        if not all(method in IDEMPOTENT_METHODS for method in methods):
+            return self._post(self.ranked_endpoints()[0], methods, request_data)
+        return self._send_read(methods, request_data)
+
+    def _send_read(self, methods: list, request_data: bytes) -> bytes:
+        # A blocking request cannot be raced from the calling thread, so the first endpoint only gets
+        # until its hedge delay; the read then moves on to the next endpoint, and comes back to the first
+        # one with its full timeout only if every other endpoint failed
+        candidates = self.ranked_endpoints()
+        attempts = [(candidates[0], self.hedge_delay(candidates[0]) if self.hedge else None)]
+        attempts += [(endpoint, None) for endpoint in candidates[1:]]
+        last_error = None
+        hedged = False
+
+        for position, (endpoint, hedge_after) in enumerate(attempts):
+            try:
+                content = self._post(endpoint, methods, request_data, hedge_after)
+            except HedgeTimeout as hedge_timeout:
+                with self._lock:
+                    endpoint.hedges += 1
+                hedged = True
+                attempts.append((endpoint, None))
+                last_error = hedge_timeout
+                continue
+            except Exception as read_error:
+                last_error = read_error
+                continue
+            if hedged and position == 1:
+                with self._lock:
+                    candidates[0].hedge_wins += 1
+            return content
+        raise last_error
+
+    # Asynchronous requests
+
+    async def _apost(self, session: aiohttp.ClientSession, endpoint: EndpointState, methods: list,
+                     request_data: bytes) -> bytes:
+        started = time.monotonic()
+        try:
+            async with session.post(endpoint.url, data=request_data, headers=JSON_HEADERS,
+                                    timeout=aiohttp.ClientTimeout(total=_timeout_for(methods)),
+                                    raise_for_status=True) as response:
+                content = await response.read()
+        except Exception as post_error:
+            self._record(endpoint, started, post_error)
+            raise
+        self._record(endpoint, started)
+        return content
+
+    async def async_send(self, session: aiohttp.ClientSession, methods: list, request_data: bytes) -> bytes:
+        """Async version of send() using an aiohttp session."""
+        sender = _nonce_sequence_sender(methods[0], request_data) if len(methods) == 1 else None
+        if sender is not None:
+            endpoint = self.pinned_endpoint(sender)
+            try:
+                return await self._apost(session, endpoint, methods, request_data)
+            except Exception:
+                self.unpin(sender)
+                raise
+        if not all(method in IDEMPOTENT_METHODS for method in methods):
+            return await self._apost(session, self.ranked_endpoints()[0], methods, request_data)
+
+        candidates = self.ranked_endpoints()
+        pending = {asyncio.ensure_future(self._apost(session, candidates[0], methods, request_data)): candidates[0]}
+        next_candidate = 1
+        last_error = None
+        hedge_task = None
+        try:
+            if self.hedge:
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_delay(candidates[0]))
+                if not done:
+                    with self._lock:
+                        candidates[0].hedges += 1
+                    hedge_task = asyncio.ensure_future(self._apost(session, candidates[1], methods, request_data))
+                    pending[hedge_task] = candidates[1]
+                    next_candidate = 2
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    if task is hedge_task:
+                        with self._lock:
+                            candidates[0].hedge_wins += 1
+                    return task.result()
+                if not pending and next_candidate < len(candidates):
+                    endpoint = candidates[next_candidate]
+                    next_candidate += 1
+                    pending[asyncio.ensure_future(self._apost(session, endpoint, methods, request_data))] = endpoint
+            raise last_error
+        finally:
+            # The losing hedge is not needed any more
+            for task in pending:
+                task.cancel()
+
+    # Health probes
+
+    def _probe_endpoint(self, endpoint: EndpointState):
+        request_data = json.dumps({"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1}).encode()
+        try:
+            response = json.loads(self._post(endpoint, ["eth_blockNumber"], request_data))
+            return int(response["result"], 16)
+        except Exception as probe_error:
+            with self._lock:
+                endpoint.healthy = False
+                endpoint.last_error = str(probe_error)
+            return None
+
+    def probe(self) -> list:
+        """Probe every endpoint's block height once and update their health.
+
+        An endpoint is healthy if it answered and is at most ``max_block_lag``
+        blocks behind the highest block any endpoint reported.
+
+        Returns:
+            list: snapshot dict per endpoint
+        """
+        heights = list(self._executor.map(self._probe_endpoint, self.endpoints))
+        best = max((height for height in heights if height is not None), default=None)
+        with self._lock:
+            for endpoint, height in zip(self.endpoints, heights):
+                if height is None:
+                    continue
+                endpoint.block_number = height
+                endpoint.healthy = best - height <= self.max_block_lag
+                if not endpoint.healthy:
+                    endpoint.last_error = f"{best - height} blocks behind"
+        return self.stats()["endpoints"]
+
+    def start(self, interval: float = DEFAULT_PROBE_INTERVAL) -> None:
+        """Probe all endpoints every ``interval`` seconds in a daemon thread.
+
+        Args:
+            interval (float): Seconds between probe rounds
+        """
+        if self._probe_thread is not None:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                try:
+                    self.probe()
+                except Exception as probe_error:
+                    logger.warning("RPC endpoint probe failed: %s", probe_error)
+                    metrics.record_event("rpc_probe", "failed")
+                self._stop_event.wait(interval)
+
+        self._probe_thread = threading.Thread(target=run, name="rpc-router-probe", daemon=True)
+        self._probe_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background probe thread."""
+        self._stop_event.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join()
+            self._probe_thread = None
+
+    def stats(self) -> dict:
+        """Per-endpoint health and latency, and the number of pinned senders."""
+        with self._lock:
+            return {
+                "endpoints": [endpoint.snapshot() for endpoint in self.endpoints],
+                "pinned_senders": len(self._pins)
+            }
+
+
+class RoutedHTTPProvider(PooledHTTPProvider):
+    """PooledHTTPProvider that sends every request through an RpcRouter."""
+
+    def __init__(self, router: RpcRouter, **kwargs):
+        super().__init__(router.endpoints[0].url, session=router.session, **kwargs)
+        self.router = router
+
+    def _post(self, methods: list, request_data: bytes) -> bytes:
+        return self.router.send(methods, request_data)
+
+    def __str__(self) -> str:
+        return f"RPC router over {', '.join(endpoint.url for endpoint in self.router.endpoints)}"
+
+
+class AsyncRoutedHTTPProvider(AsyncHTTPProvider):
+    """AsyncHTTPProvider that sends every request through an RpcRouter."""
+
+    def __init__(self, router: RpcRouter, **kwargs):
+        super().__init__(router.endpoints[0].url, exception_retry_configuration=None, **kwargs)
+        self.router = router
+
+    async def _session(self) -> aiohttp.ClientSession:
+        # The session cached for this event loop by cache_async_session(), or a new one
+        return await self._request_session_manager.async_cache_and_return_session(self.endpoint_uri)
+
+    async def _make_request(self, method, request_data: bytes) -> bytes:
+        return await self.router.async_send(await self._session(), [method], request_data)
+
+    async def make_batch_request(self, batch_requests: list):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        response_content = await self.router.async_send(
+            await self._session(), [method for method, _ in batch_requests], request_data
+        )
+        responses = json.loads(response_content)
+        if not isinstance(responses, list):
+            # RPC errors return only one response with the error object
+            return responses
+        return sorted(responses, key=lambda rpc_response: int(rpc_response["id"]))
+
+    def __str__(self) -> str:
+        return f"RPC router over {', '.join(endpoint.url for endpoint in self.router.endpoints)}"
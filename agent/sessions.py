@@ -0,0 +1,259 @@
+"""Per-session wallet and preference state, so one process can serve many users.
+
+Every ADK session (or user, see ``bind_session``) gets its own private key,
+network preference and confirmation mode in a ``SessionStore``. The session
+of the running tool call is carried in a context variable: tools registered
+with the agent are wrapped by ``bind_session``, which reads it from the ADK
+``ToolContext``; calls made outside the agent (scripts, benchmarks) use the
+``"default"`` session unless they enter ``session_scope``.
+
+Private keys are held AES-GCM encrypted with a key generated per process
+(bound to their session ID) and are only decrypted for the call that signs.
+The store keeps at most ``max_sessions`` sessions and drops sessions idle for
+``idle_timeout`` seconds, least recently used first.
+"""
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Sessions kept in memory (least recently used are evicted first)
+DEFAULT_MAX_SESSIONS = 1000
+
+# Seconds without a tool call after which a session is evicted
+DEFAULT_IDLE_TIMEOUT = 3600
+
+# Session used by calls made outside an agent invocation
+DEFAULT_SESSION_ID = "default"
+
+# Parameter through which the agent framework passes its ToolContext
+TOOL_CONTEXT_PARAMETER = "tool_context"
+
+_current_session = contextvars.ContextVar("protectedpay_session", default=DEFAULT_SESSION_ID)
+
+
+def current_session_id() -> str:
+    """ID of the session the running tool call belongs to."""
+    return _current_session.get()
+
+
+@contextlib.contextmanager
+def session_scope(session_id: str):
+    """Run the enclosed calls in a session (for scripts serving several users)."""
+    token = _current_session.set(session_id)
+    try:
+        yield session_id
+    finally:
+        _current_session.reset(token)
+
+
+def session_id_from_context(tool_context, scope: str = "session") -> str:
+    """Session ID of an ADK ToolContext.
+
+    Args:
+        tool_context: The ToolContext of a tool call (None outside the agent)
+        scope (str): "session" for one state per conversation, "user" to share it across a user's sessions
+
+    Returns:
+        str: app, user and (for the session scope) session ID
+    """
+    if tool_context is None:
+        return current_session_id()
+    session = tool_context.session
+    if scope == "user":
+        return f"{session.app_name}:{session.user_id}"
+    return f"{session.app_name}:{session.user_id}:{session.id}"
+
+
+def bind_session(func, scope: str = "session"):
+    """Wrap a tool (sync or async) to run in the session of the ADK call that invokes it.
+
+    The wrapper accepts an optional keyword-only ``tool_context``, which the
+    agent framework fills in and leaves out of the tool declaration, so the
+    model sees the same parameters. Direct calls keep working unchanged.
+    """
+    signature = inspect.signature(func)
+    if TOOL_CONTEXT_PARAMETER in signature.parameters:
+        return func
+    bound_signature = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter(TOOL_CONTEXT_PARAMETER, inspect.Parameter.KEYWORD_ONLY, default=None),
+    ])
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, tool_context=None, **kwargs):
+            with session_scope(session_id_from_context(tool_context, scope)):
+                return await func(*args, **kwargs)
+        async_wrapper.__signature__ = bound_signature
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, tool_context=None, **kwargs):
+        with session_scope(session_id_from_context(tool_context, scope)):
+            return func(*args, **kwargs)
+    wrapper.__signature__ = bound_signature
+    return wrapper
+
+
+class SessionState:
+    """Preferences of one session (its private key is read through the store)."""
+
+    __slots__ = ("session_id", "network_preference", "wait_for_confirmation", "last_used", "_encrypted_key")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.network_preference = "mainnet"
+        # False returns right after submission
+        self.wait_for_confirmation = True
+        self.last_used = time.monotonic()
+        self._encrypted_key = None  # (nonce, ciphertext) or None
+
+    @property
+    def has_private_key(self) -> bool:
+        return self._encrypted_key is not None
+
+
+class SessionStore:
+    """Bounded, thread-safe store of per-session private keys and preferences."""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 on_evict=None):
+        """Create the store.
+
+        Args:
+            max_sessions (int): Sessions kept in memory
+            idle_timeout (float): Seconds without use after which a session is evicted
+            on_evict: Called with the private key of every evicted session that had one
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+
+        self.evictions = 0
+
+        self._sessions = OrderedDict()  # session ID -> SessionState, least recently used first
+        self._cipher = None  # AESGCM with a per-process key, created when the first key is stored
+        self._cipher_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def _aead(self):
+        with self._cipher_lock:
+            if self._cipher is None:
+                from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+                self._cipher = AESGCM(AESGCM.generate_key(bit_length=256))
+            return self._cipher
+
+    def _evict_locked(self, now: float) -> list:
+        evicted = []
+        while self._sessions:
+            session_id, state = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - state.last_used < self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            evicted.append(state)
+        self.evictions += len(evicted)
+        return evicted
+
+    def _notify(self, evicted: list) -> None:
+        if self.on_evict is None:
+            return
+        for state in evicted:
+            private_key = self._decrypt(state)
+            if private_key is not None:
+                self.on_evict(private_key)
+
+    def _decrypt(self, state: SessionState):
+        encrypted = state._encrypted_key
+        if encrypted is None:
+            return None
+        nonce, ciphertext = encrypted
+        return self._aead().decrypt(nonce, ciphertext, state.session_id.encode()).decode()
+
+    def get(self, session_id: str = None) -> SessionState:
+        """State of a session (the current one by default), created on first use.
+
+        Marks the session as used and evicts idle sessions and, above
+        ``max_sessions``, the least recently used ones.
+        """
+        session_id = session_id or current_session_id()
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(session_id)
+                self._sessions[session_id] = state
+            else:
+                self._sessions.move_to_end(session_id)
+            state.last_used = now
+            evicted = self._evict_locked(now)
+        self._notify(evicted)
+        return state
+
+    def set_private_key(self, private_key: str, session_id: str = None) -> None:
+        """Store a session's private key, encrypted."""
+        state = self.get(session_id)
+        nonce = os.urandom(12)
+        encrypted = (nonce, self._aead().encrypt(nonce, private_key.encode(), state.session_id.encode()))
+        with self._lock:
+            state._encrypted_key = encrypted
+
+    def private_key(self, session_id: str = None):
+        """Decrypted private key of a session, or None if it has none."""
+        return self._decrypt(self.get(session_id))
+
+    def clear_private_key(self, session_id: str = None):
+        """Remove a session's private key.
+
+        Returns:
+            str: the removed key, or None if the session had none
+        """
+        state = self.get(session_id)
+        private_key = self._decrypt(state)
+        with self._lock:
+            state._encrypted_key = None
+        return private_key
+
+    def evict_idle(self) -> int:
+        """Evict every session idle for longer than ``idle_timeout`` now.
+
+        Returns:
+            int: number of evicted sessions
+        """
+        with self._lock:
+            evicted = self._evict_locked(time.monotonic())
+        self._notify(evicted)
+        return len(evicted)
+
+    def remove(self, session_id: str) -> bool:
+        """Drop a session and its key (e.g. when the agent deletes the session)."""
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+        if state is not None:
+            self._notify([state])
+        return state is not None
+
+    def clear(self) -> None:
+        """Drop every session."""
+        with self._lock:
+            evicted = list(self._sessions.values())
+            self._sessions.clear()
+        self._notify(evicted)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self) -> dict:
+        """Session counts."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "with_private_key": sum(1 for state in self._sessions.values() if state.has_private_key),
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,419 @@
+"""State and result builders shared by the synchronous tools and the async read tools.
+
+``agent.py`` (every tool, synchronous) and ``async_tools.py`` (the coroutine
+read tools registered with the agent) both import this module, so neither has
+to import the other while it is still initializing. It holds the HTTP
+sessions, the price and username caches, the local event index handle and the
+functions that turn read results into tool results.
+
+The username cache reads through the mainnet contract, which ``agent.py``
+binds to it (``username_cache.w3`` / ``username_cache.contract``) when it
+builds its Web3 instance.
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import Optional
+
+import aiohttp
+
+from .amounts import format_ton, wei_to_ton
+from .indexer import ProtectedPayIndexer
+from .instrumentation import metrics
+from .price_cache import PriceCache
+from .records import Transfer
+from .transfer_filters import describe_filters
+from .transport import async_http_get_json, create_async_session, create_session, http_get_json
+from .username_cache import UsernameCache
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of keep-alive connections per host in the shared HTTP pool
+HTTP_POOL_SIZE = 20
+
+# Shared keep-alive session for RPC and price API requests
+http_session = create_session(HTTP_POOL_SIZE)
+
+# Shared aiohttp session per event loop, used by async_w3 and the async price fetch
+async_http_sessions = weakref.WeakKeyDictionary()
+
+# Coroutine functions awaited with each new per-loop session (agent.py attaches it to async_w3)
+_async_session_listeners = []
+
+
+def add_async_session_listener(listener) -> None:
+    """Register a coroutine function awaited with each aiohttp session created by get_async_session()."""
+    _async_session_listeners.append(listener)
+
+
+async def get_async_session() -> aiohttp.ClientSession:
+    """Get the shared aiohttp session for the running event loop, creating it on first use.
+
+    Returns:
+        aiohttp.ClientSession: session shared by async_w3 and the async price fetch
+    """
+    loop = asyncio.get_running_loop()
+    session = async_http_sessions.get(loop)
+    if session is None or session.closed:
+        session = create_async_session(HTTP_POOL_SIZE)
+        async_http_sessions[loop] = session
+        for listener in _async_session_listeners:
+            await listener(session)
+    return session
+
+
+async def close_async_session() -> None:
+    """Close the running event loop's shared aiohttp session (call before the loop shuts down)."""
+    session = async_http_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+# Maximum usernames (and addresses) remembered by the username cache
+USERNAME_CACHE_SIZE = 10000
+
+# Username <-> address lookups, invalidated by UserRegistered logs (bound to the contract by agent.py)
+username_cache = UsernameCache(None, None, max_entries=USERNAME_CACHE_SIZE)
+
+# Maximum age (seconds) of the local event index before read tools fall back to live RPC reads
+LOCAL_INDEX_MAX_AGE = 30
+
+# Local event index of contract state (None until agent.enable_local_index() is called)
+protectedpay_index = None
+
+
+def get_fresh_index() -> Optional[ProtectedPayIndexer]:
+    """Get the local event index if it is enabled and recently synced.
+
+    Returns:
+        ProtectedPayIndexer or None: the index, or None if reads must go to the chain
+    """
+    if protectedpay_index is not None and protectedpay_index.is_fresh(LOCAL_INDEX_MAX_AGE):
+        return protectedpay_index
+    return None
+
+
+class TransferScan:
+    """The I/O-free part of reading a user's transfer history chunk by chunk.
+
+    iter_user_transfers() and aiter_user_transfers() make the RPC calls
+    (getUserProfile, one batch of getTransferDetails per chunk, or the legacy
+    getUserTransfers) and hand the results to a scan, which picks the next
+    chunk of IDs, decodes and filters the records and stops at ``limit``.
+    """
+
+    def __init__(self, user_address: str, offset: int, limit: Optional[int], filters: Optional[dict],
+                 batch_size: int):
+        """Start a scan at ``offset``.
+
+        Args:
+            user_address (str): The user's checksummed wallet address
+            offset (int): Position in the user's history to start at
+            limit (int): Maximum number of transfers to return (None for all)
+            filters (dict): Filters from build_transfer_filters()
+            batch_size (int): Transfers fetched per aggregated call
+        """
+        self.user_address = user_address
+        self.filters = filters or {}
+        self.batch_size = batch_size
+        self.position = offset
+        self.remaining = limit
+
+    @property
+    def done(self) -> bool:
+        """Whether ``limit`` transfers have been found."""
+        return self.remaining is not None and self.remaining <= 0
+
+    def _take(self, records) -> list:
+        matched = []
+        for record in records:
+            if self.done:
+                break
+            if record.matches(self.user_address, self.filters):
+                matched.append(record)
+                if self.remaining is not None:
+                    self.remaining -= 1
+        return matched
+
+    def next_chunk(self, transfer_ids: list) -> list:
+        """Transfer IDs to fetch details for next (empty once the history or the limit is exhausted)."""
+        if self.done:
+            return []
+        # Unfiltered pages fetch exactly what is still needed
+        chunk_size = self.batch_size if self.filters or self.remaining is None else min(self.batch_size, self.remaining)
+        return transfer_ids[self.position:self.position + chunk_size]
+
+    def chunk_records(self, chunk_ids: list, detail_results: list) -> list:
+        """Matching records of a chunk, from its (success, getTransferDetails tuple) batch results."""
+        records = []
+        for i, (transfer_id_bytes, (success, transfer_details)) in enumerate(zip(chunk_ids, detail_results),
+                                                                            start=self.position):
+            if not success:
+                logger.warning("Error getting details for transfer %d: %s", i, transfer_details)
+                continue
+            records.append(Transfer(i, transfer_id_bytes, transfer_details))
+        self.position += len(chunk_ids)
+        return self._take(records)
+
+    def index_records(self, page: list) -> list:
+        """Matching records of a (position, transfer row) page from the local event index."""
+        if page:
+            self.position = page[-1][0] + 1
+        return self._take(Transfer(position, transfer[0], transfer[1:]) for position, transfer in page)
+
+    def legacy_records(self, transfers: list, profile_error: Exception) -> list:
+        """Matching records of the legacy getUserTransfers result, read because getUserProfile failed."""
+        logger.warning("getUserProfile failed: %s, falling back to getUserTransfers", profile_error)
+        metrics.record_event("user_profile", "fallback")
+        return self._take(Transfer(i, None, transfers[i]) for i in range(self.position, len(transfers)))
+
+
+# Common token names mapped to their Coinbase symbols
+TOKEN_MAPPINGS = {
+    'bitcoin': 'BTC',
+    'ethereum': 'ETH',
+    'ton': 'TON',
+    'toncoin': 'TON',
+    'usdc': 'USDC',
+    'usdt': 'USDT',
+    'cardano': 'ADA',
+    'solana': 'SOL',
+    'polkadot': 'DOT',
+    'chainlink': 'LINK',
+    'litecoin': 'LTC',
+    'dogecoin': 'DOG',
+    'duck': 'DUCK'  # DuckChain token
+}
+
+
+def normalize_token_symbol(token_symbol: str) -> str:
+    """Convert a token name or symbol to its Coinbase symbol (e.g. 'bitcoin' -> 'BTC').
+
+    Args:
+        token_symbol (str): Token name or symbol
+
+    Returns:
+        str: normalized symbol
+    """
+    normalized_token = token_symbol.lower().strip()
+    if normalized_token in TOKEN_MAPPINGS:
+        return TOKEN_MAPPINGS[normalized_token]
+    return token_symbol.upper().strip()
+
+
+def fetch_token_price(token_symbol: str) -> tuple:
+    """Fetch the spot USD price of a normalized token symbol from Coinbase.
+
+    Args:
+        token_symbol (str): Normalized token symbol
+
+    Returns:
+        tuple: (price, currency)
+    """
+    url = f"https://api.coinbase.com/v2/prices/{token_symbol}-USD/spot"
+    data = http_get_json(http_session, url, timeout=10)
+
+    if 'data' in data and 'amount' in data['data']:
+        return float(data['data']['amount']), data['data']['currency']
+
+    raise LookupError(f"Price data not found for token '{token_symbol}'")
+
+
+async def fetch_token_price_async(token_symbol: str) -> tuple:
+    """Async version of fetch_token_price using the event loop's shared aiohttp session."""
+    url = f"https://api.coinbase.com/v2/prices/{token_symbol}-USD/spot"
+    data = await async_http_get_json(await get_async_session(), url, timeout=10)
+
+    if 'data' in data and 'amount' in data['data']:
+        return float(data['data']['amount']), data['data']['currency']
+
+    raise LookupError(f"Price data not found for token '{token_symbol}'")
+
+
+# Seconds a cached price is served as fresh, and how long past that it may be served while refreshing
+PRICE_CACHE_TTL = 30
+PRICE_CACHE_STALE_TTL = 300
+
+# Price cache keyed by normalized symbol (see price_cache.stats() for hit/miss counters)
+price_cache = PriceCache(fetch_token_price, ttl=PRICE_CACHE_TTL, stale_ttl=PRICE_CACHE_STALE_TTL,
+                         async_fetch=fetch_token_price_async)
+
+
+def transfers_page_result(user_address: str, transfer_list: list, offset: int, limit: int, filters: dict,
+                          contract_address: str, source: Optional[str] = None) -> dict:
+    """Build the get_user_transfers result for one page of transfers.
+
+    Args:
+        user_address (str): The user's wallet address
+        transfer_list (list): Transfer records of the page
+        offset (int): Offset the page was read from
+        limit (int): Page size that was requested
+        filters (dict): Filters from build_transfer_filters()
+        contract_address (str): ProtectedPay contract the page was read from
+        source (str): Set to "local_index" when answered from the event index
+
+    Returns:
+        dict: status, transfers and the offset of the next page
+    """
+    fallback = any(transfer.is_legacy for transfer in transfer_list)
+    has_more = len(transfer_list) == limit
+    next_offset = transfer_list[-1].index + 1 if has_more else None
+    filter_text = describe_filters(filters)
+
+    if not transfer_list and offset == 0 and not filters and source is None:
+        return {
+            "status": "success",
+            "report": f"No transfers found for address {user_address} on mainnet",
+            "transfers": [],
+            "count": 0,
+            "has_more": False,
+            "next_offset": None,
+            "network": "mainnet",
+            "contract_address": contract_address
+        }
+
+    report = f"Found {len(transfer_list)} transfers for address {user_address} on mainnet"
+    if filter_text:
+        report += f" ({filter_text})"
+    if fallback:
+        report += " (fallback method)"
+    if has_more:
+        report += f". More may be available: call again with offset={next_offset}"
+
+    result = {
+        "status": "success",
+        "report": report,
+        "transfers": [transfer.to_dict() for transfer in transfer_list],
+        "count": len(transfer_list),
+        "offset": offset,
+        "limit": limit,
+        "has_more": has_more,
+        "next_offset": next_offset,
+        "filters": filter_text or None,
+        "network": "mainnet",
+        "contract_address": contract_address
+    }
+    if source is not None:
+        result["source"] = source
+    return result
+
+
+def portfolio_result(user_address: str, portfolio: dict, group_payments: bool, savings_pots: bool,
+                     contract_address: str) -> dict:
+    """Build the result of the portfolio tools from load_portfolio() output.
+
+    Args:
+        user_address (str): The user's wallet address
+        portfolio (dict): group_payments, savings_pots (records) and errors from load_portfolio()
+        group_payments (bool): Whether group payments were requested
+        savings_pots (bool): Whether savings pots were requested
+        contract_address (str): ProtectedPay contract the portfolio was read from
+
+    Returns:
+        dict: status, report and the requested lists
+    """
+    parts = []
+    result = {"status": "success", "address": user_address}
+    if group_payments:
+        result["group_payments"] = [payment.to_dict() for payment in portfolio["group_payments"]]
+        pending = sum(1 for payment in portfolio["group_payments"] if payment.status_name == "Pending")
+        parts.append(f"{len(portfolio['group_payments'])} group payments ({pending} pending)")
+    if savings_pots:
+        result["savings_pots"] = [pot.to_dict() for pot in portfolio["savings_pots"]]
+        saved_wei = sum(pot.current_amount_wei for pot in portfolio["savings_pots"] if pot.status_name == "Active")
+        parts.append(f"{len(portfolio['savings_pots'])} savings pots ({format_ton(saved_wei)} TON in active pots)")
+
+    result["report"] = f"Found {' and '.join(parts)} for address {user_address} on mainnet"
+    if portfolio["errors"]:
+        result["report"] += f" ({len(portfolio['errors'])} could not be read)"
+        result["errors"] = portfolio["errors"]
+    result["network"] = "mainnet"
+    result["contract_address"] = contract_address
+    return result
+
+
+def balances_result(addresses: list, invalid: list, requested: int, block_number: int, results: dict) -> dict:
+    """Build the get_balances result from streamed (address, balance or error) results.
+
+    Args:
+        addresses (list): Unique checksummed addresses, in input order
+        invalid (list): Inputs that are not valid addresses
+        requested (int): Number of addresses given (including duplicates and invalid ones)
+        block_number (int): Block the balances were read at
+        results (dict): address -> balance in wei, or the Exception raised for it
+
+    Returns:
+        dict: status, per-address balances and total
+    """
+    balances = []
+    failed = []
+    for address in addresses:
+        result = results[address]
+        if isinstance(result, Exception):
+            failed.append({"address": address, "error_message": str(result)})
+        else:
+            balances.append({
+                "address": address,
+                "balance_wei": result,
+                "balance_ton": wei_to_ton(result)
+            })
+
+    total_wei = sum(balance["balance_wei"] for balance in balances)
+    report = f"Fetched {len(balances)} balances at block {block_number}: {format_ton(total_wei)} TON in total"
+    if failed:
+        report += f", {len(failed)} failed"
+    if invalid:
+        report += f", {len(invalid)} invalid addresses skipped"
+
+    error_message = None
+    if not addresses:
+        error_message = "No valid addresses given"
+    elif not balances:
+        error_message = f"Failed to fetch balances: {failed[0]['error_message']}"
+
+    return {
+        "status": "error" if error_message else "success",
+        "report": report,
+        "error_message": error_message,
+        "block_number": block_number,
+        "balances": balances,
+        "failed": failed,
+        "invalid_addresses": invalid,
+        "duplicates_removed": requested - len(invalid) - len(addresses),
+        "count": len(balances),
+        "total_wei": total_wei,
+        "total_ton": wei_to_ton(total_wei),
+        "network": "DuckChain"
+    }
+
+
+def pending_claims_result(claimer_address: str, pending: list, contract_address: str) -> dict:
+    """Build the get_pending_claims result from list_pending_claims() output.
+
+    Args:
+        claimer_address (str): The recipient's wallet address
+        pending (list): Pending Transfer records
+        contract_address (str): ProtectedPay contract the transfers were read from
+
+    Returns:
+        dict: status, the pending transfers and their total
+    """
+    total_wei = sum(transfer.amount_wei for transfer in pending)
+    senders = {transfer.sender for transfer in pending}
+    if pending:
+        report = (f"{len(pending)} pending transfers totalling {format_ton(total_wei)} TON "
+                  f"from {len(senders)} senders are waiting to be claimed by {claimer_address}. "
+                  f"Claim them all with claim_all_pending_transfers")
+    else:
+        report = f"No pending transfers are waiting to be claimed by {claimer_address} on mainnet"
+    return {
+        "status": "success",
+        "report": report,
+        "pending_transfers": [transfer.to_dict() for transfer in pending],
+        "count": len(pending),
+        "total_pending_wei": total_wei,
+        "total_pending_ton": format_ton(total_wei),
+        "network": "mainnet",
+        "contract_address": contract_address
+    }
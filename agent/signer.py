@@ -0,0 +1,155 @@
+"""Transaction signing with cached accounts and an optional process pool.
+
+Deriving an account from a private key and ECDSA signing are both CPU-bound
+and hold the GIL. ``SignerService`` derives each ``LocalAccount`` once and
+keeps it, and for large batches signs in worker processes so the agent
+process stays free to send already signed transactions while the rest are
+being signed.
+
+Cached accounts are looked up by a keyed hash of the private key (never the
+key itself), and ``forget`` drops them. Worker processes keep nothing: they
+derive the account for each chunk they sign, so a forgotten key does not
+linger in a worker.
+"""
+
+import hmac
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account
+
+# Accounts kept by the service (one per private key in use)
+DEFAULT_MAX_ACCOUNTS = 64
+
+# Batches smaller than this are signed in-process (starting work in the pool costs more)
+DEFAULT_POOL_MIN_BATCH = 32
+
+# Transactions sent to a worker process per task
+DEFAULT_CHUNK_SIZE = 16
+
+
+def _sign_chunk(private_key: str, transactions: list) -> list:
+    """Sign transactions inside a worker process (the account is derived per chunk and not kept)."""
+    account = Account.from_key(private_key)
+    return [account.sign_transaction(transaction) for transaction in transactions]
+
+
+def _normalize_key(private_key: str) -> str:
+    private_key = private_key.strip()
+    return private_key if private_key.startswith("0x") else "0x" + private_key
+
+
+class SignerService:
+    """Signs transactions with cached LocalAccounts, in a process pool for large batches."""
+
+    def __init__(self, max_workers: int = None, pool_min_batch: int = DEFAULT_POOL_MIN_BATCH,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_accounts: int = DEFAULT_MAX_ACCOUNTS):
+        """Create the service (the process pool is started on first use).
+
+        Args:
+            max_workers (int): Worker processes for batch signing (default: CPU count); 1 disables the pool
+            pool_min_batch (int): Smallest batch signed in the pool
+            chunk_size (int): Transactions per pool task
+            max_accounts (int): Derived accounts kept in memory
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pool_min_batch = pool_min_batch
+        self.chunk_size = chunk_size
+        self.max_accounts = max_accounts
+
+        self._accounts = OrderedDict()  # keyed hash of the private key -> LocalAccount
+        self._hash_key = os.urandom(32)  # per-process HMAC key for the cache keys
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _cache_key(self, private_key: str) -> bytes:
+        return hmac.digest(self._hash_key, _normalize_key(private_key).lower().encode(), "sha256")
+
+    def account(self, private_key: str):
+        """LocalAccount for a private key, derived on first use.
+
+        Args:
+            private_key (str): Hex private key, with or without 0x
+
+        Returns:
+            LocalAccount: the account (raises ValueError for an invalid key)
+        """
+        cache_key = self._cache_key(private_key)
+        with self._lock:
+            account = self._accounts.get(cache_key)
+            if account is not None:
+                self._accounts.move_to_end(cache_key)
+                return account
+        account = Account.from_key(_normalize_key(private_key))
+        with self._lock:
+            self._accounts[cache_key] = account
+            while len(self._accounts) > self.max_accounts:
+                self._accounts.popitem(last=False)
+        return account
+
+    def forget(self, private_key: str) -> None:
+        """Drop the cached account of a key (e.g. when the user clears it or its session is evicted)."""
+        with self._lock:
+            self._accounts.pop(self._cache_key(private_key), None)
+
+    def sign(self, transaction: dict, private_key: str):
+        """Sign one transaction in-process with the cached account.
+
+        Returns:
+            SignedTransaction: raw_transaction, hash and signature
+        """
+        return self.account(private_key).sign_transaction(transaction)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers do not inherit the agent's threads or their locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def iter_sign(self, transactions: list, private_key: str):
+        """Sign many transactions, yielding each as soon as it and all before it are signed.
+
+        Batches of at least ``pool_min_batch`` are split into chunks signed in
+        parallel by the worker processes; smaller batches, or a service with
+        one worker, sign in-process.
+
+        Args:
+            transactions (list): Transaction dicts (fully built, nonce included)
+            private_key (str): Hex private key
+
+        Yields:
+            SignedTransaction: in the order of ``transactions``
+        """
+        if self.max_workers <= 1 or len(transactions) < self.pool_min_batch:
+            account = self.account(private_key)
+            for transaction in transactions:
+                yield account.sign_transaction(transaction)
+            return
+
+        private_key = _normalize_key(private_key)
+        chunks = [transactions[start:start + self.chunk_size] for start in range(0, len(transactions), self.chunk_size)]
+        futures = [self._get_pool().submit(_sign_chunk, private_key, chunk) for chunk in chunks]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def sign_many(self, transactions: list, private_key: str) -> list:
+        """Sign many transactions and return them in order (see iter_sign)."""
+        return list(self.iter_sign(transactions, private_key))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,233 @@
+"""Pre-flight simulation of contract transactions with revert-reason decoding.
+
+Before a transaction is signed, the exact call (sender, calldata and value) is
+run with ``eth_call`` against the pending block. A call that would revert is
+rejected with its decoded reason: ``Error(string)`` messages, Solidity
+``Panic(uint256)`` codes and custom errors declared in the contract ABI.
+Results are cached per (contract, function, calldata, value, sender, block),
+so repeating an identical call within a block costs no RPC round trip.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from eth_abi import decode
+from eth_utils import function_abi_to_4byte_selector
+from web3.exceptions import ContractLogicError
+
+# Selector of Error(string), the encoding of require() / revert("...") messages
+ERROR_STRING_SELECTOR = "08c379a0"
+
+# Selector of Panic(uint256), raised by failing asserts and checked arithmetic
+PANIC_SELECTOR = "4e487b71"
+
+# Meaning of Solidity panic codes
+PANIC_REASONS = {
+    0x00: "generic compiler panic",
+    0x01: "assertion failed",
+    0x11: "arithmetic underflow or overflow",
+    0x12: "division or modulo by zero",
+    0x21: "invalid enum value",
+    0x22: "incorrectly encoded storage byte array",
+    0x31: "pop() on an empty array",
+    0x32: "array index out of bounds",
+    0x41: "out of memory",
+    0x51: "call to an uninitialized internal function",
+}
+
+# Prefix nodes put in front of revert reasons in error messages
+REVERT_MESSAGE_PREFIX = "execution reverted"
+
+# Simulation results remembered (oldest are evicted first)
+DEFAULT_MAX_ENTRIES = 1024
+
+# Seconds the latest block number is reused for cache keys
+DEFAULT_BLOCK_TTL = 1.0
+
+
+def custom_error_decoders(abi: list) -> dict:
+    """Custom errors declared in an ABI, keyed by 4-byte selector (hex, no 0x).
+
+    Returns:
+        dict: selector -> (error name, input names, input types)
+    """
+    decoders = {}
+    for entry in abi:
+        if entry.get("type") != "error":
+            continue
+        inputs = entry.get("inputs", [])
+        selector = function_abi_to_4byte_selector(entry).hex()
+        decoders[selector] = (entry["name"], [item["name"] for item in inputs], [item["type"] for item in inputs])
+    return decoders
+
+
+def decode_revert_data(data: str, custom_errors: dict = None) -> dict:
+    """Decode the return data of a reverted call.
+
+    Args:
+        data (str): Revert data as hex (with or without 0x)
+        custom_errors (dict): Decoders from custom_error_decoders()
+
+    Returns:
+        dict: kind ("error", "panic", "custom", "empty" or "unknown"), reason and, when decoded, details
+    """
+    data = data[2:] if data.startswith("0x") else data
+    if not data:
+        return {"kind": "empty", "reason": "reverted without a reason"}
+
+    selector, payload = data[:8], bytes.fromhex(data[8:])
+    try:
+        if selector == ERROR_STRING_SELECTOR:
+            (message,) = decode(["string"], payload)
+            return {"kind": "error", "reason": message}
+        if selector == PANIC_SELECTOR:
+            (code,) = decode(["uint256"], payload)
+            return {
+                "kind": "panic",
+                "reason": f"panic 0x{code:02x}: {PANIC_REASONS.get(code, 'unknown panic code')}",
+                "code": code
+            }
+        if custom_errors and selector in custom_errors:
+            name, names, types = custom_errors[selector]
+            values = decode(types, payload)
+            arguments = {arg_name or f"arg{i}": value for i, (arg_name, value) in enumerate(zip(names, values))}
+            formatted = ", ".join(f"{key}={value!r}" for key, value in arguments.items())
+            return {"kind": "custom", "reason": f"{name}({formatted})", "error": name, "arguments": arguments}
+    except Exception:
+        pass
+    return {"kind": "unknown", "reason": f"reverted with undecoded data 0x{data}", "selector": "0x" + selector}
+
+
+def is_revert(error: Exception) -> bool:
+    """Whether an eth_call error means the call reverted (rather than the node being unreachable)."""
+    return isinstance(error, ContractLogicError) or REVERT_MESSAGE_PREFIX in str(error).lower()
+
+
+def decode_revert_error(error: Exception, custom_errors: dict = None) -> dict:
+    """Decode a revert from the exception raised by eth_call or estimate_gas.
+
+    Uses the raw revert data when the node returned it, and otherwise the
+    reason from the error message.
+
+    Returns:
+        dict: see decode_revert_data
+    """
+    data = getattr(error, "data", None)
+    if isinstance(data, dict):
+        data = data.get("data")
+    if isinstance(data, str) and data.startswith("0x") and len(data) >= 10:
+        return decode_revert_data(data, custom_errors)
+
+    message = getattr(error, "message", None) or str(error)
+    if REVERT_MESSAGE_PREFIX in message.lower():
+        reason = message[message.lower().index(REVERT_MESSAGE_PREFIX) + len(REVERT_MESSAGE_PREFIX):].lstrip(": ")
+        if reason:
+            return {"kind": "error", "reason": reason}
+        return {"kind": "empty", "reason": "reverted without a reason"}
+    return {"kind": "unknown", "reason": message}
+
+
+class TransactionSimulator:
+    """Runs transactions as eth_call at the pending block and caches the outcome per block."""
+
+    def __init__(self, w3, max_entries: int = DEFAULT_MAX_ENTRIES, block_ttl: float = DEFAULT_BLOCK_TTL):
+        """Create the simulator.
+
+        Args:
+            w3: Web3 instance used for eth_call and the block number
+            max_entries (int): Simulation results kept in the cache
+            block_ttl (float): Seconds the latest block number is reused for cache keys
+        """
+        self.w3 = w3
+        self.max_entries = max_entries
+        self.block_ttl = block_ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._results = OrderedDict()  # (address, function, calldata, value, sender, block) -> result
+        self._custom_errors = {}  # contract address -> custom error decoders
+        self._block = (None, 0.0)  # (block number, monotonic time read)
+        self._lock = threading.Lock()
+
+    def block_number(self) -> int:
+        """Latest block number, read at most once per ``block_ttl`` seconds."""
+        with self._lock:
+            number, read_at = self._block
+            if number is not None and time.monotonic() - read_at < self.block_ttl:
+                return number
+        number = self.w3.eth.block_number
+        with self._lock:
+            self._block = (number, time.monotonic())
+        return number
+
+    def _decoders_for(self, contract_function) -> dict:
+        with self._lock:
+            decoders = self._custom_errors.get(contract_function.address)
+        if decoders is None:
+            decoders = custom_error_decoders(contract_function.contract_abi or [])
+            with self._lock:
+                self._custom_errors[contract_function.address] = decoders
+        return decoders
+
+    def simulate(self, contract_function, sender: str, value_wei: int = 0) -> dict:
+        """Simulate a transaction as an eth_call at the pending block.
+
+        Args:
+            contract_function: Bound contract function (arguments applied)
+            sender (str): Address the transaction would be sent from
+            value_wei (int): Value the transaction would send
+
+        Returns:
+            dict: success, reason and revert (decoded, None on success), block_number and cached.
+            Errors other than reverts (e.g. the node cannot be reached) are raised.
+        """
+        calldata = contract_function._encode_transaction_data()
+        block_number = self.block_number()
+        key = (contract_function.address, contract_function.fn_name, calldata, value_wei, sender, block_number)
+
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return dict(result, cached=True)
+            self.misses += 1
+
+        try:
+            self.w3.eth.call({
+                "from": sender,
+                "to": contract_function.address,
+                "data": calldata,
+                "value": value_wei
+            }, "pending")
+            result = {"success": True, "reason": None, "revert": None, "block_number": block_number}
+        except Exception as call_error:
+            if not is_revert(call_error):
+                raise
+            revert = decode_revert_error(call_error, self._decoders_for(contract_function))
+            result = {"success": False, "reason": revert["reason"], "revert": revert, "block_number": block_number}
+
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return dict(result, cached=False)
+
+    def forget_sender(self, sender: str) -> None:
+        """Drop the cached results of a sender (its pending state changes once it submits a transaction)."""
+        with self._lock:
+            for key in [key for key in self._results if key[4] == sender]:
+                del self._results[key]
+
+    def clear(self) -> None:
+        """Forget all cached results."""
+        with self._lock:
+            self._results.clear()
+            self._block = (None, 0.0)
+
+    def stats(self) -> dict:
+        """Cache size and hit/miss counters."""
+        with self._lock:
+            return {"entries": len(self._results), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,123 @@
+"""Shared fixtures: local py-evm chains with the benchmark contracts deployed, and mock JSON-RPC servers."""
+
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent.benchmarks.local_chain import LocalChain
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Hash the mock RPC server returns for eth_sendRawTransaction
+TX_HASH = "0x" + "ab" * 32
+
+
+@pytest.fixture
+def chain():
+    """A fresh chain that the agent is not attached to."""
+    return LocalChain()
+
+
+@pytest.fixture(scope="session")
+def agent_chain():
+    """The chain the ``agent.agent`` module talks to (attached once per test run)."""
+    import agent.agent as agent_module
+
+    local_chain = LocalChain()
+    local_chain.attach(agent_module)
+    return local_chain
+
+
+class MockRPCServer:
+    """JSON-RPC server on localhost that fails requests as scripted.
+
+    Each POST takes the next fault from ``faults`` (None once they run out):
+    ``"reset"`` closes the connection without a response, an int answers with
+    that HTTP status, ``"slow"`` answers after ``slow_seconds`` and None
+    answers normally. Every answer is also delayed by ``delay`` seconds, and
+    eth_blockNumber returns ``block_number``. Every received body is kept in
+    ``requests``, so tests can count how often a call was posted.
+    """
+
+    def __init__(self):
+        self.faults = []
+        self.requests = []
+        self.slow_seconds = 0.5
+        self.delay = 0
+        self.block_number = 100
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests.append(body)
+                    fault = server.faults.pop(0) if server.faults else None
+                if fault == "reset":
+                    # SO_LINGER 0: close with a TCP reset instead of a clean shutdown
+                    self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                    self.connection.close()
+                    self.close_connection = True
+                    return
+                if isinstance(fault, int):
+                    self.send_response(fault)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if fault == "slow":
+                    time.sleep(server.slow_seconds)
+                time.sleep(server.delay)
+                if isinstance(body, list):
+                    data = json.dumps([server.answer(call) for call in body]).encode()
+                else:
+                    data = json.dumps(server.answer(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                pass  # Scripted resets and abandoned requests are expected
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def answer(self, call: dict) -> dict:
+        results = {
+            "eth_blockNumber": hex(self.block_number),
+            "eth_chainId": hex(5545),
+            "eth_getBalance": hex(10 ** 18),
+            "eth_sendRawTransaction": TX_HASH,
+        }
+        return {"jsonrpc": "2.0", "id": call["id"], "result": results.get(call["method"])}
+
+    def posts_of(self, method: str) -> int:
+        """Number of POSTs that contained a call of ``method``."""
+        return sum(
+            1 for body in self.requests
+            if any(call["method"] == method for call in (body if isinstance(body, list) else [body]))
+        )
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def rpc_server():
+    server = MockRPCServer()
+    yield server
+    server.close()
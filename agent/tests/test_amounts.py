@@ -0,0 +1,90 @@
+"""Tests of the exact TON amount parsing that every transaction amount goes through."""
+
+from decimal import Decimal
+
+import pytest
+
+from agent.amounts import MAX_WEI, WEI_PER_TON, format_ton, parse_ton, parse_ton_many, wei_to_ton, wei_to_ton_many
+
+
+@pytest.mark.parametrize("amount, wei", [
+    ("1", WEI_PER_TON),
+    ("1.5", 3 * WEI_PER_TON // 2),
+    (" 0.25 ", WEI_PER_TON // 4),
+    (".5", WEI_PER_TON // 2),
+    ("2.", 2 * WEI_PER_TON),
+    ("+3", 3 * WEI_PER_TON),
+    ("-0", 0),
+    ("0.000000000000000001", 1),
+    ("1.100000000000000000000", 11 * WEI_PER_TON // 10),
+    (7, 7 * WEI_PER_TON),
+    (0.1, WEI_PER_TON // 10),
+    (Decimal("0.3"), 3 * WEI_PER_TON // 10),
+])
+def test_plain_amounts_are_exact(amount, wei):
+    assert parse_ton(amount) == wei
+
+
+def test_eighteen_decimal_places_is_the_limit():
+    assert parse_ton("123456789.123456789123456789") == 123456789123456789123456789
+    with pytest.raises(ValueError, match="more than 18 decimal places"):
+        parse_ton("0.0000000000000000001")
+    with pytest.raises(ValueError, match="more than 18 decimal places"):
+        parse_ton(Decimal("1.0000000000000000001"))
+
+
+@pytest.mark.parametrize("amount, wei", [
+    ("2e-3", 2 * WEI_PER_TON // 1000),
+    ("1E18", 10 ** 36),
+    ("1.5e1", 15 * WEI_PER_TON),
+    ("1e-18", 1),
+    ("0e999999", 0),
+])
+def test_exponent_amounts_are_exact(amount, wei):
+    assert parse_ton(amount) == wei
+
+
+@pytest.mark.parametrize("amount, message", [
+    ("1e-19", "more than 18 decimal places"),
+    ("1e1000000", "too large"),
+    (str(MAX_WEI // WEI_PER_TON + 1), "too large"),
+])
+def test_exponent_and_size_limits(amount, message):
+    with pytest.raises(ValueError, match=message):
+        parse_ton(amount)
+
+
+@pytest.mark.parametrize("amount", ["-1", "-0.5", "-1e-18", -2, Decimal("-0.1"), -0.1])
+def test_negative_amounts_are_rejected(amount):
+    with pytest.raises(ValueError, match="is negative"):
+        parse_ton(amount)
+
+
+@pytest.mark.parametrize("amount", [
+    "nan", "NaN", "sNaN", "inf", "-Infinity", float("nan"), float("inf"), Decimal("nan"), Decimal("-inf"),
+    "", " ", ".", "-", "abc", "1.2.3", "0x10", "1,5", None, True,
+])
+def test_non_numbers_are_rejected(amount):
+    with pytest.raises(ValueError, match="Invalid TON amount"):
+        parse_ton(amount)
+
+
+@pytest.mark.parametrize("amount", ["1_000", "1_000.5", "0.000_001", "1_0e3"])
+def test_digit_separators_are_rejected(amount):
+    with pytest.raises(ValueError, match="Invalid TON amount"):
+        parse_ton(amount)
+
+
+def test_parse_ton_many_names_the_invalid_position():
+    assert parse_ton_many(["1", "0.5", 2]) == [WEI_PER_TON, WEI_PER_TON // 2, 2 * WEI_PER_TON]
+    with pytest.raises(ValueError, match="Amount 1: .*more than 18 decimal places"):
+        parse_ton_many(["1", "0.0000000000000000001", "-1"])
+
+
+def test_parse_ton_many_round_trips_through_wei_to_ton():
+    amounts = ["0.1", "1.5", "0.000001", "12345.678", "1000000", "0.3"]
+    wei = parse_ton_many(amounts)
+
+    assert wei_to_ton_many(wei) == [wei_to_ton(value) for value in wei] == [float(amount) for amount in amounts]
+    assert parse_ton_many(wei_to_ton_many(wei)) == wei
+    assert [format_ton(value) for value in wei] == amounts
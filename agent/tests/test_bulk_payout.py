@@ -0,0 +1,45 @@
+"""Tests of payout parsing and the payout journal (agent.bulk_payout)."""
+
+import pytest
+
+from agent.bulk_payout import JOURNAL_SIGNED, JOURNAL_SUBMITTED, PayoutJournal, parse_payouts, payout_fingerprint
+
+SENDER = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+PAYOUTS = "recipient,amount_ton,remarks\n0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69,1.5,rent\nbob,0.25,lunch\n"
+
+
+def test_parse_payouts_reads_addresses_usernames_and_exact_amounts():
+    rows = parse_payouts(PAYOUTS)
+
+    assert [(row["recipient"], row["username"], row["amount_wei"]) for row in rows] == [
+        ("0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69", None, 1_500_000_000_000_000_000),
+        (None, "bob", 250_000_000_000_000_000),
+    ]
+    assert all(row["error"] is None for row in rows)
+
+
+def test_journal_resumes_the_same_batch(tmp_path):
+    path = str(tmp_path / "payout.jsonl")
+    fingerprint = payout_fingerprint(SENDER, parse_payouts(PAYOUTS))
+    journal = PayoutJournal(path, fingerprint)
+    journal.record(0, JOURNAL_SIGNED, nonce=7, tx_hash="0x01", raw_transaction="0x02")
+    journal.record(0, JOURNAL_SUBMITTED, error=None)
+
+    resumed = PayoutJournal(path, fingerprint)
+    assert resumed.state(0) == {"nonce": 7, "tx_hash": "0x01", "raw_transaction": "0x02", "error": None,
+                                "type": JOURNAL_SUBMITTED, "row": 0}
+    assert resumed.state(1) is None
+
+    with pytest.raises(ValueError, match="different payout batch"):
+        PayoutJournal(path, "other batch")
+
+
+def test_empty_journal_file_gets_a_header(tmp_path):
+    path = tmp_path / "payout.jsonl"
+    path.touch()
+
+    journal = PayoutJournal(str(path), "batch")
+    journal.record(0, JOURNAL_SIGNED, nonce=1)
+
+    resumed = PayoutJournal(str(path), "batch")
+    assert resumed.state(0)["nonce"] == 1
@@ -0,0 +1,109 @@
+"""Tests of the tools that sign and broadcast many transactions in one call."""
+
+import json
+
+import pytest
+import rlp
+
+from agent.bulk_payout import JOURNAL_REVERTED, PayoutJournal, parse_payouts, payout_fingerprint
+
+
+@pytest.fixture
+def agent_module(agent_chain):
+    import agent.agent as agent_module
+
+    return agent_module
+
+
+@pytest.fixture
+def wallet(agent_chain, agent_module):
+    """Sign with agent_chain.accounts[5] and return without waiting for receipts."""
+    agent_module.set_private_key(agent_chain.private_keys[5])
+    agent_module.session_store.get().wait_for_confirmation = False
+    yield agent_chain.accounts[5]
+    agent_module.clear_private_key()
+
+
+class FlakySender:
+    """Stand-in for eth.send_raw_transaction that fails one call and records the nonce order of the rest."""
+
+    def __init__(self, send_raw_transaction, fail_call: int):
+        self.send_raw_transaction = send_raw_transaction
+        self.fail_call = fail_call
+        self.nonces = []
+
+    def __call__(self, raw_transaction):
+        # Legacy transactions are an RLP list starting with the nonce
+        self.nonces.append(int.from_bytes(rlp.decode(bytes(raw_transaction))[0], "big"))
+        if len(self.nonces) == self.fail_call:
+            raise ConnectionError("node unavailable")
+        return self.send_raw_transaction(raw_transaction)
+
+
+def test_claim_all_sends_in_nonce_order_and_stops_at_the_first_failure(agent_chain, agent_module, wallet, monkeypatch):
+    agent_chain.seed_transfers([(agent_chain.accounts[6], wallet)] * 6)
+    start_nonce = agent_chain.w3.eth.get_transaction_count(wallet)
+
+    flaky = FlakySender(agent_module.w3.eth.send_raw_transaction, fail_call=3)
+    monkeypatch.setattr(agent_module.w3.eth, "send_raw_transaction", flaky)
+    result = agent_module.claim_all_pending_transfers(wallet)
+
+    assert flaky.nonces == [start_nonce, start_nonce + 1, start_nonce + 2]
+    assert [claim["status"] for claim in result["results"]] == ["submitted"] * 2 + ["failed"] + ["not_sent"] * 3
+    assert [claim["transaction_hash"] for claim in result["results"][3:]] == [None] * 3
+    assert result["remaining"] == 4
+
+    # No gap: the next call reuses the released nonces and claims the rest
+    monkeypatch.undo()
+    result = agent_module.claim_all_pending_transfers(wallet)
+    assert result["counts"] == {"submitted": 4}
+    assert [claim["nonce"] for claim in result["results"]] == list(range(start_nonce + 2, start_nonce + 6))
+    assert agent_chain.w3.eth.get_transaction_count(wallet) == start_nonce + 6
+    assert agent_chain.pending_transfer_ids(wallet, recipient=wallet) == []
+
+
+def _payouts(recipients: list) -> str:
+    return json.dumps([
+        {"recipient": recipient, "amount_ton": "0.01", "remarks": f"payout {index}"}
+        for index, recipient in enumerate(recipients)
+    ])
+
+
+def test_bulk_payout_sends_in_nonce_order_and_resumes_after_a_failure(agent_chain, agent_module, wallet, monkeypatch,
+                                                                       tmp_path):
+    payouts = _payouts([agent_chain.accounts[7], agent_chain.accounts[8]] * 3)
+    journal_path = str(tmp_path / "payout.jsonl")
+    start_nonce = agent_chain.w3.eth.get_transaction_count(wallet)
+
+    flaky = FlakySender(agent_module.w3.eth.send_raw_transaction, fail_call=3)
+    monkeypatch.setattr(agent_module.w3.eth, "send_raw_transaction", flaky)
+    result = agent_module.send_bulk_payout(payouts, wallet, journal_path=journal_path)
+
+    assert flaky.nonces == [start_nonce, start_nonce + 1, start_nonce + 2]
+    assert [row["status"] for row in result["results"]] == ["submitted"] * 2 + ["failed"] + ["not_sent"] * 3
+    assert agent_chain.w3.eth.get_transaction_count(wallet) == start_nonce + 2
+
+    # The resume broadcasts the journaled transactions at their nonces, lowest first
+    monkeypatch.undo()
+    flaky = FlakySender(agent_module.w3.eth.send_raw_transaction, fail_call=0)
+    monkeypatch.setattr(agent_module.w3.eth, "send_raw_transaction", flaky)
+    result = agent_module.send_bulk_payout(payouts, wallet, journal_path=journal_path)
+
+    assert flaky.nonces == list(range(start_nonce + 2, start_nonce + 6))
+    assert result["counts"] == {"submitted": 6}
+    assert agent_chain.w3.eth.get_transaction_count(wallet) == start_nonce + 6
+
+
+def test_bulk_payout_resume_does_not_retry_reverted_rows(agent_chain, agent_module, wallet, tmp_path):
+    payouts = _payouts([agent_chain.accounts[7], agent_chain.accounts[8]])
+    journal_path = str(tmp_path / "payout.jsonl")
+    journal = PayoutJournal(journal_path, payout_fingerprint(wallet, parse_payouts(payouts)))
+    journal.record(0, JOURNAL_REVERTED, nonce=0, tx_hash="0x" + "11" * 32, error="execution reverted")
+
+    result = agent_module.send_bulk_payout(payouts, wallet, journal_path=journal_path)
+
+    assert [row["status"] for row in result["results"]] == ["reverted", "submitted"]
+    assert result["results"][0]["transaction_hash"] == "0x" + "11" * 32
+    assert result["counts"] == {"reverted": 1, "submitted": 1}
+    assert "will not be retried" in result["report"]
+    assert "Run again" not in result["report"]
@@ -0,0 +1,144 @@
+"""Tests of concurrent read-only dispatch and per-session ordered dispatch of mutating tools."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent.dispatch import ToolDispatcher
+from agent.sessions import current_session_id, session_scope
+
+
+@pytest.fixture
+def dispatcher():
+    tool_dispatcher = ToolDispatcher({"read_balance", "read_price"}, max_workers=4, default_timeout=5)
+    yield tool_dispatcher
+    tool_dispatcher.shutdown()
+
+
+def _in_session(session_id: str, call):
+    async def run():
+        with session_scope(session_id):
+            return await call
+    return run()
+
+
+def test_mutating_calls_run_one_at_a_time_in_call_order_per_session(dispatcher):
+    events = []
+    running = []
+
+    def send_payment(index: int, seconds: float) -> str:
+        running.append(index)
+        assert len(running) == 1, "two writes of one session overlapped"
+        events.append((current_session_id(), index))
+        time.sleep(seconds)
+        running.remove(index)
+        return f"sent {index}"
+
+    send = dispatcher.wrap(send_payment)
+
+    async def main():
+        # The first call is the slowest: later calls still wait for it
+        return await asyncio.gather(*(_in_session("a", send(index, 0.05 - index * 0.01)) for index in range(5)))
+
+    assert asyncio.run(main()) == [f"sent {index}" for index in range(5)]
+    assert events == [("a", index) for index in range(5)]
+    assert dispatcher.stats()["ordered_calls"] == 5
+
+
+def test_sessions_do_not_wait_behind_each_others_writes(dispatcher):
+    release = threading.Event()
+
+    def send_payment(session_id: str) -> str:
+        if session_id == "slow":
+            assert release.wait(5)
+        return session_id
+
+    send = dispatcher.wrap(send_payment)
+
+    async def main():
+        slow = asyncio.ensure_future(_in_session("slow", send("slow")))
+        assert await asyncio.wait_for(_in_session("fast", send("fast")), 2) == "fast"
+        release.set()
+        return await slow
+
+    assert asyncio.run(main()) == "slow"
+
+
+def test_mutating_call_cancelled_before_it_starts_never_runs(dispatcher):
+    started = threading.Event()
+    release = threading.Event()
+    ran = []
+
+    def send_payment(index: int) -> int:
+        ran.append(index)
+        started.set()
+        assert release.wait(5)
+        return index
+
+    send = dispatcher.wrap(send_payment)
+
+    async def main():
+        first = asyncio.ensure_future(send(0))
+        second = asyncio.ensure_future(send(1))
+        await asyncio.to_thread(started.wait, 5)
+        first.cancel()
+        second.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, second, return_exceptions=True)
+        # The started call ran to completion on the lane, the queued one was dropped
+        await asyncio.to_thread(dispatcher._lane(current_session_id()).submit(lambda: None).result)
+
+    asyncio.run(main())
+    assert ran == [0]
+    assert dispatcher.stats()["cancelled"] == 2
+
+
+def test_read_only_calls_run_concurrently_in_their_session(dispatcher):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def read_balance(address: str) -> str:
+        barrier.wait()
+        return f"{current_session_id()} {address}"
+
+    async def read_price(token: str) -> str:
+        await asyncio.sleep(0)
+        return token
+
+    read = dispatcher.wrap(read_balance)
+    price = dispatcher.wrap(read_price)
+
+    async def main():
+        return await asyncio.gather(*(_in_session("a", read(f"0x{index}")) for index in range(3)), price("TON"))
+
+    assert asyncio.run(main()) == ["a 0x0", "a 0x1", "a 0x2", "TON"]
+    assert dispatcher.stats()["concurrent_calls"] == 4
+
+
+def test_read_only_call_past_its_timeout_answers_with_an_error(dispatcher):
+    dispatcher.timeouts["read_price"] = 0.05
+
+    async def read_price(token: str) -> str:
+        await asyncio.sleep(5)
+        return token
+
+    result = asyncio.run(dispatcher.wrap(read_price)("TON"))
+
+    assert result["status"] == "error"
+    assert "within 0.05 seconds" in result["error_message"]
+    assert dispatcher.stats()["timed_out"] == 1
+
+
+def test_wrap_keeps_the_tool_declaration_and_rejects_async_mutating_tools(dispatcher):
+    def send_payment(recipient: str, amount_ton: str) -> dict:
+        """Send a payment."""
+
+    async def async_send(recipient: str) -> dict:
+        pass
+
+    wrapped = dispatcher.wrap(send_payment)
+    assert (wrapped.__name__, wrapped.__doc__) == ("send_payment", "Send a payment.")
+    with pytest.raises(TypeError):
+        dispatcher.wrap(async_send)
@@ -0,0 +1,81 @@
+"""Tests of the gas oracle's gas price TTL and history-based gas limits."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agent.gas_oracle import CALLDATA_BUCKET, GasOracle
+
+
+class NodeGasPrice:
+    """Stand-in for w3.eth whose gas price the test sets, counting the reads."""
+
+    def __init__(self, gas_price: int):
+        self.price = gas_price
+        self.reads = 0
+
+    @property
+    def gas_price(self) -> int:
+        self.reads += 1
+        return self.price
+
+
+@pytest.fixture
+def node():
+    return NodeGasPrice(10 ** 9)
+
+
+def test_gas_price_is_reused_within_the_ttl_and_never_after(node):
+    oracle = GasOracle(SimpleNamespace(eth=node), price_ttl=0.05, price_multiplier=1.5)
+
+    assert oracle.gas_price() == oracle.gas_price() == 15 * 10 ** 8
+    assert node.reads == 1
+
+    node.price = 2 * 10 ** 9
+    time.sleep(0.06)
+    # Past the TTL the new price is read before answering
+    assert oracle.gas_price() == 3 * 10 ** 9
+    assert node.reads == 2
+    assert (oracle.stats()["gas_price_hits"], oracle.stats()["gas_price_fetches"]) == (1, 2)
+
+
+def test_reset_forgets_the_gas_price(node):
+    oracle = GasOracle(SimpleNamespace(eth=node))
+    oracle.gas_price()
+    node.price = 3 * 10 ** 9
+
+    oracle.reset()
+
+    assert oracle.gas_price() == int(3 * 10 ** 9 * 1.1)
+
+
+def test_call_key_buckets_calldata_without_rpc(chain, monkeypatch):
+    monkeypatch.setattr(chain.w3.provider, "make_request", lambda *args: pytest.fail("encoding made an RPC call"))
+    short = chain.contract.functions.sendToAddress(chain.accounts[1], "rent")
+    long = chain.contract.functions.sendToAddress(chain.accounts[1], "rent " * 20)
+
+    key = GasOracle.call_key(short, 10 ** 15)
+
+    assert key[:2] == (chain.contract.address, "sendToAddress")
+    assert key[2] % CALLDATA_BUCKET == 0
+    assert key[3] is True
+    assert GasOracle.call_key(chain.contract.functions.sendToAddress(chain.accounts[2], "food"), 10 ** 15) == key
+    assert GasOracle.call_key(long, 10 ** 15)[2] > key[2]
+    assert GasOracle.call_key(short, 0)[3] is False
+
+
+def test_gas_limit_is_predicted_after_enough_estimates(chain):
+    oracle = GasOracle(chain.w3, min_samples=3)
+    send = chain.contract.functions.sendToAddress(chain.accounts[1], "rent")
+    tx_params = {"from": chain.accounts[0], "value": 10 ** 15}
+
+    sources = [oracle.gas_limit(send, tx_params)[2] for _ in range(4)]
+    gas_limit, key, _ = oracle.gas_limit(send, tx_params)
+
+    assert sources == ["estimate"] * 3 + ["history"]
+    assert gas_limit >= send.estimate_gas(tx_params)
+
+    # Running out of gas drops the history of the call shape
+    oracle.record_receipt(key, gas_limit, gas_limit, success=False)
+    assert oracle.gas_limit(send, tx_params)[2] == "estimate"
@@ -0,0 +1,287 @@
+"""Tests of the local event index (agent.indexer).
+
+``fixtures/protectedpay_logs.json`` is eth_getLogs output recorded from a
+LocalChain session: alice and bob register, transfers are sent, one claimed
+and one refunded, a group payment completes, another stays open, and two
+savings pots are created (one of them broken).
+"""
+
+import os
+
+import pytest
+from web3 import Web3
+
+from agent import shared
+from agent.indexer import ProtectedPayIndexer, load_log_fixture
+
+from .conftest import FIXTURES_DIR
+
+LOG_FIXTURE = os.path.join(FIXTURES_DIR, "protectedpay_logs.json")
+
+# Accounts of the recorded session
+ALICE = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+BOB = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+CAROL = "0x1efF47bc3a10a45D4B230B5d10E37751FE6AA718"
+DAVE = "0xe1AB8145F7E55DC933d51a18c793F901A3A0b276"
+
+
+@pytest.fixture
+def fixture_logs():
+    return load_log_fixture(LOG_FIXTURE)
+
+
+@pytest.fixture
+def replayed_index(fixture_logs):
+    """An index built from the recorded logs alone (no RPC access)."""
+    from agent.agent import load_contract_abi
+
+    offline_w3 = Web3()
+    contract = offline_w3.eth.contract(address=fixture_logs[0]["address"], abi=load_contract_abi())
+    index = ProtectedPayIndexer(offline_w3, contract)
+    index.apply_logs(fixture_logs)
+    yield index
+    index.close()
+
+
+def _remarks(transfers) -> list:
+    return [transfer[6] for transfer in transfers]
+
+
+def test_fixture_replay_builds_state(replayed_index, fixture_logs):
+    assert replayed_index.last_block == max(log["blockNumber"] for log in fixture_logs)
+
+    assert replayed_index.get_address_by_username("alice") == ALICE
+    assert replayed_index.get_username_by_address(BOB) == "bob"
+    assert replayed_index.get_username_by_address(CAROL) is None
+
+    transfers = replayed_index.get_transfers_for_address(ALICE)
+    assert _remarks(transfers) == ["rent", "lunch", "refund me"] + [f"split {i}" for i in range(6)]
+    statuses = {transfer[6]: transfer[5] for transfer in transfers}
+    assert (statuses["rent"], statuses["lunch"], statuses["refund me"]) == (1, 0, 2)
+    assert transfers[0][3] == Web3.to_wei(1, "ether")
+
+    group_payments = {payment["remarks"]: payment for payment in replayed_index.get_group_payments_for_address(BOB)}
+    assert group_payments["dinner"]["status"] == 1
+    assert group_payments["dinner"]["recipient"] == DAVE
+    assert group_payments["gift"]["status"] == 0
+    assert int(group_payments["gift"]["amount_collected_wei"]) == Web3.to_wei(3, "ether")
+
+    [holiday] = replayed_index.get_savings_pots_for_address(ALICE)
+    assert (holiday["name"], holiday["status"], int(holiday["current_amount_wei"])) == ("holiday", 0, Web3.to_wei(2, "ether"))
+    [bike] = replayed_index.get_savings_pots_for_address(BOB)
+    assert (bike["status"], int(bike["current_amount_wei"])) == (1, 0)
+
+
+def test_transfer_pages_cover_history_in_order(replayed_index):
+    history = replayed_index.get_transfers_for_address(ALICE)
+
+    pages = []
+    offset = 0
+    while True:
+        page = replayed_index.get_transfer_page(ALICE, offset, 2)
+        if not page:
+            break
+        pages.extend(page)
+        offset = page[-1][0] + 1
+
+    assert [position for position, _ in pages] == list(range(len(history)))
+    assert [transfer for _, transfer in pages] == history
+
+
+def test_transfer_page_filters_keep_history_positions(replayed_index):
+    received = replayed_index.get_transfer_page(ALICE, 0, 100, status=0, direction="received")
+    assert [(position, transfer[6]) for position, transfer in received] == [(4, "split 1"), (6, "split 3"), (8, "split 5")]
+
+    # Positions are counted over the whole history, so a page can resume after a filtered one
+    assert replayed_index.get_transfer_page(ALICE, 5, 1, status=0, direction="received")[0][0] == 6
+
+    cancelled = replayed_index.get_transfer_page(ALICE, 0, 100, status=2)
+    assert [transfer[6] for _, transfer in cancelled] == ["refund me"]
+
+    start_time = received[1][1][4]
+    assert [position for position, _ in replayed_index.get_transfer_page(ALICE, 0, 100, start_time=start_time,
+                                                                           direction="received")] == [6, 8]
+
+
+def _send(chain, sender: str, recipient: str, remarks: str, value: int = 10 ** 15) -> None:
+    tx_hash = chain.contract.functions.sendToAddress(recipient, remarks).transact({"from": sender, "value": value})
+    chain.w3.eth.wait_for_transaction_receipt(tx_hash)
+
+
+def test_sync_pages_get_logs_and_splits_rejected_ranges(chain):
+    sender, recipient = chain.accounts[1], chain.accounts[2]
+    for i in range(12):
+        _send(chain, sender, recipient, f"payment {i}")
+
+    requested = []
+    get_logs = chain.w3.eth.get_logs
+
+    def capped_get_logs(filter_params):
+        # Like providers that cap the block range of one eth_getLogs call
+        requested.append((filter_params["fromBlock"], filter_params["toBlock"]))
+        if filter_params["toBlock"] - filter_params["fromBlock"] >= 2:
+            raise ValueError("query returned more than 10000 results")
+        return get_logs(filter_params)
+
+    chain.w3.eth.get_logs = capped_get_logs
+    index = ProtectedPayIndexer(chain.w3, chain.contract, block_batch_size=8, confirmations=0)
+    head = chain.w3.eth.block_number
+    summary = index.sync()
+
+    assert summary == {"from_block": 0, "to_block": head, "logs_applied": 12}
+    assert index.last_block == head
+    assert _remarks(index.get_transfers_for_address(sender)) == [f"payment {i}" for i in range(12)]
+
+    served = [(start, end) for start, end in requested if end - start < 2]
+    assert served[0][0] == 0 and served[-1][1] == head
+    assert all(end + 1 == next_start for (_, end), (next_start, _) in zip(served, served[1:]))
+
+    # Nothing new: the next sync starts at the checkpoint and applies nothing
+    requested.clear()
+    assert index.sync()["logs_applied"] == 0
+    assert requested == []
+    index.close()
+
+
+def test_sync_is_incremental(chain):
+    sender, recipient = chain.accounts[1], chain.accounts[2]
+    index = ProtectedPayIndexer(chain.w3, chain.contract, confirmations=0)
+
+    _send(chain, sender, recipient, "first")
+    assert index.sync()["logs_applied"] == 1
+    _send(chain, sender, recipient, "second")
+    _send(chain, recipient, sender, "third")
+    assert index.sync()["logs_applied"] == 2
+
+    assert _remarks(index.get_transfers_for_address(sender)) == ["first", "second", "third"]
+    assert index.is_fresh(60)
+    index.close()
+
+
+def test_rebuild_replaces_reorged_events_and_stays_stale_until_done(chain):
+    sender, recipient = chain.accounts[1], chain.accounts[2]
+    _send(chain, sender, recipient, "kept")
+    snapshot = chain.tester.take_snapshot()
+    _send(chain, sender, recipient, "orphaned")
+
+    index = ProtectedPayIndexer(chain.w3, chain.contract, confirmations=0)
+    index.sync()
+    assert _remarks(index.get_transfers_for_address(sender)) == ["kept", "orphaned"]
+
+    # Reorg: the orphaned block is replaced by a longer branch
+    chain.tester.revert_to_snapshot(snapshot)
+    _send(chain, sender, recipient, "replacement")
+    _send(chain, recipient, sender, "reply")
+
+    freshness_during_rebuild = []
+    get_logs = chain.w3.eth.get_logs
+
+    def observing_get_logs(filter_params):
+        freshness_during_rebuild.append(index.is_fresh(60))
+        return get_logs(filter_params)
+
+    chain.w3.eth.get_logs = observing_get_logs
+    summary = index.rebuild()
+
+    assert freshness_during_rebuild == [False]
+    assert index.is_fresh(60)
+    assert summary["logs_applied"] == 3
+    assert _remarks(index.get_transfers_for_address(sender)) == ["kept", "replacement", "reply"]
+    index.close()
+
+
+def test_failed_rebuild_leaves_index_stale(chain):
+    _send(chain, chain.accounts[1], chain.accounts[2], "payment")
+    index = ProtectedPayIndexer(chain.w3, chain.contract, confirmations=0)
+    index.sync()
+
+    def failing_get_logs(filter_params):
+        raise ConnectionError("RPC unavailable")
+
+    chain.w3.eth.get_logs = failing_get_logs
+    with pytest.raises(ConnectionError):
+        index.rebuild()
+
+    assert not index.is_fresh(60)
+    assert index.get_transfers_for_address(chain.accounts[1]) == []
+    index.close()
+
+
+@pytest.fixture(scope="module")
+def seeded_history(agent_chain):
+    """A focus account with a long history of pending, claimed and refunded transfers."""
+    focus = agent_chain.accounts[1]
+    agent_chain.seed(users=20, transfers=90, group_payments=0, savings_pots=0, focus_account=focus, focus_transfers=60)
+    contract = agent_chain.contract
+    for transfer_id in agent_chain.pending_transfer_ids(focus, recipient=focus)[::3]:
+        agent_chain.w3.eth.wait_for_transaction_receipt(
+            contract.functions.claimTransferById(bytes.fromhex(transfer_id)).transact({"from": focus})
+        )
+    for transfer_id in agent_chain.pending_transfer_ids(focus, sender=focus)[::4]:
+        agent_chain.w3.eth.wait_for_transaction_receipt(
+            contract.functions.refundTransfer(bytes.fromhex(transfer_id)).transact({"from": focus})
+        )
+    for i in range(5):
+        _send(agent_chain, focus, agent_chain.accounts[2], f"larger payment {i}", value=(i + 2) * 10 ** 17)
+    return focus
+
+
+def _walk_pages(agent_module, address: str, limit: int, **filters) -> list:
+    """Follow next_offset through every page, checking each was answered by the expected source."""
+    source = "local_index" if shared.protectedpay_index is not None else None
+    pages = []
+    offset = 0
+    while offset is not None:
+        result = agent_module.get_user_transfers(address, offset=offset, limit=limit, **filters)
+        assert result["status"] == "success", result
+        assert result.get("source") == source
+        pages.append((offset, result["transfers"], result["next_offset"]))
+        offset = result["next_offset"]
+    return pages
+
+
+@pytest.mark.parametrize("limit, filters", [
+    (7, {}),
+    (25, {}),
+    (5, {"status": "Pending"}),
+    (4, {"status": "Completed"}),
+    (3, {"status": "Cancelled", "direction": "sent"}),
+    (6, {"direction": "received"}),
+    (2, {"min_amount_ton": "0.1"}),
+    (10, {"status": "Pending", "direction": "sent", "max_amount_ton": "0.001"}),
+])
+def test_index_pages_match_rpc_pages(agent_chain, seeded_history, monkeypatch, limit, filters):
+    import agent.agent as agent_module
+
+    index = ProtectedPayIndexer(agent_module.w3, agent_module.contract, confirmations=0)
+    index.sync()
+
+    monkeypatch.setattr(shared, "protectedpay_index", None)
+    rpc_pages = _walk_pages(agent_module, seeded_history, limit, **filters)
+
+    monkeypatch.setattr(shared, "protectedpay_index", index)
+    assert agent_module.get_fresh_index() is index
+    index_pages = _walk_pages(agent_module, seeded_history, limit, **filters)
+    index.close()
+
+    assert index_pages == rpc_pages
+    assert sum(len(transfers) for _, transfers, _ in rpc_pages) > 0
+
+
+def test_index_pages_match_rpc_pages_with_time_window(agent_chain, seeded_history, monkeypatch):
+    import agent.agent as agent_module
+
+    index = ProtectedPayIndexer(agent_module.w3, agent_module.contract, confirmations=0)
+    index.sync()
+    history = index.get_transfers_for_address(seeded_history)
+    timestamps = sorted({transfer[4] for transfer in history})
+    window = {"start_time": timestamps[1], "end_time": timestamps[-2]}
+
+    monkeypatch.setattr(shared, "protectedpay_index", None)
+    rpc_pages = _walk_pages(agent_module, seeded_history, 8, **window)
+    monkeypatch.setattr(shared, "protectedpay_index", index)
+    index_pages = _walk_pages(agent_module, seeded_history, 8, **window)
+    index.close()
+
+    assert index_pages == rpc_pages
+    assert 0 < sum(len(transfers) for _, transfers, _ in rpc_pages) < len(history)
@@ -0,0 +1,117 @@
+"""Tests of local nonce reservation against a local chain."""
+
+import threading
+
+import pytest
+
+from agent.nonce_manager import NonceManager, is_nonce_error
+
+
+@pytest.fixture
+def nonces(chain):
+    return NonceManager(chain.w3)
+
+
+def _send(chain, sender: str, nonce: int) -> None:
+    chain.w3.eth.send_transaction({"from": sender, "to": chain.accounts[1], "value": 1, "nonce": nonce})
+
+
+def test_first_reservation_reads_the_pending_count_and_later_ones_are_local(chain, nonces, monkeypatch):
+    sender = chain.accounts[0]
+    start = chain.w3.eth.get_transaction_count(sender, "pending")
+
+    assert nonces.reserve(sender) == start
+    monkeypatch.setattr(nonces, "_chain_nonce", lambda address: pytest.fail("read the chain again"))
+    assert nonces.reserve_many(sender, 3) == [start + 1, start + 2, start + 3]
+    assert nonces.in_flight(sender) == [start, start + 1, start + 2, start + 3]
+
+
+def test_concurrent_reservations_are_unique_and_gapless(chain, nonces):
+    sender = chain.accounts[0]
+    start = chain.w3.eth.get_transaction_count(sender, "pending")
+    reserved = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(50):
+            nonce = nonces.reserve(sender)
+            with lock:
+                reserved.append(nonce)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(reserved) == list(range(start, start + 400))
+
+
+def test_releasing_the_latest_reservation_reuses_it(chain, nonces):
+    sender = chain.accounts[0]
+    first, second = nonces.reserve_many(sender, 2)
+
+    nonces.release(sender, second)
+
+    assert nonces.reserve(sender) == second
+    assert nonces.in_flight(sender) == [first, second]
+
+
+def test_releasing_an_earlier_reservation_resyncs_and_keeps_later_ones(chain, nonces):
+    sender = chain.accounts[0]
+    first, second, third = nonces.reserve_many(sender, 3)
+    _send(chain, sender, first)
+    nonces.confirm(sender, first)
+
+    # The second transaction was never accepted, the third is still in flight above it
+    nonces.release(sender, second)
+
+    assert nonces.in_flight(sender) == [third]
+    assert nonces.reserve(sender) == third + 1
+
+
+def test_rejected_nonce_release_resyncs_with_the_chain(chain, nonces):
+    sender = chain.accounts[0]
+    nonce = nonces.reserve(sender)
+    # Another signer used the same key: the node now expects a later nonce
+    _send(chain, sender, nonce)
+    _send(chain, sender, nonce + 1)
+
+    nonces.release(sender, nonce, resync=True)
+
+    assert nonces.in_flight(sender) == []
+    assert nonces.reserve(sender) == nonce + 2
+
+
+def test_resync_settles_mined_reservations_and_fills_the_gap_of_dropped_ones(chain, nonces):
+    sender = chain.accounts[0]
+    reserved = nonces.reserve_many(sender, 3)
+    _send(chain, sender, reserved[0])
+
+    # The transactions of the last two reservations were dropped without an error
+    nonces.confirm(sender, reserved[1])
+    nonces.confirm(sender, reserved[2])
+    assert nonces.resync(sender) == reserved[1]
+    assert nonces.reserve(sender) == reserved[1]
+
+
+def test_reset_forgets_the_local_counter(chain, nonces):
+    sender = chain.accounts[0]
+    nonces.reserve_many(sender, 5)
+
+    nonces.reset()
+
+    assert nonces.in_flight(sender) == []
+    assert nonces.reserve(sender) == chain.w3.eth.get_transaction_count(sender, "pending")
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("nonce too low", True),
+    ("Nonce too high", True),
+    ("already known", True),
+    ("replacement transaction underpriced", True),
+    ("insufficient funds for gas * price + value", False),
+    ("execution reverted", False),
+])
+def test_is_nonce_error(message, expected):
+    assert is_nonce_error(ValueError(message)) is expected
@@ -0,0 +1,140 @@
+"""Tests of the single-flight and stale-while-revalidate behaviour of PriceCache."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agent.price_cache import PriceCache
+
+
+class BlockingFetch:
+    """Fetch that counts its calls and, until ``release`` is set, blocks before answering."""
+
+    def __init__(self, blocked: bool = True):
+        self.calls = []
+        self.release = threading.Event()
+        if not blocked:
+            self.release.set()
+        self.error = None
+
+    def __call__(self, key):
+        self.calls.append(key)
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return f"{key}:{len(self.calls)}"
+
+
+def _age(cache: PriceCache, key: str, seconds: float) -> None:
+    """Make the entry of ``key`` look ``seconds`` old."""
+    value, fetched_at = cache._entries[key]
+    cache._entries[key] = (value, fetched_at - seconds)
+
+
+def _wait_until(condition) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_concurrent_misses_share_one_fetch():
+    fetch = BlockingFetch()
+    cache = PriceCache(fetch)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [pool.submit(cache.get, "TON") for _ in range(8)]
+        _wait_until(lambda: cache.misses == 8)
+        fetch.release.set()
+        assert [result.result() for result in results] == ["TON:1"] * 8
+
+    assert fetch.calls == ["TON"]
+    assert cache.get("TON") == "TON:1"
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    fetch = BlockingFetch(blocked=False)
+    cache = PriceCache(fetch, ttl=30, stale_ttl=300)
+    cache.get("TON")
+    _age(cache, "TON", 60)
+    fetch.release.clear()
+
+    # Served at once from the stale entry, with a single background refresh for all callers
+    assert [cache.get("TON") for _ in range(5)] == ["TON:1"] * 5
+    _wait_until(lambda: len(fetch.calls) == 2)
+    fetch.release.set()
+    _wait_until(lambda: "TON" not in cache._in_flight)
+
+    assert cache.get("TON") == "TON:2"
+    assert len(fetch.calls) == 2
+    assert (cache.stats()["stale_hits"], cache.stats()["hits"]) == (5, 1)
+
+
+def test_entry_past_the_stale_window_is_fetched_before_answering():
+    fetch = BlockingFetch(blocked=False)
+    cache = PriceCache(fetch, ttl=30, stale_ttl=300)
+    cache.get("TON")
+    _age(cache, "TON", 400)
+
+    assert cache.get("TON") == "TON:2"
+    assert cache.stats()["misses"] == 2
+
+
+def test_failed_fetch_fails_every_waiter_and_releases_the_key():
+    fetch = BlockingFetch()
+    fetch.error = ConnectionError("price API down")
+    cache = PriceCache(fetch)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = [pool.submit(cache.get, "TON") for _ in range(4)]
+        _wait_until(lambda: cache.misses == 4)
+        fetch.release.set()
+        for result in results:
+            with pytest.raises(ConnectionError):
+                result.result()
+
+    assert len(fetch.calls) == 1
+    fetch.error = None
+    assert cache.get("TON") == "TON:2"
+    assert cache.stats()["fetch_errors"] == 1
+
+
+def test_async_misses_share_one_fetch_that_survives_a_cancelled_caller():
+    calls = []
+
+    async def async_fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"{key}:{len(calls)}"
+
+    cache = PriceCache(None, async_fetch=async_fetch)
+
+    async def main():
+        cancelled = asyncio.create_task(cache.aget("TON"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        results = await asyncio.gather(*(cache.aget("TON") for _ in range(5)))
+        return cancelled.cancelled(), results
+
+    cancelled, results = asyncio.run(main())
+
+    assert cancelled
+    assert results == ["TON:1"] * 5
+    assert calls == ["TON"]
+
+
+def test_invalidate_forces_a_fetch():
+    fetch = BlockingFetch(blocked=False)
+    cache = PriceCache(fetch)
+    cache.get("TON")
+    cache.get("BTC")
+
+    cache.invalidate("TON")
+    assert cache.get("TON") == "TON:3"
+    assert cache.get("BTC") == "BTC:2"
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
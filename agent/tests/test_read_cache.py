@@ -0,0 +1,169 @@
+"""Tests of the head-block-aware eth_call cache on a local chain."""
+
+import time
+
+import pytest
+from eth_abi import decode
+from web3 import Web3
+
+from agent.multicall import batch_call
+from agent.read_cache import ReadCache, ReadCacheMiddleware
+
+
+class CachedChain:
+    """A Web3 instance on a local chain with the read cache injected, counting what reaches the chain."""
+
+    def __init__(self, chain):
+        self.chain = chain
+        provider = chain.sync_provider()
+        self.requests = []
+        make_request = provider.make_request
+
+        def counting_make_request(method, params):
+            self.requests.append((method, params))
+            return make_request(method, params)
+
+        provider.make_request = counting_make_request
+        self.w3 = Web3(provider)
+        self.cache = ReadCache(lambda: self.w3.eth.block_number, poll_interval=0.01, idle_timeout=5)
+        self.w3.middleware_onion.inject(ReadCacheMiddleware.build(self.cache), name="read_cache", layer=0)
+        self.contract = self.w3.eth.contract(address=chain.contract.address, abi=chain.contract.abi)
+
+    def start(self) -> None:
+        """Make a first eth_call, which starts the head poller, and wait for the head."""
+        self.contract.functions.getUserTransfers(self.chain.accounts[0]).call()
+        deadline = time.monotonic() + 5
+        while self.cache.head is None:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        self.requests.clear()
+
+    def eth_calls(self) -> list:
+        return [params for method, params in self.requests if method == "eth_call"]
+
+    def new_block(self) -> int:
+        """Mine a block with a new transfer and wait until the cache has seen it."""
+        self.chain.seed_transfers([(self.chain.accounts[1], self.chain.accounts[2])])
+        head = self.chain.w3.eth.block_number
+        deadline = time.monotonic() + 5
+        while self.cache.head != head:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        return head
+
+
+@pytest.fixture
+def cached(chain):
+    cached_chain = CachedChain(chain)
+    cached_chain.start()
+    return cached_chain
+
+
+def test_repeated_calls_are_answered_from_the_cache(cached, chain):
+    transfers = cached.contract.functions.getUserTransfers(chain.accounts[2])
+
+    first = transfers.call()
+    assert [transfers.call() for _ in range(3)] == [first] * 3
+    assert len(cached.eth_calls()) == 1
+    assert cached.cache.stats()["pinned"] == 1
+
+
+def test_new_block_drops_results_pinned_to_the_old_head(cached, chain):
+    transfers = cached.contract.functions.getUserTransfers(chain.accounts[2])
+    before = transfers.call()
+
+    cached.new_block()
+
+    assert cached.cache.stats()["pinned"] == 0
+    assert len(transfers.call()) == len(before) + 1
+
+
+def test_results_at_a_block_number_and_immutable_results_survive_new_blocks(cached, chain):
+    transfers = cached.contract.functions.getUserTransfers(chain.accounts[2])
+    chain.seed_transfers([(chain.accounts[1], chain.accounts[2])])
+    transfer_id = chain.contract.functions.getUserProfile(chain.accounts[2]).call()[1][0]
+    details = cached.contract.functions.getTransferDetails(transfer_id)
+    cached.cache.mark_immutable(details.selector, lambda result: True)
+    block = chain.w3.eth.block_number
+
+    at_block = transfers.call(block_identifier=block)
+    details.call()
+    cached.new_block()
+    calls = len(cached.eth_calls())
+
+    assert transfers.call(block_identifier=block) == at_block
+    details.call()
+    assert len(cached.eth_calls()) == calls
+
+
+def test_multicall_sends_only_the_sub_calls_not_in_the_cache(cached, chain):
+    multicall = chain.multicall.address
+    users = chain.accounts[1:5]
+    expected = [chain.contract.functions.getUserTransfers(user).call() for user in users]
+
+    batch_call(cached.w3, [cached.contract.functions.getUserTransfers(user) for user in users[:2]],
+               multicall_address=multicall)
+    results = batch_call(cached.w3, [cached.contract.functions.getUserTransfers(user) for user in users],
+                         multicall_address=multicall)
+
+    assert [result for _, result in results] == expected
+    (forwarded,) = decode(["(address,bool,bytes)[]"], bytes.fromhex(cached.eth_calls()[-1][0]["data"][10:]))
+    requested = [cached.contract.encode_abi("getUserTransfers", args=[user]) for user in users[2:]]
+    assert ["0x" + calldata.hex() for _, _, calldata in forwarded] == requested
+
+
+def test_result_of_a_call_in_flight_across_a_new_block_is_not_cached():
+    cache = ReadCache(lambda: 0, poll_interval=3600)
+    cache.observe_block(10)
+    params = [{"to": "0x" + "11" * 20, "data": "0x12345678"}, "latest"]
+
+    _, _, complete = cache.prepare(params)
+    cache.observe_block(11)
+    complete({"jsonrpc": "2.0", "id": 0, "result": "0x01"})
+
+    assert cache.lookup(cache.call_key(params)) is None
+    assert cache.stats()["stale_results"] == 1
+
+
+def test_latest_calls_are_sent_at_the_head_block(cached, chain):
+    cached.contract.functions.getUserTransfers(chain.accounts[2]).call()
+    batch_call(cached.w3, [cached.contract.functions.getUserTransfers(user) for user in chain.accounts[3:5]],
+               multicall_address=chain.multicall.address)
+
+    # The tester provider's request formatters turn the hex block number into an int
+    assert [params[1] for params in cached.eth_calls()] == [cached.cache.head] * 2
+
+
+def test_answer_of_an_endpoint_behind_the_head_is_not_cached():
+    cache = ReadCache(lambda: 0, poll_interval=3600)
+    cache.observe_block(10)
+    sent = []
+
+    def lagging_endpoint(method, params):
+        # Synced to block 9: the head block is unknown there, latest is its own block
+        sent.append(params[1])
+        if params[1] == hex(10):
+            return {"jsonrpc": "2.0", "id": 0, "error": {"code": -32000, "message": "header not found"}}
+        return {"jsonrpc": "2.0", "id": 0, "result": "0x09"}
+
+    middleware = ReadCacheMiddleware.build(cache, None).wrap_make_request(lagging_endpoint)
+    params = [{"to": "0x" + "11" * 20, "data": "0x12345678"}, "latest"]
+
+    assert middleware("eth_call", params)["result"] == "0x09"
+    assert sent == [hex(10), "latest"]
+    assert cache.lookup(cache.call_key(params)) is None
+
+
+def test_reverted_call_at_the_head_block_is_not_repeated():
+    cache = ReadCache(lambda: 0, poll_interval=3600)
+    cache.observe_block(10)
+    sent = []
+
+    def endpoint(method, params):
+        sent.append(params[1])
+        return {"jsonrpc": "2.0", "id": 0, "error": {"code": 3, "message": "execution reverted"}}
+
+    middleware = ReadCacheMiddleware.build(cache, None).wrap_make_request(endpoint)
+
+    assert "error" in middleware("eth_call", [{"to": "0x" + "11" * 20, "data": "0x12345678"}, "latest"])
+    assert sent == [hex(10)]
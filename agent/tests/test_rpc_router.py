@@ -0,0 +1,190 @@
+"""Tests of RpcRouter routing, hedging, failover and write pinning against mock JSON-RPC servers."""
+
+import asyncio
+import json
+import threading
+import time
+
+import aiohttp
+import pytest
+from eth_account import Account
+
+from agent.rpc_router import MIN_HEDGE_DELAY, MIN_HEDGE_SAMPLES, RpcRouter
+from agent.transport import create_session
+
+from .conftest import MockRPCServer
+
+SENDER_KEY = "0x" + "42" * 32
+
+
+@pytest.fixture
+def servers():
+    started = [MockRPCServer() for _ in range(3)]
+    yield started
+    for server in started:
+        server.close()
+
+
+@pytest.fixture
+def router(servers):
+    session = create_session()
+    yield RpcRouter([server.url for server in servers], session)
+    session.close()
+
+
+def _body(method: str, params: list) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "method": method, "params": params, "id": 1}).encode()
+
+
+def _read(router) -> int:
+    return int(json.loads(router.send(["eth_blockNumber"], _body("eth_blockNumber", [])))["result"], 16)
+
+
+def _served_by(servers) -> list:
+    return [len(server.requests) for server in servers]
+
+
+def _warm_up(router, index: int, latency: float = 0.01) -> None:
+    """Give an endpoint enough fast samples to rank first and have a short hedge delay."""
+    endpoint = router.endpoints[index]
+    for _ in range(MIN_HEDGE_SAMPLES):
+        endpoint.record_success(latency)
+
+
+def _raw_transaction(nonce: int) -> str:
+    signed = Account.sign_transaction({
+        "to": "0x" + "22" * 20, "value": 1, "gas": 21000, "gasPrice": 10 ** 9, "nonce": nonce, "chainId": 5545
+    }, SENDER_KEY)
+    return "0x" + signed.raw_transaction.hex().removeprefix("0x")
+
+
+def test_probe_excludes_lagging_and_failing_endpoints(router, servers):
+    servers[0].block_number = 90
+    servers[1].faults = [503]
+    servers[2].block_number = 100
+
+    snapshots = router.probe()
+
+    assert [snapshot["healthy"] for snapshot in snapshots] == [False, False, True]
+    assert snapshots[0]["last_error"] == "10 blocks behind"
+    for server in servers:
+        server.requests.clear()
+    assert _read(router) == 100
+    assert _served_by(servers) == [0, 0, 1]
+
+
+def test_primary_read_runs_on_the_calling_thread(router, servers, monkeypatch):
+    threads = []
+    post = router.session.post
+
+    def recording_post(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return post(*args, **kwargs)
+
+    monkeypatch.setattr(router.session, "post", recording_post)
+    _read(router)
+
+    assert threads == [threading.current_thread()]
+    assert _served_by(servers) == [1, 0, 0]
+
+
+def test_slow_read_is_hedged_to_the_next_endpoint(router, servers):
+    _warm_up(router, 0)
+    _warm_up(router, 1, latency=0.02)
+    servers[0].delay = 1.0
+
+    started = time.monotonic()
+    assert _read(router) == 100
+    elapsed = time.monotonic() - started
+
+    assert MIN_HEDGE_DELAY <= elapsed < 0.5
+    assert _served_by(servers) == [1, 1, 0]
+    primary = router.stats()["endpoints"][0]
+    assert (primary["hedges"], primary["hedge_wins"]) == (1, 1)
+    # Slow is not failed: the endpoint keeps serving reads
+    assert primary["healthy"] and primary["failures"] == 0
+
+
+def test_fast_read_is_not_hedged(router, servers):
+    _warm_up(router, 0, latency=0.2)
+
+    assert _read(router) == 100
+    assert _served_by(servers) == [1, 0, 0]
+    assert router.stats()["endpoints"][0]["hedges"] == 0
+
+
+def test_failed_read_fails_over_without_counting_a_hedge_win(router, servers):
+    servers[0].faults = [502]
+
+    assert _read(router) == 100
+    assert _served_by(servers) == [1, 1, 0]
+    primary = router.stats()["endpoints"][0]
+    assert (primary["hedges"], primary["hedge_wins"], primary["healthy"]) == (0, 0, False)
+
+
+def test_read_fails_after_every_endpoint_failed(router, servers):
+    for server in servers:
+        server.faults = [503]
+
+    with pytest.raises(Exception):
+        _read(router)
+    assert _served_by(servers) == [1, 1, 1]
+
+
+def test_nonce_sequence_is_pinned_to_one_endpoint_per_sender(router, servers):
+    sender = Account.from_key(SENDER_KEY).address
+    _warm_up(router, 1)
+
+    router.send(["eth_getTransactionCount"], _body("eth_getTransactionCount", [sender, "pending"]))
+    # Another endpoint becomes the fastest, but the sender stays where its nonce sequence started
+    _warm_up(router, 2, latency=0.001)
+    for nonce in range(3):
+        router.send(["eth_sendRawTransaction"], _body("eth_sendRawTransaction", [_raw_transaction(nonce)]))
+
+    assert _served_by(servers) == [0, 4, 0]
+    assert router.stats()["pinned_senders"] == 1
+    # Ordinary reads still follow latency
+    _read(router)
+    assert _served_by(servers) == [0, 4, 1]
+
+
+def test_failed_write_releases_the_pin(router, servers):
+    sender = Account.from_key(SENDER_KEY).address
+    _warm_up(router, 1)
+    router.send(["eth_getTransactionCount"], _body("eth_getTransactionCount", [sender, "pending"]))
+    servers[1].faults = [400]
+
+    with pytest.raises(Exception):
+        router.send(["eth_sendRawTransaction"], _body("eth_sendRawTransaction", [_raw_transaction(0)]))
+    assert router.stats()["pinned_senders"] == 0
+
+    _warm_up(router, 2, latency=0.001)
+    router.send(["eth_getTransactionCount"], _body("eth_getTransactionCount", [sender, "pending"]))
+    assert _served_by(servers) == [0, 2, 1]
+
+
+def _async_read(router) -> int:
+    async def read():
+        async with aiohttp.ClientSession() as session:
+            return await router.async_send(session, ["eth_blockNumber"], _body("eth_blockNumber", []))
+
+    return int(json.loads(asyncio.run(read()))["result"], 16)
+
+
+def test_async_hedge_takes_the_first_answer(router, servers):
+    _warm_up(router, 0)
+    servers[0].delay = 1.0
+
+    started = time.monotonic()
+    assert _async_read(router) == 100
+    assert time.monotonic() - started < 0.5
+    primary = router.stats()["endpoints"][0]
+    assert (primary["hedges"], primary["hedge_wins"]) == (1, 1)
+
+
+def test_async_failover_is_not_a_hedge_win(router, servers):
+    servers[0].faults = [502]
+
+    assert _async_read(router) == 100
+    primary = router.stats()["endpoints"][0]
+    assert (primary["hedges"], primary["hedge_wins"]) == (0, 0)
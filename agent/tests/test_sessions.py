@@ -0,0 +1,106 @@
+"""Tests of per-session state: encrypted keys, eviction and session binding of tools."""
+
+import asyncio
+import inspect
+from types import SimpleNamespace
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from agent.sessions import DEFAULT_SESSION_ID, SessionStore, bind_session, current_session_id, session_scope
+
+PRIVATE_KEY = "0x" + "4c" * 32
+
+
+def _tool_context(session_id: str, user_id: str = "alice"):
+    return SimpleNamespace(session=SimpleNamespace(app_name="protectedpay", user_id=user_id, id=session_id))
+
+
+def test_private_key_round_trips_encrypted():
+    store = SessionStore()
+
+    store.set_private_key(PRIVATE_KEY, "a")
+
+    nonce, ciphertext = store.get("a")._encrypted_key
+    assert PRIVATE_KEY.encode() not in ciphertext
+    assert store.private_key("a") == PRIVATE_KEY
+    assert store.private_key("b") is None
+    assert store.clear_private_key("a") == PRIVATE_KEY
+    assert store.private_key("a") is None
+    assert not store.get("a").has_private_key
+
+
+def test_encrypted_key_is_bound_to_its_session():
+    store = SessionStore()
+    store.set_private_key(PRIVATE_KEY, "a")
+
+    # A ciphertext copied into another session does not decrypt there
+    store.get("b")._encrypted_key = store.get("a")._encrypted_key
+    with pytest.raises(InvalidTag):
+        store.private_key("b")
+
+
+def test_least_recently_used_session_is_evicted_with_its_key():
+    evicted_keys = []
+    store = SessionStore(max_sessions=2, on_evict=evicted_keys.append)
+    store.set_private_key(PRIVATE_KEY, "a")
+    store.get("b")
+    store.get("a")
+
+    store.get("c")
+
+    assert set(store._sessions) == {"a", "c"}
+    assert evicted_keys == []
+    store.get("d")
+    assert set(store._sessions) == {"c", "d"}
+    assert evicted_keys == [PRIVATE_KEY]
+    assert store.stats() == {"sessions": 2, "with_private_key": 0, "evictions": 2}
+
+
+def test_idle_sessions_are_evicted():
+    evicted_keys = []
+    store = SessionStore(idle_timeout=60, on_evict=evicted_keys.append)
+    store.set_private_key(PRIVATE_KEY, "idle")
+    store.get("active")
+    store._sessions["idle"].last_used -= 120
+
+    assert store.evict_idle() == 1
+    assert set(store._sessions) == {"active"}
+    assert evicted_keys == [PRIVATE_KEY]
+
+
+def test_remove_and_clear_hand_keys_to_on_evict():
+    evicted_keys = []
+    store = SessionStore(on_evict=evicted_keys.append)
+    store.set_private_key(PRIVATE_KEY, "a")
+    store.set_private_key(PRIVATE_KEY.replace("4c", "5d"), "b")
+
+    assert store.remove("a") and not store.remove("a")
+    store.clear()
+
+    assert evicted_keys == [PRIVATE_KEY, PRIVATE_KEY.replace("4c", "5d")]
+    assert len(store) == 0
+
+
+def test_session_scope_sets_the_current_session():
+    assert current_session_id() == DEFAULT_SESSION_ID
+    with session_scope("a"):
+        assert current_session_id() == "a"
+    assert current_session_id() == DEFAULT_SESSION_ID
+
+
+def test_bound_tools_run_in_the_session_of_their_tool_context():
+    def tool(address: str) -> str:
+        return f"{current_session_id()} {address}"
+
+    async def async_tool(address: str) -> str:
+        return f"{current_session_id()} {address}"
+
+    bound = bind_session(tool)
+    async_bound = bind_session(async_tool, scope="user")
+
+    assert list(inspect.signature(bound).parameters) == ["address", "tool_context"]
+    assert bound("0x1", tool_context=_tool_context("s1")) == "protectedpay:alice:s1 0x1"
+    assert bound("0x1") == "default 0x1"
+    assert asyncio.run(async_bound("0x2", tool_context=_tool_context("s1"))) == "protectedpay:alice 0x2"
+    assert bind_session(bound) is bound
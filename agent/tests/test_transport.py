@@ -0,0 +1,101 @@
+"""Tests of the retry policy of PooledHTTPProvider against a mock JSON-RPC server."""
+
+import pytest
+import requests
+from web3 import Web3
+
+from agent import transport
+from agent.transport import PooledHTTPProvider, batch_rpc_request, create_session
+
+from .conftest import TX_HASH
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(transport, "BACKOFF_BASE", 0)
+
+
+@pytest.fixture
+def rpc_w3(rpc_server):
+    session = create_session()
+    yield Web3(PooledHTTPProvider(rpc_server.url, session))
+    session.close()
+
+
+@pytest.mark.parametrize("fault", ["reset", 429, 502, 503])
+def test_reads_are_retried_after_transient_failures(rpc_server, rpc_w3, fault):
+    rpc_server.faults = [fault, fault]
+
+    assert rpc_w3.eth.get_balance("0x" + "11" * 20) == 10 ** 18
+    assert rpc_server.posts_of("eth_getBalance") == 3
+
+
+def test_reads_give_up_after_max_attempts(rpc_server, rpc_w3):
+    rpc_server.faults = [503] * 10
+
+    with pytest.raises(requests.HTTPError):
+        rpc_w3.eth.get_balance("0x" + "11" * 20)
+    assert rpc_server.posts_of("eth_getBalance") == transport.DEFAULT_MAX_ATTEMPTS
+
+
+def test_client_errors_are_not_retried(rpc_server, rpc_w3):
+    rpc_server.faults = [400]
+
+    with pytest.raises(requests.HTTPError):
+        rpc_w3.eth.get_balance("0x" + "11" * 20)
+    assert rpc_server.posts_of("eth_getBalance") == 1
+
+
+def test_reads_are_retried_after_their_method_timeout(rpc_server):
+    session = create_session()
+    w3 = Web3(PooledHTTPProvider(rpc_server.url, session, method_timeouts={"eth_chainId": 0.1}))
+    rpc_server.faults = ["slow"]
+
+    assert w3.eth.chain_id == 5545
+    assert rpc_server.posts_of("eth_chainId") == 2
+    session.close()
+
+
+@pytest.mark.parametrize("fault", ["reset", 502, 503])
+def test_send_raw_transaction_is_never_retried(rpc_server, rpc_w3, fault):
+    rpc_server.faults = [fault]
+
+    with pytest.raises(requests.RequestException):
+        rpc_w3.eth.send_raw_transaction("0x02f86b")
+    assert rpc_server.posts_of("eth_sendRawTransaction") == 1
+
+
+def test_send_raw_transaction_is_not_retried_after_timeout(rpc_server):
+    session = create_session()
+    w3 = Web3(PooledHTTPProvider(rpc_server.url, session, method_timeouts={"eth_sendRawTransaction": 0.1}))
+    rpc_server.faults = ["slow"]
+
+    with pytest.raises(requests.Timeout):
+        w3.eth.send_raw_transaction("0x02f86b")
+    assert rpc_server.posts_of("eth_sendRawTransaction") == 1
+    session.close()
+
+
+def test_batch_with_send_raw_transaction_is_not_reposted_after_reset(rpc_server, rpc_w3):
+    rpc_server.faults = ["reset"]
+    calls = [("eth_blockNumber", []), ("eth_sendRawTransaction", ["0x02f86b"]), ("eth_chainId", [])]
+
+    with pytest.raises(requests.ConnectionError):
+        batch_rpc_request(rpc_w3, calls)
+    assert len(rpc_server.requests) == 1
+    assert rpc_server.posts_of("eth_sendRawTransaction") == 1
+
+
+def test_batch_of_reads_is_retried_after_reset(rpc_server, rpc_w3):
+    rpc_server.faults = ["reset"]
+    calls = [("eth_blockNumber", []), ("eth_chainId", [])]
+
+    assert batch_rpc_request(rpc_w3, calls) == [hex(100), hex(5545)]
+    assert len(rpc_server.requests) == 2
+
+
+def test_batch_with_send_raw_transaction_succeeds_in_one_post(rpc_server, rpc_w3):
+    calls = [("eth_sendRawTransaction", ["0x02f86b"]), ("eth_blockNumber", [])]
+
+    assert batch_rpc_request(rpc_w3, calls) == [TX_HASH, hex(100)]
+    assert len(rpc_server.requests) == 1
@@ -0,0 +1,105 @@
+"""Filters for paging through a user's transfer history.
+
+Filters are validated once into a plain dict and then applied to each
+transfer as it is decoded, so a page is complete as soon as enough matches
+have been found.
+"""
+
+from web3 import Web3
+
+from .amounts import format_ton, parse_ton
+
+# Contract status codes and their names in tool output
+TRANSFER_STATUS_NAMES = {0: "Pending", 1: "Completed", 2: "Cancelled"}
+TRANSFER_STATUS_CODES = {name.lower(): code for code, name in TRANSFER_STATUS_NAMES.items()}
+
+# Accepted direction filters, relative to the user whose history is read
+DIRECTIONS = ("sent", "received")
+
+
+def _parse_amount_wei(amount_ton, name: str):
+    if amount_ton is None or str(amount_ton).strip() == "":
+        return None
+    try:
+        return parse_ton(amount_ton)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: '{amount_ton}'") from None
+
+
+def build_transfer_filters(status=None, direction=None, start_time=None, end_time=None,
+                           min_amount_ton=None, max_amount_ton=None) -> dict:
+    """Validate filter arguments into a filter dict (only the filters that are set).
+
+    Args:
+        status (str): "Pending", "Completed" or "Cancelled" (case-insensitive)
+        direction (str): "sent" or "received"
+        start_time (int): Earliest transfer timestamp (unix seconds, inclusive)
+        end_time (int): Latest transfer timestamp (unix seconds, inclusive)
+        min_amount_ton (str): Smallest amount in TON (inclusive)
+        max_amount_ton (str): Largest amount in TON (inclusive)
+
+    Returns:
+        dict: status (code), direction, start_time, end_time, min_amount_wei, max_amount_wei
+    """
+    filters = {}
+    if status:
+        if status.strip().lower() not in TRANSFER_STATUS_CODES:
+            raise ValueError(f"Invalid status '{status}'. Use Pending, Completed or Cancelled.")
+        filters["status"] = TRANSFER_STATUS_CODES[status.strip().lower()]
+    if direction:
+        if direction.strip().lower() not in DIRECTIONS:
+            raise ValueError(f"Invalid direction '{direction}'. Use sent or received.")
+        filters["direction"] = direction.strip().lower()
+    if start_time is not None:
+        filters["start_time"] = int(start_time)
+    if end_time is not None:
+        filters["end_time"] = int(end_time)
+
+    min_amount_wei = _parse_amount_wei(min_amount_ton, "min_amount_ton")
+    if min_amount_wei is not None:
+        filters["min_amount_wei"] = min_amount_wei
+    max_amount_wei = _parse_amount_wei(max_amount_ton, "max_amount_ton")
+    if max_amount_wei is not None:
+        filters["max_amount_wei"] = max_amount_wei
+    return filters
+
+
+def transfer_matches(user_address: str, sender: str, recipient: str, amount_wei: int, timestamp: int,
+                     status: int, filters: dict) -> bool:
+    """Whether a decoded transfer passes every filter."""
+    if not filters:
+        return True
+    if "status" in filters and status != filters["status"]:
+        return False
+    if "direction" in filters:
+        user_address = Web3.to_checksum_address(user_address)
+        party = sender if filters["direction"] == "sent" else recipient
+        if Web3.to_checksum_address(party) != user_address:
+            return False
+    if "start_time" in filters and timestamp < filters["start_time"]:
+        return False
+    if "end_time" in filters and timestamp > filters["end_time"]:
+        return False
+    if "min_amount_wei" in filters and amount_wei < filters["min_amount_wei"]:
+        return False
+    if "max_amount_wei" in filters and amount_wei > filters["max_amount_wei"]:
+        return False
+    return True
+
+
+def describe_filters(filters: dict) -> str:
+    """Short human-readable summary of active filters (empty if none)."""
+    parts = []
+    if "status" in filters:
+        parts.append(f"status {TRANSFER_STATUS_NAMES[filters['status']]}")
+    if "direction" in filters:
+        parts.append(filters["direction"])
+    if "start_time" in filters:
+        parts.append(f"from {filters['start_time']}")
+    if "end_time" in filters:
+        parts.append(f"until {filters['end_time']}")
+    if "min_amount_wei" in filters:
+        parts.append(f"at least {format_ton(filters['min_amount_wei'])} TON")
+    if "max_amount_wei" in filters:
+        parts.append(f"at most {format_ton(filters['max_amount_wei'])} TON")
+    return ", ".join(parts)
@@ -0,0 +1,264 @@
+"""Shared HTTP transport for RPC and price API calls.
+
+One pooled keep-alive requests.Session is shared by the Web3 provider and the
+Coinbase price fetch (and one aiohttp session per event loop by the async
+tools). Idempotent reads are retried with jittered exponential backoff;
+transaction submission is never retried.
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+
+# Number of keep-alive connections kept open per host
+DEFAULT_POOL_SIZE = 20
+
+# Attempts for idempotent reads (first try included)
+DEFAULT_MAX_ATTEMPTS = 4
+
+# Backoff for retry n is a random delay in [0, min(BACKOFF_MAX, BACKOFF_BASE * 2**n)] seconds
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+
+# Request timeout (seconds) per JSON-RPC method, DEFAULT_TIMEOUT for anything else
+DEFAULT_TIMEOUT = 10
+METHOD_TIMEOUTS = {
+    "eth_blockNumber": 5,
+    "eth_chainId": 5,
+    "eth_gasPrice": 5,
+    "eth_getBalance": 5,
+    "eth_getTransactionCount": 5,
+    "eth_getCode": 5,
+    "eth_call": 10,
+    "eth_estimateGas": 10,
+    "eth_getTransactionReceipt": 10,
+    "eth_getBlockByNumber": 10,
+    "eth_getLogs": 30,
+    "eth_sendRawTransaction": 30,
+}
+
+# JSON-RPC methods that are safe to send again after a failure
+IDEMPOTENT_METHODS = frozenset({
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_estimateGas",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByHash",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getLogs",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_maxPriorityFeePerGas",
+    "eth_feeHistory",
+    "net_version",
+    "web3_clientVersion",
+})
+
+# HTTP status codes worth retrying (rate limiting and gateway errors)
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Create a keep-alive session with a connection pool of the given size.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+
+    Returns:
+        requests.Session: session to share between all HTTP clients
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff delay for the given retry attempt (0-based)."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def create_async_session(pool_size: int = DEFAULT_POOL_SIZE) -> aiohttp.ClientSession:
+    """Create a keep-alive aiohttp session (must be called inside the event loop that will use it).
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host
+
+    Returns:
+        aiohttp.ClientSession: session to share between all async HTTP clients on this loop
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=pool_size)
+    return aiohttp.ClientSession(connector=connector, raise_for_status=True)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether an HTTP error is transient and the request may be retried."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUS_CODES
+    return False
+
+
+def request_with_retries(send, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> requests.Response:
+    """Call ``send()`` until it returns a successful response or attempts run out.
+
+    Args:
+        send: Callable performing one HTTP request and returning a Response
+        max_attempts (int): Total number of attempts
+
+    Returns:
+        requests.Response: the first successful response
+    """
+    for attempt in range(max_attempts):
+        try:
+            response = send()
+            response.raise_for_status()
+            return response
+        except Exception as e:
+            if attempt == max_attempts - 1 or not is_retryable_error(e):
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+def http_get_json(session: requests.Session, url: str, timeout: float = DEFAULT_TIMEOUT,
+                  max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict:
+    """GET a JSON document through the shared session, retrying transient failures.
+
+    Args:
+        session (requests.Session): Shared session
+        url (str): URL to fetch
+        timeout (float): Request timeout in seconds
+        max_attempts (int): Total number of attempts
+
+    Returns:
+        dict: decoded JSON body
+    """
+    response = request_with_retries(lambda: session.get(url, timeout=timeout), max_attempts)
+    return response.json()
+
+
+async def async_http_get_json(session: aiohttp.ClientSession, url: str, timeout: float = DEFAULT_TIMEOUT,
+                              max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict:
+    """Async GET of a JSON document through a shared aiohttp session, retrying transient failures.
+
+    Args:
+        session (aiohttp.ClientSession): Shared session (see create_async_session)
+        url (str): URL to fetch
+        timeout (float): Request timeout in seconds
+        max_attempts (int): Total number of attempts
+
+    Returns:
+        dict: decoded JSON body
+    """
+    for attempt in range(max_attempts):
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout), raise_for_status=True) as response:
+                return await response.json(content_type=None)
+        except Exception as e:
+            if attempt == max_attempts - 1 or not is_retryable_error(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTPProvider using a shared pooled session, per-method timeouts and retried reads."""
+
+    def __init__(self, endpoint_uri: str, session: requests.Session, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 method_timeouts: dict = None, **kwargs):
+        """Create the provider.
+
+        Args:
+            endpoint_uri (str): JSON-RPC endpoint URL
+            session (requests.Session): Shared pooled session
+            max_attempts (int): Total attempts for idempotent methods
+            method_timeouts (dict): Per-method timeout overrides in seconds
+        """
+        # Retries are handled here, disable web3's own fixed-delay retry loop
+        super().__init__(endpoint_uri, session=session, exception_retry_configuration=None, **kwargs)
+        self.session = session
+        self.max_attempts = max_attempts
+        self.method_timeouts = {**METHOD_TIMEOUTS, **(method_timeouts or {})}
+
+    def _post(self, methods: list, request_data: bytes) -> bytes:
+        """POST one JSON-RPC request body (a single call or a batch) and return the raw response."""
+        request_kwargs = self.get_request_kwargs()
+        request_kwargs["timeout"] = max(self.method_timeouts.get(method, DEFAULT_TIMEOUT) for method in methods)
+        all_idempotent = all(method in IDEMPOTENT_METHODS for method in methods)
+
+        response = request_with_retries(
+            lambda: self.session.post(self.endpoint_uri, data=request_data, **request_kwargs),
+            self.max_attempts if all_idempotent else 1
+        )
+        return response.content
+
+    def _make_request(self, method, request_data: bytes) -> bytes:
+        return self._post([method], request_data)
+
+    def make_batch_request(self, batch_requests: list):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        response_content = self._post([method for method, _ in batch_requests], request_data)
+        responses = json.loads(response_content)
+        if not isinstance(responses, list):
+            # RPC errors return only one response with the error object
+            return responses
+        return sorted(responses, key=lambda rpc_response: int(rpc_response["id"]))
+
+
+def batch_rpc_request(w3, calls: list) -> list:
+    """Send raw JSON-RPC calls as a single batch request.
+
+    Results are returned unformatted, exactly as the node sent them (hex
+    strings for quantities). Raises if the provider cannot batch, so callers
+    can fall back to individual requests.
+
+    Args:
+        w3: Web3 instance whose provider sends the batch
+        calls (list): (method, params) tuples
+
+    Returns:
+        list: result per call, or an Exception for calls the node answered with an error
+    """
+    if not calls:
+        return []
+    return _batch_results(w3.provider.make_batch_request(calls), calls)
+
+
+async def async_batch_rpc_request(async_w3, calls: list) -> list:
+    """Async version of batch_rpc_request for an AsyncWeb3 instance."""
+    if not calls:
+        return []
+    return _batch_results(await async_w3.provider.make_batch_request(calls), calls)
+
+
+def _batch_results(responses, calls: list) -> list:
+    if not isinstance(responses, list):
+        raise ValueError(f"Batch request failed: {responses.get('error', responses)}")
+    if len(responses) != len(calls):
+        raise ValueError(f"Batch request returned {len(responses)} responses for {len(calls)} calls")
+    return [
+        ValueError(rpc_response["error"]) if "error" in rpc_response else rpc_response.get("result")
+        for rpc_response in responses
+    ]
+
+
+def to_int(value) -> int:
+    """Convert a JSON-RPC quantity (hex string) or already formatted integer to int."""
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value)
@@ -0,0 +1,234 @@
+"""Receipt tracking for transactions submitted without waiting for confirmation.
+
+Submitted transactions are registered under their hash. A background poller
+fetches receipts for all pending transactions in batched JSON-RPC requests and
+resolves each one as confirmed or failed.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from web3.exceptions import TransactionNotFound
+
+from .instrumentation import metrics
+from .transport import batch_rpc_request, to_int
+
+logger = logging.getLogger(__name__)
+
+# Seconds between receipt polling rounds
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Maximum receipts requested in one JSON-RPC batch
+DEFAULT_BATCH_SIZE = 50
+
+# Seconds after which a transaction without a receipt is considered dropped
+DEFAULT_TIMEOUT = 600
+
+# Resolved records kept for status queries
+MAX_RESOLVED_RECORDS = 1000
+
+STATUS_PENDING = "pending"
+STATUS_CONFIRMED = "confirmed"
+STATUS_FAILED = "failed"
+
+
+def normalize_tx_hash(tx_hash) -> str:
+    """Lowercase 0x-prefixed hex form of a transaction hash (bytes or str)."""
+    if isinstance(tx_hash, (bytes, bytearray)):
+        return "0x" + bytes(tx_hash).hex()
+    tx_hash = tx_hash.strip().lower()
+    return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+
+class TransactionTracker:
+    """Registry of submitted transactions resolved by a background receipt poller."""
+
+    def __init__(self, w3, poll_interval: float = DEFAULT_POLL_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """Create the tracker (the poller starts with the first tracked transaction).
+
+        Args:
+            w3: Web3 instance used to fetch receipts
+            poll_interval (float): Seconds between polling rounds
+            batch_size (int): Maximum receipts per batched request
+            timeout (float): Seconds before an unmined transaction is marked failed
+        """
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+        self._pending = OrderedDict()  # tx hash -> record
+        self._resolved = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._poller = None
+        self._listeners = []
+
+    def add_listener(self, listener) -> None:
+        """Register a callable invoked with each record when it is resolved."""
+        self._listeners.append(listener)
+
+    def track(self, tx_hash, **metadata) -> str:
+        """Start tracking a submitted transaction.
+
+        Args:
+            tx_hash: Transaction hash (bytes or hex string)
+            **metadata: Extra fields stored with the record (sender, nonce, function, ...)
+
+        Returns:
+            str: tracking ID (the transaction hash as hex)
+        """
+        tracking_id = normalize_tx_hash(tx_hash)
+        with self._lock:
+            self._pending[tracking_id] = {
+                **metadata,
+                "tracking_id": tracking_id,
+                "transaction_hash": tracking_id,
+                "status": STATUS_PENDING,
+                "submitted_at": time.time()
+            }
+            self._ensure_poller()
+        return tracking_id
+
+    def get(self, tracking_id: str):
+        """Current record for a tracking ID, or None if it is not tracked."""
+        tracking_id = normalize_tx_hash(tracking_id)
+        with self._lock:
+            record = self._pending.get(tracking_id) or self._resolved.get(tracking_id)
+            return dict(record) if record is not None else None
+
+    def pending_records(self, **metadata) -> list:
+        """Records still waiting for a receipt whose metadata matches every given field.
+
+        Args:
+            **metadata: Fields to match (e.g. from_address, function_name)
+
+        Returns:
+            list: copies of the matching records
+        """
+        with self._lock:
+            return [
+                dict(record) for record in self._pending.values()
+                if all(record.get(key) == value for key, value in metadata.items())
+            ]
+
+    def pending_count(self) -> int:
+        """Number of transactions still waiting for a receipt."""
+        with self._lock:
+            return len(self._pending)
+
+    def wait(self, tracking_id: str, timeout: float = None):
+        """Block until a tracked transaction is resolved.
+
+        Args:
+            tracking_id (str): Tracking ID returned by track()
+            timeout (float): Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            dict: the record (still pending if the wait timed out)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            record = self.get(tracking_id)
+            if record is None or record["status"] != STATUS_PENDING:
+                return record
+            if deadline is not None and time.monotonic() >= deadline:
+                return record
+            self._wake_event.set()
+            time.sleep(min(self.poll_interval, 0.5))
+
+    def _ensure_poller(self) -> None:
+        if self._poller is None or not self._poller.is_alive():
+            self._poller = threading.Thread(target=self._poll_loop, name="receipt-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self) -> None:
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._poller = None
+                    return
+                tracking_ids = list(self._pending)
+            try:
+                self.poll_once(tracking_ids)
+            except Exception as poll_error:
+                logger.warning("Receipt polling failed: %s", poll_error)
+                metrics.record_event("receipt_poll", "failed")
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+
+    def poll_once(self, tracking_ids: list = None) -> int:
+        """Fetch receipts for pending transactions and resolve the ones that were mined.
+
+        Args:
+            tracking_ids (list): Subset of pending tracking IDs (all pending by default)
+
+        Returns:
+            int: number of transactions resolved in this round
+        """
+        if tracking_ids is None:
+            with self._lock:
+                tracking_ids = list(self._pending)
+
+        resolved = 0
+        for start in range(0, len(tracking_ids), self.batch_size):
+            chunk = tracking_ids[start:start + self.batch_size]
+            receipts = self._fetch_receipts(chunk)
+            now = time.time()
+            for tracking_id, receipt in zip(chunk, receipts):
+                if isinstance(receipt, Exception):
+                    continue
+                if receipt is not None:
+                    status = STATUS_CONFIRMED if to_int(receipt["status"]) == 1 else STATUS_FAILED
+                    self._resolve(tracking_id, {
+                        "status": status,
+                        "block_number": to_int(receipt["blockNumber"]),
+                        "gas_used": to_int(receipt["gasUsed"]),
+                        "error_message": None if status == STATUS_CONFIRMED else "Transaction reverted"
+                    })
+                    resolved += 1
+                else:
+                    with self._lock:
+                        record = self._pending.get(tracking_id)
+                    if record is not None and now - record["submitted_at"] > self.timeout:
+                        self._resolve(tracking_id, {
+                            "status": STATUS_FAILED,
+                            "dropped": True,
+                            "error_message": f"Transaction was not mined within {self.timeout} seconds and may have been dropped"
+                        })
+                        resolved += 1
+        return resolved
+
+    def _fetch_receipts(self, tracking_ids: list) -> list:
+        """Receipts (or None if not mined yet) for the given hashes, batched when the provider allows."""
+        try:
+            return batch_rpc_request(self.w3, [("eth_getTransactionReceipt", [tracking_id]) for tracking_id in tracking_ids])
+        except Exception:
+            receipts = []
+            for tracking_id in tracking_ids:
+                try:
+                    receipts.append(self.w3.eth.get_transaction_receipt(tracking_id))
+                except TransactionNotFound:
+                    receipts.append(None)
+                except Exception as receipt_error:
+                    receipts.append(receipt_error)
+            return receipts
+
+    def _resolve(self, tracking_id: str, updates: dict) -> None:
+        with self._lock:
+            record = self._pending.pop(tracking_id, None)
+            if record is None:
+                return
+            record.update(updates)
+            record["resolved_at"] = time.time()
+            self._resolved[tracking_id] = record
+            while len(self._resolved) > MAX_RESOLVED_RECORDS:
+                self._resolved.popitem(last=False)
+        for listener in self._listeners:
+            try:
+                listener(dict(record))
+            except Exception as listener_error:
+                logger.warning("Transaction listener failed: %s", listener_error)
@@ -0,0 +1,294 @@
+"""Bidirectional username <-> address cache for ProtectedPay lookups.
+
+Answers for getUserByUsername / usernameToAddress (username -> address) and
+getUserByAddress (address -> username) are kept in bounded LRU maps, including
+negative answers for unregistered names and addresses. Entries never expire on
+a timer; instead the cache follows the contract's UserRegistered logs and drops
+the entries a registration affects.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from hexbytes import HexBytes
+
+from .instrumentation import metrics
+from .multicall import MULTICALL3_ADDRESS, DEFAULT_CHUNK_SIZE, batch_call
+
+logger = logging.getLogger(__name__)
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Maximum entries kept in each direction
+DEFAULT_MAX_ENTRIES = 10000
+
+# Minimum seconds between UserRegistered log polls
+DEFAULT_SYNC_INTERVAL = 5.0
+
+# Largest block range scanned in one eth_getLogs call; larger gaps clear the cache instead
+MAX_SYNC_RANGE = 5000
+
+
+class UsernameCache:
+    """LRU cache of username registrations invalidated by UserRegistered logs."""
+
+    def __init__(self, w3, contract, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 sync_interval: float = DEFAULT_SYNC_INTERVAL):
+        """Create the cache.
+
+        Args:
+            w3: Web3 instance used for lookups and log polling
+            contract: ProtectedPay contract instance
+            max_entries (int): Maximum entries per direction
+            sync_interval (float): Minimum seconds between log polls
+        """
+        self.w3 = w3
+        self.contract = contract
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._addresses = OrderedDict()  # username -> address, or None if unregistered
+        self._usernames = OrderedDict()  # checksummed address -> username, or None if unregistered
+        self._last_block = None
+        self._last_sync = 0.0
+        self._generation = 0  # bumped on every invalidation, so reads racing a registration are not cached
+        self._lock = threading.RLock()
+
+    def _get(self, entries: OrderedDict, key):
+        """(found, value) for a key, counting the hit and refreshing its LRU position."""
+        with self._lock:
+            if key not in entries:
+                self.misses += 1
+                return False, None
+            entries.move_to_end(key)
+            value = entries[key]
+            if value is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, value
+
+    def _put(self, entries: OrderedDict, key, value, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def lookup_address(self, username: str):
+        """Address registered for ``username``, or None if it is not registered."""
+        self.sync()
+        found, address = self._get(self._addresses, username)
+        if found:
+            return address
+        generation = self._generation
+        address = self.contract.functions.getUserByUsername(username).call()
+        address = None if address == ZERO_ADDRESS else address
+        self._put(self._addresses, username, address, generation)
+        return address
+
+    def lookup_username(self, address: str):
+        """Username registered for ``address``, or None if it has none."""
+        self.sync()
+        address = self.w3.to_checksum_address(address)
+        found, username = self._get(self._usernames, address)
+        if found:
+            return username
+        generation = self._generation
+        username = self.contract.functions.getUserByAddress(address).call() or None
+        self._put(self._usernames, address, username, generation)
+        return username
+
+    def resolve_usernames(self, usernames, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          multicall_address: str = MULTICALL3_ADDRESS) -> dict:
+        """Resolve many usernames, fetching all cache misses in one batched call.
+
+        Args:
+            usernames: Usernames to resolve
+            chunk_size (int): Maximum calls per aggregated request
+            multicall_address (str): Multicall3 deployment used for batching
+
+        Returns:
+            dict: username -> address, or None for unregistered (or unresolvable) names
+        """
+        self.sync()
+        resolved = {}
+        missing = []
+        for username in dict.fromkeys(usernames):
+            found, address = self._get(self._addresses, username)
+            if found:
+                resolved[username] = address
+            else:
+                missing.append(username)
+
+        if missing:
+            generation = self._generation
+            results = batch_call(
+                self.w3,
+                [self.contract.functions.getUserByUsername(username) for username in missing],
+                chunk_size=chunk_size,
+                multicall_address=multicall_address
+            )
+            for username, (success, address) in zip(missing, results):
+                if not success:
+                    resolved[username] = None
+                    continue
+                address = None if address == ZERO_ADDRESS else address
+                resolved[username] = address
+                self._put(self._addresses, username, address, generation)
+        return resolved
+
+    def invalidate(self, username: str = None, address: str = None) -> None:
+        """Drop the entries for a username and/or address (both directions)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if username is not None:
+                self._addresses.pop(username, None)
+            if address is not None:
+                address = self.w3.to_checksum_address(address)
+                self._usernames.pop(address, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._addresses.clear()
+            self._usernames.clear()
+
+    def apply_registration(self, event_data) -> None:
+        """Invalidate the entries touched by a decoded UserRegistered event."""
+        args = event_data["args"]
+        self.invalidate(username=args["username"], address=args["userAddress"])
+
+    def _claim_sync(self, force: bool) -> bool:
+        """Whether a log poll is due now (marks it as started)."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_sync < self.sync_interval:
+                return False
+            self._last_sync = now
+            return True
+
+    def _sync_start(self, head: int):
+        """First block to poll up to ``head``, or None if there is nothing to poll."""
+        with self._lock:
+            if self._last_block is None or head - self._last_block > MAX_SYNC_RANGE:
+                # Nothing is known about the gap, start from an empty cache at the head
+                self.clear()
+                self._last_block = head
+                return None
+            if head <= self._last_block:
+                return None
+            return self._last_block + 1
+
+    def _sync_filter(self, event, from_block: int, head: int) -> dict:
+        return {
+            "address": self.contract.address,
+            "fromBlock": from_block,
+            "toBlock": head,
+            "topics": [HexBytes(event.topic).to_0x_hex()]
+        }
+
+    def _sync_failed(self, logs_error: Exception) -> None:
+        # Registrations in the gap are unknown, so no entry can be trusted
+        logger.warning("UserRegistered log poll failed: %s, clearing username cache", logs_error)
+        metrics.record_event("username_cache_sync", "failed")
+        with self._lock:
+            self.clear()
+            self._last_block = None
+
+    def _sync_apply(self, event, logs: list, head: int) -> int:
+        with self._lock:
+            for log in logs:
+                self.apply_registration(event.process_log(log))
+            self._last_block = max(self._last_block or head, head)
+        return len(logs)
+
+    def sync(self, force: bool = False) -> int:
+        """Apply UserRegistered logs mined since the last poll (at most every sync_interval seconds).
+
+        Args:
+            force (bool): Poll even if the interval has not passed
+
+        Returns:
+            int: number of registrations applied
+        """
+        if not self._claim_sync(force):
+            return 0
+        head = self.w3.eth.block_number
+        from_block = self._sync_start(head)
+        if from_block is None:
+            return 0
+
+        event = self.contract.events.UserRegistered()
+        try:
+            logs = self.w3.eth.get_logs(self._sync_filter(event, from_block, head))
+        except Exception as logs_error:
+            self._sync_failed(logs_error)
+            return 0
+        return self._sync_apply(event, logs, head)
+
+    async def sync_async(self, async_w3, force: bool = False) -> int:
+        """Async version of sync() polling through an AsyncWeb3 instance."""
+        if not self._claim_sync(force):
+            return 0
+        head = await async_w3.eth.block_number
+        from_block = self._sync_start(head)
+        if from_block is None:
+            return 0
+
+        event = self.contract.events.UserRegistered()
+        try:
+            logs = await async_w3.eth.get_logs(self._sync_filter(event, from_block, head))
+        except Exception as logs_error:
+            self._sync_failed(logs_error)
+            return 0
+        return self._sync_apply(event, logs, head)
+
+    async def lookup_address_async(self, async_w3, async_contract, username: str):
+        """Async version of lookup_address() reading through an AsyncWeb3 contract."""
+        await self.sync_async(async_w3)
+        found, address = self._get(self._addresses, username)
+        if found:
+            return address
+        generation = self._generation
+        address = await async_contract.functions.getUserByUsername(username).call()
+        address = None if address == ZERO_ADDRESS else address
+        self._put(self._addresses, username, address, generation)
+        return address
+
+    async def lookup_username_async(self, async_w3, async_contract, address: str):
+        """Async version of lookup_username() reading through an AsyncWeb3 contract."""
+        await self.sync_async(async_w3)
+        address = self.w3.to_checksum_address(address)
+        found, username = self._get(self._usernames, address)
+        if found:
+            return username
+        generation = self._generation
+        username = await async_contract.functions.getUserByAddress(address).call() or None
+        self._put(self._usernames, address, username, generation)
+        return username
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                "usernames": len(self._addresses),
+                "addresses": len(self._usernames)
+            }